@@ -0,0 +1,108 @@
+"""Measures the CPU cost and the bytes saved by ``COMPRESS=DEFLATE`` at each
+compression level, using the responses the server sends for a typical mail
+client session against the dict plugin demo data.
+
+Usage::
+
+    $ python bench/compress.py --repeat 200
+
+"""
+
+import asyncio
+import time
+import zlib
+from argparse import ArgumentParser, Namespace
+from typing import List, Sequence, Tuple
+
+from pymap.backend.dict import DictBackend
+
+_SESSION = [b'login1 LOGIN demouser demopass',
+            b'list1 LIST "" *']
+_MAILBOX = [b'select1 SELECT %b',
+            b'fetch1 FETCH 1:* (FLAGS INTERNALDATE RFC822.SIZE ENVELOPE '
+            b'BODYSTRUCTURE BODY.PEEK[HEADER.FIELDS (FROM TO SUBJECT DATE)])',
+            b'fetch2 FETCH 1:* (BODY.PEEK[HEADER] BODY.PEEK[TEXT])',
+            b'fetch3 FETCH 1:* (BODY.PEEK[])',
+            b'search1 SEARCH ALL']
+_MAILBOXES = [b'INBOX', b'Sent', b'Trash']
+
+
+class _Writer:
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.buffered: List[bytes] = []
+        self.responses: List[bytes] = []
+
+    def write(self, data: bytes) -> None:
+        self.buffered.append(bytes(data))
+
+    def writelines(self, data: Sequence[bytes]) -> None:
+        for chunk in data:
+            self.write(chunk)
+
+    async def drain(self) -> None:
+        self.responses.append(b''.join(self.buffered))
+        self.buffered.clear()
+
+    def get_extra_info(self, name: str) -> str:
+        return 'bench'
+
+    def close(self) -> None:
+        pass
+
+
+async def _capture() -> Sequence[bytes]:
+    args = Namespace(debug=False, insecure_login=True, cert=None, key=None,
+                     text_index=False, demo_data=True, demo_user='demouser',
+                     demo_password='demopass')
+    backend = await DictBackend.init(args)
+    lines = list(_SESSION)
+    for name in _MAILBOXES:
+        lines.extend(line.replace(b'%b', name) for line in _MAILBOX)
+    lines.append(b'logout1 LOGOUT')
+    reader = asyncio.StreamReader()
+    reader.feed_data(b''.join(line + b'\r\n' for line in lines))
+    reader.feed_eof()
+    writer = _Writer()
+    await backend(reader, writer)  # type: ignore
+    return writer.responses
+
+
+def _compress(responses: Sequence[bytes], level: int, repeat: int) \
+        -> Tuple[int, float]:
+    total = 0
+    start = time.process_time()
+    for _ in range(repeat):
+        compress = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        total = 0
+        for resp in responses:
+            total += len(compress.compress(resp))
+            total += len(compress.flush(zlib.Z_SYNC_FLUSH))
+    elapsed = time.process_time() - start
+    return total, elapsed / repeat
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=100,
+                        help='compress the session this many times')
+    parser.add_argument('--level', type=int, action='append',
+                        help='the compression levels to measure')
+    args = parser.parse_args()
+    levels = args.level or list(range(0, 10))
+    responses = asyncio.run(_capture())
+    raw = sum(len(resp) for resp in responses)
+    print(f'{len(responses)} responses, {raw} bytes uncompressed')
+    print(f'{"level":>5} {"bytes":>9} {"saved":>7} {"usec":>9} '
+          f'{"MB/s":>8}')
+    for level in levels:
+        total, elapsed = _compress(responses, level, args.repeat)
+        saved = 100.0 * (raw - total) / raw
+        rate = raw / elapsed / 1e6 if elapsed else float('inf')
+        print(f'{level:>5} {total:>9} {saved:>6.1f}% '
+              f'{elapsed * 1e6:>9.1f} {rate:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
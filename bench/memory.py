@@ -0,0 +1,81 @@
+"""Measures the memory used to track the messages of a selected mailbox, for
+many sessions that have each selected a large mailbox.
+
+Usage::
+
+    $ python bench/memory.py --messages 1000000 --sessions 100 [--shared]
+
+With ``--shared``, the sessions select the mailbox through the same
+:class:`~pymap.selected.SelectedSet`, as they would in a server, and only the
+first session is given every message.
+
+"""
+
+import random
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence
+
+from pymap.flags import PermanentFlags, SessionFlags
+from pymap.message import BaseMessage
+from pymap.parsing.specials.flag import Flag, Answered, Deleted, Flagged, \
+    Seen
+from pymap.parsing.command.select import SearchCommand
+from pymap.selected import SelectedSet, SelectedMailbox
+
+_FLAG_SETS = [[], [Seen], [Seen], [Seen, Answered], [Seen, Flagged],
+              [Deleted], [Seen, Flag(b'$Forwarded')]]
+
+
+def _build(count: int) -> Sequence[BaseMessage]:
+    rand = random.Random(0)
+    start = datetime(2020, 1, 1, tzinfo=timezone(timedelta(hours=-5)))
+    return [BaseMessage(uid, rand.choice(_FLAG_SETS),
+                        start + timedelta(seconds=uid * 37))
+            for uid in range(1, count + 1)]
+
+
+def _select(messages: Sequence[BaseMessage],
+            selected_set: Optional[SelectedSet]) -> SelectedMailbox:
+    selected = SelectedMailbox('INBOX', False, PermanentFlags([]),
+                               SessionFlags([]), selected_set=selected_set)
+    selected.uid_validity = 1
+    if selected.mod_sequence is None:
+        selected.mod_sequence = 1
+        selected.add_updates(messages, [])
+    selected, _ = selected.fork(SearchCommand(b'.', [], None))
+    return selected
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--messages', type=int, default=1000000,
+                        help='the number of messages in the mailbox')
+    parser.add_argument('--sessions', type=int, default=100,
+                        help='the number of sessions selecting the mailbox')
+    parser.add_argument('--shared', action='store_true',
+                        help='the sessions share a selected set')
+    args = parser.parse_args()
+    messages = _build(args.messages)
+    selected_set = SelectedSet() if args.shared else None
+    sessions: List[SelectedMailbox] = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(args.sessions):
+        sessions.append(_select(messages, selected_set))
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_session = current / len(sessions)
+    print(f'{args.sessions} sessions of {args.messages} messages '
+          f'in {elapsed:.1f}s')
+    print(f'{current / 2 ** 20:>10.1f} MiB total, '
+          f'{peak / 2 ** 20:.1f} MiB peak')
+    print(f'{per_session / 2 ** 20:>10.1f} MiB per session')
+    print(f'{per_session / args.messages:>10.1f} bytes per message')
+
+
+if __name__ == '__main__':
+    main()
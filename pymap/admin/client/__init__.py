@@ -10,6 +10,7 @@ from grpclib.client import Channel  # type: ignore
 from pymap.core import __version__
 
 from .append import AppendCommand
+from .stats import StatsCommand
 from .command import ClientCommand
 from ..grpc.admin_grpc import AdminStub
 
@@ -35,7 +36,8 @@ def main() -> None:
 
     subparsers = parser.add_subparsers(dest='command',
                                        help='which admin command to run')
-    commands = dict([AppendCommand.init(parser, subparsers)])
+    commands = dict([AppendCommand.init(parser, subparsers),
+                     StatsCommand.init(parser, subparsers)])
     args = parser.parse_args()
 
     if not args.command:
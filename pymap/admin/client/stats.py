@@ -0,0 +1,23 @@
+"""Show the metrics collected for each command executed by the server."""
+
+from argparse import ArgumentParser, Namespace
+from typing import Tuple
+
+from .command import ClientCommand
+from ..grpc.admin_grpc import AdminStub
+from ..grpc.admin_pb2 import StatsRequest, StatsResponse
+
+
+class StatsCommand(ClientCommand):
+
+    @classmethod
+    def init(cls, parser: ArgumentParser, subparsers) \
+            -> Tuple[str, 'StatsCommand']:
+        subparsers.add_parser(
+            'stats', description=__doc__,
+            help='show command metrics')
+        return 'stats', cls()
+
+    async def run(self, stub: AdminStub, args: Namespace) -> StatsResponse:
+        req = StatsRequest()
+        return await stub.Stats(req)
@@ -15,6 +15,10 @@ class AdminBase(abc.ABC):
     async def Append(self, stream):
         pass
 
+    @abc.abstractmethod
+    async def Stats(self, stream):
+        pass
+
     def __mapping__(self):
         return {
             '/admin.Admin/Append': grpclib.const.Handler(
@@ -23,6 +27,12 @@ class AdminBase(abc.ABC):
                 pymap.admin.grpc.admin_pb2.AppendRequest,
                 pymap.admin.grpc.admin_pb2.AppendResponse,
             ),
+            '/admin.Admin/Stats': grpclib.const.Handler(
+                self.Stats,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                pymap.admin.grpc.admin_pb2.StatsRequest,
+                pymap.admin.grpc.admin_pb2.StatsResponse,
+            ),
         }
 
 
@@ -35,3 +45,9 @@ class AdminStub:
             pymap.admin.grpc.admin_pb2.AppendRequest,
             pymap.admin.grpc.admin_pb2.AppendResponse,
         )
+        self.Stats = grpclib.client.UnaryUnaryMethod(
+            channel,
+            '/admin.Admin/Stats',
+            pymap.admin.grpc.admin_pb2.StatsRequest,
+            pymap.admin.grpc.admin_pb2.StatsResponse,
+        )
@@ -1,12 +1,10 @@
+# -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # source: pymap/admin/grpc/admin.proto
-
-import sys
-_b=sys.version_info[0]<3 and (lambda x:x) or (lambda x:x.encode('latin1'))
-from google.protobuf.internal import enum_type_wrapper
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
 from google.protobuf import descriptor as _descriptor
-from google.protobuf import message as _message
-from google.protobuf import reflection as _reflection
+from google.protobuf import descriptor_pool as _descriptor_pool
 from google.protobuf import symbol_database as _symbol_database
 # @@protoc_insertion_point(imports)
 
@@ -15,193 +13,29 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor.FileDescriptor(
-  name='pymap/admin/grpc/admin.proto',
-  package='admin',
-  syntax='proto3',
-  serialized_options=None,
-  serialized_pb=_b('\n\x1cpymap/admin/grpc/admin.proto\x12\x05\x61\x64min\"Y\n\rAppendRequest\x12\x0c\n\x04user\x18\x01 \x01(\t\x12\x0f\n\x07mailbox\x18\x02 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\x12\r\n\x05\x66lags\x18\x04 \x03(\t\x12\x0c\n\x04when\x18\x05 \x01(\x01\"N\n\x0e\x41ppendResponse\x12\x1d\n\x06result\x18\x01 \x01(\x0e\x32\r.admin.Result\x12\x10\n\x08validity\x18\x02 \x01(\r\x12\x0b\n\x03uid\x18\x03 \x01(\r*@\n\x06Result\x12\x0b\n\x07SUCCESS\x10\x00\x12\x12\n\x0eUSER_NOT_FOUND\x10\x01\x12\x15\n\x11MAILBOX_NOT_FOUND\x10\x02\x32@\n\x05\x41\x64min\x12\x37\n\x06\x41ppend\x12\x14.admin.AppendRequest\x1a\x15.admin.AppendResponse\"\x00\x62\x06proto3')
-)
-
-_RESULT = _descriptor.EnumDescriptor(
-  name='Result',
-  full_name='admin.Result',
-  filename=None,
-  file=DESCRIPTOR,
-  values=[
-    _descriptor.EnumValueDescriptor(
-      name='SUCCESS', index=0, number=0,
-      serialized_options=None,
-      type=None),
-    _descriptor.EnumValueDescriptor(
-      name='USER_NOT_FOUND', index=1, number=1,
-      serialized_options=None,
-      type=None),
-    _descriptor.EnumValueDescriptor(
-      name='MAILBOX_NOT_FOUND', index=2, number=2,
-      serialized_options=None,
-      type=None),
-  ],
-  containing_type=None,
-  serialized_options=None,
-  serialized_start=210,
-  serialized_end=274,
-)
-_sym_db.RegisterEnumDescriptor(_RESULT)
-
-Result = enum_type_wrapper.EnumTypeWrapper(_RESULT)
-SUCCESS = 0
-USER_NOT_FOUND = 1
-MAILBOX_NOT_FOUND = 2
-
-
-
-_APPENDREQUEST = _descriptor.Descriptor(
-  name='AppendRequest',
-  full_name='admin.AppendRequest',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='user', full_name='admin.AppendRequest.user', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='mailbox', full_name='admin.AppendRequest.mailbox', index=1,
-      number=2, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='data', full_name='admin.AppendRequest.data', index=2,
-      number=3, type=12, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b(""),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='flags', full_name='admin.AppendRequest.flags', index=3,
-      number=4, type=9, cpp_type=9, label=3,
-      has_default_value=False, default_value=[],
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='when', full_name='admin.AppendRequest.when', index=4,
-      number=5, type=1, cpp_type=5, label=1,
-      has_default_value=False, default_value=float(0),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=39,
-  serialized_end=128,
-)
-
-
-_APPENDRESPONSE = _descriptor.Descriptor(
-  name='AppendResponse',
-  full_name='admin.AppendResponse',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='result', full_name='admin.AppendResponse.result', index=0,
-      number=1, type=14, cpp_type=8, label=1,
-      has_default_value=False, default_value=0,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='validity', full_name='admin.AppendResponse.validity', index=1,
-      number=2, type=13, cpp_type=3, label=1,
-      has_default_value=False, default_value=0,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='uid', full_name='admin.AppendResponse.uid', index=2,
-      number=3, type=13, cpp_type=3, label=1,
-      has_default_value=False, default_value=0,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=130,
-  serialized_end=208,
-)
-
-_APPENDRESPONSE.fields_by_name['result'].enum_type = _RESULT
-DESCRIPTOR.message_types_by_name['AppendRequest'] = _APPENDREQUEST
-DESCRIPTOR.message_types_by_name['AppendResponse'] = _APPENDRESPONSE
-DESCRIPTOR.enum_types_by_name['Result'] = _RESULT
-_sym_db.RegisterFileDescriptor(DESCRIPTOR)
-
-AppendRequest = _reflection.GeneratedProtocolMessageType('AppendRequest', (_message.Message,), dict(
-  DESCRIPTOR = _APPENDREQUEST,
-  __module__ = 'pymap.admin.grpc.admin_pb2'
-  # @@protoc_insertion_point(class_scope:admin.AppendRequest)
-  ))
-_sym_db.RegisterMessage(AppendRequest)
-
-AppendResponse = _reflection.GeneratedProtocolMessageType('AppendResponse', (_message.Message,), dict(
-  DESCRIPTOR = _APPENDRESPONSE,
-  __module__ = 'pymap.admin.grpc.admin_pb2'
-  # @@protoc_insertion_point(class_scope:admin.AppendResponse)
-  ))
-_sym_db.RegisterMessage(AppendResponse)
-
-
-
-_ADMIN = _descriptor.ServiceDescriptor(
-  name='Admin',
-  full_name='admin.Admin',
-  file=DESCRIPTOR,
-  index=0,
-  serialized_options=None,
-  serialized_start=276,
-  serialized_end=340,
-  methods=[
-  _descriptor.MethodDescriptor(
-    name='Append',
-    full_name='admin.Admin.Append',
-    index=0,
-    containing_service=None,
-    input_type=_APPENDREQUEST,
-    output_type=_APPENDRESPONSE,
-    serialized_options=None,
-  ),
-])
-_sym_db.RegisterServiceDescriptor(_ADMIN)
-
-DESCRIPTOR.services_by_name['Admin'] = _ADMIN
-
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1cpymap/admin/grpc/admin.proto\x12\x05\x61\x64min\"Y\n\rAppendRequest\x12\x0c\n\x04user\x18\x01 \x01(\t\x12\x0f\n\x07mailbox\x18\x02 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\x12\r\n\x05\x66lags\x18\x04 \x03(\t\x12\x0c\n\x04when\x18\x05 \x01(\x01\"N\n\x0e\x41ppendResponse\x12\x1d\n\x06result\x18\x01 \x01(\x0e\x32\r.admin.Result\x12\x10\n\x08validity\x18\x02 \x01(\r\x12\x0b\n\x03uid\x18\x03 \x01(\r\"\x0e\n\x0cStatsRequest\"5\n\x0fHistogramBucket\x12\x13\n\x0bupper_bound\x18\x01 \x01(\x01\x12\r\n\x05\x63ount\x18\x02 \x01(\x04\"\xcf\x01\n\x0c\x43ommandStats\x12\x0f\n\x07\x63ommand\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x04\x12\x13\n\x0blatency_sum\x18\x03 \x01(\x01\x12\'\n\x07latency\x18\x04 \x03(\x0b\x32\x16.admin.HistogramBucket\x12\x10\n\x08\x62ytes_in\x18\x05 \x01(\x04\x12\x11\n\tbytes_out\x18\x06 \x01(\x04\x12\x10\n\x08messages\x18\x07 \x01(\x04\x12*\n\rbackend_calls\x18\x08 \x03(\x0b\x32\x13.admin.BackendCalls\"-\n\x0c\x42\x61\x63kendCalls\x12\x0e\n\x06method\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x04\"M\n\rStatsResponse\x12\x0f\n\x07\x62\x61\x63kend\x18\x01 \x01(\t\x12%\n\x08\x63ommands\x18\x02 \x03(\x0b\x32\x13.admin.CommandStatsJ\x04\x08\x03\x10\x04*@\n\x06Result\x12\x0b\n\x07SUCCESS\x10\x00\x12\x12\n\x0eUSER_NOT_FOUND\x10\x01\x12\x15\n\x11MAILBOX_NOT_FOUND\x10\x02\x32v\n\x05\x41\x64min\x12\x37\n\x06\x41ppend\x12\x14.admin.AppendRequest\x1a\x15.admin.AppendResponse\"\x00\x12\x34\n\x05Stats\x12\x13.admin.StatsRequest\x1a\x14.admin.StatsResponse\"\x00\x62\x06proto3')
+
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'pymap.admin.grpc.admin_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
+
+  DESCRIPTOR._options = None
+  _RESULT._serialized_start=617
+  _RESULT._serialized_end=681
+  _APPENDREQUEST._serialized_start=39
+  _APPENDREQUEST._serialized_end=128
+  _APPENDRESPONSE._serialized_start=130
+  _APPENDRESPONSE._serialized_end=208
+  _STATSREQUEST._serialized_start=210
+  _STATSREQUEST._serialized_end=224
+  _HISTOGRAMBUCKET._serialized_start=226
+  _HISTOGRAMBUCKET._serialized_end=279
+  _COMMANDSTATS._serialized_start=282
+  _COMMANDSTATS._serialized_end=489
+  _BACKENDCALLS._serialized_start=491
+  _BACKENDCALLS._serialized_end=536
+  _STATSRESPONSE._serialized_start=538
+  _STATSRESPONSE._serialized_end=615
+  _ADMIN._serialized_start=683
+  _ADMIN._serialized_end=801
 # @@protoc_insertion_point(module_scope)
@@ -4,6 +4,7 @@ from google.protobuf.descriptor import (
 )
 
 from google.protobuf.internal.containers import (
+    RepeatedCompositeFieldContainer as google___protobuf___internal___containers___RepeatedCompositeFieldContainer,
     RepeatedScalarFieldContainer as google___protobuf___internal___containers___RepeatedScalarFieldContainer,
 )
 
@@ -70,3 +71,76 @@ class AppendResponse(google___protobuf___message___Message):
     def FromString(cls, s: bytes) -> AppendResponse: ...
     def MergeFrom(self, other_msg: google___protobuf___message___Message) -> None: ...
     def CopyFrom(self, other_msg: google___protobuf___message___Message) -> None: ...
+
+class StatsRequest(google___protobuf___message___Message):
+
+    def __init__(self,
+        ) -> None: ...
+    @classmethod
+    def FromString(cls, s: bytes) -> StatsRequest: ...
+    def MergeFrom(self, other_msg: google___protobuf___message___Message) -> None: ...
+    def CopyFrom(self, other_msg: google___protobuf___message___Message) -> None: ...
+
+class HistogramBucket(google___protobuf___message___Message):
+    upper_bound = ... # type: float
+    count = ... # type: int
+
+    def __init__(self,
+        upper_bound : typing___Optional[float] = None,
+        count : typing___Optional[int] = None,
+        ) -> None: ...
+    @classmethod
+    def FromString(cls, s: bytes) -> HistogramBucket: ...
+    def MergeFrom(self, other_msg: google___protobuf___message___Message) -> None: ...
+    def CopyFrom(self, other_msg: google___protobuf___message___Message) -> None: ...
+
+class CommandStats(google___protobuf___message___Message):
+    command = ... # type: typing___Text
+    count = ... # type: int
+    latency_sum = ... # type: float
+    latency = ... # type: google___protobuf___internal___containers___RepeatedCompositeFieldContainer[HistogramBucket]
+    bytes_in = ... # type: int
+    bytes_out = ... # type: int
+    messages = ... # type: int
+    backend_calls = ... # type: google___protobuf___internal___containers___RepeatedCompositeFieldContainer[BackendCalls]
+
+    def __init__(self,
+        command : typing___Optional[typing___Text] = None,
+        count : typing___Optional[int] = None,
+        latency_sum : typing___Optional[float] = None,
+        latency : typing___Optional[typing___Iterable[HistogramBucket]] = None,
+        bytes_in : typing___Optional[int] = None,
+        bytes_out : typing___Optional[int] = None,
+        messages : typing___Optional[int] = None,
+        backend_calls : typing___Optional[typing___Iterable[BackendCalls]] = None,
+        ) -> None: ...
+    @classmethod
+    def FromString(cls, s: bytes) -> CommandStats: ...
+    def MergeFrom(self, other_msg: google___protobuf___message___Message) -> None: ...
+    def CopyFrom(self, other_msg: google___protobuf___message___Message) -> None: ...
+
+class BackendCalls(google___protobuf___message___Message):
+    method = ... # type: typing___Text
+    count = ... # type: int
+
+    def __init__(self,
+        method : typing___Optional[typing___Text] = None,
+        count : typing___Optional[int] = None,
+        ) -> None: ...
+    @classmethod
+    def FromString(cls, s: bytes) -> BackendCalls: ...
+    def MergeFrom(self, other_msg: google___protobuf___message___Message) -> None: ...
+    def CopyFrom(self, other_msg: google___protobuf___message___Message) -> None: ...
+
+class StatsResponse(google___protobuf___message___Message):
+    backend = ... # type: typing___Text
+    commands = ... # type: google___protobuf___internal___containers___RepeatedCompositeFieldContainer[CommandStats]
+
+    def __init__(self,
+        backend : typing___Optional[typing___Text] = None,
+        commands : typing___Optional[typing___Iterable[CommandStats]] = None,
+        ) -> None: ...
+    @classmethod
+    def FromString(cls, s: bytes) -> StatsResponse: ...
+    def MergeFrom(self, other_msg: google___protobuf___message___Message) -> None: ...
+    def CopyFrom(self, other_msg: google___protobuf___message___Message) -> None: ...
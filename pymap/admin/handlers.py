@@ -64,3 +64,32 @@ class GrpcHandlers(AdminBase):
             uid = next(iter(append_uid.uids))
             resp = AppendResponse(validity=validity, uid=uid)
         await stream.send_message(resp)
+
+    async def Stats(self, stream) -> None:
+        """Return the metrics collected for each command executed by the
+        server. For example::
+
+            $ pymap-admin stats
+
+        Args:
+            stream (:class:`~grpclib.server.Stream`): The stream for the
+                request and response.
+
+        """
+        from .grpc.admin_pb2 import StatsResponse, CommandStats, \
+            HistogramBucket, BackendCalls
+        await stream.recv_message()
+        stats = self.config.stats
+        commands = [CommandStats(
+            command=name.decode('ascii'), count=cmd_stats.count,
+            latency_sum=cmd_stats.latency.sum,
+            latency=[HistogramBucket(upper_bound=bound, count=count)
+                     for bound, count in cmd_stats.latency.cumulative()],
+            bytes_in=cmd_stats.bytes_in, bytes_out=cmd_stats.bytes_out,
+            messages=cmd_stats.messages,
+            backend_calls=[
+                BackendCalls(method=method, count=count)
+                for method, count in sorted(cmd_stats.backend_calls.items())])
+            for name, cmd_stats in sorted(stats.commands.items())]
+        resp = StatsResponse(backend=stats.backend, commands=commands)
+        await stream.send_message(resp)
@@ -114,7 +114,7 @@ class Session(BaseSession[Message]):
             raise InvalidAuth()
         mailbox_set = config.set_cache.get(user)
         if not mailbox_set:
-            mailbox_set = MailboxSet()
+            mailbox_set = MailboxSet(config.text_index)
             if config.demo_data:
                 await cls._load_demo(mailbox_set)
             config.set_cache[user] = mailbox_set
@@ -3,10 +3,11 @@ from bisect import bisect_left
 from collections import OrderedDict
 from itertools import islice
 from typing import Tuple, Sequence, Dict, Optional, Iterable, AsyncIterable, \
-    List, Set, AbstractSet, FrozenSet
+    List, Set, AbstractSet, FrozenSet, Mapping
 
 from pymap.concurrent import ReadWriteLock
 from pymap.context import subsystem
+from pymap.counters import MailboxCounters
 from pymap.exceptions import MailboxNotFound, MailboxConflict
 from pymap.flags import FlagOp
 from pymap.interfaces.message import AppendMessage, CachedMessage
@@ -14,6 +15,7 @@ from pymap.mailbox import MailboxSnapshot
 from pymap.parsing.specials import FetchRequirement
 from pymap.parsing.specials.flag import Flag, Seen
 from pymap.selected import SelectedSet, SelectedMailbox
+from pymap.textindex import message_terms, TextIndex
 
 from ..mailbox import Message, MailboxDataInterface, MailboxSetInterface
 
@@ -24,7 +26,8 @@ class _ModSequenceMapping:
 
     def __init__(self) -> None:
         super().__init__()
-        self._highest = 0
+        # The highest mod-sequence of an empty mailbox, see RFC 7162 3.1.1.
+        self._highest = 1
         self._uids: Dict[int, int] = {}
         self._updates: Dict[int, Set[int]] = {}
         self._expunges: Dict[int, Set[int]] = {}
@@ -43,7 +46,8 @@ class _ModSequenceMapping:
                 del data[prev_mod_seq]
                 self._mod_seqs_order.remove(prev_mod_seq)
 
-    def _set(self, uids: Iterable[int], data: Dict[int, Set[int]]) -> None:
+    def _set(self, uids: Iterable[int], data: Dict[int, Set[int]]) -> int:
+        uids = list(uids)
         self._highest = mod_seq = self._highest + 1
         self._mod_seqs_order.append(mod_seq)
         new_uid_set = data.setdefault(mod_seq, set())
@@ -54,11 +58,12 @@ class _ModSequenceMapping:
             if prev_mod_seq is not None:
                 self._remove_prev(uid, prev_mod_seq, self._updates)
                 self._remove_prev(uid, prev_mod_seq, self._expunges)
+        return mod_seq
 
-    def update(self, uids: Iterable[int]) -> None:
+    def update(self, uids: Iterable[int]) -> int:
         return self._set(uids, self._updates)
 
-    def expunge(self, uids: Iterable[int]) -> None:
+    def expunge(self, uids: Iterable[int]) -> int:
         return self._set(uids, self._expunges)
 
     def find_updated(self, mod_seq: int) \
@@ -86,9 +91,10 @@ class MailboxData(MailboxDataInterface[Message]):
 
     """
 
-    def __init__(self, name: str) -> None:
+    def __init__(self, name: str, text_index: bool = False) -> None:
         self._name = name
         self._readonly = False
+        self._text_index_enabled = text_index
         self._messages_lock = subsystem.get().new_rwlock()
         self._selected_set = SelectedSet()
         self._reset_messages()
@@ -98,6 +104,9 @@ class MailboxData(MailboxDataInterface[Message]):
         self._max_uid = 100
         self._mod_sequences = _ModSequenceMapping()
         self._messages: Dict[int, Message] = OrderedDict()
+        self._counters = MailboxCounters()
+        self._text_index: Optional[TextIndex] = \
+            TextIndex() if self._text_index_enabled else None
 
     @property
     def name(self) -> str:
@@ -134,16 +143,70 @@ class MailboxData(MailboxDataInterface[Message]):
             selected.add_updates(updated_messages, expunged)
         return selected
 
-    async def add(self, append_msg: AppendMessage, recent: bool = False) \
-            -> Message:
+    async def add_many(self, append_msgs: Sequence[AppendMessage],
+                       recent: bool = False) -> Sequence[Message]:
+        # Spooled messages are copied, they are kept in memory anyway.
+        messages = [Message.parse(0, bytes(append_msg.message),
+                                  append_msg.flag_set, append_msg.when)
+                    for append_msg in append_msgs]
+        return await self._add_copies(messages, recent)
+
+    async def _add_copies(self, messages: Sequence[Message],
+                          recent: bool) -> Sequence[Message]:
+        if not messages:
+            return []
+        text_index = self._text_index
+        if text_index is not None:
+            terms = [message_terms(message) for message in messages]
         async with self.messages_lock.write_lock():
-            self._max_uid = new_uid = self._max_uid + 1
-            message = Message.parse(new_uid, append_msg.message,
-                                    append_msg.flag_set, append_msg.when,
-                                    recent=recent)
-            self._messages[new_uid] = message
-            self._mod_sequences.update([new_uid])
-            return message
+            first_uid = self._max_uid + 1
+            self._max_uid += len(messages)
+            copies = [message.copy(new_uid) for new_uid, message
+                      in enumerate(messages, first_uid)]
+            mod_seq = self._mod_sequences.update(
+                message.uid for message in copies)
+            for message in copies:
+                message.recent = recent
+                message.mod_sequence = mod_seq
+                self._messages[message.uid] = message
+                self._counters.add(message.uid,
+                                   Seen in message.permanent_flags, recent)
+            if text_index is not None:
+                text_index.add((message.uid, msg_terms)
+                               for message, msg_terms in zip(copies, terms))
+            return copies
+
+    async def copy_to(self, uids: Sequence[int],
+                      destination: MailboxDataInterface[Message],
+                      recent: bool = False) -> Sequence[Tuple[int, int]]:
+        if not isinstance(destination, MailboxData):
+            return await super().copy_to(uids, destination, recent)
+        async with self.messages_lock.read_lock():
+            messages = [self._messages[uid] for uid in uids
+                        if uid in self._messages]
+        # The copies share the parsed contents of the original messages.
+        copies = await destination._add_copies(messages, recent)
+        return [(message.uid, msg_copy.uid)
+                for message, msg_copy in zip(messages, copies)]
+
+    async def move_to(self, uids: Sequence[int],
+                      destination: MailboxDataInterface[Message],
+                      recent: bool = False) -> Sequence[Tuple[int, int]]:
+        if not isinstance(destination, MailboxData):
+            return await super().move_to(uids, destination, recent)
+        async with self.messages_lock.write_lock():
+            messages = [self._messages.pop(uid) for uid in uids
+                        if uid in self._messages]
+            if messages:
+                self._mod_sequences.expunge(
+                    message.uid for message in messages)
+                self._counters.remove(message.uid for message in messages)
+                if self._text_index is not None:
+                    self._text_index.remove(
+                        message.uid for message in messages)
+        moved = await destination._add_copies(messages, recent)
+        return [(message.uid, msg_moved.uid)
+                for message, msg_moved in zip(messages, moved)]
 
     async def get(self, uid: int, cached_msg: CachedMessage = None,
                   requirement: FetchRequirement = FetchRequirement.METADATA) \
@@ -158,6 +221,28 @@ class MailboxData(MailboxDataInterface[Message]):
             else:
                 return ret
 
+    async def get_many(
+            self, uids: Sequence[int],
+            requirement: FetchRequirement = FetchRequirement.METADATA,
+            cached_msgs: Mapping[int, CachedMessage] = None) \
+            -> Sequence[Message]:
+        max_uid = self._max_uid
+        ret: List[Message] = []
+        async with self.messages_lock.read_lock():
+            for uid in uids:
+                if uid < 1 or uid > max_uid:
+                    raise IndexError(uid)
+                msg = self._messages.get(uid)
+                if msg is not None:
+                    ret.append(msg)
+                elif cached_msgs and uid in cached_msgs:
+                    cached_msg = cached_msgs[uid]
+                    ret.append(Message(cached_msg.uid,
+                                       cached_msg.permanent_flags,
+                                       cached_msg.internal_date,
+                                       expunged=True))
+        return ret
+
     async def delete(self, uids: Iterable[int]) -> None:
         async with self.messages_lock.write_lock():
             for uid in uids:
@@ -165,23 +250,55 @@ class MailboxData(MailboxDataInterface[Message]):
                     del self._messages[uid]
                 except KeyError:
                     pass
+            self._counters.remove(uids)
+            if self._text_index is not None:
+                self._text_index.remove(uids)
         self._mod_sequences.expunge(uids)
 
+    async def find_sizes(self, uids: Sequence[int]) \
+            -> Optional[Mapping[int, int]]:
+        async with self.messages_lock.read_lock():
+            messages = self._messages
+            return {uid: messages[uid].get_size() for uid in uids
+                    if uid in messages}
+
+    async def find_text(self, uids: Sequence[int], value: bytes) \
+            -> Optional[AbstractSet[int]]:
+        text_index = self._text_index
+        if text_index is None:
+            return None
+        async with self.messages_lock.read_lock():
+            return text_index.find(uids, value)
+
     async def claim_recent(self, selected: SelectedMailbox) -> None:
-        uids: List[int] = []
-        async for msg in self.messages():
-            if msg.recent:
-                msg.recent = False
-                msg_uid = msg.uid
+        async with self.messages_lock.write_lock():
+            uids = self._counters.claim_recent()
+            for msg_uid in uids:
+                self._messages[msg_uid].recent = False
                 selected.session_flags.add_recent(msg_uid)
-                uids.append(msg_uid)
-        self._mod_sequences.update(uids)
+        if uids:
+            mod_seq = self._mod_sequences.update(uids)
+            for msg_uid in uids:
+                self._messages[msg_uid].mod_sequence = mod_seq
 
     async def update_flags(self, messages: Sequence[Message],
                            flag_set: FrozenSet[Flag], mode: FlagOp) -> None:
-        self._mod_sequences.update(msg.uid for msg in messages)
+        changed: List[Message] = []
         for msg in messages:
-            msg.permanent_flags = mode.apply(msg.permanent_flags, flag_set)
+            new_flags = mode.apply(msg.permanent_flags, flag_set)
+            if new_flags != msg.permanent_flags:
+                msg.permanent_flags = new_flags
+                changed.append(msg)
+        if not changed:
+            return
+        mod_seq = self._mod_sequences.update(msg.uid for msg in changed)
+        for msg in changed:
+            msg.mod_sequence = mod_seq
+            self._counters.set_seen(msg.uid, Seen in msg.permanent_flags)
+
+    async def find_expunged(self, mod_sequence: int) -> Sequence[int]:
+        _, expunged = self._mod_sequences.find_updated(mod_sequence + 1)
+        return sorted(expunged)
 
     async def cleanup(self) -> None:
         pass
@@ -192,33 +309,32 @@ class MailboxData(MailboxDataInterface[Message]):
                 yield msg
 
     async def snapshot(self) -> MailboxSnapshot:
-        exists = 0
-        recent = 0
-        unseen = 0
-        first_unseen: Optional[int] = None
         next_uid = self._max_uid + 1
-        async for msg in self.messages():
-            exists += 1
-            if msg.recent:
-                recent += 1
-            if Seen not in msg.permanent_flags:
-                unseen += 1
-                if first_unseen is None:
-                    first_unseen = exists
+        async with self.messages_lock.read_lock():
+            counters = self._counters
+            exists = counters.exists
+            recent = counters.recent
+            unseen = counters.unseen
+            first_unseen = counters.first_unseen
         return MailboxSnapshot(self.name, self.readonly, self.uid_validity,
                                self.permanent_flags, self.session_flags,
-                               exists, recent, unseen, first_unseen, next_uid)
+                               exists, recent, unseen, first_unseen, next_uid,
+                               self._mod_sequences.highest)
 
 
 class MailboxSet(MailboxSetInterface[MailboxData]):
     """Implementation of :class:`~pymap.backend.mailbox.MailboxSetInterface`
     for the dict backend.
 
+    Args:
+        text_index: True if each mailbox should keep a full-text index.
+
     """
 
-    def __init__(self) -> None:
+    def __init__(self, text_index: bool = False) -> None:
         super().__init__()
-        self._inbox = MailboxData('INBOX')
+        self._text_index = text_index
+        self._inbox = MailboxData('INBOX', text_index)
         self._set: Dict[str, 'MailboxData'] = OrderedDict()
         self._set_lock = subsystem.get().new_rwlock()
         self._subscribed: Dict[str, bool] = {}
@@ -254,7 +370,7 @@ class MailboxSet(MailboxSetInterface[MailboxData]):
             if name in self._set:
                 raise MailboxConflict(name)
         async with self._set_lock.write_lock():
-            self._set[name] = ret = MailboxData(name)
+            self._set[name] = ret = MailboxData(name, self._text_index)
         return ret
 
     async def delete_mailbox(self, name: str) -> None:
@@ -272,10 +388,13 @@ class MailboxSet(MailboxSetInterface[MailboxData]):
                 raise MailboxConflict(after)
         if before == 'INBOX':
             async with self._set_lock.write_lock():
-                self._set[after] = ret = MailboxData(after)
+                self._set[after] = ret = MailboxData(after, self._text_index)
                 ret._uid_validity = self._inbox._uid_validity
                 ret._max_uid = self._inbox._max_uid
+                ret._mod_sequences = self._inbox._mod_sequences
                 ret._messages = self._inbox._messages
+                ret._counters = self._inbox._counters
+                ret._text_index = self._inbox._text_index
                 self._inbox._reset_messages()
                 return ret
         else:
@@ -1,19 +1,24 @@
 
 from abc import abstractmethod
+from itertools import islice
 from typing import TypeVar, Optional, Tuple, Sequence, FrozenSet, \
-    Iterable, AsyncIterable
+    Iterable, AsyncIterable, Dict, List, Mapping, AbstractSet
 from typing_extensions import Protocol
 
+from pymap.exceptions import MailboxNotFound
 from pymap.flags import FlagOp
 from pymap.interfaces.message import AppendMessage, CachedMessage
 from pymap.mailbox import MailboxSnapshot
 from pymap.message import BaseMessage
 from pymap.parsing.specials import SequenceSet, FetchRequirement
 from pymap.parsing.specials.flag import get_system_flags, Flag, Deleted, Recent
+from pymap.search import SearchCriteria, SearchPlan
 from pymap.selected import SelectedSet, SelectedMailbox
+from pymap.sort import SortKeys
 
 __all__ = ['MailboxDataInterface', 'MailboxSetInterface', 'Message',
-           'MessageT', 'MailboxDataT', 'MailboxDataT_co']
+           'MessageT', 'MailboxDataT', 'MailboxDataT_co', 'FIND_CHUNK_SIZE',
+           'FIND_BODY_CHUNK_SIZE']
 
 #: Type variable with an upper bound of :class:`Message`.
 MessageT = TypeVar('MessageT', bound='Message')
@@ -21,6 +26,15 @@ MessageT = TypeVar('MessageT', bound='Message')
 #: Type variable with an upper bound of :class:`MailboxDataInterface`.
 MailboxDataT = TypeVar('MailboxDataT', bound='MailboxDataInterface')
 
+#: The maximum number of messages loaded at once by
+#: :meth:`MailboxDataInterface.find` and
+#: :meth:`MailboxDataInterface.get_sort_keys`.
+FIND_CHUNK_SIZE = 100
+
+#: The maximum number of messages loaded at once, when the full message
+#: contents are required.
+FIND_BODY_CHUNK_SIZE = 10
+
 #: Covariant type variable with an upper bound of
 #: :class:`MailboxDataInterface`.
 MailboxDataT_co = TypeVar('MailboxDataT_co', bound='MailboxDataInterface',
@@ -97,7 +111,6 @@ class MailboxDataInterface(Protocol[MessageT]):
         """
         ...
 
-    @abstractmethod
     async def add(self, message: AppendMessage, recent: bool = False) \
             -> MessageT:
         """Adds a new message to the end of the mailbox, returning a copy of
@@ -107,9 +120,71 @@ class MailboxDataInterface(Protocol[MessageT]):
             message: The new message data.
             recent: True if the message should be marked recent.
 
+        """
+        [added] = await self.add_many([message], recent)
+        return added
+
+    @abstractmethod
+    async def add_many(self, messages: Sequence[AppendMessage],
+                       recent: bool = False) -> Sequence[MessageT]:
+        """Adds new messages to the end of the mailbox, returning copies of
+        the messages with their assigned UIDs. The messages are committed
+        together and given a contiguous block of UIDs, in the order they were
+        given.
+
+        Args:
+            messages: The new message data.
+            recent: True if the messages should be marked recent.
+
         """
         ...
 
+    async def copy_to(self, uids: Sequence[int],
+                      destination: 'MailboxDataInterface[MessageT]',
+                      recent: bool = False) -> Sequence[Tuple[int, int]]:
+        """Copies messages to the end of another mailbox, returning the UID
+        of each copied message paired with the UID assigned to its copy.
+        Messages that no longer exist are not copied.
+
+        By default, each message is loaded and appended to the destination
+        with :meth:`.add_many`. Backends may override this to copy the
+        message contents without parsing them again.
+
+        Args:
+            uids: The message UIDs.
+            destination: The mailbox to copy the messages to.
+            recent: True if the copies should be marked recent.
+
+        """
+        messages = await self.get_many(uids, FetchRequirement.BODY)
+        added = await destination.add_many(
+            [msg.append_msg for msg in messages], recent)
+        return [(msg.uid, new_msg.uid)
+                for msg, new_msg in zip(messages, added)]
+
+    async def move_to(self, uids: Sequence[int],
+                      destination: 'MailboxDataInterface[MessageT]',
+                      recent: bool = False) -> Sequence[Tuple[int, int]]:
+        """Moves messages to the end of another mailbox, returning the UID
+        of each moved message paired with its new UID. The moved messages
+        are expunged from this mailbox. Messages that no longer exist are not
+        moved.
+
+        By default, the messages are copied with :meth:`.copy_to` and then
+        deleted. Backends may override this to transfer the messages without
+        copying their contents.
+
+        Args:
+            uids: The message UIDs.
+            destination: The mailbox to move the messages to.
+            recent: True if the moved messages should be marked recent.
+
+        """
+        moved = await self.copy_to(uids, destination, recent)
+        if moved:
+            await self.delete([uid for uid, _ in moved])
+        return moved
+
     @abstractmethod
     async def get(self, uid: int, cached_msg: CachedMessage = None,
                   requirement: FetchRequirement = FetchRequirement.METADATA) \
@@ -127,6 +202,35 @@ class MailboxDataInterface(Protocol[MessageT]):
         """
         ...
 
+    async def get_many(
+            self, uids: Sequence[int],
+            requirement: FetchRequirement = FetchRequirement.METADATA,
+            cached_msgs: Mapping[int, CachedMessage] = None) \
+            -> Sequence[MessageT]:
+        """Return the messages with the given UIDs, in the same order.
+        Messages that no longer exist are omitted, unless a cached message is
+        given for their UID.
+
+        By default, each message is loaded with :meth:`.get`. Backends may
+        override this to load many messages with fewer round trips.
+
+        Args:
+            uids: The message UIDs.
+            requirement: The data required from each message.
+            cached_msgs: The last known cached messages, keyed by UID.
+
+        Raises:
+            IndexError: A UID is not valid in the mailbox.
+
+        """
+        ret: List[MessageT] = []
+        for uid in uids:
+            cached_msg = cached_msgs.get(uid) if cached_msgs else None
+            msg = await self.get(uid, cached_msg, requirement)
+            if msg is not None:
+                ret.append(msg)
+        return ret
+
     @abstractmethod
     async def delete(self, uids: Iterable[int]) -> None:
         """Delete messages with the given UIDs.
@@ -177,12 +281,125 @@ class MailboxDataInterface(Protocol[MessageT]):
         """Returns a snapshot of the current state of the mailbox."""
         ...
 
-    async def find(self, seq_set: SequenceSet, selected: SelectedMailbox,
-                   requirement: FetchRequirement = FetchRequirement.METADATA) \
+    async def find_expunged(self, mod_sequence: int) \
+            -> Optional[Sequence[int]]:
+        """Return the UIDs of messages that were expunged with a mod-sequence
+        greater than the given value, or ``None`` if the mailbox does not keep
+        track of them.
+
+        Args:
+            mod_sequence: The mod-sequence value.
+
+        """
+        return None
+
+    async def find_flagged(self, flag: Flag, expected: bool) \
+            -> Optional[AbstractSet[int]]:
+        """Return the UIDs of messages that have the given permanent flag, or
+        that do not have it if ``expected`` is False. If the mailbox does not
+        keep an index of the flag, return ``None``.
+
+        Args:
+            flag: The permanent flag.
+            expected: True if the messages should have the flag.
+
+        """
+        return None
+
+    async def find_sizes(self, uids: Sequence[int]) \
+            -> Optional[Mapping[int, int]]:
+        """Return the size of each message with the given UIDs, without
+        loading the message contents. If the mailbox cannot do this, return
+        ``None``.
+
+        Args:
+            uids: The message UIDs.
+
+        """
+        return None
+
+    async def find_text(self, uids: Sequence[int], value: bytes) \
+            -> Optional[AbstractSet[int]]:
+        """Return the subset of the given UIDs whose messages may contain the
+        value in their headers or text, using a full-text index. If the
+        mailbox does not keep a full-text index, return ``None``.
+
+        See Also:
+            :mod:`pymap.textindex`
+
+        Args:
+            uids: The candidate message UIDs.
+            value: The search value.
+
+        """
+        return None
+
+    async def search(self, plan: SearchPlan, selected: SelectedMailbox) \
+            -> Sequence[Tuple[int, MessageT]]:
+        """Return the message sequence ID and message pairs that match the
+        search plan. The cached criteria are evaluated first, then any flag
+        and size criteria answered by :meth:`.find_flagged` and
+        :meth:`.find_sizes`, and the candidates are narrowed down further by
+        :meth:`.find_text`. The remaining candidates are loaded once per stage
+        of the plan, so that message headers or bodies are only loaded if
+        needed.
+
+        Args:
+            plan: The search plan.
+            selected: The selected mailbox session.
+
+        """
+        candidates: Sequence[Tuple[int, CachedMessage]] = [
+            (seq, cached_msg) for seq, cached_msg
+            in selected.messages.get_all(plan.sequence_set)
+            if plan.matches_cached(seq, cached_msg)]
+        answered: List[SearchCriteria] = []
+        for flag_crit in plan.flag_criteria:
+            if not candidates:
+                break
+            flagged = await self.find_flagged(flag_crit.flag,
+                                              flag_crit.expected)
+            if flagged is not None:
+                candidates = [(seq, cached_msg)
+                              for seq, cached_msg in candidates
+                              if cached_msg.uid in flagged]
+                answered.append(flag_crit)
+        if plan.size_criteria and candidates:
+            sizes = await self.find_sizes(
+                [cached_msg.uid for _, cached_msg in candidates])
+            if sizes is not None:
+                candidates = [(seq, cached_msg)
+                              for seq, cached_msg in candidates
+                              if all(crit.matches_size(
+                                  sizes.get(cached_msg.uid, 0))
+                                  for crit in plan.size_criteria)]
+                answered.extend(plan.size_criteria)
+        for _, value in plan.text_criteria:
+            if not candidates:
+                break
+            found = await self.find_text(
+                [cached_msg.uid for _, cached_msg in candidates], value)
+            if found is not None:
+                candidates = [(seq, cached_msg)
+                              for seq, cached_msg in candidates
+                              if cached_msg.uid in found]
+        matched: List[Tuple[int, MessageT]] = []
+        for requirement, criteria in plan.stages(answered):
+            matched = [(seq, msg) async for seq, msg
+                       in self._find(candidates, requirement)
+                       if all(crit.matches(seq, msg) for crit in criteria)]
+            candidates = matched
+        return matched
+
+    def find(self, seq_set: SequenceSet, selected: SelectedMailbox,
+             requirement: FetchRequirement = FetchRequirement.METADATA) \
             -> AsyncIterable[Tuple[int, MessageT]]:
         """Find the active message UID and message pairs in the mailbox that
         are contained in the given sequences set. Message sequence numbers
-        are resolved by the selected mailbox session.
+        are resolved by the selected mailbox session immediately, but the
+        messages are only loaded with :meth:`.get_many`, in chunks of
+        :data:`FIND_CHUNK_SIZE` or :data:`FIND_BODY_CHUNK_SIZE`, as the result
+        is iterated.
 
         Args:
             seq_set: The sequence set of the desired messages.
@@ -190,10 +407,70 @@ class MailboxDataInterface(Protocol[MessageT]):
             requirement: The data required from each message.
 
         """
-        for seq, cached_msg in selected.messages.get_all(seq_set):
-            msg = await self.get(cached_msg.uid, cached_msg, requirement)
-            if msg is not None:
-                yield (seq, msg)
+        found = list(selected.messages.get_all(seq_set))
+        return self._find(found, requirement)
+
+    async def _find(self, found: Sequence[Tuple[int, CachedMessage]],
+                    requirement: FetchRequirement) \
+            -> AsyncIterable[Tuple[int, MessageT]]:
+        found_iter = iter(found)
+        chunk_size = FIND_BODY_CHUNK_SIZE \
+            if requirement & FetchRequirement.BODY else FIND_CHUNK_SIZE
+        while True:
+            chunk = list(islice(found_iter, chunk_size))
+            if not chunk:
+                break
+            seqs = {cached_msg.uid: seq for seq, cached_msg in chunk}
+            cached_msgs = {cached_msg.uid: cached_msg
+                           for _, cached_msg in chunk}
+            messages = await self.get_many(list(seqs), requirement,
+                                           cached_msgs)
+            for msg in messages:
+                yield (seqs[msg.uid], msg)
+
+    async def get_sort_keys(self, uids: Sequence[int],
+                            selected: SelectedMailbox) \
+            -> Mapping[int, SortKeys]:
+        """Return the sort keys of the messages with the given UIDs. Keys are
+        taken from the :attr:`~pymap.selected.SelectedMailbox.sort_cache`,
+        and only the headers of the messages missing from the cache are
+        loaded, in chunks of :data:`FIND_CHUNK_SIZE`, with their sizes from
+        :meth:`.find_sizes`. If the sizes are not available, the full
+        messages are loaded instead, in chunks of
+        :data:`FIND_BODY_CHUNK_SIZE`. Messages that no longer exist are
+        omitted.
+
+        Args:
+            uids: The message UIDs.
+            selected: The selected mailbox session.
+
+        """
+        sort_cache = selected.sort_cache
+        missing = sort_cache.missing(uids)
+        for i in range(0, len(missing), FIND_CHUNK_SIZE):
+            chunk = missing[i:i + FIND_CHUNK_SIZE]
+            # Message headers are enough if the sizes are known without the
+            # message contents.
+            sizes = await self.find_sizes(chunk)
+            if sizes is None:
+                for j in range(0, len(chunk), FIND_BODY_CHUNK_SIZE):
+                    messages = await self.get_many(
+                        chunk[j:j + FIND_BODY_CHUNK_SIZE],
+                        FetchRequirement.BODY)
+                    sort_cache.add((msg.uid, SortKeys.build(msg))
+                                   for msg in messages)
+            else:
+                messages = await self.get_many(chunk,
+                                               FetchRequirement.HEADERS)
+                sort_cache.add((msg.uid, SortKeys.build(msg, sizes[msg.uid]))
+                               for msg in messages if msg.uid in sizes)
+        ret = {}
+        for uid in uids:
+            try:
+                ret[uid] = sort_cache.get(uid)
+            except KeyError:
+                pass
+        return ret
 
     async def find_deleted(self, seq_set: SequenceSet,
                            selected: SelectedMailbox) -> Sequence[int]:
@@ -269,6 +546,31 @@ class MailboxSetInterface(Protocol[MailboxDataT_co]):
         """
         ...
 
+    async def snapshot_many(self, names: Sequence[str]) \
+            -> Mapping[str, MailboxSnapshot]:
+        """Return a snapshot of the current state of each mailbox, as
+        returned by :meth:`MailboxDataInterface.snapshot`. Mailboxes that do
+        not exist are omitted.
+
+        By default, each mailbox is retrieved and snapshotted in turn.
+        Backends may override this to retrieve the snapshots together.
+
+        See Also:
+            :meth:`~pymap.interfaces.session.SessionInterface.get_mailboxes`
+
+        Args:
+            names: The names of the mailboxes.
+
+        """
+        ret: Dict[str, MailboxSnapshot] = {}
+        for name in names:
+            try:
+                mbx = await self.get_mailbox(name)
+            except MailboxNotFound:
+                continue
+            ret[name] = await mbx.snapshot()
+        return ret
+
     @abstractmethod
     async def add_mailbox(self, name: str) -> MailboxDataT_co:
         """Create a new mailbox.
@@ -151,7 +151,7 @@ class Session(BaseSession[Message]):
         if not credentials.check_secret(password):
             raise InvalidAuth()
         maildir, layout = cls._load_maildir(config, user_dir)
-        mailbox_set = MailboxSet(maildir, layout)
+        mailbox_set = MailboxSet(maildir, layout, config.text_index)
         return cls(config, mailbox_set)
 
     @classmethod
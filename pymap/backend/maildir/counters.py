@@ -0,0 +1,200 @@
+from typing import IO, ClassVar, Iterable, Optional, Tuple, TypeVar, Type
+
+from .io import FileWriteable
+
+__all__ = ['MaildirCounters']
+
+_CT = TypeVar('_CT', bound='MaildirCounters')
+
+_Counts = Tuple[int, int, int, Optional[int]]
+
+
+class MaildirCounters(FileWriteable):
+    """Maintains the message counts of a mailbox in a file stored alongside
+    the UID list file. Only the counts are stored, along with the UID of the
+    first message without ``\\Seen``, so that updating them does not read or
+    write a line for every message.
+
+    The counts are only valid if the UID validity and highest mod-sequence
+    they were written with match those of the UID list file. Otherwise, they
+    are considered stale and must be rebuilt. An update that cannot be
+    applied to the counts alone, such as adding ``\\Seen`` to the first
+    unseen message, leaves them stale.
+
+    Args:
+        base_dir: The directory of the file.
+        uid_validity: The UID validity value of the counts.
+        mod_sequence: The highest mod-sequence of the counts.
+        counts: The counts read from the file.
+        first_unseen_uid: The UID of the first message without ``\\Seen``.
+
+    """
+
+    #: The counters file name, stored in the mailbox directory.
+    FILE_NAME: ClassVar[str] = 'pymap-counters'
+
+    #: The counters lock file, stored adjacent to the counters file.
+    LOCK_FILE: ClassVar[str] = 'pymap-counters.lock'
+
+    def __init__(self, base_dir: str, uid_validity: int = 0,
+                 mod_sequence: int = 0, counts: _Counts = None,
+                 first_unseen_uid: int = 0) -> None:
+        super().__init__()
+        self._base_dir = base_dir
+        self.uid_validity = uid_validity
+        self.mod_sequence = mod_sequence
+        exists, recent, unseen, first_unseen = counts or (0, 0, 0, None)
+        self._exists = exists
+        self._recent = recent
+        self._unseen = unseen
+        self._first_unseen = first_unseen or 0
+        self._first_unseen_uid = first_unseen_uid or 0
+
+    @property
+    def counts(self) -> _Counts:
+        """The number of messages, the number of ``\\Recent`` messages, the
+        number of messages without ``\\Seen``, and the message sequence number
+        of the first message without ``\\Seen``.
+
+        """
+        return (self._exists, self._recent, self._unseen,
+                self._first_unseen or None)
+
+    def is_current(self, uid_validity: int, mod_sequence: int) -> bool:
+        """True if the counts reflect the given mailbox state.
+
+        Args:
+            uid_validity: The UID validity value of the mailbox.
+            mod_sequence: The highest mod-sequence of the mailbox.
+
+        """
+        return self.uid_validity == uid_validity \
+            and self.mod_sequence == mod_sequence
+
+    def reset(self, uid_validity: int, mod_sequence: int,
+              messages: Iterable[Tuple[int, bool, bool]] = ()) -> None:
+        """Discard all counts and rebuild them from the given messages.
+
+        Args:
+            uid_validity: The UID validity value of the mailbox.
+            mod_sequence: The highest mod-sequence of the mailbox.
+            messages: The UID, ``\\Seen``, and ``\\Recent`` of each message.
+
+        """
+        self.uid_validity = uid_validity
+        self.mod_sequence = mod_sequence
+        self._exists = self._recent = self._unseen = 0
+        self._first_unseen = self._first_unseen_uid = 0
+        self.add(sorted(messages))
+
+    def add(self, messages: Iterable[Tuple[int, bool, bool]]) -> None:
+        """Add messages to the counts, in order of UID. Each UID must be
+        higher than any UID already counted.
+
+        Args:
+            messages: The UID, ``\\Seen``, and ``\\Recent`` of each message.
+
+        """
+        for uid, seen, recent in messages:
+            self._exists += 1
+            if recent:
+                self._recent += 1
+            if not seen:
+                self._unseen += 1
+                if not self._first_unseen_uid:
+                    self._first_unseen_uid = uid
+                    self._first_unseen = self._exists
+
+    def remove(self, messages: Iterable[Tuple[int, bool, bool]]) -> bool:
+        """Remove counted messages from the counts. False is returned if the
+        first message without ``\\Seen`` was removed and can no longer be
+        found from the counts.
+
+        Args:
+            messages: The UID, ``\\Seen``, and ``\\Recent`` of each message.
+
+        """
+        first_uid = self._first_unseen_uid
+        current = True
+        for uid, seen, recent in messages:
+            self._exists -= 1
+            if recent:
+                self._recent -= 1
+            if not seen:
+                self._unseen -= 1
+                current = current and uid != first_uid
+            if uid < first_uid:
+                self._first_unseen -= 1
+        return self._check_unseen(current)
+
+    def set_seen(self, messages: Iterable[Tuple[int, bool]]) -> bool:
+        """Update counted messages whose ``\\Seen`` flag has changed. False is
+        returned if the first message without ``\\Seen`` changed and can no
+        longer be found from the counts.
+
+        Args:
+            messages: The UID and new ``\\Seen`` value of each message.
+
+        """
+        first_uid = self._first_unseen_uid
+        current = True
+        for uid, seen in messages:
+            if seen:
+                self._unseen -= 1
+                current = current and uid != first_uid
+            else:
+                self._unseen += 1
+                current = current and 0 < first_uid < uid
+        return self._check_unseen(current)
+
+    def claim_recent(self) -> None:
+        """Remove the ``\\Recent`` flag from every message."""
+        self._recent = 0
+
+    def _check_unseen(self, current: bool) -> bool:
+        if not self._unseen:
+            self._first_unseen = self._first_unseen_uid = 0
+            return True
+        return current
+
+    @classmethod
+    def _read_header(cls: Type[_CT], base_dir: str, line: str) -> _CT:
+        data = line.split()
+        if not data or data[0] != '1':
+            return cls.get_default(base_dir)
+        fields = {field[0]: int(field[1:]) for field in data[1:]}
+        counts = (fields.get('E', 0), fields.get('R', 0), fields.get('U', 0),
+                  fields.get('F') or None)
+        return cls(base_dir, fields.get('V', 0), fields.get('M', 0), counts,
+                   fields.get('N', 0))
+
+    def _build_header(self) -> str:
+        return ''.join(['1 V', str(self.uid_validity),
+                        ' M', str(self.mod_sequence),
+                        ' E', str(self._exists), ' R', str(self._recent),
+                        ' U', str(self._unseen), ' F', str(self._first_unseen),
+                        ' N', str(self._first_unseen_uid),
+                        '\r\n'])
+
+    @classmethod
+    def get_file(cls) -> str:
+        return cls.FILE_NAME
+
+    @classmethod
+    def get_lock(cls) -> str:
+        return cls.LOCK_FILE
+
+    def get_dir(self) -> str:
+        return self._base_dir
+
+    @classmethod
+    def get_default(cls: Type[_CT], base_dir: str) -> _CT:
+        return cls(base_dir)
+
+    def write(self, fp: IO[str]) -> None:
+        fp.write(self._build_header())
+
+    @classmethod
+    def open(cls: Type[_CT], base_dir: str, fp: IO[str]) -> _CT:
+        header = fp.readline()
+        return cls._read_header(base_dir, header)
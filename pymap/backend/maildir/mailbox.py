@@ -2,9 +2,11 @@
 import errno
 import os
 import os.path
+import shutil
 from datetime import datetime
 from mailbox import Maildir as _Maildir, MaildirMessage  # type: ignore
-from typing import Sequence, Dict, Optional, FrozenSet, Iterable, AsyncIterable
+from typing import Sequence, Dict, Optional, FrozenSet, Iterable, \
+    AbstractSet, AsyncIterable, Callable, List, Tuple, Mapping
 
 from pymap.concurrent import ReadWriteLock
 from pymap.context import subsystem
@@ -16,11 +18,15 @@ from pymap.mailbox import MailboxSnapshot
 from pymap.parsing.specials import FetchRequirement
 from pymap.parsing.specials.flag import Flag, Seen
 from pymap.selected import SelectedSet, SelectedMailbox
+from pymap.spool import SpooledLiteral
+from pymap.textindex import message_terms
 
+from .counters import MaildirCounters
 from .flags import MaildirFlags
 from .io import NoChanges
 from .layout import MaildirLayout
 from .subscriptions import Subscriptions
+from .textindex import MaildirTextIndex
 from .uidlist import Record, UidList
 from ..mailbox import MailboxDataInterface, MailboxSetInterface, \
     Message as _Message
@@ -61,6 +67,137 @@ class Maildir(_Maildir):
         msg.set_date(os.path.getmtime(os.path.join(self._path, subpath)))
         return msg
 
+    def get_message_size(self, key: str) -> int:
+        """Like :meth:`.get_message_metadata` but only the size of the
+        message file is returned, without reading the message contents.
+
+        """
+        subpath = self._lookup(key)  # type: ignore
+        return os.path.getsize(os.path.join(self._path, subpath))
+
+    def get_message_info(self, key: str) -> str:
+        """Like :meth:`.get_message_metadata` but only the
+        :meth:`~mailbox.MaildirMessage.get_info` value is returned, which is
+        read from the message filename without accessing the message file.
+
+        """
+        name = os.path.basename(self._lookup(key))  # type: ignore
+        if self.colon in name:
+            return name.rsplit(self.colon, 1)[-1]
+        return ''
+
+    def add_spooled(self, spooled: SpooledLiteral,
+                    msg: MaildirMessage) -> Optional[str]:
+        """Like :meth:`~mailbox.Maildir.add`, but the message contents are
+        moved into the ``tmp`` subdirectory from the spooled literal with
+        :func:`os.rename`, rather than written.
+
+        Args:
+            spooled: The spooled message contents.
+            msg: The message metadata.
+
+        Returns:
+            The new message key, or ``None`` if the spooled literal could not
+            be moved, e.g. because it is on another filesystem.
+
+        """
+        tmp_file = self._create_tmp()  # type: ignore
+        tmp_file.close()
+        if not spooled.claim(tmp_file.name):
+            os.remove(tmp_file.name)
+            return None
+        uniq = os.path.basename(tmp_file.name).split(self.colon)[0]
+        suffix = self.colon + msg.get_info()
+        if suffix == self.colon:
+            suffix = ''
+        dest = os.path.join(self._path, msg.get_subdir(), uniq + suffix)
+        os.utime(tmp_file.name,
+                 (os.path.getatime(tmp_file.name), msg.get_date()))
+        os.rename(tmp_file.name, dest)
+        return uniq
+
+    def add_link(self, path: str, msg: MaildirMessage) -> str:
+        """Like :meth:`~mailbox.Maildir.add`, but the message contents are
+        hard-linked from an existing message file, rather than written. The
+        file is copied instead if it cannot be linked, e.g. because it is on
+        another filesystem.
+
+        Args:
+            path: The path to the existing message file.
+            msg: The message metadata.
+
+        Returns:
+            The new message key.
+
+        Raises:
+            FileNotFoundError: The existing message file was removed.
+
+        """
+        tmp_file = self._create_tmp()  # type: ignore
+        tmp_file.close()
+        uniq = os.path.basename(tmp_file.name).split(self.colon)[0]
+        suffix = self.colon + msg.get_info()
+        if suffix == self.colon:
+            suffix = ''
+        dest = os.path.join(self._path, msg.get_subdir(), uniq + suffix)
+        try:
+            os.link(path, dest)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            shutil.copy2(path, dest)
+        finally:
+            os.remove(tmp_file.name)
+        return uniq
+
+    def add_move(self, path: str, msg: MaildirMessage) -> str:
+        """Like :meth:`~mailbox.Maildir.add`, but the existing message file
+        is moved with :func:`os.rename`, rather than written. The file is
+        copied and removed instead if it cannot be renamed, e.g. because it is
+        on another filesystem.
+
+        Args:
+            path: The path to the existing message file.
+            msg: The message metadata.
+
+        Returns:
+            The new message key.
+
+        Raises:
+            FileNotFoundError: The existing message file was removed.
+
+        """
+        tmp_file = self._create_tmp()  # type: ignore
+        tmp_file.close()
+        uniq = os.path.basename(tmp_file.name).split(self.colon)[0]
+        suffix = self.colon + msg.get_info()
+        if suffix == self.colon:
+            suffix = ''
+        dest = os.path.join(self._path, msg.get_subdir(), uniq + suffix)
+        try:
+            os.rename(path, dest)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            shutil.copy2(path, dest)
+            os.remove(path)
+        finally:
+            os.remove(tmp_file.name)
+        return uniq
+
+    def get_message_path(self, key: str) -> str:
+        """Return the path to the file containing the message.
+
+        Args:
+            key: The message key.
+
+        Raises:
+            KeyError: The message key was not found.
+
+        """
+        subpath = self._lookup(key)  # type: ignore
+        return os.path.join(self._path, subpath)
+
     def update_metadata(self, key: str, msg: MaildirMessage) -> None:
         """Uses :func:`os.rename` to atomically update the message filename
         based on :meth:`~mailbox.MaildirMessage.get_info`.
@@ -88,9 +225,19 @@ class Message(_Message):
 
     @property
     def maildir_msg(self) -> MaildirMessage:
-        flag_str = self.maildir_flags.to_maildir(self.permanent_flags)
         msg_bytes = bytes(self.get_body(binary=True))
-        maildir_msg = MaildirMessage(msg_bytes)
+        return self._set_metadata(MaildirMessage(msg_bytes))
+
+    @property
+    def maildir_metadata(self) -> MaildirMessage:
+        """Like :attr:`.maildir_msg` but the message contents are not
+        included.
+
+        """
+        return self._set_metadata(MaildirMessage())
+
+    def _set_metadata(self, maildir_msg: MaildirMessage) -> MaildirMessage:
+        flag_str = self.maildir_flags.to_maildir(self.permanent_flags)
         maildir_msg.set_flags(flag_str)
         maildir_msg.set_subdir('new' if self.recent else 'cur')
         if self.internal_date is not None:
@@ -100,17 +247,20 @@ class Message(_Message):
     @classmethod
     def from_maildir(cls, uid: int, maildir_msg: MaildirMessage,
                      maildir_flags: 'MaildirFlags',
-                     metadata_only: bool) -> 'Message':
+                     metadata_only: bool,
+                     mod_sequence: int = None) -> 'Message':
         flag_set = maildir_flags.from_maildir(maildir_msg.get_flags())
         recent = maildir_msg.get_subdir() == 'new'
         msg_dt = datetime.fromtimestamp(maildir_msg.get_date())
         if metadata_only:
             return cls(uid, flag_set, msg_dt, recent=recent,
-                       maildir_flags=maildir_flags)
+                       maildir_flags=maildir_flags,
+                       mod_sequence=mod_sequence)
         else:
             msg_data = bytes(maildir_msg)
             return cls.parse(uid, msg_data, flag_set, msg_dt, recent=recent,
-                             maildir_flags=maildir_flags)
+                             maildir_flags=maildir_flags,
+                             mod_sequence=mod_sequence)
 
 
 class MailboxData(MailboxDataInterface[Message]):
@@ -120,15 +270,19 @@ class MailboxData(MailboxDataInterface[Message]):
     filename_db = '.uid'
     filename_tmp_db = 'tmp.uid'
 
-    def __init__(self, name: str, maildir: Maildir, path: str) -> None:
+    def __init__(self, name: str, maildir: Maildir, path: str,
+                 text_index: bool = False) -> None:
         self._name = name
         self._maildir = maildir
         self._path = path
+        self._text_index: Optional[MaildirTextIndex] = \
+            MaildirTextIndex(path) if text_index else None
         self._uid_validity = 0
         self._next_uid = 0
         self._flags: Optional[MaildirFlags] = None
         self._messages_lock = subsystem.get().new_rwlock()
-        self._selected_set = SelectedSet()
+        self._selected_set = SelectedSet.for_key(
+            os.fsencode(os.path.abspath(path)))
 
     @property
     def name(self) -> str:
@@ -164,28 +318,195 @@ class MailboxData(MailboxDataInterface[Message]):
     async def update_selected(self, selected: SelectedMailbox) \
             -> SelectedMailbox:
         selected.uid_validity = self.uid_validity
-        all_messages = [msg async for msg in self.messages()]
+        async with UidList.with_read(self._path) as uidl:
+            mod_sequence = uidl.highest_mod_sequence
+            records = list(uidl.records)
+        all_messages = [msg async for msg in self._messages(records)]
+        selected.mod_sequence = mod_sequence
         selected.set_messages(all_messages)
         return selected
 
-    async def add(self, append_msg: AppendMessage, recent: bool = False) \
-            -> Message:
-        message = Message.parse(0, append_msg.message, append_msg.flag_set,
-                                append_msg.when, recent=True,
-                                maildir_flags=self.maildir_flags)
+    async def add_many(self, append_msgs: Sequence[AppendMessage],
+                       recent: bool = False) -> Sequence[Message]:
+        if not append_msgs:
+            return []
+        messages = [Message.parse(0, append_msg.message, append_msg.flag_set,
+                                  append_msg.when, recent=True,
+                                  maildir_flags=self.maildir_flags)
+                    for append_msg in append_msgs]
+        filenames: List[Tuple[str, bool, bool]] = []
         async with self.messages_lock.write_lock():
-            maildir_msg = message.maildir_msg
-            if recent:
-                maildir_msg.set_subdir('new')
-            key = self._maildir.add(maildir_msg)
-            filename = key + ':' + maildir_msg.get_info()
+            for append_msg, message in zip(append_msgs, messages):
+                key: Optional[str] = None
+                if append_msg.spooled is not None:
+                    maildir_msg = message.maildir_metadata
+                    if recent:
+                        maildir_msg.set_subdir('new')
+                    key = self._maildir.add_spooled(append_msg.spooled,
+                                                    maildir_msg)
+                if key is None:
+                    maildir_msg = message.maildir_msg
+                    if recent:
+                        maildir_msg.set_subdir('new')
+                    key = self._maildir.add(maildir_msg)
+                filenames.append((key + ':' + maildir_msg.get_info(),
+                                  Seen in message.permanent_flags,
+                                  maildir_msg.get_subdir() == 'new'))
+        first_uid, mod_seq = await self._add_records(filenames)
+        if self._text_index is not None:
+            self._text_index.add(
+                (new_uid, message_terms(message))
+                for new_uid, message in enumerate(messages, first_uid))
+        added: List[Message] = []
+        for new_uid, message in enumerate(messages, first_uid):
+            msg_copy = message.copy(new_uid)
+            msg_copy.recent = recent
+            msg_copy.mod_sequence = mod_seq
+            added.append(msg_copy)
+        return added
+
+    async def _add_records(self, filenames: Sequence[Tuple[str, bool, bool]]) \
+            -> Tuple[int, int]:
         async with UidList.with_write(self._path) as uidl:
-            new_rec = Record(uidl.next_uid, {}, filename)
-            uidl.next_uid += 1
-            uidl.set(new_rec)
-        msg_copy = message.copy(new_rec.uid)
-        msg_copy.recent = recent
-        return msg_copy
+            prev_mod_seq = uidl.highest_mod_sequence
+            uidl.highest_mod_sequence = mod_seq = prev_mod_seq + 1
+            first_uid = uidl.next_uid
+            for new_uid, (filename, _, _) in enumerate(filenames, first_uid):
+                uidl.set(Record(new_uid, {'M': mod_seq}, filename))
+            uidl.next_uid = first_uid + len(filenames)
+
+        def add_counts(counts: MaildirCounters) -> bool:
+            counts.add((new_uid, seen, recent) for new_uid, (_, seen, recent)
+                       in enumerate(filenames, first_uid))
+            return True
+        await self._update_counters(prev_mod_seq, mod_seq, add_counts)
+        return first_uid, mod_seq
+
+    async def _update_counters(self, mod_sequence: int, new_mod_sequence: int,
+                               update: Callable[[MaildirCounters], bool]) \
+            -> None:
+        # Counts that did not reflect the previous mod-sequence, or that the
+        # update could not be applied to, are left stale to be rebuilt by the
+        # next snapshot.
+        async with MaildirCounters.with_write(self._path) as counts:
+            if not counts.is_current(self.uid_validity, mod_sequence):
+                raise NoChanges()
+            counts.mod_sequence = new_mod_sequence
+            if not update(counts):
+                raise NoChanges()
+
+    async def _build_counters(self) -> MaildirCounters:
+        async with UidList.with_read(self._path) as uidl:
+            mod_sequence = uidl.highest_mod_sequence
+            records = list(uidl.records)
+        messages = [(msg.uid, Seen in msg.permanent_flags, msg.recent)
+                    async for msg in self._messages(records)]
+        async with MaildirCounters.with_write(self._path) as counts:
+            counts.reset(self.uid_validity, mod_sequence, messages)
+        return counts
+
+    async def copy_to(self, uids: Sequence[int],
+                      destination: MailboxDataInterface[Message],
+                      recent: bool = False) -> Sequence[Tuple[int, int]]:
+        if not isinstance(destination, MailboxData):
+            return await super().copy_to(uids, destination, recent)
+        async with UidList.with_read(self._path) as uidl:
+            records = uidl.get_all(uids)
+        found: List[Tuple[int, str, FrozenSet[Flag]]] = []
+        async with self.messages_lock.read_lock():
+            for uid, rec in records.items():
+                try:
+                    path = self._maildir.get_message_path(rec.key)
+                    maildir_msg = self._maildir.get_message_metadata(rec.key)
+                except (KeyError, FileNotFoundError):
+                    continue
+                flag_set = self.maildir_flags.from_maildir(
+                    maildir_msg.get_flags())
+                found.append((uid, path, flag_set))
+        dest_flags = destination.maildir_flags
+        copied: List[Tuple[int, Tuple[str, bool, bool]]] = []
+        async with destination.messages_lock.write_lock():
+            for uid, path, flag_set in found:
+                maildir_msg = MaildirMessage()
+                maildir_msg.set_flags(dest_flags.to_maildir(flag_set))
+                maildir_msg.set_subdir('new' if recent else 'cur')
+                try:
+                    key = destination._maildir.add_link(path, maildir_msg)
+                except FileNotFoundError:
+                    continue
+                copied.append((uid, (key + ':' + maildir_msg.get_info(),
+                                     Seen in flag_set, recent)))
+        if not copied:
+            return []
+        first_uid, _ = await destination._add_records(
+            [filename for _, filename in copied])
+        ret = [(uid, new_uid) for new_uid, (uid, _) in enumerate(
+            copied, first_uid)]
+        self._copy_terms(ret, destination)
+        return ret
+
+    async def move_to(self, uids: Sequence[int],
+                      destination: MailboxDataInterface[Message],
+                      recent: bool = False) -> Sequence[Tuple[int, int]]:
+        if not isinstance(destination, MailboxData) \
+                or destination._path == self._path:
+            return await super().move_to(uids, destination, recent)
+        async with UidList.with_write(self._path) as uidl:
+            records = uidl.get_all(uids)
+            if not records:
+                return []
+            prev_mod_seq = uidl.highest_mod_sequence
+            uidl.highest_mod_sequence = mod_seq = prev_mod_seq + 1
+        found: List[Tuple[int, str, FrozenSet[Flag]]] = []
+        removed: List[Tuple[int, bool, bool]] = []
+        async with self.messages_lock.read_lock():
+            for uid, rec in records.items():
+                try:
+                    path = self._maildir.get_message_path(rec.key)
+                    maildir_msg = self._maildir.get_message_metadata(rec.key)
+                except (KeyError, FileNotFoundError):
+                    continue
+                flag_set = self.maildir_flags.from_maildir(
+                    maildir_msg.get_flags())
+                found.append((uid, path, flag_set))
+                removed.append((uid, Seen in flag_set,
+                                maildir_msg.get_subdir() == 'new'))
+        dest_flags = destination.maildir_flags
+        moved: List[Tuple[int, Tuple[str, bool, bool]]] = []
+        async with destination.messages_lock.write_lock():
+            for uid, path, flag_set in found:
+                maildir_msg = MaildirMessage()
+                maildir_msg.set_flags(dest_flags.to_maildir(flag_set))
+                maildir_msg.set_subdir('new' if recent else 'cur')
+                try:
+                    key = destination._maildir.add_move(path, maildir_msg)
+                except FileNotFoundError:
+                    continue
+                moved.append((uid, (key + ':' + maildir_msg.get_info(),
+                                    Seen in flag_set, recent)))
+        await self._update_counters(
+            prev_mod_seq, mod_seq,
+            lambda counts: len(removed) == len(records)
+            and counts.remove(removed))
+        if not moved:
+            return []
+        first_uid, _ = await destination._add_records(
+            [filename for _, filename in moved])
+        ret = [(uid, new_uid) for new_uid, (uid, _) in enumerate(
+            moved, first_uid)]
+        self._copy_terms(ret, destination)
+        if self._text_index is not None:
+            self._text_index.remove(uid for uid, _ in ret)
+        return ret
+
+    def _copy_terms(self, uids: Sequence[Tuple[int, int]],
+                    destination: 'MailboxData') -> None:
+        if self._text_index is None or destination._text_index is None:
+            return
+        terms = self._text_index.get(uid for uid, _ in uids)
+        destination._text_index.add(
+            (dest_uid, terms[uid]) for uid, dest_uid in uids
+            if uid in terms)
 
     async def get(self, uid: int, cached_msg: CachedMessage = None,
                   requirement: FetchRequirement = FetchRequirement.METADATA) \
@@ -195,7 +516,7 @@ class MailboxData(MailboxDataInterface[Message]):
             if uid < 1 or uid >= next_uid:
                 raise IndexError(uid)
             try:
-                key = uidl.get(uid).key
+                rec = uidl.get(uid)
             except KeyError:
                 if cached_msg is not None:
                     return Message(cached_msg.uid, cached_msg.permanent_flags,
@@ -206,9 +527,9 @@ class MailboxData(MailboxDataInterface[Message]):
         async with self.messages_lock.read_lock():
             try:
                 if metadata_only:
-                    maildir_msg = self._maildir.get_message_metadata(key)
+                    maildir_msg = self._maildir.get_message_metadata(rec.key)
                 else:
-                    maildir_msg = self._maildir.get_message(key)
+                    maildir_msg = self._maildir.get_message(rec.key)
             except (KeyError, FileNotFoundError):
                 if cached_msg is not None:
                     return Message(cached_msg.uid, cached_msg.permanent_flags,
@@ -216,74 +537,192 @@ class MailboxData(MailboxDataInterface[Message]):
                 else:
                     return None
             return Message.from_maildir(uid, maildir_msg, self.maildir_flags,
-                                        metadata_only)
+                                        metadata_only, rec.mod_sequence)
 
-    async def delete(self, uids: Iterable[int]) -> None:
+    async def get_many(
+            self, uids: Sequence[int],
+            requirement: FetchRequirement = FetchRequirement.METADATA,
+            cached_msgs: Mapping[int, CachedMessage] = None) \
+            -> Sequence[Message]:
         async with UidList.with_read(self._path) as uidl:
+            next_uid = uidl.next_uid
+            for uid in uids:
+                if uid < 1 or uid >= next_uid:
+                    raise IndexError(uid)
             records = uidl.get_all(uids)
+        metadata_only = (requirement == FetchRequirement.METADATA)
+        maildir_flags = self.maildir_flags
+        ret: List[Message] = []
+        async with self.messages_lock.read_lock():
+            for uid in uids:
+                rec = records.get(uid)
+                try:
+                    if rec is None:
+                        raise KeyError(uid)
+                    elif metadata_only:
+                        maildir_msg = self._maildir.get_message_metadata(
+                            rec.key)
+                    else:
+                        maildir_msg = self._maildir.get_message(rec.key)
+                except (KeyError, FileNotFoundError):
+                    if cached_msgs and uid in cached_msgs:
+                        cached_msg = cached_msgs[uid]
+                        ret.append(Message(cached_msg.uid,
+                                           cached_msg.permanent_flags,
+                                           cached_msg.internal_date,
+                                           expunged=True))
+                    continue
+                ret.append(Message.from_maildir(
+                    uid, maildir_msg, maildir_flags, metadata_only,
+                    rec.mod_sequence))
+        return ret
+
+    async def delete(self, uids: Iterable[int]) -> None:
+        async with UidList.with_write(self._path) as uidl:
+            records = uidl.get_all(uids)
+            if not records:
+                raise NoChanges()
+            prev_mod_seq = uidl.highest_mod_sequence
+            uidl.highest_mod_sequence = mod_seq = prev_mod_seq + 1
+        if not records:
+            return
+        maildir_flags = self.maildir_flags
+        removed: List[Tuple[int, bool, bool]] = []
         async with self.messages_lock.write_lock():
             for uid, rec in records.items():
                 try:
+                    maildir_msg = self._maildir.get_message_metadata(rec.key)
                     self._maildir.remove(rec.key)
+                except (KeyError, FileNotFoundError):
+                    continue
+                flag_set = maildir_flags.from_maildir(maildir_msg.get_flags())
+                removed.append((uid, Seen in flag_set,
+                                maildir_msg.get_subdir() == 'new'))
+        await self._update_counters(
+            prev_mod_seq, mod_seq,
+            lambda counts: len(removed) == len(records)
+            and counts.remove(removed))
+        if self._text_index is not None:
+            self._text_index.remove(records.keys())
+
+    async def find_sizes(self, uids: Sequence[int]) \
+            -> Optional[Mapping[int, int]]:
+        async with UidList.with_read(self._path) as uidl:
+            records = uidl.get_all(uids)
+        ret: Dict[int, int] = {}
+        async with self.messages_lock.read_lock():
+            for uid, rec in records.items():
+                try:
+                    ret[uid] = self._maildir.get_message_size(rec.key)
                 except (KeyError, FileNotFoundError):
                     pass
+        return ret
+
+    async def find_text(self, uids: Sequence[int], value: bytes) \
+            -> Optional[AbstractSet[int]]:
+        if self._text_index is None:
+            return None
+        return self._text_index.find(uids, value)
 
     async def claim_recent(self, selected: SelectedMailbox) -> None:
         async with self.messages_lock.write_lock():
             keys = self._maildir.claim_new()
         async with UidList.with_read(self._path) as uidl:
+            mod_seq = uidl.highest_mod_sequence
             for rec in uidl.records:
                 if rec.key in keys:
                     selected.session_flags.add_recent(rec.uid)
 
+        def claim_recent(counts: MaildirCounters) -> bool:
+            counts.claim_recent()
+            return True
+        await self._update_counters(mod_seq, mod_seq, claim_recent)
+
     async def update_flags(self, messages: Iterable[Message],
                            flag_set: FrozenSet[Flag], mode: FlagOp) -> None:
         msgs_map = {msg.uid: msg for msg in messages}
         async with UidList.with_read(self._path) as uidl:
             records = uidl.get_all(msgs_map.keys())
+        maildir_flags = self.maildir_flags
+        changed: List[int] = []
+        seen_changed: List[Tuple[int, bool]] = []
         async with self.messages_lock.write_lock():
             for uid, rec in records.items():
                 key = rec.key
                 msg = msgs_map[uid]
-                msg.permanent_flags = mode.apply(msg.permanent_flags, flag_set)
-                flag_str = self.maildir_flags.to_maildir(msg.permanent_flags)
                 try:
                     maildir_msg = self._maildir.get_message_metadata(key)
                 except (KeyError, FileNotFoundError):
                     continue
+                old_flags = maildir_flags.from_maildir(maildir_msg.get_flags())
+                msg.permanent_flags = mode.apply(old_flags, flag_set)
+                if msg.permanent_flags == old_flags:
+                    continue
+                flag_str = maildir_flags.to_maildir(msg.permanent_flags)
                 maildir_msg.set_flags(flag_str)
                 maildir_msg.set_subdir('new' if msg.recent else 'cur')
                 try:
                     self._maildir.update_metadata(key, maildir_msg)
                 except (KeyError, FileNotFoundError):
-                    pass
+                    continue
+                changed.append(uid)
+                seen = Seen in msg.permanent_flags
+                if seen != (Seen in old_flags):
+                    seen_changed.append((uid, seen))
+        if not changed:
+            return
+        # The new mod-sequence is only written after the flags, so that a
+        # session never sees it without the flag changes.
+        async with UidList.with_write(self._path) as uidl:
+            prev_mod_seq = uidl.highest_mod_sequence
+            uidl.highest_mod_sequence = mod_seq = prev_mod_seq + 1
+            for rec in uidl.get_all(changed).values():
+                fields = dict(rec.fields, M=mod_seq)
+                uidl.set(Record(rec.uid, fields, rec.filename))
+        for uid in changed:
+            msgs_map[uid].mod_sequence = mod_seq
+        await self._update_counters(
+            prev_mod_seq, mod_seq,
+            lambda counts: counts.set_seen(seen_changed))
 
     async def cleanup(self) -> None:
         self._maildir.clean()
         keys = await self._get_keys()
+        removed: List[int] = []
         async with UidList.with_write(self._path) as uidl:
             for rec in list(uidl.records):
                 key = rec.key
                 info = keys.get(key)
                 if info is None:
                     uidl.remove(rec.uid)
+                    uidl.highest_mod_sequence += 1
+                    removed.append(rec.uid)
                 else:
                     filename = key + ':' + info
                     new_rec = Record(rec.uid, rec.fields, filename)
                     uidl.set(new_rec)
+        if self._text_index is not None and removed:
+            self._text_index.remove(removed)
+        await self._build_counters()
 
     async def messages(self) -> AsyncIterable[Message]:
         async with UidList.with_read(self._path) as uidl:
-            uids = {rec.uid: rec.key for rec in uidl.records}
+            records = list(uidl.records)
+        async for msg in self._messages(records):
+            yield msg
+
+    async def _messages(self, records: Iterable[Record]) \
+            -> AsyncIterable[Message]:
         async with self.messages_lock.read_lock():
-            for uid, key in uids.items():
+            for rec in records:
                 try:
-                    maildir_msg = self._maildir.get_message_metadata(key)
+                    maildir_msg = self._maildir.get_message_metadata(rec.key)
                 except (KeyError, FileNotFoundError):
                     pass
                 else:
                     yield Message.from_maildir(
-                        uid, maildir_msg, self.maildir_flags, True)
+                        rec.uid, maildir_msg, self.maildir_flags, True,
+                        rec.mod_sequence)
 
     async def reset(self) -> 'MailboxData':
         keys = await self._get_keys()
@@ -292,52 +731,61 @@ class MailboxData(MailboxDataInterface[Message]):
                 keys.pop(rec.key, None)
             if not keys:
                 raise NoChanges()
+            uidl.highest_mod_sequence = mod_seq = \
+                uidl.highest_mod_sequence + 1
             for key, info in keys.items():
                 filename = key + ':' + info
-                new_rec = Record(uidl.next_uid, {}, filename)
+                new_rec = Record(uidl.next_uid, {'M': mod_seq}, filename)
                 uidl.next_uid += 1
                 uidl.set(new_rec)
         self._uid_validity = uidl.uid_validity
         self._next_uid = uidl.next_uid
+        if self._text_index is not None:
+            self._text_index.reset(self._uid_validity)
         return self
 
     async def snapshot(self) -> MailboxSnapshot:
-        exists = 0
-        recent = 0
-        unseen = 0
-        first_unseen: Optional[int] = None
         next_uid = self._next_uid
-        async for msg in self.messages():
-            exists += 1
-            if msg.recent:
-                recent += 1
-            if Seen not in msg.permanent_flags:
-                unseen += 1
-                if first_unseen is None:
-                    first_unseen = exists
+        async with UidList.with_open(self._path) as uidl:
+            mod_sequence = uidl.highest_mod_sequence
+        async with MaildirCounters.with_open(self._path) as counts:
+            pass
+        if not counts.is_current(self.uid_validity, mod_sequence):
+            counts = await self._build_counters()
+            mod_sequence = counts.mod_sequence
+        exists, recent, unseen, first_unseen = counts.counts
         return MailboxSnapshot(self.name, self.readonly, self.uid_validity,
                                self.permanent_flags, self.session_flags,
-                               exists, recent, unseen, first_unseen, next_uid)
+                               exists, recent, unseen, first_unseen, next_uid,
+                               mod_sequence)
 
     async def _get_keys(self) -> Dict[str, str]:
         keys: Dict[str, str] = {}
         async with self.messages_lock.read_lock():
             for key in self._maildir.keys():
                 try:
-                    msg = self._maildir.get_message_metadata(key)
-                except (KeyError, FileNotFoundError):
+                    keys[key] = self._maildir.get_message_info(key)
+                except KeyError:
                     pass
-                else:
-                    keys[key] = msg.get_info()
         return keys
 
 
 class MailboxSet(MailboxSetInterface[MailboxData]):
+    """The set of mailboxes of a maildir login.
+
+    Args:
+        maildir: The maildir of the inbox.
+        layout: The layout of the maildir folders.
+        text_index: Whether each mailbox keeps a full-text index.
+
+    """
 
-    def __init__(self, maildir: Maildir, layout: MaildirLayout) -> None:
+    def __init__(self, maildir: Maildir, layout: MaildirLayout,
+                 text_index: bool = False) -> None:
         super().__init__()
         self._layout = layout
-        self._inbox = MailboxData('INBOX', maildir, layout.path)
+        self._text_index = text_index
+        self._inbox = MailboxData('INBOX', maildir, layout.path, text_index)
         self._cache: Dict[str, 'MailboxData'] = {}
 
     @property
@@ -370,7 +818,7 @@ class MailboxSet(MailboxSetInterface[MailboxData]):
                 mbx = self._cache[name]
             else:
                 path = self._layout.get_path(name, self.delimiter)
-                mbx = MailboxData(name, maildir, path)
+                mbx = MailboxData(name, maildir, path, self._text_index)
                 self._cache[name] = mbx
             return await mbx.reset()
 
@@ -380,7 +828,7 @@ class MailboxSet(MailboxSetInterface[MailboxData]):
         except FileExistsError:
             raise MailboxConflict(name)
         path = self._layout.get_path(name, self.delimiter)
-        mbx = MailboxData(name, maildir, path)
+        mbx = MailboxData(name, maildir, path, self._text_index)
         self._cache[name] = mbx
         return await mbx.reset()
 
@@ -411,5 +859,6 @@ class MailboxSet(MailboxSetInterface[MailboxData]):
         else:
             maildir = self._layout.rename_folder(before, after, self.delimiter)
             after_path = self._layout.get_path(after, self.delimiter)
-            after_mbx = MailboxData(after, maildir, after_path)
+            after_mbx = MailboxData(after, maildir, after_path,
+                                    self._text_index)
         return await after_mbx.reset()
@@ -0,0 +1,139 @@
+
+import os.path
+import sqlite3
+from contextlib import closing
+from typing import AbstractSet, ClassVar, Dict, FrozenSet, Iterable, \
+    Mapping, Set, Tuple
+
+from pymap.textindex import value_terms
+
+__all__ = ['MaildirTextIndex']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS validity (value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS messages (uid INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS terms (
+    term BLOB NOT NULL,
+    uid INTEGER NOT NULL,
+    PRIMARY KEY (term, uid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS terms_uid ON terms (uid);
+"""
+
+
+class MaildirTextIndex:
+    """Maintains the full-text index of a mailbox in a SQLite database file,
+    stored alongside the UID list file.
+
+    See Also:
+        :mod:`pymap.textindex`
+
+    Args:
+        base_dir: The directory of the file.
+
+    """
+
+    #: The index file name, stored in the mailbox directory.
+    FILE_NAME: ClassVar[str] = 'pymap-textindex.db'
+
+    __slots__ = ['_path']
+
+    def __init__(self, base_dir: str) -> None:
+        super().__init__()
+        self._path = os.path.join(base_dir, self.FILE_NAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, timeout=10.0)
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def reset(self, uid_validity: int) -> None:
+        """Discard the index if it was built for a different UID validity
+        value, since its UIDs no longer refer to the same messages.
+
+        Args:
+            uid_validity: The current UID validity value of the mailbox.
+
+        """
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute('SELECT value FROM validity').fetchone()
+            if row is not None and row[0] == uid_validity:
+                return
+            conn.execute('DELETE FROM validity')
+            conn.execute('DELETE FROM messages')
+            conn.execute('DELETE FROM terms')
+            conn.execute('INSERT INTO validity (value) VALUES (?)',
+                         (uid_validity, ))
+
+    def add(self, messages: Iterable[Tuple[int, FrozenSet[bytes]]]) -> None:
+        """Add messages to the index.
+
+        Args:
+            messages: The UID and index terms of each message.
+
+        """
+        with closing(self._connect()) as conn, conn:
+            for uid, terms in messages:
+                conn.execute('INSERT OR IGNORE INTO messages (uid) '
+                             'VALUES (?)', (uid, ))
+                conn.executemany('INSERT OR IGNORE INTO terms (term, uid) '
+                                 'VALUES (?, ?)',
+                                 ((term, uid) for term in terms))
+
+    def get(self, uids: Iterable[int]) -> Mapping[int, FrozenSet[bytes]]:
+        """Return the index terms of the messages. Messages that have not been
+        indexed are omitted.
+
+        Args:
+            uids: The message UIDs.
+
+        """
+        ret: Dict[int, Set[bytes]] = {}
+        with closing(self._connect()) as conn:
+            for uid in uids:
+                row = conn.execute('SELECT uid FROM messages WHERE uid = ?',
+                                   (uid, )).fetchone()
+                if row is None:
+                    continue
+                cur = conn.execute('SELECT term FROM terms WHERE uid = ?',
+                                   (uid, ))
+                ret[uid] = {bytes(term) for term, in cur}
+        return {uid: frozenset(terms) for uid, terms in ret.items()}
+
+    def remove(self, uids: Iterable[int]) -> None:
+        """Remove messages from the index.
+
+        Args:
+            uids: The message UIDs.
+
+        """
+        with closing(self._connect()) as conn, conn:
+            for uid in uids:
+                conn.execute('DELETE FROM messages WHERE uid = ?', (uid, ))
+                conn.execute('DELETE FROM terms WHERE uid = ?', (uid, ))
+
+    def find(self, uids: Iterable[int], value: bytes) -> AbstractSet[int]:
+        """Return the subset of the given UIDs whose messages may contain the
+        value. Messages that have not been indexed are always included.
+
+        Args:
+            uids: The candidate message UIDs.
+            value: The search value.
+
+        """
+        terms = list(value_terms(value))
+        if not terms:
+            return set(uids)
+        matched: Set[int] = set()
+        indexed: Set[int] = set()
+        with closing(self._connect()) as conn:
+            conn.execute('CREATE TEMP TABLE search (term BLOB PRIMARY KEY)')
+            conn.executemany('INSERT OR IGNORE INTO search (term) '
+                             'VALUES (?)', ((term, ) for term in terms))
+            cur = conn.execute(
+                'SELECT terms.uid FROM terms JOIN search USING (term) '
+                'GROUP BY terms.uid HAVING COUNT(*) = ?', (len(terms), ))
+            matched.update(uid for uid, in cur)
+            cur = conn.execute('SELECT uid FROM messages')
+            indexed.update(uid for uid, in cur)
+        return {uid for uid in uids if uid in matched or uid not in indexed}
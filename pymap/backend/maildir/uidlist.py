@@ -33,6 +33,14 @@ class Record(NamedTuple):
         """The :class:`~mailbox.Maildir` key value."""
         return self.filename.split(':', 1)[0]
 
+    @property
+    def mod_sequence(self) -> int:
+        """The mod-sequence of the last change to the message. Records
+        written without one are given the lowest mod-sequence.
+
+        """
+        return int(self.fields.get('M', 1))
+
 
 class UidList(FileWriteable):
     """Maintains the file with UID mapping to maildir files.
@@ -42,6 +50,8 @@ class UidList(FileWriteable):
         uid_validity: The UID validity value.
         next_uid: The next assignable message UID value.
         global_uid: The 128-bit global mailbox UID.
+        highest_mod_sequence: The highest mod-sequence of any change to the
+            mailbox.
 
     """
 
@@ -52,12 +62,14 @@ class UidList(FileWriteable):
     LOCK_FILE: ClassVar[str] = 'dovecot-uidlist.lock'
 
     def __init__(self, base_dir: str, uid_validity: int,
-                 next_uid: int, global_uid: bytes = None) -> None:
+                 next_uid: int, global_uid: bytes = None,
+                 highest_mod_sequence: int = 1) -> None:
         super().__init__()
         self._base_dir = base_dir
         self.uid_validity = uid_validity
         self.next_uid = next_uid
         self.global_uid = global_uid or self._create_guid(base_dir)
+        self.highest_mod_sequence = highest_mod_sequence
         self._records: Dict[int, Record] = OrderedDict()
 
     @property
@@ -137,6 +149,7 @@ class UidList(FileWriteable):
         uid_validity: Optional[int] = None
         next_uid: Optional[int] = None
         global_uid: Optional[bytes] = None
+        highest_mod_sequence = 1
         for field in data[1:]:
             if field[0] == 'V':
                 uid_validity = int(field[1:])
@@ -144,9 +157,12 @@ class UidList(FileWriteable):
                 next_uid = int(field[1:])
             elif field[0] == 'G':
                 global_uid = cls._read_guid_hex(field[1:])
+            elif field[0] == 'M':
+                highest_mod_sequence = int(field[1:])
         if uid_validity is None or next_uid is None or global_uid is None:
             raise ValueError(line)
-        return cls(base_dir, uid_validity, next_uid, global_uid)
+        return cls(base_dir, uid_validity, next_uid, global_uid,
+                   highest_mod_sequence)
 
     def _create_guid(self, base_dir: str) -> bytes:
         ret = hashlib.sha256()
@@ -161,7 +177,8 @@ class UidList(FileWriteable):
     def _build_header(self) -> str:
         return ''.join(['3 V', str(self.uid_validity),
                         ' N', str(self.next_uid),
-                        ' G', self._get_guid_hex(), '\r\n'])
+                        ' G', self._get_guid_hex(),
+                        ' M', str(self.highest_mod_sequence), '\r\n'])
 
     @classmethod
     def get_file(cls) -> str:
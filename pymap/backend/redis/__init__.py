@@ -142,7 +142,7 @@ class Session(BaseSession[Message]):
         """
         redis = await create_redis(config.address)
         prefix = await cls._check_user(redis, config, credentials)
-        mailbox_set = MailboxSet(redis, prefix)
+        mailbox_set = MailboxSet(redis, prefix, config.text_index)
         try:
             await mailbox_set.add_mailbox('INBOX')
         except MailboxConflict:
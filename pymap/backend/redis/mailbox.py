@@ -2,7 +2,7 @@
 import asyncio
 from datetime import datetime
 from typing import Optional, Sequence, List, Dict, Tuple, FrozenSet, \
-    Iterable, Awaitable
+    Iterable, Mapping, AbstractSet
 
 from aioredis import Redis, MultiExecError, WatchVariableError  # type: ignore
 
@@ -15,11 +15,16 @@ from pymap.parsing.modutf7 import modutf7_encode, modutf7_decode
 from pymap.parsing.specials import FetchRequirement, SequenceSet
 from pymap.parsing.specials.flag import Flag, Deleted, Seen
 from pymap.selected import SelectedSet, SelectedMailbox
+from pymap.textindex import message_terms, value_terms
 
-from ..mailbox import Message, MailboxDataInterface, MailboxSetInterface
+from ..mailbox import Message, MailboxDataInterface, MailboxSetInterface, \
+    FIND_CHUNK_SIZE, FIND_BODY_CHUNK_SIZE
 
 __all__ = ['Message', 'MailboxData', 'MailboxSet']
 
+#: The number of commands queued by a mailbox snapshot.
+_SNAPSHOT_LEN = 6
+
 
 async def _delete_keys(redis: Redis, prefixes: Iterable[bytes]) -> None:
     for prefix in prefixes:
@@ -31,6 +36,19 @@ async def _delete_keys(redis: Redis, prefixes: Iterable[bytes]) -> None:
                 await redis.unlink(*keys)
 
 
+async def _delete_messages(redis: Redis, prefix: bytes,
+                           uids: Sequence[int]) -> None:
+    msg_prefixes = [prefix + b':msg:%d' % uid for uid in uids]
+    for uid, msg_prefix in zip(uids, msg_prefixes):
+        terms = await redis.smembers(msg_prefix + b':terms')
+        if terms:
+            multi = redis.multi_exec()
+            for term in terms:
+                multi.srem(prefix + b':fts:' + term, uid)
+            await multi.execute()
+    await _delete_keys(redis, msg_prefixes)
+
+
 async def _check_errors(multi) -> bool:
     # Prevents warning about exception never being retrieved.
     errors = await asyncio.gather(*multi._results, return_exceptions=True)
@@ -44,13 +62,14 @@ class MailboxData(MailboxDataInterface[Message]):
     """
 
     def __init__(self, redis: Redis, name: str, prefix: bytes,
-                 uid_validity: int) -> None:
+                 uid_validity: int, text_index: bool = False) -> None:
         super().__init__()
         self._redis = redis
         self._prefix = prefix
         self._uid_validity = uid_validity
+        self._text_index = text_index
         self._name = name
-        self._selected_set = SelectedSet()
+        self._selected_set = SelectedSet.for_key(prefix)
 
     @property
     def name(self) -> str:
@@ -84,39 +103,221 @@ class MailboxData(MailboxDataInterface[Message]):
         selected.add_updates(updated, expunged)
         return selected
 
-    async def add(self, append_msg: AppendMessage, recent: bool = False) \
-            -> Message:
+    async def add_many(self, append_msgs: Sequence[AppendMessage],
+                       recent: bool = False) -> Sequence[Message]:
+        if not append_msgs:
+            return []
         redis = self._redis
         prefix = self._prefix
-        is_deleted = Deleted in append_msg.flag_set
-        is_unseen = Seen not in append_msg.flag_set
-        msg_content = MessageContent.parse(append_msg.message)
-        msg_flags = [flag.value for flag in append_msg.flag_set]
-        msg_time = append_msg.when.isoformat().encode('ascii')
+        msg_contents = [MessageContent.parse(append_msg.message)
+                        for append_msg in append_msgs]
+        if self._text_index:
+            msg_terms: Sequence[Optional[FrozenSet[bytes]]] = [
+                message_terms(Message(0, [], append_msg.when,
+                                      content=msg_content))
+                for append_msg, msg_content in zip(append_msgs,
+                                                   msg_contents)]
+        else:
+            msg_terms = [None] * len(append_msgs)
         while True:
             await redis.watch(prefix + b':max-mod')
             max_uid, max_mod = await redis.mget(prefix + b':max-uid',
                                                 prefix + b':max-mod')
-            new_uid = int(max_uid or 0) + 1
-            new_mod = int(max_mod or 0) + 1
-            msg_prefix = prefix + b':msg:%d' % new_uid
+            first_uid = int(max_uid or 0) + 1
+            new_mod = int(max_mod or 1) + 1
+            multi = redis.multi_exec()
+            multi.set(prefix + b':max-uid', first_uid + len(append_msgs) - 1)
+            multi.set(prefix + b':max-mod', new_mod)
+            for new_uid, append_msg, msg_content, terms in zip(
+                    range(first_uid, first_uid + len(append_msgs)),
+                    append_msgs, msg_contents, msg_terms):
+                msg_time = append_msg.when.isoformat().encode('ascii')
+                msg_prefix = self._add_metadata(
+                    multi, new_uid, new_mod, append_msg.flag_set, msg_time,
+                    recent)
+                multi.set(msg_prefix + b':header', bytes(msg_content.header))
+                multi.set(msg_prefix + b':body', bytes(msg_content.body))
+                if terms is not None:
+                    self._add_terms(multi, new_uid, terms)
+            try:
+                await multi.execute()
+            except MultiExecError:
+                if await _check_errors(multi):
+                    raise
+            else:
+                break
+        return [Message(new_uid, append_msg.flag_set, append_msg.when,
+                        recent=recent, mod_sequence=new_mod,
+                        content=msg_content)
+                for new_uid, append_msg, msg_content in zip(
+                    range(first_uid, first_uid + len(append_msgs)),
+                    append_msgs, msg_contents)]
+
+    def _add_metadata(self, multi, uid: int, mod_seq: int,
+                      flag_set: FrozenSet[Flag], msg_time: bytes,
+                      recent: bool) -> bytes:
+        prefix = self._prefix
+        msg_prefix = prefix + b':msg:%d' % uid
+        msg_flags = [flag.value for flag in flag_set]
+        multi.sadd(prefix + b':uids', uid)
+        multi.zadd(prefix + b':mod-sequence', mod_seq, uid)
+        multi.zadd(prefix + b':sequence', uid, uid)
+        if recent:
+            multi.sadd(prefix + b':recent', uid)
+        if Deleted in flag_set:
+            multi.sadd(prefix + b':deleted', uid)
+        if Seen not in flag_set:
+            multi.zadd(prefix + b':unseen', uid, uid)
+        if msg_flags:
+            multi.sadd(msg_prefix + b':flags', *msg_flags)
+        multi.set(msg_prefix + b':time', msg_time)
+        return msg_prefix
+
+    def _add_terms(self, multi, uid: int, terms: Iterable[bytes]) -> None:
+        prefix = self._prefix
+        msg_prefix = prefix + b':msg:%d' % uid
+        terms = list(terms)
+        multi.sadd(prefix + b':indexed', uid)
+        multi.unlink(msg_prefix + b':terms')
+        if terms:
+            multi.sadd(msg_prefix + b':terms', *terms)
+        for term in terms:
+            multi.sadd(prefix + b':fts:' + term, uid)
+
+    async def copy_to(self, uids: Sequence[int],
+                      destination: MailboxDataInterface[Message],
+                      recent: bool = False) -> Sequence[Tuple[int, int]]:
+        if not isinstance(destination, MailboxData) \
+                or destination._redis is not self._redis:
+            return await super().copy_to(uids, destination, recent)
+        redis = self._redis
+        prefix = self._prefix
+        multi = redis.multi_exec()
+        for uid in uids:
+            msg_prefix = prefix + b':msg:%d' % uid
+            multi.sismember(prefix + b':uids', uid)
+            multi.smembers(msg_prefix + b':flags')
+            multi.get(msg_prefix + b':time')
+            multi.dump(msg_prefix + b':header')
+            multi.dump(msg_prefix + b':body')
+            multi.sismember(prefix + b':indexed', uid)
+            multi.smembers(msg_prefix + b':terms')
+        results = await multi.execute()
+        # The contents are copied in their serialized form, with DUMP and
+        # RESTORE, so they are never parsed or re-encoded.
+        found: List[Tuple[int, FrozenSet[Flag], bytes, bytes, bytes,
+                          Optional[Sequence[bytes]]]] = []
+        for uid, i in zip(uids, range(0, len(results), 7)):
+            exists, flags, msg_time, header, body, indexed, terms = \
+                results[i:i + 7]
+            if exists and header is not None and body is not None:
+                flag_set = frozenset(Flag(flag) for flag in flags)
+                found.append((uid, flag_set, msg_time, header, body,
+                              terms if indexed else None))
+        if not found:
+            return []
+        dest_prefix = destination._prefix
+        while True:
+            await redis.watch(dest_prefix + b':max-mod')
+            max_uid, max_mod = await redis.mget(dest_prefix + b':max-uid',
+                                                dest_prefix + b':max-mod')
+            first_uid = int(max_uid or 0) + 1
+            new_mod = int(max_mod or 1) + 1
+            multi = redis.multi_exec()
+            multi.set(dest_prefix + b':max-uid', first_uid + len(found) - 1)
+            multi.set(dest_prefix + b':max-mod', new_mod)
+            for new_uid, (_, flag_set, msg_time, header, body,
+                          terms) in enumerate(found, first_uid):
+                msg_prefix = destination._add_metadata(
+                    multi, new_uid, new_mod, flag_set, msg_time, recent)
+                multi.restore(msg_prefix + b':header', 0, header)
+                multi.restore(msg_prefix + b':body', 0, body)
+                if terms is not None and destination._text_index:
+                    destination._add_terms(multi, new_uid, terms)
+            try:
+                await multi.execute()
+            except MultiExecError:
+                if await _check_errors(multi):
+                    raise
+            else:
+                break
+        return [(uid, new_uid) for new_uid, (uid, *_) in enumerate(
+            found, first_uid)]
+
+    def _remove_metadata(self, multi, uids: Sequence[int],
+                         mod_seq: int) -> None:
+        prefix = self._prefix
+        for uid in uids:
+            multi.zadd(prefix + b':expunged', mod_seq, uid)
+        multi.srem(prefix + b':uids', *uids)
+        multi.zrem(prefix + b':sequence', *uids)
+        multi.zrem(prefix + b':mod-sequence', *uids)
+        multi.srem(prefix + b':recent', *uids)
+        multi.srem(prefix + b':deleted', *uids)
+        multi.zrem(prefix + b':unseen', *uids)
+        multi.srem(prefix + b':indexed', *uids)
+
+    async def move_to(self, uids: Sequence[int],
+                      destination: MailboxDataInterface[Message],
+                      recent: bool = False) -> Sequence[Tuple[int, int]]:
+        if not isinstance(destination, MailboxData) \
+                or destination._redis is not self._redis \
+                or destination._prefix == self._prefix:
+            return await super().move_to(uids, destination, recent)
+        redis = self._redis
+        prefix = self._prefix
+        dest_prefix = destination._prefix
+        while True:
+            await redis.watch(prefix + b':max-mod', dest_prefix + b':max-mod')
+            pipe = redis.pipeline()
+            pipe.get(prefix + b':max-mod')
+            pipe.mget(dest_prefix + b':max-uid', dest_prefix + b':max-mod')
+            for uid in uids:
+                msg_prefix = prefix + b':msg:%d' % uid
+                pipe.sismember(prefix + b':uids', uid)
+                pipe.smembers(msg_prefix + b':flags')
+                pipe.get(msg_prefix + b':time')
+                pipe.sismember(prefix + b':indexed', uid)
+                pipe.smembers(msg_prefix + b':terms')
+            max_mod, (dest_max_uid, dest_max_mod), *results = \
+                await pipe.execute()
+            found: List[Tuple[int, FrozenSet[Flag], bytes,
+                              Optional[Sequence[bytes]]]] = []
+            for uid, i in zip(uids, range(0, len(results), 5)):
+                exists, flags, msg_time, indexed, terms = results[i:i + 5]
+                if exists:
+                    flag_set = frozenset(Flag(flag) for flag in flags)
+                    found.append((uid, flag_set, msg_time,
+                                  terms if indexed else None))
+            if not found:
+                await redis.unwatch()
+                return []
+            new_mod = int(max_mod or 1) + 1
+            first_uid = int(dest_max_uid or 0) + 1
+            dest_new_mod = int(dest_max_mod or 1) + 1
             multi = redis.multi_exec()
-            multi.set(prefix + b':max-uid', new_uid)
             multi.set(prefix + b':max-mod', new_mod)
-            multi.sadd(prefix + b':uids', new_uid)
-            multi.zadd(prefix + b':mod-sequence', new_mod, new_uid)
-            multi.zadd(prefix + b':sequence', new_uid, new_uid)
-            if recent:
-                multi.sadd(prefix + b':recent', new_uid)
-            if is_deleted:
-                multi.sadd(prefix + b':deleted', new_uid)
-            if is_unseen:
-                multi.zadd(prefix + b':unseen', new_uid, new_uid)
-            if msg_flags:
-                multi.sadd(msg_prefix + b':flags', *msg_flags)
-            multi.set(msg_prefix + b':time', msg_time)
-            multi.set(msg_prefix + b':header', bytes(msg_content.header))
-            multi.set(msg_prefix + b':body', bytes(msg_content.body))
+            self._remove_metadata(multi, [uid for uid, *_ in found],
+                                  new_mod)
+            multi.set(dest_prefix + b':max-uid', first_uid + len(found) - 1)
+            multi.set(dest_prefix + b':max-mod', dest_new_mod)
+            for new_uid, (uid, flag_set, msg_time, terms) in enumerate(
+                    found, first_uid):
+                # The message contents are moved by renaming their keys.
+                src_msg_prefix = prefix + b':msg:%d' % uid
+                msg_prefix = destination._add_metadata(
+                    multi, new_uid, dest_new_mod, flag_set, msg_time, recent)
+                multi.rename(src_msg_prefix + b':header',
+                             msg_prefix + b':header')
+                multi.rename(src_msg_prefix + b':body',
+                             msg_prefix + b':body')
+                multi.unlink(src_msg_prefix + b':flags',
+                             src_msg_prefix + b':time',
+                             src_msg_prefix + b':terms')
+                for term in terms or []:
+                    multi.srem(prefix + b':fts:' + term, uid)
+                if terms is not None and destination._text_index:
+                    destination._add_terms(multi, new_uid, terms)
             try:
                 await multi.execute()
             except MultiExecError:
@@ -124,45 +325,80 @@ class MailboxData(MailboxDataInterface[Message]):
                     raise
             else:
                 break
-        return Message(new_uid, append_msg.flag_set, append_msg.when,
-                       recent=recent, content=msg_content)
+        return [(uid, new_uid) for new_uid, (uid, *_) in enumerate(
+            found, first_uid)]
 
     async def get(self, uid: int, cached_msg: CachedMessage = None,
                   requirement: FetchRequirement = FetchRequirement.METADATA) \
             -> Optional[Message]:
+        cached_msgs = {uid: cached_msg} if cached_msg is not None else None
+        found = await self._get_chunk([uid], requirement, cached_msgs)
+        return found[0] if found else None
+
+    async def get_many(
+            self, uids: Sequence[int],
+            requirement: FetchRequirement = FetchRequirement.METADATA,
+            cached_msgs: Mapping[int, CachedMessage] = None) \
+            -> Sequence[Message]:
+        ret: List[Message] = []
+        chunk_size = FIND_BODY_CHUNK_SIZE \
+            if requirement & FetchRequirement.BODY else FIND_CHUNK_SIZE
+        for i in range(0, len(uids), chunk_size):
+            chunk = uids[i:i + chunk_size]
+            ret.extend(await self._get_chunk(chunk, requirement, cached_msgs))
+        return ret
+
+    async def _get_chunk(self, uids: Sequence[int],
+                         requirement: FetchRequirement,
+                         cached_msgs: Optional[Mapping[int, CachedMessage]]) \
+            -> Sequence[Message]:
         redis = self._redis
         prefix = self._prefix
-        msg_prefix = prefix + b':msg:%d' % uid
         multi = redis.multi_exec()
-        multi.sismember(prefix + b':uids', uid)
-        multi.smembers(msg_prefix + b':flags')
-        multi.get(msg_prefix + b':time')
-        multi.sismember(prefix + b':recent', uid)
-        if requirement & FetchRequirement.BODY:
-            multi.get(msg_prefix + b':header')
-            multi.get(msg_prefix + b':body')
-        elif requirement & FetchRequirement.HEADERS:
-            multi.get(msg_prefix + b':header')
-            multi.echo(b'')
-        else:
-            multi.echo(b'')
-            multi.echo(b'')
-        exists, flags, time, recent, header, body = await multi.execute()
-        if not exists:
-            if cached_msg is None:
-                return None
+        for uid in uids:
+            msg_prefix = prefix + b':msg:%d' % uid
+            multi.sismember(prefix + b':uids', uid)
+            multi.smembers(msg_prefix + b':flags')
+            multi.get(msg_prefix + b':time')
+            multi.sismember(prefix + b':recent', uid)
+            multi.zscore(prefix + b':mod-sequence', uid)
+            if requirement & FetchRequirement.BODY:
+                multi.get(msg_prefix + b':header')
+                multi.get(msg_prefix + b':body')
+            elif requirement & FetchRequirement.HEADERS:
+                multi.get(msg_prefix + b':header')
+                multi.echo(b'')
             else:
-                return Message(cached_msg.uid, cached_msg.permanent_flags,
-                               cached_msg.internal_date, expunged=True)
-        msg_flags = {Flag(flag) for flag in flags}
-        msg_time = datetime.fromisoformat(time.decode('ascii'))
-        msg_recent = bool(recent)
-        if header:
-            msg_content = MessageContent.parse_split(header, body)
-            return Message(uid, msg_flags, msg_time, recent=msg_recent,
-                           content=msg_content)
-        else:
-            return Message(uid, msg_flags, msg_time, recent=msg_recent)
+                multi.echo(b'')
+                multi.echo(b'')
+        results = await multi.execute()
+        ret: List[Message] = []
+        for uid, i in zip(uids, range(0, len(results), 7)):
+            exists, flags, time, recent, mod_seq, header, body = \
+                results[i:i + 7]
+            if not exists:
+                if cached_msgs and uid in cached_msgs:
+                    cached_msg = cached_msgs[uid]
+                    ret.append(Message(cached_msg.uid,
+                                       cached_msg.permanent_flags,
+                                       cached_msg.internal_date,
+                                       expunged=True))
+                continue
+            msg_flags = {Flag(flag) for flag in flags}
+            msg_time = datetime.fromisoformat(time.decode('ascii'))
+            msg_recent = bool(recent)
+            msg_mod_seq = int(mod_seq)
+            if header:
+                msg_content = MessageContent.parse_split(header, body)
+                ret.append(Message(uid, msg_flags, msg_time,
+                                   recent=msg_recent,
+                                   mod_sequence=msg_mod_seq,
+                                   content=msg_content))
+            else:
+                ret.append(Message(uid, msg_flags, msg_time,
+                                   recent=msg_recent,
+                                   mod_sequence=msg_mod_seq))
+        return ret
 
     async def delete(self, uids: Iterable[int]) -> None:
         redis = self._redis
@@ -173,17 +409,10 @@ class MailboxData(MailboxDataInterface[Message]):
         while True:
             await redis.watch(prefix + b':max-mod')
             max_mod = await redis.get(prefix + b':max-mod')
-            new_mod = int(max_mod or 0) + 1
+            new_mod = int(max_mod or 1) + 1
             multi = redis.multi_exec()
             multi.set(prefix + b':max-mod', new_mod)
-            for uid in uids:
-                multi.zadd(prefix + b':expunged', new_mod, uid)
-            multi.srem(prefix + b':uids', *uids)
-            multi.zrem(prefix + b':sequence', *uids)
-            multi.zrem(prefix + b':mod-sequence', *uids)
-            multi.srem(prefix + b':recent', *uids)
-            multi.srem(prefix + b':deleted', *uids)
-            multi.zrem(prefix + b':unseen', *uids)
+            self._remove_metadata(multi, uids, new_mod)
             try:
                 await multi.execute()
             except MultiExecError:
@@ -191,8 +420,7 @@ class MailboxData(MailboxDataInterface[Message]):
                     raise
             else:
                 break
-        prefixes = (prefix + b':msg:%d' % uid for uid in uids)
-        asyncio.create_task(_delete_keys(redis, prefixes))
+        asyncio.create_task(_delete_messages(redis, prefix, uids))
 
     async def claim_recent(self, selected: SelectedMailbox) -> None:
         redis = self._redis
@@ -204,7 +432,7 @@ class MailboxData(MailboxDataInterface[Message]):
                 await redis.unwatch()
                 break
             max_mod = await redis.get(prefix + b':max-mod')
-            new_mod = int(max_mod or 0) + 1
+            new_mod = int(max_mod or 1) + 1
             multi = self._redis.multi_exec()
             multi.set(prefix + b':max-mod', new_mod)
             for uid in recent:
@@ -229,40 +457,43 @@ class MailboxData(MailboxDataInterface[Message]):
             return
         uids = {msg.uid: msg for msg in messages}
         while True:
+            # Other flag updates change the max-mod key, so the flags read
+            # here are current if the transaction succeeds.
             await redis.watch(prefix + b':max-mod')
             pipe = redis.pipeline()
             pipe.smembers(prefix + b':uids')
             pipe.get(prefix + b':max-mod')
-            existing_uids, max_mod = await pipe.execute()
-            update_uids = uids.keys() & {int(uid) for uid in existing_uids}
-            if not update_uids:
+            for msg_uid in uids:
+                pipe.smembers(prefix + b':msg:%d:flags' % msg_uid)
+            existing_uids, max_mod, *old_vals = await pipe.execute()
+            existing = {int(uid) for uid in existing_uids}
+            new_flags: Dict[int, FrozenSet[Flag]] = {}
+            for msg_uid, flag_vals in zip(uids, old_vals):
+                if msg_uid not in existing:
+                    continue
+                msg = uids[msg_uid]
+                old_flags = frozenset(Flag(flag) for flag in flag_vals)
+                msg.permanent_flags = mode.apply(old_flags, flag_set)
+                if msg.permanent_flags != old_flags:
+                    new_flags[msg_uid] = msg.permanent_flags
+            if not new_flags:
                 await redis.unwatch()
                 break
-            new_mod = int(max_mod or 0) + 1
-            new_flags: Dict[int, Awaitable[Sequence[bytes]]] = {}
+            new_mod = int(max_mod or 1) + 1
             multi = redis.multi_exec()
             multi.set(prefix + b':max-mod', new_mod)
-            for msg in messages:
-                msg_uid = msg.uid
-                if msg_uid not in update_uids:
-                    continue
+            for msg_uid, perm_flags in new_flags.items():
                 msg_prefix = prefix + b':msg:%d' % msg_uid
-                flag_vals = (flag.value for flag in flag_set)
                 multi.zadd(prefix + b':mod-sequence', new_mod, msg_uid)
-                if mode == FlagOp.REPLACE:
-                    multi.unlink(msg_prefix + b':flags')
-                    if flag_set:
-                        multi.sadd(msg_prefix + b':flags', *flag_vals)
-                elif mode == FlagOp.ADD and flag_set:
-                    multi.sadd(msg_prefix + b':flags', *flag_vals)
-                elif mode == FlagOp.DELETE and flag_set:
-                    multi.srem(msg_prefix + b':flags', *flag_vals)
-                new_flags[msg_uid] = multi.smembers(msg_prefix + b':flags')
-                if Deleted in msg.permanent_flags:
+                multi.unlink(msg_prefix + b':flags')
+                if perm_flags:
+                    multi.sadd(msg_prefix + b':flags',
+                               *(flag.value for flag in perm_flags))
+                if Deleted in perm_flags:
                     multi.sadd(prefix + b':deleted', msg_uid)
                 else:
                     multi.srem(prefix + b':deleted', msg_uid)
-                if Seen not in msg.permanent_flags:
+                if Seen not in perm_flags:
                     multi.zadd(prefix + b':unseen', msg_uid, msg_uid)
                 else:
                     multi.zrem(prefix + b':unseen', msg_uid)
@@ -272,12 +503,17 @@ class MailboxData(MailboxDataInterface[Message]):
                 if await _check_errors(multi):
                     raise
             else:
-                for msg_uid, msg_flags in new_flags.items():
-                    msg = uids[msg_uid]
-                    msg.permanent_flags = frozenset(
-                        Flag(flag) for flag in await msg_flags)
+                for msg_uid in new_flags:
+                    uids[msg_uid].mod_sequence = new_mod
                 break
 
+    async def find_expunged(self, mod_sequence: int) -> Sequence[int]:
+        redis = self._redis
+        prefix = self._prefix
+        expunged = await redis.zrangebyscore(
+            prefix + b':expunged', mod_sequence + 1)
+        return [int(uid) for uid in expunged]
+
     async def cleanup(self) -> None:
         pass
 
@@ -290,39 +526,102 @@ class MailboxData(MailboxDataInterface[Message]):
         deleted = await redis.smembers(prefix + b':deleted')
         return [int(uid) for uid in deleted]
 
+    async def find_flagged(self, flag: Flag, expected: bool) \
+            -> Optional[AbstractSet[int]]:
+        redis = self._redis
+        prefix = self._prefix
+        if flag == Deleted:
+            if expected:
+                found = await redis.smembers(prefix + b':deleted')
+            else:
+                found = await redis.sdiff(prefix + b':uids',
+                                          prefix + b':deleted')
+        elif flag == Seen:
+            multi = redis.multi_exec()
+            multi.smembers(prefix + b':uids')
+            multi.zrange(prefix + b':unseen')
+            uids, unseen = await multi.execute()
+            found = set(unseen) if not expected else set(uids) - set(unseen)
+        else:
+            return None
+        return {int(uid) for uid in found}
+
+    async def find_sizes(self, uids: Sequence[int]) \
+            -> Optional[Mapping[int, int]]:
+        redis = self._redis
+        prefix = self._prefix
+        pipe = redis.pipeline()
+        for uid in uids:
+            msg_prefix = prefix + b':msg:%d' % uid
+            pipe.strlen(msg_prefix + b':header')
+            pipe.strlen(msg_prefix + b':body')
+        results = await pipe.execute()
+        return {uid: results[i] + results[i + 1]
+                for uid, i in zip(uids, range(0, len(results), 2))}
+
+    async def find_text(self, uids: Sequence[int], value: bytes) \
+            -> Optional[AbstractSet[int]]:
+        if not self._text_index:
+            return None
+        terms = value_terms(value)
+        if not terms:
+            return set(uids)
+        redis = self._redis
+        prefix = self._prefix
+        multi = redis.multi_exec()
+        multi.sinter(*[prefix + b':fts:' + term for term in terms])
+        multi.smembers(prefix + b':indexed')
+        matched, indexed = await multi.execute()
+        matched_uids = {int(uid) for uid in matched}
+        indexed_uids = {int(uid) for uid in indexed}
+        return {uid for uid in uids
+                if uid in matched_uids or uid not in indexed_uids}
+
+    def _queue_snapshot(self, pipe) -> None:
+        # Queues the _SNAPSHOT_LEN commands read by _build_snapshot.
+        prefix = self._prefix
+        pipe.get(prefix + b':max-uid')
+        pipe.get(prefix + b':max-mod')
+        pipe.zcard(prefix + b':sequence')
+        pipe.scard(prefix + b':recent')
+        pipe.zcard(prefix + b':unseen')
+        pipe.zrange(prefix + b':unseen', 0, 0)
+
+    def _build_snapshot(self, results: Sequence,
+                        first_rank: Optional[int]) -> MailboxSnapshot:
+        max_uid, max_mod, exists, num_recent, num_unseen, _ = results
+        next_uid = int(max_uid or 0) + 1
+        first_unseen = first_rank + 1 if first_rank is not None else None
+        return MailboxSnapshot(self.name, self.readonly, self.uid_validity,
+                               self.permanent_flags, self.session_flags,
+                               exists, num_recent, num_unseen, first_unseen,
+                               next_uid, int(max_mod or 1))
+
     async def snapshot(self) -> MailboxSnapshot:
         redis = self._redis
         prefix = self._prefix
         while True:
             await redis.watch(prefix + b':sequence')
             pipe = redis.pipeline()
-            pipe.get(prefix + b':max-uid')
-            pipe.zcard(prefix + b':sequence')
-            pipe.scard(prefix + b':recent')
-            pipe.zcard(prefix + b':unseen')
-            pipe.zrange(prefix + b':unseen', 0, 0)
-            max_uid, exists, num_recent, num_unseen, unseen = \
-                await pipe.execute()
-            next_uid = int(max_uid or 0) + 1
+            self._queue_snapshot(pipe)
+            results = await pipe.execute()
+            unseen = results[-1]
             if not unseen:
                 await redis.unwatch()
-                first_unseen: Optional[int] = None
+                first_rank: Optional[int] = None
                 break
             else:
                 first_uid = int(unseen[0])
                 multi = redis.multi_exec()
                 multi.zrank(prefix + b':sequence', first_uid)
                 try:
-                    [first_unseen] = await multi.execute()
+                    [first_rank] = await multi.execute()
                 except MultiExecError:
                     if await _check_errors(multi):
                         raise
                 else:
                     break
-        return MailboxSnapshot(self.name, self.readonly, self.uid_validity,
-                               self.permanent_flags, self.session_flags,
-                               exists, num_recent, num_unseen, first_unseen,
-                               next_uid)
+        return self._build_snapshot(results, first_rank)
 
     async def _get_initial(self) \
             -> Tuple[int, Sequence[Message], Sequence[int]]:
@@ -338,6 +637,7 @@ class MailboxData(MailboxDataInterface[Message]):
                 multi.echo(uid)
                 multi.smembers(msg_prefix + b':flags')
                 multi.get(msg_prefix + b':time')
+                multi.zscore(prefix + b':mod-sequence', uid)
             try:
                 results = await multi.execute()
             except MultiExecError:
@@ -347,11 +647,13 @@ class MailboxData(MailboxDataInterface[Message]):
                 break
         mod_seq = int(results[0] or 0)
         updated: List[Message] = []
-        for i in range(1, len(results), 3):
+        for i in range(1, len(results), 4):
             msg_uid = int(results[i])
             msg_flags = {Flag(flag) for flag in results[i + 1]}
             msg_time = datetime.fromisoformat(results[i + 2].decode('ascii'))
-            msg = Message(msg_uid, msg_flags, msg_time)
+            msg_mod_seq = int(results[i + 3])
+            msg = Message(msg_uid, msg_flags, msg_time,
+                          mod_sequence=msg_mod_seq)
             updated.append(msg)
         return mod_seq, updated, []
 
@@ -371,6 +673,7 @@ class MailboxData(MailboxDataInterface[Message]):
                 multi.echo(uid)
                 multi.smembers(msg_prefix + b':flags')
                 multi.get(msg_prefix + b':time')
+                multi.zscore(prefix + b':mod-sequence', uid)
             try:
                 results = await multi.execute()
             except MultiExecError:
@@ -381,11 +684,13 @@ class MailboxData(MailboxDataInterface[Message]):
         mod_seq = int(results[0] or 0)
         expunged = [int(uid) for uid in results[1]]
         updated: List[Message] = []
-        for i in range(2, len(results), 3):
+        for i in range(2, len(results), 4):
             msg_uid = int(results[i])
             msg_flags = {Flag(flag) for flag in results[i + 1]}
             msg_time = datetime.fromisoformat(results[i + 2].decode('ascii'))
-            msg = Message(msg_uid, msg_flags, msg_time)
+            msg_mod_seq = int(results[i + 3])
+            msg = Message(msg_uid, msg_flags, msg_time,
+                          mod_sequence=msg_mod_seq)
             updated.append(msg)
         return mod_seq, updated, expunged
 
@@ -396,10 +701,12 @@ class MailboxSet(MailboxSetInterface[MailboxData]):
 
     """
 
-    def __init__(self, redis: Redis, prefix: bytes) -> None:
+    def __init__(self, redis: Redis, prefix: bytes,
+                 text_index: bool = False) -> None:
         super().__init__()
         self._redis = redis
         self._prefix = prefix
+        self._text_index = text_index
         self._order_key = prefix + b':mbx-order'
         self._mbx_key = prefix + b':mailboxes'
         self._sub_key = prefix + b':subscribed'
@@ -434,7 +741,48 @@ class MailboxSet(MailboxSetInterface[MailboxData]):
         if not exists:
             raise MailboxNotFound(name, try_create)
         mbx_prefix = b':'.join((self._prefix, name_key, uidval))
-        return MailboxData(redis, name, mbx_prefix, int(uidval))
+        return MailboxData(redis, name, mbx_prefix, int(uidval),
+                           self._text_index)
+
+    async def snapshot_many(self, names: Sequence[str]) \
+            -> Mapping[str, MailboxSnapshot]:
+        redis = self._redis
+        name_keys = [modutf7_encode(name) for name in names]
+        if not name_keys:
+            return {}
+        multi = redis.multi_exec()
+        for name_key in name_keys:
+            multi.zscore(self._mbx_key, name_key)
+            multi.hget(self._uidv_key, name_key)
+        found = await multi.execute()
+        mailboxes: List[MailboxData] = []
+        for i, (name, name_key) in enumerate(zip(names, name_keys)):
+            exists, uidval = found[i * 2:i * 2 + 2]
+            if exists:
+                mbx_prefix = b':'.join((self._prefix, name_key, uidval))
+                mailboxes.append(MailboxData(redis, name, mbx_prefix,
+                                             int(uidval), self._text_index))
+        if not mailboxes:
+            return {}
+        pipe = redis.pipeline()
+        for mbx in mailboxes:
+            mbx._queue_snapshot(pipe)
+        results = await pipe.execute()
+        mbx_results = [results[i:i + _SNAPSHOT_LEN]
+                       for i in range(0, len(results), _SNAPSHOT_LEN)]
+        ranks: Dict[str, int] = {}
+        unseen_mailboxes = [(mbx, int(mbx_result[-1][0]))
+                            for mbx, mbx_result in zip(mailboxes, mbx_results)
+                            if mbx_result[-1]]
+        if unseen_mailboxes:
+            pipe = redis.pipeline()
+            for mbx, first_uid in unseen_mailboxes:
+                pipe.zrank(mbx._prefix + b':sequence', first_uid)
+            first_ranks = await pipe.execute()
+            ranks = {mbx.name: rank for (mbx, _), rank
+                     in zip(unseen_mailboxes, first_ranks)}
+        return {mbx.name: mbx._build_snapshot(mbx_result, ranks.get(mbx.name))
+                for mbx, mbx_result in zip(mailboxes, mbx_results)}
 
     async def add_mailbox(self, name: str) -> 'MailboxData':
         redis = self._redis
@@ -457,7 +805,8 @@ class MailboxSet(MailboxSetInterface[MailboxData]):
             else:
                 mbx_prefix = b':'.join(
                     (self._prefix, name_key, b'%d' % uidval))
-                return MailboxData(redis, name, mbx_prefix, uidval)
+                return MailboxData(redis, name, mbx_prefix, uidval,
+                                   self._text_index)
 
     async def delete_mailbox(self, name: str) -> None:
         redis = self._redis
@@ -1,7 +1,8 @@
 
 from abc import abstractmethod
 from asyncio import shield
-from typing import Tuple, Optional, FrozenSet, Iterable, Sequence, List
+from typing import Tuple, Optional, FrozenSet, Iterable, Sequence, List, \
+    AsyncIterable, Mapping
 from typing_extensions import Protocol
 
 from pymap.concurrent import Event
@@ -16,8 +17,9 @@ from pymap.parsing.specials.flag import Flag, Seen
 from pymap.parsing.response.code import AppendUid, CopyUid
 from pymap.interfaces.message import AppendMessage
 from pymap.interfaces.session import SessionInterface
-from pymap.search import SearchParams, SearchCriteriaSet
+from pymap.search import SearchParams, SearchCriteriaSet, SearchPlan
 from pymap.selected import SelectedMailbox
+from pymap.sort import SortKeys
 
 from .mailbox import MailboxDataInterface, MailboxSetInterface, MessageT
 
@@ -87,6 +89,13 @@ class BaseSession(SessionInterface, Protocol[MessageT]):
         snapshot = await mbx.snapshot()
         return snapshot, await self._load_updates(selected, mbx)
 
+    async def get_mailboxes(self, names: Sequence[str],
+                            selected: SelectedMailbox = None) \
+            -> Tuple[Mapping[str, MailboxSnapshot],
+                     Optional[SelectedMailbox]]:
+        snapshots = await self.mailbox_set.snapshot_many(names)
+        return snapshots, await self._load_updates(selected, None)
+
     async def create_mailbox(self, name: str,
                              selected: SelectedMailbox = None) \
             -> Optional[SelectedMailbox]:
@@ -125,13 +134,12 @@ class BaseSession(SessionInterface, Protocol[MessageT]):
         if mbx.readonly:
             raise MailboxReadOnly(name)
         dest_selected = self._find_selected(selected, mbx)
-        uids: List[int] = []
-        for append_msg in messages:
-            msg = await mbx.add(append_msg, recent=not dest_selected)
-            if dest_selected:
-                dest_selected.session_flags.add_recent(msg.uid)
-            uids.append(msg.uid)
-        mbx.selected_set.updated.set()
+        added = await mbx.add_many(messages, recent=not dest_selected)
+        uids = [msg.uid for msg in added]
+        if dest_selected:
+            for uid in uids:
+                dest_selected.session_flags.add_recent(uid)
+        mbx.selected_set.notify()
         return (AppendUid(mbx.uid_validity, uids),
                 await self._load_updates(selected, mbx))
 
@@ -154,38 +162,50 @@ class BaseSession(SessionInterface, Protocol[MessageT]):
         if housekeeping:
             await shield(mbx.cleanup())
         if wait_on is not None:
-            either_event = wait_on.or_event(mbx.selected_set.updated)
-            await either_event.wait()
+            return await mbx.selected_set.wait_updates(
+                selected, wait_on, mbx.update_selected,
+                self.config.max_idle_wait)
         return await mbx.update_selected(selected)
 
     async def fetch_messages(self, selected: SelectedMailbox,
                              sequence_set: SequenceSet,
                              attributes: FrozenSet[FetchAttribute]) \
-            -> Tuple[Iterable[Tuple[int, MessageT]], SelectedMailbox]:
+            -> Tuple[AsyncIterable[Tuple[int, MessageT]], SelectedMailbox]:
         mbx = await self.mailbox_set.get_mailbox(selected.name)
         req = FetchRequirement.reduce({attr.requirement
                                        for attr in attributes})
-        ret = [(seq, msg) async for seq, msg
-               in mbx.find(sequence_set, selected, req)]
         if not selected.readonly and any(attr.set_seen for attr in attributes):
             seen_set = frozenset([Seen])
-            await mbx.update_flags([msg for _, msg in ret],
+            await mbx.update_flags([msg async for _, msg
+                                    in mbx.find(sequence_set, selected)],
                                    seen_set, FlagOp.ADD)
-            mbx.selected_set.updated.set()
+            mbx.selected_set.notify()
+        ret = mbx.find(sequence_set, selected, req)
         return ret, await mbx.update_selected(selected)
 
     async def search_mailbox(self, selected: SelectedMailbox,
                              keys: FrozenSet[SearchKey]) \
             -> Tuple[Iterable[Tuple[int, MessageT]], SelectedMailbox]:
         mbx = await self.mailbox_set.get_mailbox(selected.name)
-        req = FetchRequirement.reduce({key.requirement for key in keys})
-        ret: List[Tuple[int, MessageT]] = []
         params = SearchParams(selected,
                               disabled=self.config.disable_search_keys)
-        search = SearchCriteriaSet(keys, params)
-        async for seq, msg in mbx.find(search.sequence_set, selected, req):
-            if search.matches(seq, msg):
-                ret.append((seq, msg))
+        plan = SearchPlan(SearchCriteriaSet(keys, params))
+        ret = await mbx.search(plan, selected)
+        return ret, await mbx.update_selected(selected)
+
+    async def sort_mailbox(self, selected: SelectedMailbox,
+                           keys: FrozenSet[SearchKey]) \
+            -> Tuple[Sequence[Tuple[int, MessageT, SortKeys]],
+                     SelectedMailbox]:
+        mbx = await self.mailbox_set.get_mailbox(selected.name)
+        params = SearchParams(selected,
+                              disabled=self.config.disable_search_keys)
+        plan = SearchPlan(SearchCriteriaSet(keys, params))
+        found = await mbx.search(plan, selected)
+        sort_keys = await mbx.get_sort_keys(
+            [msg.uid for _, msg in found], selected)
+        ret = [(msg_seq, msg, sort_keys[msg.uid]) for msg_seq, msg in found
+               if msg.uid in sort_keys]
         return ret, await mbx.update_selected(selected)
 
     async def expunge_mailbox(self, selected: SelectedMailbox,
@@ -197,7 +217,7 @@ class BaseSession(SessionInterface, Protocol[MessageT]):
             uid_set = SequenceSet.all(uid=True)
         expunge_uids = await mbx.find_deleted(uid_set, selected)
         await mbx.delete(expunge_uids)
-        mbx.selected_set.updated.set()
+        mbx.selected_set.notify()
         return await mbx.update_selected(selected)
 
     async def copy_messages(self, selected: SelectedMailbox,
@@ -208,24 +228,44 @@ class BaseSession(SessionInterface, Protocol[MessageT]):
         dest = await self.mailbox_set.get_mailbox(mailbox, try_create=True)
         if dest.readonly:
             raise MailboxReadOnly(mailbox)
-        req = FetchRequirement.BODY
         dest_selected = self._find_selected(selected, dest)
-        uids: List[Tuple[int, int]] = []
-        async for _, msg in mbx.find(sequence_set, selected, req):
-            if not msg.expunged:
-                source_uid = msg.uid
-                msg = await dest.add(msg.append_msg, recent=not dest_selected)
-                if dest_selected:
-                    dest_selected.session_flags.add_recent(msg.uid)
-                uids.append((source_uid, msg.uid))
-        dest.selected_set.updated.set()
+        source_uids = [msg.uid for _, msg
+                       in selected.messages.get_all(sequence_set)]
+        uids = await mbx.copy_to(source_uids, dest, recent=not dest_selected)
+        if dest_selected:
+            for _, dest_uid in uids:
+                dest_selected.session_flags.add_recent(dest_uid)
+        dest.selected_set.notify()
+        return (CopyUid(dest.uid_validity, uids),
+                await mbx.update_selected(selected))
+
+    async def move_messages(self, selected: SelectedMailbox,
+                            sequence_set: SequenceSet,
+                            mailbox: str) \
+            -> Tuple[Optional[CopyUid], SelectedMailbox]:
+        if selected.readonly:
+            raise MailboxReadOnly(selected.name)
+        mbx = await self.mailbox_set.get_mailbox(selected.name)
+        dest = await self.mailbox_set.get_mailbox(mailbox, try_create=True)
+        if dest.readonly:
+            raise MailboxReadOnly(mailbox)
+        dest_selected = self._find_selected(selected, dest)
+        source_uids = [msg.uid for _, msg
+                       in selected.messages.get_all(sequence_set)]
+        uids = await mbx.move_to(source_uids, dest, recent=not dest_selected)
+        if dest_selected:
+            for _, dest_uid in uids:
+                dest_selected.session_flags.add_recent(dest_uid)
+        mbx.selected_set.notify()
+        dest.selected_set.notify()
         return (CopyUid(dest.uid_validity, uids),
                 await mbx.update_selected(selected))
 
     async def update_flags(self, selected: SelectedMailbox,
                            sequence_set: SequenceSet,
                            flag_set: FrozenSet[Flag],
-                           mode: FlagOp = FlagOp.REPLACE) \
+                           mode: FlagOp = FlagOp.REPLACE, *,
+                           unchanged_since: int = None) \
             -> Tuple[Iterable[Tuple[int, MessageT]], SelectedMailbox]:
         if selected.readonly:
             raise MailboxReadOnly(selected.name)
@@ -234,9 +274,30 @@ class BaseSession(SessionInterface, Protocol[MessageT]):
         messages: List[Tuple[int, MessageT]] = []
         async for msg_seq, msg in mbx.find(sequence_set, selected):
             if not msg.expunged:
+                if unchanged_since is not None \
+                        and (msg.mod_sequence or 0) > unchanged_since:
+                    continue
                 selected.session_flags.update(msg.uid, flag_set, mode)
             messages.append((msg_seq, msg))
         await mbx.update_flags([msg for _, msg in messages],
                                permanent_flags, mode)
-        mbx.selected_set.updated.set()
+        mbx.selected_set.notify()
         return messages, await mbx.update_selected(selected)
+
+    async def find_vanished(self, selected: SelectedMailbox,
+                            mod_sequence: int, uid_set: SequenceSet) \
+            -> Tuple[Sequence[int], SelectedMailbox]:
+        mbx = await self.mailbox_set.get_mailbox(selected.name)
+        expunged = await mbx.find_expunged(mod_sequence)
+        if expunged is None:
+            max_uid = selected.messages.max_uid
+            existing = {msg.uid for _, msg
+                        in selected.messages.get_all(uid_set)}
+            vanished = [uid for uid in uid_set.iter(max_uid)
+                        if uid not in existing]
+        else:
+            max_uid = max(expunged, default=0)
+            ranges = uid_set.ranges(max_uid)
+            vanished = [uid for uid in sorted(expunged)
+                        if any(low <= uid <= high for low, high in ranges)]
+        return vanished, await mbx.update_selected(selected)
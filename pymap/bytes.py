@@ -29,9 +29,10 @@ class WriteStream(Protocol):
     """
 
     @abstractmethod
-    def write(self, data: bytes) -> Any:
+    def write(self, data: Union[bytes, memoryview]) -> Any:
         """Defines an abstract method where ``data`` is written to a stream or
-        buffer.
+        buffer. Implementations must not assume that ``data`` remains valid
+        beyond the call if they do not hold a reference to it.
 
         Args:
             data: The data to write.
@@ -123,6 +124,8 @@ class _ConcatWriteable(Writeable):
         for item in self.data:
             if isinstance(item, Writeable):
                 item.write(writer)
+            elif isinstance(item, (bytes, memoryview)):
+                writer.write(item)
             else:
                 writer.write(bytes(item))
 
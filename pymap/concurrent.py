@@ -228,8 +228,13 @@ class Event(metaclass=ABCMeta):
         ...
 
     @abstractmethod
-    async def wait(self) -> None:
-        """Wait until another thread signals the event."""
+    async def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait until another thread signals the event.
+
+        Args:
+            timeout: Stop waiting after this many seconds.
+
+        """
         ...
 
 
@@ -437,8 +442,11 @@ class _AsyncioEvent(Event):
     def clear(self) -> None:
         self._event.clear()
 
-    async def wait(self) -> None:
-        await self._event.wait()
+    async def wait(self, timeout: Optional[float] = None) -> None:
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
 
 
 class _ThreadingEvent(Event):  # pragma: no cover
@@ -470,5 +478,5 @@ class _ThreadingEvent(Event):  # pragma: no cover
     def clear(self) -> None:
         self._event.clear()
 
-    async def wait(self) -> None:
-        self._event.wait()
+    async def wait(self, timeout: Optional[float] = None) -> None:
+        self._event.wait(timeout)
@@ -1,5 +1,6 @@
 import os.path
 import ssl
+import zlib
 from argparse import Namespace
 from ssl import SSLContext
 from typing import Sequence, Any, Optional, Iterable, Mapping, TypeVar, Type
@@ -11,6 +12,7 @@ from .concurrent import Subsystem
 from .context import subsystem
 from .parsing import Params
 from .parsing.commands import Commands
+from .stats import Stats
 
 __all__ = ['IMAPConfig', 'ConfigT', 'ConfigT_co', 'ConfigT_contra']
 
@@ -47,12 +49,29 @@ class IMAPConfig:
         bad_command_limit: The number of consecutive commands received from
             the client with parsing errors before the client is disconnected.
         disable_idle: Disable the ``IDLE`` capability.
-        max_idle_wait: If given, the ``IDLE`` command will transparently cancel
-            and re-issue its request for updates every *N* seconds.
+        max_idle_wait: If given, mailboxes with ``IDLE`` sessions are checked
+            for updates every *N* seconds, even without notification.
+        disable_compress: Disable the ``COMPRESS=DEFLATE`` capability.
+        compression_level: The :mod:`zlib` compression level, from 0 to 9, used
+            by connections that enable ``COMPRESS=DEFLATE``.
+        stream_buffer_len: The number of bytes of streamed untagged responses,
+            e.g. from ``FETCH``, written before waiting for the socket buffer
+            to drain.
+        spool_literal_len: Literal strings received from the client longer
+            than this many bytes, e.g. large ``APPEND`` messages, are written
+            to a temporary file as they arrive instead of held in memory.
+        spool_dir: The directory for the temporary files of spooled literal
+            strings. Backends that store messages as files, such as maildir,
+            can move a spooled message into place if the directory is on the
+            same filesystem.
+        text_index: Maintain a full-text index of each mailbox, used to
+            narrow down the messages loaded by ``BODY``, ``TEXT`` and header
+            search keys.
         extra: Additional keywords used for special circumstances.
 
     Attributes:
         args: The command-line arguments.
+        stats: The metrics collected for the commands executed by the server.
 
     """
 
@@ -68,6 +87,12 @@ class IMAPConfig:
                  disable_search_keys: Iterable[bytes] = None,
                  disable_idle: bool = False,
                  max_idle_wait: float = None,
+                 disable_compress: bool = False,
+                 compression_level: int = zlib.Z_DEFAULT_COMPRESSION,
+                 stream_buffer_len: int = 65536,
+                 spool_literal_len: Optional[int] = 1048576,
+                 spool_dir: str = None,
+                 text_index: bool = False,
                  **extra: Any) -> None:
         super().__init__()
         self.args = args
@@ -76,12 +101,19 @@ class IMAPConfig:
         self.bad_command_limit: Final = bad_command_limit
         self.disable_search_keys: Final = disable_search_keys or []
         self.max_idle_wait: Final = max_idle_wait
+        self.compression_level: Final = compression_level
+        self.stream_buffer_len: Final = stream_buffer_len
+        self.spool_literal_len: Final = spool_literal_len
+        self.spool_dir: Final = spool_dir
+        self.text_index: Final = text_index
+        self.stats: Final = Stats(getattr(args, 'backend', None) or '')
         self._ssl_context = ssl_context
         self._starttls_enabled = starttls_enabled
         self._reject_insecure_auth = reject_insecure_auth
         self._preauth_credentials = preauth_credentials
         self._max_append_len = max_append_len
         self._disable_idle = disable_idle
+        self._disable_compress = disable_compress
         self._extra = extra
 
     @classmethod
@@ -109,6 +141,7 @@ class IMAPConfig:
         return cls(args, debug=args.debug,
                    reject_insecure_auth=not args.insecure_login,
                    cert_file=args.cert, key_file=args.key,
+                   text_index=args.text_index,
                    **parsed_args)
 
     def apply_context(self) -> None:
@@ -158,9 +191,14 @@ class IMAPConfig:
 
     @property
     def login_capability(self) -> Sequence[bytes]:
-        ret = [b'BINARY', b'UIDPLUS', b'MULTIAPPEND', b'CHILDREN']
+        ret = [b'BINARY', b'UIDPLUS', b'MULTIAPPEND', b'CHILDREN', b'ENABLE',
+               b'CONDSTORE', b'QRESYNC', b'MOVE', b'ESEARCH', b'SEARCHRES',
+               b'SORT', b'THREAD=ORDEREDSUBJECT', b'THREAD=REFERENCES',
+               b'LIST-STATUS']
         if not self._disable_idle:
             ret.append(b'IDLE')
+        if not self._disable_compress:
+            ret.append(b'COMPRESS=DEFLATE')
         if self._max_append_len is not None:
             ret.append(b'APPENDLIMIT=%i' % self._max_append_len)
         return ret
@@ -11,18 +11,24 @@ Attributes:
         :class:`~pymap.parsing.command.Command`.
     socket_info: :class:`~pymap.sockinfo.SocketInfo` about the currently
         connected client.
+    updates_relay: If set, called with the key of a
+        :class:`~pymap.selected.SelectedSet` when its mailbox is updated, to
+        notify other processes.
 
 """
 
 from contextvars import ContextVar
+from typing import Callable, Optional
 
 from .concurrent import Subsystem
 from .parsing.command import Command
 from .sockinfo import SocketInfo
 
-__all__ = ['subsystem', 'current_command', 'socket_info']
+__all__ = ['subsystem', 'current_command', 'socket_info', 'updates_relay']
 
 subsystem: ContextVar[Subsystem] = ContextVar(
     'subsystem', default=Subsystem.for_asyncio())
 current_command: ContextVar[Command] = ContextVar('current_command')
 socket_info: ContextVar[SocketInfo] = ContextVar('socket_info')
+updates_relay: ContextVar[Optional[Callable[[bytes], None]]] = ContextVar(
+    'updates_relay', default=None)
@@ -0,0 +1,129 @@
+"""Message counts of a mailbox that are maintained as messages are added,
+removed, and updated, so that a mailbox snapshot does not need to visit every
+message.
+
+"""
+
+from typing import AbstractSet, Iterable, Iterator, Optional, Sequence, \
+    Set, Tuple
+
+from .uids import SortedUids
+
+__all__ = ['MailboxCounters']
+
+
+class MailboxCounters:
+    """Tracks the UIDs of the messages in a mailbox, along with the subsets of
+    those UIDs that do not have the ``\\Seen`` flag and that are ``\\Recent``.
+    Each update is an ``O(log n)`` operation, and the counts used by a
+    :class:`~pymap.mailbox.MailboxSnapshot` are available without visiting
+    every message.
+
+    See Also:
+        :class:`~pymap.uids.SortedUids`
+
+    """
+
+    __slots__ = ['_uids', '_unseen', '_recent']
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._uids = SortedUids()
+        self._unseen = SortedUids()
+        self._recent: Set[int] = set()
+
+    @property
+    def exists(self) -> int:
+        """The number of messages in the mailbox."""
+        return len(self._uids)
+
+    @property
+    def recent(self) -> int:
+        """The number of messages in the mailbox with the ``\\Recent`` flag.
+
+        """
+        return len(self._recent)
+
+    @property
+    def unseen(self) -> int:
+        """The number of messages in the mailbox without the ``\\Seen`` flag.
+
+        """
+        return len(self._unseen)
+
+    @property
+    def first_unseen(self) -> Optional[int]:
+        """The message sequence number of the first message without the
+        ``\\Seen`` flag, if any.
+
+        """
+        if not self._unseen:
+            return None
+        return self._uids.index(self._unseen[0]) + 1
+
+    @property
+    def recent_uids(self) -> AbstractSet[int]:
+        """The UIDs of the messages with the ``\\Recent`` flag."""
+        return frozenset(self._recent)
+
+    def add(self, uid: int, seen: bool, recent: bool) -> None:
+        """Add a message to the counts.
+
+        Args:
+            uid: The message UID.
+            seen: True if the message has the ``\\Seen`` flag.
+            recent: True if the message has the ``\\Recent`` flag.
+
+        """
+        self._uids.add(uid)
+        self.set_seen(uid, seen)
+        if recent:
+            self._recent.add(uid)
+        else:
+            self._recent.discard(uid)
+
+    def remove(self, uids: Iterable[int]) -> None:
+        """Remove messages from the counts. UIDs that are not counted are
+        ignored.
+
+        Args:
+            uids: The message UIDs.
+
+        """
+        for uid in uids:
+            self._uids.discard(uid)
+            self._unseen.discard(uid)
+            self._recent.discard(uid)
+
+    def set_seen(self, uid: int, seen: bool) -> None:
+        """Update whether a message has the ``\\Seen`` flag. UIDs that are not
+        counted are ignored.
+
+        Args:
+            uid: The message UID.
+            seen: True if the message has the ``\\Seen`` flag.
+
+        """
+        if seen:
+            self._unseen.discard(uid)
+        elif uid in self._uids:
+            self._unseen.add(uid)
+
+    def claim_recent(self) -> Sequence[int]:
+        """Remove the ``\\Recent`` flag from every message, returning the
+        UIDs of the messages that had it.
+
+        """
+        ret = sorted(self._recent)
+        self._recent.clear()
+        return ret
+
+    def __iter__(self) -> Iterator[Tuple[int, bool, bool]]:
+        """Iterate the UID of each message, whether it has the ``\\Seen``
+        flag, and whether it has the ``\\Recent`` flag.
+
+        """
+        unseen = self._unseen
+        recent = self._recent
+        for uid in self._uids:
+            yield uid, uid not in unseen, uid in recent
@@ -6,13 +6,197 @@ See Also:
 """
 
 import enum
-from typing import Iterable, Mapping, AbstractSet, FrozenSet, Dict, Set
+from itertools import chain
+from threading import Lock
+from typing import Any, Iterable, Mapping, AbstractSet, FrozenSet, Dict, \
+    List, Optional, Set
 
-from .parsing.specials.flag import Flag, Recent, Wildcard
+from .parsing.specials.flag import Flag, Seen, Recent, Deleted, Flagged, \
+    Answered, Draft, Wildcard
 
-__all__ = ['FlagOp', 'PermanentFlags', 'SessionFlags']
+__all__ = ['FlagSet', 'FlagOp', 'PermanentFlags', 'SessionFlags']
 
-_recent_set = frozenset({Recent})
+
+class FlagSet(FrozenSet[Flag]):
+    """An immutable set of flags that is also represented as a bitmask. The
+    first :attr:`.max_bits` flags seen are assigned a bit position, starting
+    with the system flags, and up to :attr:`.max_interned` distinct sets of
+    flags are interned. Set operations between two flag sets, such as ``|``,
+    ``&`` and ``-``, are integer operations on their bitmasks followed by a
+    lookup of the interned result, rather than hashing each flag.
+
+    Flags seen after every bit position is taken are kept in the set without
+    one. Operations on sets that contain them are done on the bitmask and
+    on a :class:`frozenset` of those flags, and the results are not interned.
+
+    Flag sets are :class:`frozenset` objects, so they may be used anywhere a
+    frozenset of flags is expected. Operations with other sets return a flag
+    set.
+
+    Args:
+        flags: The flags in the set.
+
+    """
+
+    __slots__ = ['_mask', '_extra']
+
+    #: The maximum number of flags that are assigned a bit position.
+    max_bits = 64
+
+    #: The maximum number of distinct flag sets that are interned.
+    max_interned = 4096
+
+    _mask: int
+    _extra: FrozenSet[Flag]
+    _bits: Dict[Flag, int] = {}
+    _flags: List[Flag] = []
+    _interned: Dict[int, 'FlagSet'] = {}
+    _lock = Lock()
+
+    def __new__(cls, flags: Iterable[Flag] = ()) -> 'FlagSet':
+        if isinstance(flags, FlagSet):
+            return flags
+        bits = cls._bits
+        mask = 0
+        extra: Optional[List[Flag]] = None
+        for flag in flags:
+            try:
+                mask |= bits[flag]
+            except KeyError:
+                bit = cls._register(flag)
+                if bit:
+                    mask |= bit
+                elif extra is None:
+                    extra = [flag]
+                else:
+                    extra.append(flag)
+        if extra is None:
+            return cls._from_mask(mask)
+        return cls._build(mask, frozenset(extra))
+
+    @classmethod
+    def _register(cls, flag: Flag) -> int:
+        with cls._lock:
+            bit = cls._bits.get(flag)
+            if bit is None:
+                if len(cls._flags) >= cls.max_bits:
+                    return 0
+                bit = 1 << len(cls._flags)
+                cls._flags.append(flag)
+                cls._bits[flag] = bit
+            return bit
+
+    @classmethod
+    def _build(cls, mask: int, extra: FrozenSet[Flag]) -> 'FlagSet':
+        all_flags = cls._flags
+        flags = [all_flags[i] for i in range(mask.bit_length())
+                 if mask >> i & 1]
+        flag_set = frozenset.__new__(cls, chain(flags, extra))
+        flag_set._mask = mask
+        flag_set._extra = extra
+        return flag_set
+
+    @classmethod
+    def _from_mask(cls, mask: int, extra: FrozenSet[Flag] = frozenset()) \
+            -> 'FlagSet':
+        if extra:
+            return cls._build(mask, extra)
+        try:
+            return cls._interned[mask]
+        except KeyError:
+            pass
+        flag_set = cls._build(mask, extra)
+        if len(cls._interned) >= cls.max_interned:
+            return flag_set
+        return cls._interned.setdefault(mask, flag_set)
+
+    @property
+    def mask(self) -> int:
+        """The bitmask of the flags in the set that have a bit position."""
+        return self._mask
+
+    @classmethod
+    def mask_of(cls, flag: Flag) -> int:
+        """Return the bitmask of a single flag. Unlike creating a flag set,
+        this does not assign a bit position to a flag that does not have one,
+        the result is zero and will not match the bitmask of any flag set.
+
+        Args:
+            flag: The flag.
+
+        """
+        return cls._bits.get(flag, 0)
+
+    def __or__(self, other: Any) -> 'FlagSet':
+        if type(other) is not FlagSet:
+            if not isinstance(other, AbstractSet):
+                return NotImplemented
+            other = FlagSet(other)
+        if self._extra or other._extra:
+            return self._from_mask(self._mask | other._mask,
+                                   self._extra | other._extra)
+        return self._from_mask(self._mask | other._mask)
+
+    def __and__(self, other: Any) -> 'FlagSet':
+        if type(other) is not FlagSet:
+            if not isinstance(other, AbstractSet):
+                return NotImplemented
+            other = FlagSet(other)
+        if self._extra or other._extra:
+            return self._from_mask(self._mask & other._mask,
+                                   self._extra & other._extra)
+        return self._from_mask(self._mask & other._mask)
+
+    def __sub__(self, other: Any) -> 'FlagSet':
+        if type(other) is not FlagSet:
+            if not isinstance(other, AbstractSet):
+                return NotImplemented
+            other = FlagSet(other)
+        if self._extra or other._extra:
+            return self._from_mask(self._mask & ~other._mask,
+                                   self._extra - other._extra)
+        return self._from_mask(self._mask & ~other._mask)
+
+    def __xor__(self, other: Any) -> 'FlagSet':
+        if type(other) is not FlagSet:
+            if not isinstance(other, AbstractSet):
+                return NotImplemented
+            other = FlagSet(other)
+        if self._extra or other._extra:
+            return self._from_mask(self._mask ^ other._mask,
+                                   self._extra ^ other._extra)
+        return self._from_mask(self._mask ^ other._mask)
+
+    def __rsub__(self, other: Any) -> 'FlagSet':
+        if isinstance(other, AbstractSet):
+            return FlagSet(other) - self
+        return NotImplemented
+
+    __ror__ = __or__
+    __rand__ = __and__
+    __rxor__ = __xor__
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is FlagSet:
+            return self._mask == other._mask and self._extra == other._extra
+        return frozenset.__eq__(self, other)
+
+    def __ne__(self, other: Any) -> bool:
+        if type(other) is FlagSet:
+            return self._mask != other._mask or self._extra != other._extra
+        return frozenset.__ne__(self, other)
+
+    __hash__ = frozenset.__hash__
+
+    def __reduce__(self) -> Any:
+        return FlagSet, (list(self), )
+
+
+for _flag in (Seen, Recent, Deleted, Flagged, Answered, Draft):
+    FlagSet._register(_flag)
+
+_recent_set = FlagSet([Recent])
+_empty_set = FlagSet()
 
 
 class FlagOp(enum.Enum):
@@ -28,7 +212,7 @@ class FlagOp(enum.Enum):
     DELETE = enum.auto()
 
     def apply(self, flag_set: AbstractSet[Flag], operand: AbstractSet[Flag]) \
-            -> FrozenSet[Flag]:
+            -> FlagSet:
         """Apply the flag operation on the two sets, returning the result.
 
         Args:
@@ -36,12 +220,16 @@ class FlagOp(enum.Enum):
             operand: The flags to use as the operand.
 
         """
-        if self == FlagOp.ADD:
-            return frozenset(flag_set | operand)
-        elif self == FlagOp.DELETE:
-            return frozenset(flag_set - operand)
-        else:  # op == FlagOp.REPLACE
-            return frozenset(operand)
+        if type(operand) is not FlagSet:
+            operand = FlagSet(operand)
+        if self is FlagOp.REPLACE:
+            return operand
+        elif type(flag_set) is not FlagSet:
+            flag_set = FlagSet(flag_set)
+        if self is FlagOp.ADD:
+            return flag_set | operand
+        else:  # op == FlagOp.DELETE
+            return flag_set - operand
 
 
 class PermanentFlags:
@@ -58,14 +246,14 @@ class PermanentFlags:
 
     def __init__(self, defined: Iterable[Flag]) -> None:
         super().__init__()
-        self._defined = frozenset(defined) - _recent_set
+        self._defined = FlagSet(defined) - _recent_set
 
     @property
-    def defined(self) -> FrozenSet[Flag]:
+    def defined(self) -> FlagSet:
         """The defined permanent flags for the mailbox."""
         return self._defined
 
-    def intersect(self, other: Iterable[Flag]) -> FrozenSet[Flag]:
+    def intersect(self, other: Iterable[Flag]) -> FlagSet:
         """Returns the subset of flags in ``other`` that are also in
         :attr:`.defined`. If the wildcard flag is defined, then all flags in
         ``other`` are returned.
@@ -81,11 +269,11 @@ class PermanentFlags:
 
         """
         if Wildcard in self._defined:
-            return frozenset(other)
+            return FlagSet(other)
         else:
-            return self._defined & frozenset(other)
+            return self._defined & FlagSet(other)
 
-    def __and__(self, other: Iterable[Flag]) -> FrozenSet[Flag]:
+    def __and__(self, other: Iterable[Flag]) -> FlagSet:
         return self.intersect(other)
 
 
@@ -103,16 +291,16 @@ class SessionFlags:
 
     def __init__(self, defined: Iterable[Flag]):
         super().__init__()
-        self._defined = frozenset(defined) - _recent_set
-        self._flags: Dict[int, FrozenSet[Flag]] = {}
+        self._defined = FlagSet(defined) - _recent_set
+        self._flags: Dict[int, FlagSet] = {}
         self._recent: Set[int] = set()
 
     @property
-    def defined(self) -> FrozenSet[Flag]:
+    def defined(self) -> FlagSet:
         """The defined session flags for the mailbox."""
         return self._defined
 
-    def intersect(self, other: Iterable[Flag]) -> FrozenSet[Flag]:
+    def intersect(self, other: Iterable[Flag]) -> FlagSet:
         """Returns the subset of flags in ``other`` that are also in
         :attr:`.defined`. If the wildcard flag is defined, then all flags in
         ``other`` are returned.
@@ -128,21 +316,21 @@ class SessionFlags:
 
         """
         if Wildcard in self._defined:
-            return frozenset(other)
+            return FlagSet(other)
         else:
-            return self._defined & frozenset(other)
+            return self._defined & FlagSet(other)
 
-    def __and__(self, other: Iterable[Flag]) -> FrozenSet[Flag]:
+    def __and__(self, other: Iterable[Flag]) -> FlagSet:
         return self.intersect(other)
 
-    def get(self, uid: int) -> FrozenSet[Flag]:
+    def get(self, uid: int) -> FlagSet:
         """Return the session flags for the mailbox session.
 
         Args:
             uid: The message UID value.
 
         """
-        recent = _recent_set if uid in self._recent else frozenset()
+        recent = _recent_set if uid in self._recent else _empty_set
         flags = self._flags.get(uid)
         return recent if flags is None else (flags | recent)
 
@@ -158,7 +346,7 @@ class SessionFlags:
             self._flags.pop(uid, None)
 
     def update(self, uid: int, flag_set: Iterable[Flag],
-               op: FlagOp = FlagOp.REPLACE) -> FrozenSet[Flag]:
+               op: FlagOp = FlagOp.REPLACE) -> FlagSet:
         """Update the flags for the session, returning the resulting flags.
 
         Args:
@@ -167,7 +355,7 @@ class SessionFlags:
             op: The type of update.
 
         """
-        orig_set = self._flags.get(uid, frozenset())
+        orig_set = self._flags.get(uid, _empty_set)
         new_flags = op.apply(orig_set, self & flag_set)
         if new_flags:
             self._flags[uid] = new_flags
@@ -195,7 +383,7 @@ class SessionFlags:
         return self._recent
 
     @property
-    def flags(self) -> Mapping[int, FrozenSet[Flag]]:
+    def flags(self) -> Mapping[int, FlagSet]:
         """The mapping of UID to its associated session flags, not including
         ``\\Recent``.
 
@@ -78,3 +78,15 @@ class MailboxInterface(Protocol):
     def uid_validity(self) -> int:
         """The mailbox UID validity value."""
         ...
+
+    @property
+    def highest_mod_sequence(self) -> Optional[int]:
+        """The highest mod-sequence of any change to the mailbox, or ``None``
+        if the mailbox does not support persistent mod-sequences.
+
+        See Also:
+            `RFC 7162 3.1.1.
+            <https://tools.ietf.org/html/rfc7162#section-3.1.1>`_
+
+        """
+        return None
@@ -1,13 +1,15 @@
 
 from abc import abstractmethod
 from datetime import datetime
-from typing import TypeVar, Tuple, NamedTuple, Sequence, FrozenSet, Collection
+from typing import TypeVar, Tuple, NamedTuple, Sequence, FrozenSet, \
+    Collection, Optional
 from typing_extensions import Protocol
 
 from ..bytes import Writeable
 from ..flags import SessionFlags
 from ..parsing.response.fetch import EnvelopeStructure, BodyStructure
 from ..parsing.specials import Flag, ExtensionOptions
+from ..spool import SpooledLiteral
 
 __all__ = ['AppendMessage', 'CachedMessage', 'MessageInterface', 'MessageT',
            'FlagsKey']
@@ -28,6 +30,8 @@ class AppendMessage(NamedTuple):
         flag_set: The flags to assign to the message.
         when: The internal timestamp to assign to the message.
         options: The extension options in use for the message.
+        spooled: If the message was spooled to disk as it was received, the
+            spooled literal. The *message* is then its memory-mapped data.
 
     """
 
@@ -35,6 +39,7 @@ class AppendMessage(NamedTuple):
     flag_set: FrozenSet[Flag]
     when: datetime
     options: ExtensionOptions
+    spooled: Optional[SpooledLiteral] = None
 
 
 class CachedMessage(Protocol):
@@ -66,6 +71,15 @@ class CachedMessage(Protocol):
         """The permanent flags for the message."""
         ...
 
+    @property
+    @abstractmethod
+    def mod_sequence(self) -> Optional[int]:
+        """The mod-sequence of the last change to the message, or ``None`` if
+        the backend does not track mod-sequences.
+
+        """
+        ...
+
     @property
     @abstractmethod
     def flags_key(self) -> FlagsKey:
@@ -116,6 +130,19 @@ class MessageInterface(Protocol):
         """The message's internal date."""
         ...
 
+    @property
+    @abstractmethod
+    def mod_sequence(self) -> Optional[int]:
+        """The mod-sequence of the last change to the message, or ``None`` if
+        the backend does not track mod-sequences.
+
+        See Also:
+            `RFC 7162 3.1.1.
+            <https://tools.ietf.org/html/rfc7162#section-3.1.1>`_
+
+        """
+        ...
+
     @property
     @abstractmethod
     def append_msg(self) -> AppendMessage:
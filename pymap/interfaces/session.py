@@ -1,6 +1,7 @@
 
 from abc import abstractmethod
-from typing import Tuple, Optional, FrozenSet, Iterable, Sequence
+from typing import Tuple, Optional, FrozenSet, Iterable, Sequence, \
+    AsyncIterable, Mapping
 from typing_extensions import Protocol
 
 from pysasl import AuthenticationCredentials
@@ -13,6 +14,7 @@ from ..flags import FlagOp
 from ..parsing.specials import SequenceSet, FetchAttribute, Flag, SearchKey
 from ..parsing.response.code import AppendUid, CopyUid
 from ..selected import SelectedMailbox
+from ..sort import SortKeys
 
 __all__ = ['LoginProtocol', 'SessionInterface']
 
@@ -82,6 +84,26 @@ class SessionInterface(Protocol):
         """
         ...
 
+    @abstractmethod
+    async def get_mailboxes(self, names: Sequence[str],
+                            selected: SelectedMailbox = None) \
+            -> Tuple[Mapping[str, MailboxInterface],
+                     Optional[SelectedMailbox]]:
+        """Retrieves :class:`~pymap.interfaces.mailbox.MailboxInterface`
+        objects corresponding to existing mailboxes owned by the user, like
+        :meth:`.get_mailbox` but for many mailboxes at once. Mailboxes that do
+        not exist are omitted.
+
+        See Also:
+            `RFC 5819 2. <https://tools.ietf.org/html/rfc5819#section-2>`_
+
+        Args:
+            names: The names of the mailboxes.
+            selected: If applicable, the currently selected mailbox name.
+
+        """
+        ...
+
     @abstractmethod
     async def create_mailbox(self, name: str,
                              selected: SelectedMailbox = None) \
@@ -267,9 +289,12 @@ class SessionInterface(Protocol):
     async def fetch_messages(self, selected: SelectedMailbox,
                              sequence_set: SequenceSet,
                              attributes: FrozenSet[FetchAttribute]) \
-            -> Tuple[Iterable[Tuple[int, MessageInterface]], SelectedMailbox]:
-        """Get a list of loaded message objects corresponding to given sequence
-        set.
+            -> Tuple[AsyncIterable[Tuple[int, MessageInterface]],
+                     SelectedMailbox]:
+        """Get the loaded message objects corresponding to given sequence
+        set. The messages are resolved against the selected mailbox session
+        before it is updated, but loaded lazily as they are iterated, so that
+        the caller never needs to hold more than one message at a time.
 
         Args:
             selected: The selected mailbox session.
@@ -303,6 +328,28 @@ class SessionInterface(Protocol):
         """
         ...
 
+    @abstractmethod
+    async def sort_mailbox(self, selected: SelectedMailbox,
+                           keys: FrozenSet[SearchKey]) \
+            -> Tuple[Sequence[Tuple[int, MessageInterface, SortKeys]],
+                     SelectedMailbox]:
+        """Get the messages in the current mailbox that meet all of the
+        given search criteria, with the sort keys of each message, for the
+        ``SORT`` and ``THREAD`` commands.
+
+        See Also:
+            `RFC 5256 3. <https://tools.ietf.org/html/rfc5256#section-3>`_
+
+        Args:
+            selected: The selected mailbox session.
+            keys: Search keys specifying the message criteria.
+
+        Raises:
+            :class:`~pymap.exceptions.MailboxNotFound`
+
+        """
+        ...
+
     @abstractmethod
     async def expunge_mailbox(self, selected: SelectedMailbox,
                               uid_set: SequenceSet = None) -> SelectedMailbox:
@@ -348,23 +395,55 @@ class SessionInterface(Protocol):
         """
         ...
 
+    @abstractmethod
+    async def move_messages(self, selected: SelectedMailbox,
+                            sequence_set: SequenceSet,
+                            mailbox: str) \
+            -> Tuple[Optional[CopyUid], SelectedMailbox]:
+        """Move a set of messages into the given mailbox, expunging them
+        from the selected mailbox.
+
+        See Also:
+            `RFC 6851 3.3.
+            <https://tools.ietf.org/html/rfc6851#section-3.3>`_
+
+        Args:
+            selected: The selected mailbox session.
+            sequence_set: Sequence set of message sequences or UIDs.
+            mailbox: Name of the mailbox to move messages into.
+
+        Raises:
+            :class:`~pymap.exceptions.MailboxNotFound`
+            :class:`~pymap.exceptions.MailboxReadOnly`
+
+        """
+        ...
+
     @abstractmethod
     async def update_flags(self, selected: SelectedMailbox,
                            sequence_set: SequenceSet,
                            flag_set: FrozenSet[Flag],
-                           mode: FlagOp = FlagOp.REPLACE) \
+                           mode: FlagOp = FlagOp.REPLACE, *,
+                           unchanged_since: int = None) \
             -> Tuple[Iterable[Tuple[int, MessageInterface]], SelectedMailbox]:
         """Update the flags for the given set of messages.
 
+        If ``unchanged_since`` is given, messages with a greater mod-sequence
+        are not updated and are not included in the returned messages.
+
         See Also:
             `RFC 3501 6.4.6.
-            <https://tools.ietf.org/html/rfc3501#section-6.4.6>`_
+            <https://tools.ietf.org/html/rfc3501#section-6.4.6>`_,
+            `RFC 7162 3.1.3.
+            <https://tools.ietf.org/html/rfc7162#section-3.1.3>`_
 
         Args:
             selected: The selected mailbox session.
             sequence_set: Sequence set of message sequences or UIDs.
             flag_set: Set of flags to update.
             mode: Update mode for the flag set.
+            unchanged_since: Only update messages whose mod-sequence is not
+                greater than this value.
 
         Raises:
             :class:`~pymap.exceptions.MailboxNotFound`
@@ -372,3 +451,27 @@ class SessionInterface(Protocol):
 
         """
         ...
+
+    @abstractmethod
+    async def find_vanished(self, selected: SelectedMailbox,
+                            mod_sequence: int, uid_set: SequenceSet) \
+            -> Tuple[Sequence[int], SelectedMailbox]:
+        """Find the UIDs of messages in the set that have been expunged since
+        the given mod-sequence. If the backend does not keep track of when
+        messages were expunged, this may be every UID in the set that does
+        not exist in the mailbox.
+
+        See Also:
+            `RFC 7162 3.2.5.1.
+            <https://tools.ietf.org/html/rfc7162#section-3.2.5.1>`_
+
+        Args:
+            selected: The selected mailbox session.
+            mod_sequence: The mod-sequence last known to the client.
+            uid_set: The UIDs last known to the client.
+
+        Raises:
+            :class:`~pymap.exceptions.MailboxNotFound`
+
+        """
+        ...
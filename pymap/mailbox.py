@@ -28,18 +28,21 @@ class MailboxSnapshot(MailboxInterface):
         unseen: Number of unseen messages in the mailbox.
         first_unseen: The sequence number of the first unseen message.
         next_uid: The predicted next message UID.
+        highest_mod_sequence: The highest mod-sequence of any change to the
+            mailbox, if known.
 
     """
 
     __slots__ = ['name', 'readonly', 'uid_validity', 'permanent_flags',
                  'session_flags', 'exists', 'recent', 'unseen', 'first_unseen',
-                 'next_uid']
+                 'next_uid', 'highest_mod_sequence']
 
     def __init__(self, name: str, readonly: bool, uid_validity: int,
                  permanent_flags: Iterable[Flag],
                  session_flags: FrozenSet[Flag],
                  exists: int, recent: int, unseen: int,
-                 first_unseen: Optional[int], next_uid: int) -> None:
+                 first_unseen: Optional[int], next_uid: int,
+                 highest_mod_sequence: int = None) -> None:
         super().__init__()
         self.name: Final = name
         self.readonly: Final = readonly
@@ -51,6 +54,7 @@ class MailboxSnapshot(MailboxInterface):
         self.unseen: Final = unseen
         self.first_unseen: Final = first_unseen
         self.next_uid: Final = next_uid
+        self.highest_mod_sequence: Final = highest_mod_sequence
 
     @classmethod
     def new_uid_validity(cls) -> int:
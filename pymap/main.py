@@ -2,14 +2,17 @@
 
 import asyncio
 import logging
+import socket
 import traceback
 from argparse import ArgumentParser, Namespace, ArgumentDefaultsHelpFormatter
-from typing import Any, Type, Sequence, Mapping
+from typing import Any, Type, Tuple, Sequence, Mapping
 
 from pkg_resources import iter_entry_points, DistributionNotFound
 
+from .context import updates_relay
 from .core import __version__
 from .interfaces.backend import BackendInterface, ServiceInterface
+from .workers import Supervisor, UpdatesRelay
 
 _Backends = Mapping[str, Type[BackendInterface]]
 _Services = Mapping[str, Type[ServiceInterface]]
@@ -48,10 +51,14 @@ def main() -> None:
     listener = parser.add_argument_group('server arguments')
     listener.add_argument('--port', action='store', type=int, default=1143,
                           help='the port to listen on')
+    listener.add_argument('--workers', action='store', type=int, default=1,
+                          metavar='N', help='the number of worker processes')
     listener.add_argument('--cert', action='store', help='cert file for TLS')
     listener.add_argument('--key', action='store', help='key file for TLS')
     listener.add_argument('--insecure-login', action='store_true',
                           help='allow plaintext login without TLS')
+    listener.add_argument('--text-index', action='store_true',
+                          help='maintain a full-text index of each mailbox')
 
     backends: _Backends = _load_entry_points(parser, 'pymap.backend')
     services: _Services = _load_entry_points(parser, 'pymap.service')
@@ -75,19 +82,69 @@ def main() -> None:
     else:
         run_services = []
 
+    if args.workers > 1:
+        return run_workers(args, backend, run_services)
+
     try:
         return asyncio.run(run(args, backend, run_services), debug=False)
     except KeyboardInterrupt:
         pass
 
 
+def _bind(port: int) -> socket.socket:
+    try:
+        sock = socket.socket(socket.AF_INET6, socket.SOCK_STREAM)
+    except OSError:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        address: Tuple[Any, ...] = ('', port)
+    else:
+        sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0)
+        address = ('', port, 0, 0)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(address)
+        sock.listen(socket.SOMAXCONN)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def run_workers(args: Namespace, backend_type: Type[BackendInterface],
+                service_types: Sequence[Type[ServiceInterface]]) -> None:
+    """Bind the listening socket, then fork and supervise ``--workers``
+    processes that accept connections from it. Services are only run by the
+    first worker.
+
+    """
+    sock = _bind(args.port)
+
+    def worker(index: int, relay: UpdatesRelay) -> None:
+        worker_services = service_types if index == 0 else []
+        asyncio.run(run(args, backend_type, worker_services,
+                        sock=sock, relay=relay), debug=False)
+
+    try:
+        Supervisor(args.workers, worker).run()
+    finally:
+        sock.close()
+
+
 async def run(args: Namespace, backend_type: Type[BackendInterface],
-              service_types: Sequence[Type[ServiceInterface]]) -> None:
+              service_types: Sequence[Type[ServiceInterface]], *,
+              sock: socket.socket = None,
+              relay: UpdatesRelay = None) -> None:
     backend = await backend_type.init(args)
     backend.config.apply_context()
+    if relay is not None:
+        relay.start()
+        updates_relay.set(relay)
     services = [await service.init(backend) for service in service_types]
 
-    server = await asyncio.start_server(backend, port=args.port)
+    if sock is not None:
+        server = await asyncio.start_server(backend, sock=sock)
+    else:
+        server = await asyncio.start_server(backend, port=args.port)
 
     # Typeshed currently has poor stubs for AbstractServer.
     async with server:  # type: ignore
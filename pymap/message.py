@@ -3,11 +3,11 @@
 import re
 from datetime import datetime
 from typing import Any, Tuple, Iterable, Mapping, FrozenSet, Sequence, \
-    Collection, TypeVar, Type
+    Collection, TypeVar, Type, Optional
 from typing_extensions import Final
 
 from .bytes import Writeable
-from .flags import SessionFlags
+from .flags import FlagSet, SessionFlags
 from .interfaces.message import AppendMessage, CachedMessage, \
     MessageInterface, FlagsKey
 from .mime import MessageContent
@@ -53,7 +53,7 @@ class BaseMessage(MessageInterface, CachedMessage):
         self.uid: Final = uid
         self.internal_date: Final = internal_date
         self.expunged: Final = expunged
-        self._permanent_flags = frozenset(permanent_flags or [])
+        self._permanent_flags = FlagSet(permanent_flags or [])
         self._flags_key = (uid, self._permanent_flags)
         self._content = content
         self._kwargs = kwargs
@@ -96,15 +96,23 @@ class BaseMessage(MessageInterface, CachedMessage):
                    self.expunged, self._content, **self._kwargs)
 
     @property
-    def permanent_flags(self) -> FrozenSet[Flag]:
+    def mod_sequence(self) -> Optional[int]:
+        return self._kwargs.get('mod_sequence')
+
+    @mod_sequence.setter
+    def mod_sequence(self, mod_sequence: Optional[int]) -> None:
+        self._kwargs['mod_sequence'] = mod_sequence
+
+    @property
+    def permanent_flags(self) -> FlagSet:
         return self._permanent_flags
 
     @permanent_flags.setter
     def permanent_flags(self, permanent_flags: FrozenSet[Flag]) -> None:
-        self._permanent_flags = permanent_flags
-        self._flags_key = (self.uid, permanent_flags)
+        self._permanent_flags = flag_set = FlagSet(permanent_flags)
+        self._flags_key = (self.uid, flag_set)
 
-    def get_flags(self, session_flags: SessionFlags) -> FrozenSet[Flag]:
+    def get_flags(self, session_flags: SessionFlags) -> FlagSet:
         msg_sflags = session_flags.get(self.uid)
         if msg_sflags:
             return self._permanent_flags | msg_sflags
@@ -137,7 +137,7 @@ class MessageContent(Writeable):
 
         """
         for part in self._raw:
-            writer.write(bytes(part))
+            writer.write(part)
 
     def __len__(self) -> int:
         return sum(len(part) for part in self._raw)
@@ -234,7 +234,7 @@ class MessageHeader(Writeable):
 
         """
         for part in self._raw:
-            writer.write(bytes(part))
+            writer.write(part)
 
     def __len__(self) -> int:
         return sum(len(part) for part in self._raw)
@@ -313,7 +313,7 @@ class MessageBody(Writeable, metaclass=ABCMeta):
 
         """
         for part in self._raw:
-            writer.write(bytes(part))
+            writer.write(part)
 
     def __len__(self) -> int:
         return sum(len(part) for part in self._raw)
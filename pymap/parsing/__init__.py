@@ -1,25 +1,33 @@
 """Package defining all the IMAP parsing and response classes."""
 
 from abc import abstractmethod, ABCMeta
-from typing import Any, Type, TypeVar, Generic, Tuple, Sequence, Dict, List
+from typing import Any, Type, TypeVar, Generic, Tuple, Sequence, Dict, List, \
+    Union
 
 from .exceptions import NotParseable, UnexpectedType
 from ..bytes import rev, Writeable
+from ..spool import SpooledLiteral
 
 __all__ = ['Params', 'Parseable', 'ExpectedParseable', 'Space', 'EndLine',
-           'ParseableT']
+           'ParseableT', 'Continuation']
 
 #: Type variable used for specifying the parseable type of a :class:`Parseable`
 #: sub-class.
 ParseableT = TypeVar('ParseableT')
 
+#: Type alias for the continuation buffers received after a literal string.
+Continuation = Union[memoryview, SpooledLiteral]
+
 
 class Params:
     """Parameters used and passed around among the :meth:`~Parseable.parse`
     methods.
 
     Args:
-        continuations: The continuation buffers remaining for parsing.
+        continuations: The continuation buffers remaining for parsing. A
+            literal that was spooled to disk is given as a
+            :class:`~pymap.spool.SpooledLiteral` followed by the buffer of the
+            line after it.
         expected: The types that are expected in the next parsed object.
         list_expected: The types that are expect in a parsed list.
         command_name: The name of the command currently being parsed, if any.
@@ -34,7 +42,7 @@ class Params:
     __slots__ = ['continuations', 'expected', 'list_expected', 'command_name',
                  'uid', 'charset', 'tag', 'max_append_len']
 
-    def __init__(self, *, continuations: List[memoryview] = None,
+    def __init__(self, *, continuations: List[Continuation] = None,
                  expected: Sequence[Type['Parseable']] = None,
                  list_expected: Sequence[Type['Parseable']] = None,
                  command_name: bytes = None,
@@ -58,7 +66,7 @@ class Params:
         else:
             kwargs[attr] = getattr(self, attr)
 
-    def copy(self, *, continuations: List[memoryview] = None,
+    def copy(self, *, continuations: List[Continuation] = None,
              expected: Sequence[Type['Parseable']] = None,
              list_expected: Sequence[Type['Parseable']] = None,
              command_name: bytes = None,
@@ -1,23 +1,26 @@
 
 from datetime import datetime
-from typing import ClassVar, Tuple, Sequence, Iterable, Optional, List
+from typing import ClassVar, Tuple, Sequence, Iterable, Optional, List, \
+    Union, FrozenSet, NamedTuple
 
 from . import CommandAuth
 from .. import NotParseable, UnexpectedType, Space, EndLine, Params
 from ..exceptions import InvalidContent
 from ..modutf7 import modutf7_decode
-from ..primitives import ListP, String, LiteralString
+from ..primitives import Atom, ListP, String, LiteralString
 from ..specials import Mailbox, DateTime, Flag, StatusAttribute, \
-    ExtensionOption, ExtensionOptions
+    ExtensionOption, ExtensionOptions, SequenceSet
 from ...bytes import rev
 from ...interfaces.message import AppendMessage
+from ...spool import SpooledLiteral
 
-__all__ = ['AppendCommand', 'CreateCommand', 'DeleteCommand', 'ExamineCommand',
-           'ListCommand', 'LSubCommand', 'RenameCommand', 'SelectCommand',
-           'StatusCommand', 'SubscribeCommand', 'UnsubscribeCommand']
+__all__ = ['AppendCommand', 'CompressCommand', 'CreateCommand',
+           'DeleteCommand', 'EnableCommand', 'ExamineCommand', 'ListCommand',
+           'LSubCommand', 'RenameCommand', 'SelectCommand', 'StatusCommand',
+           'SubscribeCommand', 'UnsubscribeCommand']
 
-_AppendMsgArg = Tuple[bytes, Iterable[Flag], Optional[datetime],
-                      ExtensionOptions]
+_AppendMsgArg = Tuple[Union[bytes, SpooledLiteral], Iterable[Flag],
+                      Optional[datetime], ExtensionOptions]
 
 
 class CommandMailboxArg(CommandAuth):
@@ -49,8 +52,9 @@ class AppendCommand(CommandAuth):
     Args:
         tag: The command tag.
         mailbox: The mailbox name.
-        messages: List of tuples containing the raw messages bytes, the
-            flags, and the internal timestamp to assign to the message.
+        messages: List of tuples containing the raw messages bytes or
+            spooled literal, the flags, and the internal timestamp to assign
+            to the message.
 
     """
 
@@ -62,10 +66,18 @@ class AppendCommand(CommandAuth):
         now = datetime.now()
         self.mailbox_obj = mailbox
         self.messages: Sequence[AppendMessage] = \
-            [AppendMessage(message, frozenset(flags),
-                           when or now, options)
+            [self._append_msg(message, frozenset(flags), when or now, options)
              for message, flags, when, options in messages]
 
+    @classmethod
+    def _append_msg(cls, message: Union[bytes, SpooledLiteral],
+                    flag_set: FrozenSet[Flag], when: datetime,
+                    options: ExtensionOptions) -> AppendMessage:
+        if isinstance(message, SpooledLiteral):
+            return AppendMessage(message.data, flag_set, when, options,
+                                 spooled=message)
+        return AppendMessage(message, flag_set, when, options)
+
     @property
     def mailbox(self) -> str:
         return str(self.mailbox_obj)
@@ -110,7 +122,8 @@ class AppendCommand(CommandAuth):
             else:
                 raise exc
         else:
-            return (message.value, flags, date_time, options), buf
+            data = message.spooled or message.value
+            return (data, flags, date_time, options), buf
 
     @classmethod
     def parse(cls, buf: memoryview, params: Params) \
@@ -130,6 +143,34 @@ class AppendCommand(CommandAuth):
         return cls(params.tag, mailbox, messages), buf
 
 
+class CompressCommand(CommandAuth):
+    """The ``COMPRESS`` command enables compression of all further data sent
+    in both directions of the connection.
+
+    See Also:
+        `RFC 4978 3. <https://tools.ietf.org/html/rfc4978#section-3>`_
+
+    Args:
+        tag: The command tag.
+        algorithm: The compression algorithm name, e.g. ``DEFLATE``.
+
+    """
+
+    command = b'COMPRESS'
+
+    def __init__(self, tag: bytes, algorithm: bytes) -> None:
+        super().__init__(tag)
+        self.algorithm = algorithm
+
+    @classmethod
+    def parse(cls, buf: memoryview, params: Params) \
+            -> Tuple['CompressCommand', memoryview]:
+        _, buf = Space.parse(buf, params)
+        algorithm, buf = Atom.parse(buf, params)
+        _, buf = EndLine.parse(buf, params)
+        return cls(params.tag, algorithm.value.upper()), buf
+
+
 class CreateCommand(CommandMailboxArg):
     """The ``CREATE`` command creates a new mailbox."""
 
@@ -156,13 +197,57 @@ class DeleteCommand(CommandMailboxArg):
     command = b'DELETE'
 
 
+class EnableCommand(CommandAuth):
+    """The ``ENABLE`` command enables server extensions that change the
+    behavior of the session.
+
+    See Also:
+        `RFC 5161 3.1. <https://tools.ietf.org/html/rfc5161#section-3.1>`_
+
+    Args:
+        tag: The command tag.
+        capabilities: The capability names to enable.
+
+    """
+
+    command = b'ENABLE'
+
+    def __init__(self, tag: bytes, capabilities: Sequence[bytes]) -> None:
+        super().__init__(tag)
+        self.capabilities = capabilities
+
+    @classmethod
+    def parse(cls, buf: memoryview, params: Params) \
+            -> Tuple['EnableCommand', memoryview]:
+        capabilities: List[bytes] = []
+        while True:
+            try:
+                _, buf = EndLine.parse(buf, params)
+            except NotParseable:
+                _, buf = Space.parse(buf, params)
+                capability, buf = Atom.parse(buf, params)
+                capabilities.append(capability.value.upper())
+            else:
+                break
+        if not capabilities:
+            raise NotParseable(buf)
+        return cls(params.tag, capabilities), buf
+
+
 class ListCommand(CommandAuth):
     """The ``LIST`` command lists existing mailboxes.
 
+    See Also:
+        `RFC 5819 <https://tools.ietf.org/html/rfc5819>`_
+
     Args:
         tag: The command tag.
         ref_name: The mailbox reference name.
         filter_: The mailbox filter string.
+        options: The ``RETURN`` options, e.g. ``STATUS``.
+
+    Raises:
+        ValueError: The return options were invalid.
 
     """
 
@@ -171,13 +256,44 @@ class ListCommand(CommandAuth):
     #: All mailboxes may be listed, not only subscribed mailboxes.
     only_subscribed: ClassVar[bool] = False
 
+    #: The return options that may be given with ``RETURN``.
+    return_options: ClassVar[FrozenSet[bytes]] = frozenset(
+        [b'STATUS', b'CHILDREN'])
+
     _list_mailbox_pattern = rev.compile(br'[\x21\x23-\x27\x2A-\x5B'
                                         br'\x5D-\x7A\x7C\x7E]+')
 
-    def __init__(self, tag: bytes, ref_name: str, filter_: str) -> None:
+    def __init__(self, tag: bytes, ref_name: str, filter_: str,
+                 options: ExtensionOptions = None) -> None:
         super().__init__(tag)
         self.ref_name = ref_name
         self.filter = filter_
+        self.options = options = options or ExtensionOptions.empty()
+        if any(option not in self.return_options
+               for option in options.value):
+            raise ValueError(options)
+        status_arg = options.get(b'STATUS')
+        if status_arg is None:
+            self.status_list: Sequence[StatusAttribute] = []
+        elif not status_arg.value:
+            raise ValueError(options)
+        else:
+            self.status_list = [StatusAttribute(bytes(attr))
+                                for attr in status_arg.value]
+
+    @classmethod
+    def _parse_options(cls, buf: memoryview, params: Params) \
+            -> Tuple[ExtensionOptions, memoryview]:
+        start = cls._whitespace_length(buf)
+        if not cls.only_subscribed \
+                and bytes(buf[start:start + 6]).upper() == b'RETURN':
+            buf = buf[start + 6:]
+            options, after = ExtensionOptions.parse(buf, params)
+            if len(after) == len(buf):
+                raise NotParseable(buf)
+            return options, after
+        else:
+            return ExtensionOptions.empty(), buf
 
     @classmethod
     def parse(cls, buf: memoryview, params: Params) \
@@ -193,8 +309,12 @@ class ListCommand(CommandAuth):
         else:
             filter_str, buf = String.parse(buf, params)
             filter_ = modutf7_decode(filter_str.value)
+        options, buf = cls._parse_options(buf, params)
         _, buf = EndLine.parse(buf, params)
-        return cls(params.tag, ref_name.value, filter_), buf
+        try:
+            return cls(params.tag, ref_name.value, filter_, options), buf
+        except ValueError:
+            raise NotParseable(buf)
 
 
 class LSubCommand(ListCommand):
@@ -246,6 +366,26 @@ class RenameCommand(CommandAuth):
         return cls(params.tag, from_mailbox, to_mailbox, options), buf
 
 
+class QResyncParams(NamedTuple):
+    """The parameters of the ``QRESYNC`` option of a ``SELECT`` or
+    ``EXAMINE`` command, describing the client's cached state of the mailbox.
+    The optional sequence match data is validated but not used.
+
+    See Also:
+        `RFC 7162 3.2.5. <https://tools.ietf.org/html/rfc7162#section-3.2.5>`_
+
+    """
+
+    #: The last known UID validity of the mailbox.
+    uid_validity: int
+
+    #: The last known highest mod-sequence of the mailbox.
+    mod_sequence: int
+
+    #: The UIDs known to the client, if given.
+    known_uids: Optional[SequenceSet] = None
+
+
 class SelectCommand(CommandMailboxArg):
     """The ``SELECT`` command selects a mailbox for querying, updates, and
     state changes.
@@ -263,6 +403,52 @@ class SelectCommand(CommandMailboxArg):
                  options: ExtensionOptions) -> None:
         super().__init__(tag, mailbox)
         self.options = options
+        self.condstore = options.has(b'CONDSTORE')
+        qresync_arg = options.get(b'QRESYNC')
+        self.qresync: Optional[QResyncParams] = None
+        if qresync_arg is not None:
+            self.qresync = self._parse_qresync(qresync_arg)
+
+    @classmethod
+    def _parse_number(cls, value: object) -> int:
+        raw = getattr(value, 'value', None)
+        if not isinstance(raw, bytes) or not raw.isdigit():
+            raise ValueError(value)
+        return int(raw)
+
+    @classmethod
+    def _parse_uid_set(cls, value: object) -> SequenceSet:
+        raw = getattr(value, 'value', None)
+        if not isinstance(raw, bytes):
+            raise ValueError(value)
+        seq_set, after = SequenceSet.parse(memoryview(raw), Params(uid=True))
+        if after:
+            raise ValueError(value)
+        return seq_set
+
+    @classmethod
+    def _parse_qresync(cls, arg: ListP) -> QResyncParams:
+        values = list(arg.value)
+        if len(values) == 1 and isinstance(values[0], ListP):
+            values = list(values[0].value)
+        if len(values) < 2 or len(values) > 4:
+            raise ValueError(arg)
+        uid_validity = cls._parse_number(values[0])
+        mod_sequence = cls._parse_number(values[1])
+        known_uids: Optional[SequenceSet] = None
+        rest = values[2:]
+        if rest and not isinstance(rest[0], ListP):
+            known_uids = cls._parse_uid_set(rest.pop(0))
+        if rest:
+            seq_match = rest.pop(0)
+            if rest or not isinstance(seq_match, ListP) \
+                    or len(seq_match.value) != 2:
+                raise ValueError(arg)
+            for seq_match_set in seq_match.value:
+                cls._parse_uid_set(seq_match_set)
+        if uid_validity == 0 or mod_sequence == 0:
+            raise ValueError(arg)
+        return QResyncParams(uid_validity, mod_sequence, known_uids)
 
     @classmethod
     def parse(cls, buf: memoryview, params: Params) \
@@ -271,7 +457,10 @@ class SelectCommand(CommandMailboxArg):
         mailbox, buf = Mailbox.parse(buf, params)
         options, buf = ExtensionOptions.parse(buf, params)
         _, buf = EndLine.parse(buf, params)
-        return cls(params.tag, mailbox, options), buf
+        try:
+            return cls(params.tag, mailbox, options), buf
+        except ValueError:
+            raise NotParseable(buf)
 
 
 class ExamineCommand(SelectCommand):
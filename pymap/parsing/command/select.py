@@ -1,20 +1,58 @@
 
 import re
-from typing import Tuple, Sequence, List, Iterable, Optional, ClassVar
+from typing import Tuple, Sequence, List, Iterable, Optional, ClassVar, \
+    FrozenSet
 
 from . import CommandSelect, CommandNoArgs
 from .. import Params, Space, EndLine
 from ..exceptions import NotParseable
-from ..primitives import Atom, ListP
+from ..primitives import Atom, ListP, Number
 from ..specials import AString, Mailbox, SequenceSet, Flag, FetchAttribute, \
-    SearchKey, ExtensionOptions
+    SearchKey, ExtensionOption, ExtensionOptions
 from ...bytes import rev
 from ...flags import FlagOp
 
 __all__ = ['CheckCommand', 'CloseCommand', 'ExpungeCommand', 'CopyCommand',
-           'FetchCommand', 'StoreCommand', 'SearchCommand', 'UidCommand',
-           'UidCopyCommand', 'UidExpungeCommand', 'UidFetchCommand',
-           'UidSearchCommand', 'UidStoreCommand', 'IdleCommand']
+           'MoveCommand', 'FetchCommand', 'StoreCommand', 'SearchCommand',
+           'SortCommand', 'ThreadCommand', 'UidCommand', 'UidCopyCommand',
+           'UidMoveCommand', 'UidExpungeCommand', 'UidFetchCommand',
+           'UidSearchCommand', 'UidSortCommand', 'UidThreadCommand',
+           'UidStoreCommand', 'IdleCommand']
+
+
+def _get_mod_sequence(options: ExtensionOptions,
+                      option: bytes) -> Optional[int]:
+    arg = options.get(option)
+    if arg is None:
+        return None
+    elif len(arg.value) != 1 or not isinstance(arg.value[0], Number):
+        raise ValueError(arg)
+    return arg.value[0].value
+
+
+def _parse_search_criteria(buf: memoryview, params: Params) \
+        -> Tuple[str, Sequence[SearchKey], memoryview]:
+    # The charset is required by the SORT and THREAD commands.
+    _, buf = Space.parse(buf, params)
+    string, after = AString.parse(buf, params)
+    charset = str(string.value, 'ascii')
+    try:
+        b' '.decode(charset)
+    except LookupError:
+        raise NotParseable(buf, b'BADCHARSET')
+    buf = after
+    search_keys = []
+    while True:
+        try:
+            _, buf = Space.parse(buf, params)
+            key, buf = SearchKey.parse(buf, params.copy(charset=charset))
+            search_keys.append(key)
+        except NotParseable:
+            if not search_keys:
+                raise
+            break
+    _, buf = EndLine.parse(buf, params)
+    return charset, search_keys, buf
 
 
 class CheckCommand(CommandNoArgs, CommandSelect):
@@ -110,6 +148,23 @@ class CopyCommand(CommandSelect):
         return cls(params.tag, seq_set, mailbox), buf
 
 
+class MoveCommand(CopyCommand):
+    """The ``MOVE`` command moves messages from the selected mailbox to the
+    end of the destination mailbox, expunging them from the selected mailbox.
+
+    See Also:
+        `RFC 6851 3.1. <https://tools.ietf.org/html/rfc6851#section-3.1>`_
+
+    Args:
+        tag: The command tag.
+        seq_set: The sequence set of the messages to move.
+        mailbox: The destination mailbox.
+
+    """
+
+    command = b'MOVE'
+
+
 class FetchCommand(CommandSelect):
     """The ``FETCH`` command fetches message data from the selected mailbox.
     What data is fetched can be controlled in depth by a set of fetch
@@ -122,6 +177,10 @@ class FetchCommand(CommandSelect):
         tag: The command tag.
         seq_set: The sequence set of the messages to fetch.
         attr_list: The message attributes to fetch.
+        options: The fetch modifiers, e.g. ``CHANGEDSINCE``.
+
+    Raises:
+        ValueError: The fetch modifiers were invalid.
 
     """
 
@@ -135,7 +194,11 @@ class FetchCommand(CommandSelect):
         self.sequence_set = seq_set
         self.no_expunge_response = not seq_set.uid
         self.attributes = attr_list
-        self.options = options or ExtensionOptions.empty()
+        self.options = options = options or ExtensionOptions.empty()
+        self.changed_since = _get_mod_sequence(options, b'CHANGEDSINCE')
+        self.vanished = options.has(b'VANISHED')
+        if self.vanished and (self.changed_since is None or not seq_set.uid):
+            raise ValueError(options)
 
     @classmethod
     def _check_macros(cls, buf: memoryview, params: Params) \
@@ -186,7 +249,12 @@ class FetchCommand(CommandSelect):
             attr_list = list(attr_list) + [FetchAttribute(b'UID')]
         options, buf = ExtensionOptions.parse(buf, params)
         _, buf = EndLine.parse(buf, params)
-        return cls(params.tag, seq_set, attr_list, options), buf
+        if options.has(b'CHANGEDSINCE'):
+            attr_list = list(attr_list) + [FetchAttribute(b'MODSEQ')]
+        try:
+            return cls(params.tag, seq_set, attr_list, options), buf
+        except ValueError:
+            raise NotParseable(buf)
 
 
 class StoreCommand(CommandSelect):
@@ -201,6 +269,11 @@ class StoreCommand(CommandSelect):
         seq_set: The sequence set of the messages to fetch.
         flags: The flag set operand.
         mode: The type of update operation.
+        silent: True if the updated flags should not be sent.
+        options: The store modifiers, e.g. ``UNCHANGEDSINCE``.
+
+    Raises:
+        ValueError: The store modifiers were invalid.
 
     """
 
@@ -218,7 +291,8 @@ class StoreCommand(CommandSelect):
         self.flag_set = frozenset(flags)
         self.mode = mode
         self.silent = silent
-        self.options = options or ExtensionOptions.empty()
+        self.options = options = options or ExtensionOptions.empty()
+        self.unchanged_since = _get_mod_sequence(options, b'UNCHANGEDSINCE')
 
     @classmethod
     def _parse_store_info(cls, buf: memoryview, params: Params) \
@@ -261,7 +335,11 @@ class StoreCommand(CommandSelect):
         _, buf = Space.parse(buf, params)
         flag_list, buf = cls._parse_flag_list(buf, params)
         _, buf = EndLine.parse(buf, params)
-        return cls(params.tag, seq_set, flag_list, mode, silent, options), buf
+        try:
+            return cls(params.tag, seq_set, flag_list, mode, silent,
+                       options), buf
+        except ValueError:
+            raise NotParseable(buf)
 
 
 class SearchCommand(CommandSelect):
@@ -269,25 +347,52 @@ class SearchCommand(CommandSelect):
     based on a set of search criteria.
 
     See Also:
-        `RFC 3501 6.4.4. <https://tools.ietf.org/html/rfc3501#section-6.4.4>`_
+        `RFC 3501 6.4.4. <https://tools.ietf.org/html/rfc3501#section-6.4.4>`_,
+        `RFC 4731 3.1. <https://tools.ietf.org/html/rfc4731#section-3.1>`_,
+        `RFC 5182 2.1. <https://tools.ietf.org/html/rfc5182#section-2.1>`_
 
     Args:
         tag: The command tag.
         keys: The search keys.
         charset: The charset in use by the search keys.
+        options: The ``RETURN`` result options, e.g. ``MIN`` or ``SAVE``.
+
+    Raises:
+        ValueError: The result options were invalid.
 
     """
 
     command = b'SEARCH'
     uid: ClassVar[bool] = False
 
+    #: The result options that may be given with ``RETURN``.
+    result_options: ClassVar[FrozenSet[bytes]] = frozenset(
+        [b'MIN', b'MAX', b'COUNT', b'ALL', b'SAVE'])
+
     def __init__(self, tag: bytes, keys: Iterable[SearchKey],
                  charset: Optional[str],
                  options: ExtensionOptions = None) -> None:
         super().__init__(tag)
         self.keys = frozenset(keys)
         self.charset = charset
-        self.options = options or ExtensionOptions.empty()
+        self.options = options = options or ExtensionOptions.empty()
+        if any(option not in self.result_options
+               or options.get(option) for option in options.value):
+            raise ValueError(options)
+
+    @property
+    def returns(self) -> FrozenSet[bytes]:
+        """The result options that produce data in the ``ESEARCH`` response.
+        If empty, a plain ``SEARCH`` response is returned instead, unless the
+        result is only saved.
+
+        """
+        return frozenset(self.options.value) - {b'SAVE'}
+
+    @property
+    def save(self) -> bool:
+        """True if the result is saved for reference by ``$``."""
+        return self.options.has(b'SAVE')
 
     @classmethod
     def _parse_charset(cls, buf: memoryview, params: Params) \
@@ -313,8 +418,16 @@ class SearchCommand(CommandSelect):
     def _parse_options(cls, buf: memoryview, params: Params) \
             -> Tuple[ExtensionOptions, memoryview]:
         start = cls._whitespace_length(buf)
-        if buf[start:start + 6] == b'RETURN':
-            return ExtensionOptions.parse(buf[start + 6:], params)
+        if bytes(buf[start:start + 6]).upper() == b'RETURN':
+            buf = buf[start + 6:]
+            options, after = ExtensionOptions.parse(buf, params)
+            if not options:
+                if len(after) == len(buf):
+                    raise NotParseable(buf)
+                # An empty list of result options is the same as ALL.
+                all_option = ExtensionOption(b'ALL', ListP([]))
+                options = ExtensionOptions([all_option])
+            return options, after
         else:
             options, _ = ExtensionOptions.parse(memoryview(b''), params)
             return options, buf
@@ -335,18 +448,139 @@ class SearchCommand(CommandSelect):
                     raise
                 break
         _, buf = EndLine.parse(buf, params)
-        return cls(params.tag, search_keys, charset, options), buf
+        try:
+            return cls(params.tag, search_keys, charset, options), buf
+        except ValueError:
+            raise NotParseable(buf)
+
+
+class SortCommand(CommandSelect):
+    """The ``SORT`` command searches the messages in the selected mailbox
+    based on a set of search criteria, like the ``SEARCH`` command, and
+    returns the matching messages in the order given by the sort criteria.
+
+    See Also:
+        `RFC 5256 3. <https://tools.ietf.org/html/rfc5256#section-3>`_
+
+    Args:
+        tag: The command tag.
+        criteria: The sort key and whether it is reversed, most significant
+            first.
+        keys: The search keys.
+        charset: The charset in use by the search keys.
+
+    Raises:
+        ValueError: The sort criteria were invalid.
+
+    """
+
+    command = b'SORT'
+    uid: ClassVar[bool] = False
+
+    #: The keys that messages may be sorted by.
+    sort_keys: ClassVar[FrozenSet[bytes]] = frozenset(
+        [b'ARRIVAL', b'CC', b'DATE', b'FROM', b'SIZE', b'SUBJECT', b'TO'])
+
+    def __init__(self, tag: bytes, criteria: Sequence[Tuple[bytes, bool]],
+                 keys: Iterable[SearchKey], charset: str) -> None:
+        super().__init__(tag)
+        self.criteria = criteria
+        self.keys = frozenset(keys)
+        self.charset = charset
+        if not criteria or any(key not in self.sort_keys
+                               for key, _ in criteria):
+            raise ValueError(criteria)
+
+    @classmethod
+    def _parse_criteria(cls, buf: memoryview, params: Params) \
+            -> Tuple[Sequence[Tuple[bytes, bool]], memoryview]:
+        params_copy = params.copy(list_expected=[Atom])
+        criteria_p, buf = ListP.parse(buf, params_copy)
+        criteria: List[Tuple[bytes, bool]] = []
+        reverse = False
+        for atom in criteria_p.get_as(Atom):
+            key = atom.value.upper()
+            if key == b'REVERSE' and not reverse:
+                reverse = True
+            else:
+                criteria.append((key, reverse))
+                reverse = False
+        if reverse:
+            raise NotParseable(buf)
+        return criteria, buf
+
+    @classmethod
+    def parse(cls, buf: memoryview, params: Params) \
+            -> Tuple['SortCommand', memoryview]:
+        _, buf = Space.parse(buf, params)
+        criteria, buf = cls._parse_criteria(buf, params)
+        charset, search_keys, buf = _parse_search_criteria(buf, params)
+        try:
+            return cls(params.tag, criteria, search_keys, charset), buf
+        except ValueError:
+            raise NotParseable(buf)
+
+
+class ThreadCommand(CommandSelect):
+    """The ``THREAD`` command searches the messages in the selected mailbox
+    based on a set of search criteria, like the ``SEARCH`` command, and
+    returns the matching messages grouped into threads of replies.
+
+    See Also:
+        `RFC 5256 3. <https://tools.ietf.org/html/rfc5256#section-3>`_
+
+    Args:
+        tag: The command tag.
+        algorithm: The threading algorithm, e.g. ``REFERENCES``.
+        keys: The search keys.
+        charset: The charset in use by the search keys.
+
+    Raises:
+        ValueError: The threading algorithm was invalid.
+
+    """
+
+    command = b'THREAD'
+    uid: ClassVar[bool] = False
+
+    #: The supported threading algorithms.
+    algorithms: ClassVar[FrozenSet[bytes]] = frozenset(
+        [b'ORDEREDSUBJECT', b'REFERENCES'])
+
+    def __init__(self, tag: bytes, algorithm: bytes,
+                 keys: Iterable[SearchKey], charset: str) -> None:
+        super().__init__(tag)
+        self.algorithm = algorithm
+        self.keys = frozenset(keys)
+        self.charset = charset
+        if algorithm not in self.algorithms:
+            raise ValueError(algorithm)
+
+    @classmethod
+    def parse(cls, buf: memoryview, params: Params) \
+            -> Tuple['ThreadCommand', memoryview]:
+        _, buf = Space.parse(buf, params)
+        atom, buf = Atom.parse(buf, params)
+        charset, search_keys, buf = _parse_search_criteria(buf, params)
+        algorithm = atom.value.upper()
+        try:
+            return cls(params.tag, algorithm, search_keys, charset), buf
+        except ValueError:
+            raise NotParseable(buf)
 
 
 class UidCommand(CommandSelect):
-    """The ``UID`` command precedes one of the ``COPY``, ``EXPUNGE``,
-    ``FETCH``, ``SEARCH``, or ``STORE`` commands and indicates that the
-    command interacts with message UIDs instead of sequence numbers. Refer
-    to the RFC section for a complete description.
+    """The ``UID`` command precedes one of the ``COPY``, ``MOVE``,
+    ``EXPUNGE``, ``FETCH``, ``SEARCH``, ``SORT``, ``THREAD``, or ``STORE``
+    commands and indicates that the command interacts with message UIDs
+    instead of sequence numbers. Refer to the RFC section for a complete
+    description.
 
     See Also:
         `RFC 3501 6.4.8 <https://tools.ietf.org/html/rfc3501#section-6.4.8>`_
         `RFC 4315 2.1 <https://tools.ietf.org/html/rfc4315#section-2.1>`_
+        `RFC 5256 3. <https://tools.ietf.org/html/rfc5256#section-3>`_
+        `RFC 6851 3.2 <https://tools.ietf.org/html/rfc6851#section-3.2>`_
 
     """
 
@@ -378,6 +612,25 @@ class UidCopyCommand(CopyCommand):
         return ret, buf
 
 
+class UidMoveCommand(MoveCommand):
+    """The ``UID MOVE`` variant of the ``MOVE`` command, which uses message
+    UIDs instead of sequence numbers.
+
+    """
+
+    command = b'UID MOVE'
+    delegate = MoveCommand
+    uid = True
+
+    @classmethod
+    def parse(cls, buf: memoryview, params: Params) \
+            -> Tuple['UidMoveCommand', memoryview]:
+        ret, buf = super().parse(buf, params.copy(uid=True))
+        if not isinstance(ret, UidMoveCommand):
+            raise TypeError(ret)
+        return ret, buf
+
+
 class UidExpungeCommand(ExpungeCommand):
     """The ``UID EXPUNGE`` variant of the ``EXPUNGE`` command, which uses
     message UIDs instead of sequence numbers.
@@ -435,6 +688,44 @@ class UidSearchCommand(SearchCommand):
         return ret, buf
 
 
+class UidSortCommand(SortCommand):
+    """The ``UID SORT`` variant of the ``SORT`` command, which uses message
+    UIDs instead of sequence numbers.
+
+    """
+
+    command = b'UID SORT'
+    delegate = SortCommand
+    uid = True
+
+    @classmethod
+    def parse(cls, buf: memoryview, params: Params) \
+            -> Tuple['UidSortCommand', memoryview]:
+        ret, buf = super().parse(buf, params.copy(uid=True))
+        if not isinstance(ret, UidSortCommand):
+            raise TypeError(ret)
+        return ret, buf
+
+
+class UidThreadCommand(ThreadCommand):
+    """The ``UID THREAD`` variant of the ``THREAD`` command, which uses
+    message UIDs instead of sequence numbers.
+
+    """
+
+    command = b'UID THREAD'
+    delegate = ThreadCommand
+    uid = True
+
+    @classmethod
+    def parse(cls, buf: memoryview, params: Params) \
+            -> Tuple['UidThreadCommand', memoryview]:
+        ret, buf = super().parse(buf, params.copy(uid=True))
+        if not isinstance(ret, UidThreadCommand):
+            raise TypeError(ret)
+        return ret, buf
+
+
 class UidStoreCommand(StoreCommand):
     """The ``UID STORE`` variant of the ``STORE`` command, which uses message
     UIDs instead of sequence numbers.
@@ -12,6 +12,7 @@ from . import Parseable, ExpectedParseable, NotParseable, Params
 from .exceptions import RequiresContinuation
 from ..bytes import rev, MaybeBytes, MaybeBytesT, BytesFormat, WriteStream, \
     Writeable
+from ..spool import SpooledLiteral
 
 __all__ = ['Nil', 'Number', 'Atom', 'ListP', 'String',
            'QuotedString', 'LiteralString']
@@ -338,6 +339,13 @@ class LiteralString(String):
     def binary(self) -> bool:
         return self._binary
 
+    @property
+    def spooled(self) -> Optional[SpooledLiteral]:
+        """The literal data, if it was spooled to disk as it was received."""
+        if isinstance(self._string, SpooledLiteral):
+            return self._string
+        return None
+
     @property
     def length(self) -> int:
         return self._length
@@ -372,7 +380,10 @@ class LiteralString(String):
         elif len(buf) > match.end(0):
             raise NotParseable(buf[match.end(0):])
         elif params.continuations:
-            buf = params.continuations.pop(0)
+            cont = params.continuations.pop(0)
+            if isinstance(cont, SpooledLiteral):
+                return cls._parse_spooled(cont, binary, literal_length, params)
+            buf = cont
             literal = bytes(buf[0:literal_length])
         else:
             raise RequiresContinuation(b'Literal string', literal_length)
@@ -380,6 +391,17 @@ class LiteralString(String):
             raise NotParseable(buf)
         return cls(literal, binary), buf[literal_length:]
 
+    @classmethod
+    def _parse_spooled(cls, spooled: SpooledLiteral, binary: bool,
+                       literal_length: int, params: Params) \
+            -> Tuple['LiteralString', memoryview]:
+        if len(spooled) != literal_length or not params.continuations:
+            raise NotParseable(memoryview(b''))
+        buf = params.continuations.pop(0)
+        if isinstance(buf, SpooledLiteral):
+            raise NotParseable(memoryview(b''))
+        return cls(spooled, binary), buf
+
     def write(self, writer: WriteStream) -> None:
         writer.write(self._prefix)
         if isinstance(self._string, Writeable):
@@ -464,6 +486,8 @@ class ListP(Parseable[Sequence[MaybeBytes]]):
                 writer.write(b' ')
             if isinstance(item, Writeable):
                 item.write(writer)
+            elif isinstance(item, (bytes, memoryview)):
+                writer.write(item)
             else:
                 writer.write(bytes(item))
         writer.write(b')')
@@ -1,6 +1,7 @@
 
 from io import BytesIO
-from typing import TypeVar, Type, Optional, List, Dict, Tuple, Hashable
+from typing import TypeVar, Type, Optional, List, Dict, Set, Tuple, \
+    Hashable, AsyncIterable, AsyncIterator
 
 from ...bytes import MaybeBytes, BytesFormat, WriteStream, Writeable
 
@@ -75,6 +76,8 @@ class Response(Writeable):
         self._text = text or b''
         self._untagged: List['Response'] = []
         self._mergeable: _Mergeable = {}
+        self._merged: Set[int] = set()
+        self._stream: Optional[AsyncIterable['Response']] = None
         self._raw: Optional[bytes] = None
 
     @property
@@ -125,6 +128,43 @@ class Response(Writeable):
                     self._untagged[untagged_idx] = merged
         self._raw = None
 
+    def add_untagged_stream(self, responses: AsyncIterable['Response']) \
+            -> None:
+        """Add an asynchronous source of untagged responses. These responses
+        are shown before any other untagged responses, and must be consumed
+        with :meth:`.stream_untagged` before the parent response is written.
+
+        Args:
+            responses: The untagged responses to stream.
+
+        """
+        self._stream = responses
+
+    async def stream_untagged(self) -> AsyncIterator['Response']:
+        """Consume the untagged responses added by
+        :meth:`.add_untagged_stream`, yielding each one as it becomes
+        available. Untagged responses added by :meth:`.add_untagged` that can
+        be merged with a streamed response are merged into it, and are not
+        written again with the parent response.
+
+        """
+        stream, self._stream = self._stream, None
+        if stream is None:
+            return
+        async for resp in stream:
+            try:
+                merge_key = resp.merge_key
+            except TypeError:
+                pass
+            else:
+                untagged_idx = self._mergeable.pop((type(resp), merge_key),
+                                                   None)
+                if untagged_idx is not None:
+                    resp = resp.merge(self._untagged[untagged_idx])
+                    self._merged.add(untagged_idx)
+                    self._raw = None
+            yield resp
+
     def add_untagged_ok(self, text: MaybeBytes,
                         code: Optional[ResponseCode] = None) -> None:
         """Add an untagged ``OK`` response.
@@ -192,8 +232,10 @@ class Response(Writeable):
             writer: The output stream.
 
         """
-        for untagged in self._untagged:
-            untagged.write(writer)
+        merged = self._merged
+        for untagged_idx, untagged in enumerate(self._untagged):
+            if untagged_idx not in merged:
+                untagged.write(writer)
         writer.write(b'%b %b\r\n' % (self.tag, self.text))
 
     def __bytes__(self) -> bytes:
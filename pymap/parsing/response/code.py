@@ -6,7 +6,7 @@ from ..specials import SequenceSet
 from ...bytes import MaybeBytes, BytesFormat
 
 __all__ = ['Capability', 'PermanentFlags', 'UidNext', 'UidValidity', 'Unseen',
-           'AppendUid', 'CopyUid']
+           'AppendUid', 'CopyUid', 'HighestModSeq', 'Modified']
 
 
 class Capability(ResponseCode):
@@ -140,7 +140,9 @@ class CopyUid(ResponseCode):
 
     def __init__(self, validity: int, uids: Iterable[Tuple[int, int]]) -> None:
         super().__init__()
-        source_uids, dest_uids = zip(*uids)
+        self.validity = validity
+        self.uids = list(uids)
+        source_uids, dest_uids = zip(*self.uids)
         source_uid_set = SequenceSet.build(source_uids)
         dest_uid_set = SequenceSet.build(dest_uids)
         self._raw = b'[COPYUID %i %b %b]' \
@@ -148,3 +150,46 @@ class CopyUid(ResponseCode):
 
     def __bytes__(self) -> bytes:
         return self._raw
+
+
+class HighestModSeq(ResponseCode):
+    """Indicates the highest mod-sequence of any change to the mailbox.
+
+    See Also:
+        `RFC 7162 3.1.2.1.
+        <https://tools.ietf.org/html/rfc7162#section-3.1.2.1>`_
+
+    Args:
+        highest: The highest mod-sequence value.
+
+    """
+
+    def __init__(self, highest: int) -> None:
+        super().__init__()
+        self.highest = highest
+        self._raw = b'[HIGHESTMODSEQ %i]' % highest
+
+    def __bytes__(self) -> bytes:
+        return self._raw
+
+
+class Modified(ResponseCode):
+    """Indicates the messages that failed the ``UNCHANGEDSINCE`` test of a
+    conditional ``STORE`` command.
+
+    See Also:
+        `RFC 7162 3.1.3. <https://tools.ietf.org/html/rfc7162#section-3.1.3>`_
+
+    Args:
+        seqs: The sequence numbers or UIDs of the modified messages.
+
+    """
+
+    def __init__(self, seqs: Iterable[int]) -> None:
+        super().__init__()
+        self.seqs = frozenset(seqs)
+        self._raw = BytesFormat(b'[MODIFIED %b]') \
+            % SequenceSet.build(self.seqs)
+
+    def __bytes__(self) -> bytes:
+        return self._raw
@@ -1,17 +1,19 @@
 
 from itertools import chain
-from typing import ClassVar, Iterable, List, Mapping, Optional
+from typing import ClassVar, Iterable, List, Mapping, NamedTuple, Optional, \
+    Sequence
 
 from . import Response
 from ..modutf7 import modutf7_encode
 from ..primitives import Nil, ListP, QuotedString, Number
-from ..specials import Mailbox, FetchAttribute, StatusAttribute
+from ..specials import Mailbox, FetchAttribute, StatusAttribute, \
+    SequenceSet
 from ...bytes import MaybeBytes, BytesFormat, WriteStream
 
 __all__ = ['FlagsResponse', 'ExistsResponse', 'RecentResponse',
-           'ExpungeResponse', 'FetchResponse', 'SearchResponse',
-           'ESearchResponse', 'StatusResponse', 'ListResponse',
-           'LSubResponse']
+           'ExpungeResponse', 'VanishedResponse', 'FetchResponse',
+           'SearchResponse', 'ESearchResponse', 'SortResponse', 'ThreadNode',
+           'ThreadResponse', 'StatusResponse', 'ListResponse', 'LSubResponse']
 
 
 class FlagsResponse(Response):
@@ -86,6 +88,33 @@ class ExpungeResponse(Response):
         return super().text + b'%i EXPUNGE' % self.seq
 
 
+class VanishedResponse(Response):
+    """Constructs the special VANISHED response used in place of EXPUNGE
+    when ``QRESYNC`` is enabled.
+
+    See Also:
+        `RFC 7162 3.2.10.
+        <https://tools.ietf.org/html/rfc7162#section-3.2.10>`_
+
+    Args:
+        uids: The UIDs of the expunged messages.
+        earlier: True if the messages may have been expunged before the
+            current command, and the client should not adjust its count of
+            messages.
+
+    """
+
+    def __init__(self, uids: SequenceSet, earlier: bool = False) -> None:
+        super().__init__(b'*')
+        self.uids = uids
+        self.earlier = earlier
+
+    @property
+    def text(self) -> bytes:
+        earlier = b'(EARLIER) ' if self.earlier else b''
+        return super().text + b'VANISHED %b%b' % (earlier, bytes(self.uids))
+
+
 class FetchResponse(Response):
     """Constructs the special FETCH response used by the STORE and FETCH
     commands.
@@ -145,17 +174,22 @@ class SearchResponse(Response):
 
     Args:
         seqs: List of message sequence integers.
+        mod_sequence: The highest mod-sequence of the found messages, if the
+            search used the ``MODSEQ`` key.
 
     """
 
-    def __init__(self, seqs: Iterable[int]) -> None:
+    def __init__(self, seqs: Iterable[int], mod_sequence: int = None) -> None:
         super().__init__(b'*')
         self.seqs = seqs
+        self.mod_sequence = mod_sequence
 
     @property
     def text(self) -> bytes:
         text = BytesFormat(b' ').join(
             [b'SEARCH'], [b'%i' % seq for seq in self.seqs])
+        if self.mod_sequence is not None:
+            text += b' (MODSEQ %i)' % self.mod_sequence
         return super().text + text
 
 
@@ -182,7 +216,7 @@ class ESearchResponse(Response):
 
     @property
     def text(self) -> bytes:
-        prefixes: List[bytes] = []
+        prefixes: List[bytes] = [b'ESEARCH']
         if self.issuer_tag is not None:
             prefixes += [BytesFormat(b'(TAG "%b")') % self.issuer_tag]
         if self.uid:
@@ -192,6 +226,84 @@ class ESearchResponse(Response):
         return super().text + BytesFormat(b' ').join(prefixes, *parts)
 
 
+class SortResponse(Response):
+    """Constructs the special SORT response used by the SORT command.
+
+    See Also:
+        `RFC 5256 4. <https://tools.ietf.org/html/rfc5256#section-4>`_
+
+    Args:
+        seqs: List of message sequence integers, in sorted order.
+
+    """
+
+    def __init__(self, seqs: Iterable[int]) -> None:
+        super().__init__(b'*')
+        self.seqs = seqs
+
+    @property
+    def text(self) -> bytes:
+        text = BytesFormat(b' ').join(
+            [b'SORT'], [b'%i' % seq for seq in self.seqs])
+        return super().text + text
+
+
+class ThreadNode(NamedTuple):
+    """A message in a thread returned by the THREAD command.
+
+    Args:
+        msg_id: The message sequence integer, or ``None`` for a placeholder
+            that groups its children.
+        children: The replies to the message, in order.
+
+    """
+
+    msg_id: Optional[int]
+    children: Sequence['ThreadNode']
+
+
+class ThreadResponse(Response):
+    """Constructs the special THREAD response used by the THREAD command.
+
+    See Also:
+        `RFC 5256 4. <https://tools.ietf.org/html/rfc5256#section-4>`_
+
+    Args:
+        threads: The root message of each thread, in order.
+
+    """
+
+    def __init__(self, threads: Iterable[ThreadNode]) -> None:
+        super().__init__(b'*')
+        self.threads = threads
+
+    @classmethod
+    def _render(cls, node: ThreadNode) -> bytes:
+        # A message with only one reply is listed alongside it, only
+        # branches are nested.
+        parts: List[bytes] = []
+        while True:
+            if node.msg_id is not None:
+                parts.append(b'%i' % node.msg_id)
+            if len(node.children) != 1:
+                break
+            node = node.children[0]
+        if node.children:
+            parts.append(b''.join(b'(%b)' % cls._render(child)
+                                  for child in node.children))
+        return b' '.join(parts)
+
+    @property
+    def text(self) -> bytes:
+        text = b''.join(b'(%b)' % self._render(thread)
+                        for thread in self.threads)
+        if text:
+            text = b'THREAD ' + text
+        else:
+            text = b'THREAD'
+        return super().text + text
+
+
 class StatusResponse(Response):
     """Constructs the special STATUS response used by the STATUS command.
 
@@ -121,7 +121,7 @@ class FetchAttribute(Parseable[bytes]):
     def requirement(self) -> FetchRequirement:
         """Indicates the data required to fulfill this fetch attribute."""
         attr_name = self.attribute
-        if attr_name in (b'UID', b'FLAGS', b'INTERNALDATE'):
+        if attr_name in (b'UID', b'FLAGS', b'INTERNALDATE', b'MODSEQ'):
             return FetchRequirement.METADATA
         elif attr_name in (b'ENVELOPE', b'RFC822.HEADER'):
             return FetchRequirement.HEADERS
@@ -213,7 +213,7 @@ class FetchAttribute(Parseable[bytes]):
         after = buf[match.end(0):]
         if attr in (b'ENVELOPE', b'FLAGS', b'INTERNALDATE', b'UID', b'RFC822',
                     b'RFC822.HEADER', b'RFC822.SIZE', b'RFC822.TEXT',
-                    b'BODYSTRUCTURE'):
+                    b'BODYSTRUCTURE', b'MODSEQ'):
             return cls(attr), after
         elif attr not in (b'BODY', b'BODY.PEEK',
                           b'BINARY', b'BINARY.PEEK', b'BINARY.SIZE'):
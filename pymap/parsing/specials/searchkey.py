@@ -210,6 +210,22 @@ class SearchKey(Parseable[bytes]):
             _, buf = Space.parse(buf, params)
             header_value, buf = cls._parse_astring_filter(buf, params)
             return cls(key, (header_field, header_value), inverse), buf
+        elif key == b'MODSEQ':
+            _, buf = Space.parse(after, params)
+            try:
+                num, buf = Number.parse(buf, params)
+            except NotParseable:
+                # The optional metadata entry is accepted but ignored, since
+                # flags do not have their own mod-sequences.
+                _, buf = QuotedString.parse(buf, params)
+                _, buf = Space.parse(buf, params)
+                entry_type, buf = Atom.parse(buf, params)
+                entry_type_name = entry_type.value.lower()
+                if entry_type_name not in (b'priv', b'shared', b'all'):
+                    raise NotParseable(buf)
+                _, buf = Space.parse(buf, params)
+                num, buf = Number.parse(buf, params)
+            return cls(key, num.value, inverse), buf
         elif key == b'OR':
             _, buf = Space.parse(after, params)
             or1, buf = SearchKey.parse(buf, params)
@@ -52,6 +52,18 @@ class SequenceSet(Parseable[Sequence[_SeqElem]]):
         """A sequence set intended to contain all values."""
         return _AllSequenceSet(uid)
 
+    @classmethod
+    def saved(cls, uid: bool = False) -> 'SequenceSet':
+        """A sequence set that refers to the saved result of a previous
+        ``SEARCH`` command, using the ``$`` marker.
+
+        See Also:
+            `RFC 5182 2.1.
+            <https://tools.ietf.org/html/rfc5182#section-2.1>`_
+
+        """
+        return _SavedSequenceSet(uid)
+
     @property
     def value(self) -> Sequence[_SeqElem]:
         """The sequence set data."""
@@ -67,17 +79,30 @@ class SequenceSet(Parseable[Sequence[_SeqElem]]):
         :meth:`.iter`.
 
         """
+        if not self.sequences:
+            return False
         first = self.sequences[0]
         return isinstance(first, tuple) \
             and first[0] == 1 and isinstance(first[1], MaxValue)
 
+    @property
+    def is_saved(self) -> bool:
+        """True if the sequence set is the ``$`` marker, which must be
+        replaced by the saved search result before it is used.
+
+        See Also:
+            :meth:`.saved`
+
+        """
+        return False
+
     @classmethod
-    def _get_range(cls, elem: _SeqElem, max_value: int) -> Iterable[int]:
+    def _get_range(cls, elem: _SeqElem, max_value: int) -> range:
         if isinstance(elem, int):
             if elem <= max_value:
                 return range(elem, elem + 1)
             else:
-                return ()
+                return range(0)
         elif isinstance(elem, MaxValue):
             return range(max_value, max_value + 1)
         else:
@@ -91,7 +116,7 @@ class SequenceSet(Parseable[Sequence[_SeqElem]]):
                 high = min(max(left, right), max_value)
                 return range(low, high + 1)
             else:
-                return ()
+                return range(0)
 
     def flatten(self, max_value: int) -> FrozenSet[int]:
         """Return a set of all values contained in the sequence set.
@@ -113,6 +138,28 @@ class SequenceSet(Parseable[Sequence[_SeqElem]]):
         return chain.from_iterable(
             (self._get_range(elem, max_value) for elem in self.sequences))
 
+    def ranges(self, max_value: int) -> Sequence[Tuple[int, int]]:
+        """Return the inclusive ranges of values contained in the set, bounded
+        by the given maximum value (in place of any ``*``). The ranges are
+        sorted, and overlapping or adjacent ranges are merged, so that no value
+        is contained in more than one range.
+
+        Args:
+            max_value: The maximum value of the set.
+
+        """
+        elems = sorted((rng.start, rng.stop - 1) for rng in (
+            self._get_range(elem, max_value) for elem in self.sequences)
+            if rng)
+        ret: List[Tuple[int, int]] = []
+        for low, high in elems:
+            if ret and low <= ret[-1][1] + 1:
+                if high > ret[-1][1]:
+                    ret[-1] = (ret[-1][0], high)
+            else:
+                ret.append((low, high))
+        return ret
+
     def _elem_bytes(self, elem: _SeqIdx) -> bytes:
         if isinstance(elem, MaxValue):
             return b'*'
@@ -180,6 +227,8 @@ class SequenceSet(Parseable[Sequence[_SeqElem]]):
 
         """
         seqs_list = sorted(set(seqs))
+        if not seqs_list:
+            return SequenceSet([], uid)
         groups: List[Union[int, Tuple[int, int]]] = []
         group: Union[int, Tuple[int, int]] = seqs_list[0]
         for i in range(1, len(seqs_list)):
@@ -206,6 +255,8 @@ class SequenceSet(Parseable[Sequence[_SeqElem]]):
             _, buf = Space.parse(buf, params)
         except NotParseable:
             pass
+        if buf[0:1] == b'$':
+            return cls.saved(params.uid), buf[1:]
         sequences = []
         while buf:
             item, buf = cls._parse_part(buf)
@@ -226,8 +277,27 @@ class _AllSequenceSet(SequenceSet):
     def iter(self, max_value: int) -> Iterator[int]:
         return iter(range(1, max_value + 1))
 
+    def ranges(self, max_value: int) -> Sequence[Tuple[int, int]]:
+        return [(1, max_value)] if max_value > 0 else []
+
     def __bytes__(self) -> bytes:
         return b'1:*'
 
     def __repr__(self) -> str:
         return '<SequenceSet set=all>'
+
+
+class _SavedSequenceSet(SequenceSet):
+
+    def __init__(self, uid: bool) -> None:
+        super().__init__([], uid)
+
+    @property
+    def is_saved(self) -> bool:
+        return True
+
+    def __bytes__(self) -> bytes:
+        return b'$'
+
+    def __repr__(self) -> str:
+        return '<SequenceSet set=saved>'
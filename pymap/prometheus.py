@@ -0,0 +1,83 @@
+"""Serves the metrics collected by :class:`~pymap.stats.Stats` over HTTP, in
+the Prometheus text exposition format.
+
+"""
+
+import asyncio
+from argparse import ArgumentParser
+from asyncio import CancelledError, StreamReader, StreamWriter
+from typing import Optional
+from typing_extensions import Final
+
+from .interfaces.backend import BackendInterface, ServiceInterface
+from .stats import Stats
+
+__all__ = ['PrometheusService']
+
+
+class PrometheusService(ServiceInterface):
+    """A pymap service that answers HTTP ``GET /metrics`` requests with the
+    collected metrics, for scraping by `Prometheus <https://prometheus.io/>`_.
+    The service does nothing unless ``--prometheus-port`` is given.
+
+    Args:
+        stats: The collected metrics.
+        port: The port to listen on, if any.
+
+    """
+
+    #: The content type of the response.
+    content_type = b'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self, stats: Stats, port: Optional[int]) -> None:
+        super().__init__()
+        self.stats: Final = stats
+        self.port: Final = port
+
+    @classmethod
+    def add_arguments(cls, parser: ArgumentParser) -> None:
+        prometheus = parser.add_argument_group('prometheus arguments')
+        prometheus.add_argument('--prometheus-port', metavar='PORT', type=int,
+                                help='port to serve metrics on')
+
+    @classmethod
+    async def init(cls, backend: BackendInterface) -> 'PrometheusService':
+        config = backend.config
+        port = getattr(config.args, 'prometheus_port', None)
+        return cls(config.stats, port)
+
+    async def _handle(self, reader: StreamReader,
+                      writer: StreamWriter) -> None:
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            parts = request.split()
+            if len(parts) < 2 or parts[0] != b'GET':
+                writer.write(b'HTTP/1.0 405 Method Not Allowed\r\n\r\n')
+            elif parts[1] != b'/metrics':
+                writer.write(b'HTTP/1.0 404 Not Found\r\n\r\n')
+            else:
+                body = self.stats.render()
+                writer.write(b'HTTP/1.0 200 OK\r\n'
+                             b'Content-Type: %b\r\n'
+                             b'Content-Length: %i\r\n\r\n'
+                             % (self.content_type, len(body)))
+                writer.write(body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def run_forever(self) -> None:
+        if self.port is None:
+            return
+        server = await asyncio.start_server(self._handle, port=self.port)
+        try:
+            await server.serve_forever()
+        except CancelledError:
+            pass
+        finally:
+            server.close()
+            await server.wait_closed()
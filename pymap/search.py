@@ -3,17 +3,20 @@
 import re
 from abc import abstractmethod, ABCMeta
 from datetime import datetime
-from typing import AnyStr, FrozenSet, Optional, Iterable
+from typing import cast, AnyStr, Dict, FrozenSet, Optional, Iterable, \
+    List, Sequence, Tuple
 from typing_extensions import Final
 
 from .exceptions import SearchNotAllowed
-from .interfaces.message import MessageInterface
-from .parsing.specials import SearchKey, SequenceSet
+from .flags import FlagSet
+from .interfaces.message import CachedMessage, MessageInterface
+from .parsing.specials import FetchRequirement, SearchKey, SequenceSet
 from .parsing.specials.flag import Flag, Answered, Deleted, Draft, Flagged, \
     Recent, Seen
 from .selected import SelectedMailbox
 
-__all__ = ['SearchParams', 'SearchCriteria', 'SearchCriteriaSet']
+__all__ = ['SearchParams', 'SearchCriteria', 'SearchCriteriaSet',
+           'SearchPlan']
 
 
 class SearchParams:
@@ -57,6 +60,16 @@ class SearchCriteria(metaclass=ABCMeta):
         escaped_substr = re.escape(substr)
         return re.search(escaped_substr, data, re_flags) is not None
 
+    @property
+    def requirement(self) -> FetchRequirement:
+        """The data required from each message to evaluate the criteria. If
+        this is :attr:`~pymap.parsing.specials.FetchRequirement.NONE`, the
+        criteria may be evaluated against the cached message in the selected
+        mailbox.
+
+        """
+        return FetchRequirement.METADATA
+
     @abstractmethod
     def matches(self, msg_seq: int, msg: MessageInterface) -> bool:
         """Implemented by sub-classes to define the search criteria.
@@ -145,6 +158,8 @@ class SearchCriteria(metaclass=ABCMeta):
             return HeaderSearchCriteria(name, value, params)
         elif key_name in (b'BODY', b'TEXT'):
             return BodySearchCriteria(key.filter_str, params)
+        elif key_name == b'MODSEQ':
+            return ModSequenceSearchCriteria(key.filter_int, params)
         raise SearchNotAllowed(key_name)
 
 
@@ -161,7 +176,14 @@ class SearchCriteriaSet(SearchCriteria):
     def __init__(self, keys: FrozenSet[SearchKey],
                  params: SearchParams) -> None:
         super().__init__(params)
-        self.all_criteria = [SearchCriteria.of(key, params) for key in keys]
+        all_criteria = [SearchCriteria.of(key, params) for key in keys]
+        self.all_criteria = sorted(all_criteria,
+                                   key=lambda crit: crit.requirement.value)
+
+    @property
+    def requirement(self) -> FetchRequirement:
+        return FetchRequirement.reduce(
+            crit.requirement for crit in self.all_criteria)
 
     @property
     def sequence_set(self) -> SequenceSet:
@@ -180,6 +202,8 @@ class SearchCriteriaSet(SearchCriteria):
 
     def matches(self, msg_seq: int, msg: MessageInterface) -> bool:
         """The message matches if all the defined search key criteria match.
+        The criteria are evaluated in order of the data they require, so that
+        the cheapest criteria are evaluated first.
 
         Args:
             msg_seq: The message sequence ID.
@@ -196,6 +220,10 @@ class InverseSearchCriteria(SearchCriteria):
         super().__init__(params)
         self.key = SearchCriteria.of(key, params)
 
+    @property
+    def requirement(self) -> FetchRequirement:
+        return self.key.requirement
+
     def matches(self, msg_seq: int, msg: MessageInterface) -> bool:
         return not self.key.matches(msg_seq, msg)
 
@@ -203,6 +231,10 @@ class InverseSearchCriteria(SearchCriteria):
 class AllSearchCriteria(SearchCriteria):
     """Always matches anything."""
 
+    @property
+    def requirement(self) -> FetchRequirement:
+        return FetchRequirement.NONE
+
     def matches(self, msg_seq: int, msg: MessageInterface):
         return True
 
@@ -216,6 +248,10 @@ class OrSearchCriteria(SearchCriteria):
         self.left = SearchCriteria.of(left, self.params)
         self.right = SearchCriteria.of(right, self.params)
 
+    @property
+    def requirement(self) -> FetchRequirement:
+        return self.left.requirement | self.right.requirement
+
     def matches(self, msg_seq: int, msg: MessageInterface) -> bool:
         return (self.left.matches(msg_seq, msg)
                 or self.right.matches(msg_seq, msg))
@@ -226,12 +262,16 @@ class SequenceSetSearchCriteria(SearchCriteria):
 
     def __init__(self, seq_set: SequenceSet, params: SearchParams) -> None:
         super().__init__(params)
-        self.seq_set = seq_set
+        self.seq_set = seq_set = params.selected.resolve_saved(seq_set)
         if seq_set.uid:
             self.flat = seq_set.flatten(params.max_uid)
         else:
             self.flat = seq_set.flatten(params.max_seq)
 
+    @property
+    def requirement(self) -> FetchRequirement:
+        return FetchRequirement.NONE
+
     def matches(self, msg_seq: int, msg: MessageInterface) -> bool:
         if self.seq_set.uid:
             return msg.uid in self.flat
@@ -250,9 +290,15 @@ class HasFlagSearchCriteria(SearchCriteria):
         super().__init__(params)
         self.flag = flag
         self.expected = expected
+        self._mask = FlagSet.mask_of(flag)
 
     def matches(self, msg_seq: int, msg: MessageInterface) -> bool:
-        has_flag = self.flag in msg.get_flags(self.params.session_flags)
+        flags = FlagSet(msg.get_flags(self.params.session_flags))
+        mask = self._mask or FlagSet.mask_of(self.flag)
+        if mask:
+            has_flag = bool(flags.mask & mask)
+        else:
+            has_flag = self.flag in flags
         expected = self.expected
         return (has_flag and expected) or (not expected and not has_flag)
 
@@ -260,9 +306,12 @@ class HasFlagSearchCriteria(SearchCriteria):
 class NewSearchCriteria(SearchCriteria):
     """Matches if the message is considered "new", i.e. recent and unseen."""
 
+    _recent = FlagSet.mask_of(Recent)
+    _seen = FlagSet.mask_of(Seen)
+
     def matches(self, msg_seq: int, msg: MessageInterface) -> bool:
-        flags = msg.get_flags(self.params.session_flags)
-        return Recent in flags and Seen not in flags
+        mask = FlagSet(msg.get_flags(self.params.session_flags)).mask
+        return bool(mask & self._recent) and not mask & self._seen
 
 
 class DateSearchCriteria(SearchCriteria):
@@ -273,6 +322,11 @@ class DateSearchCriteria(SearchCriteria):
         self.when = when.date()
         self.op = op
 
+    @property
+    def requirement(self) -> FetchRequirement:
+        # The internal date never changes, so the cached value is used.
+        return FetchRequirement.NONE
+
     @classmethod
     def _get_msg_date(cls, msg: MessageInterface) -> Optional[datetime]:
         return msg.internal_date
@@ -294,6 +348,10 @@ class DateSearchCriteria(SearchCriteria):
 class HeaderDateSearchCriteria(DateSearchCriteria):
     """Matches by comparing against the ``Date:`` header of the message."""
 
+    @property
+    def requirement(self) -> FetchRequirement:
+        return FetchRequirement.HEADERS
+
     @classmethod
     def _get_msg_date(cls, msg: MessageInterface) -> Optional[datetime]:
         envelope = msg.get_envelope_structure()
@@ -308,8 +366,20 @@ class SizeSearchCriteria(SearchCriteria):
         self.size = size
         self.op = op
 
+    @property
+    def requirement(self) -> FetchRequirement:
+        return FetchRequirement.BODY
+
     def matches(self, msg_seq: int, msg: MessageInterface) -> bool:
-        size = msg.get_size()
+        return self.matches_size(msg.get_size())
+
+    def matches_size(self, size: int) -> bool:
+        """Compare the given message size against the criteria.
+
+        Args:
+            size: The message size.
+
+        """
         if self.op == '<':
             return size < self.size
         elif self.op == '>':
@@ -317,6 +387,22 @@ class SizeSearchCriteria(SearchCriteria):
         raise ValueError(self.op)
 
 
+class ModSequenceSearchCriteria(SearchCriteria):
+    """Matches messages whose mod-sequence is at least the given value.
+
+    See Also:
+        `RFC 7162 3.1.5. <https://tools.ietf.org/html/rfc7162#section-3.1.5>`_
+
+    """
+
+    def __init__(self, mod_sequence: int, params: SearchParams) -> None:
+        super().__init__(params)
+        self.mod_sequence = mod_sequence
+
+    def matches(self, msg_seq: int, msg: MessageInterface) -> bool:
+        return (msg.mod_sequence or 0) >= self.mod_sequence
+
+
 class EnvelopeSearchCriteria(SearchCriteria):
     """Matches by checking for strings within various fields of the envelope
     structure.
@@ -328,6 +414,10 @@ class EnvelopeSearchCriteria(SearchCriteria):
         self.key = key
         self.value = value
 
+    @property
+    def requirement(self) -> FetchRequirement:
+        return FetchRequirement.HEADERS
+
     def matches(self, msg_seq: int, msg: MessageInterface) -> bool:
         envelope = msg.get_envelope_structure()
         if self.key == b'BCC':
@@ -362,6 +452,10 @@ class HeaderSearchCriteria(SearchCriteria):
         self.name = name.encode('ascii')
         self.value = value
 
+    @property
+    def requirement(self) -> FetchRequirement:
+        return FetchRequirement.HEADERS
+
     def matches(self, msg_seq: int, msg: MessageInterface) -> bool:
         values = msg.get_header(self.name)
         return any(self._in(self.value, value) for value in values)
@@ -374,5 +468,110 @@ class BodySearchCriteria(SearchCriteria):
         super().__init__(params)
         self.value = bytes(value, 'utf-8', 'replace')
 
+    @property
+    def requirement(self) -> FetchRequirement:
+        return FetchRequirement.BODY
+
     def matches(self, msg_seq: int, msg: MessageInterface) -> bool:
         return msg.contains(self.value)
+
+
+class SearchPlan:
+    """Plans the evaluation of a search criteria set, so that the cheapest
+    criteria are evaluated first and message headers or bodies are only
+    loaded for the candidates that remain. The criteria are split into:
+
+    * :attr:`.cached_criteria`, evaluated against the cached messages of the
+      selected mailbox without loading anything.
+    * :attr:`.flag_criteria` and :attr:`.size_criteria`, which a backend may
+      be able to answer from its own indexes.
+    * :attr:`.text_criteria`, whose candidates a backend may narrow down with
+      a full-text index, see :mod:`pymap.textindex`.
+    * :meth:`.stages`, the remaining criteria grouped by the data they
+      require from each message.
+
+    Args:
+        criteria: The search criteria set.
+
+    """
+
+    def __init__(self, criteria: SearchCriteriaSet) -> None:
+        super().__init__()
+        self.criteria: Final = criteria
+        self.cached_criteria: List[SearchCriteria] = []
+        self.flag_criteria: List[HasFlagSearchCriteria] = []
+        self.size_criteria: List[SizeSearchCriteria] = []
+        self.text_criteria: List[Tuple[SearchCriteria, bytes]] = []
+        self._loaded_criteria: List[SearchCriteria] = []
+        session_flags = criteria.params.session_flags
+        for crit in criteria.all_criteria:
+            if crit.requirement == FetchRequirement.NONE:
+                self.cached_criteria.append(crit)
+                continue
+            elif isinstance(crit, HasFlagSearchCriteria):
+                # Session flags are never known to the backend.
+                if crit.flag != Recent \
+                        and not session_flags.intersect([crit.flag]):
+                    self.flag_criteria.append(crit)
+            elif isinstance(crit, SizeSearchCriteria):
+                self.size_criteria.append(crit)
+            elif isinstance(crit, BodySearchCriteria):
+                self.text_criteria.append((crit, crit.value))
+            elif isinstance(crit, (EnvelopeSearchCriteria,
+                                   HeaderSearchCriteria)):
+                value = bytes(crit.value, 'utf-8', 'replace')
+                self.text_criteria.append((crit, value))
+            self._loaded_criteria.append(crit)
+
+    @property
+    def sequence_set(self) -> SequenceSet:
+        """The sequence set to use when finding the candidate messages.
+
+        See Also:
+            :attr:`SearchCriteriaSet.sequence_set`
+
+        """
+        return self.criteria.sequence_set
+
+    def matches_cached(self, msg_seq: int, msg: CachedMessage) -> bool:
+        """The cached message matches if all of :attr:`.cached_criteria`
+        match.
+
+        Args:
+            msg_seq: The message sequence ID.
+            msg: The cached message object.
+
+        """
+        # These criteria only use attributes available on cached messages.
+        cached_msg = cast(MessageInterface, msg)
+        return all(crit.matches(msg_seq, cached_msg)
+                   for crit in self.cached_criteria)
+
+    def stages(self, answered: Iterable[SearchCriteria] = ()) \
+            -> Sequence[Tuple[FetchRequirement, Sequence[SearchCriteria]]]:
+        """Return the criteria that must be evaluated against loaded messages,
+        grouped by the data required from each message and in order of cost.
+        There is always at least one stage, so that every matching message is
+        loaded.
+
+        Args:
+            answered: Criteria that were already answered by an index, which
+                are left out.
+
+        """
+        answered_set = frozenset(answered)
+        by_requirement: Dict[FetchRequirement, List[SearchCriteria]] = {}
+        for crit in self._loaded_criteria:
+            if crit in answered_set:
+                continue
+            requirement = crit.requirement
+            if requirement & FetchRequirement.BODY:
+                stage = FetchRequirement.BODY
+            elif requirement & FetchRequirement.HEADERS:
+                stage = FetchRequirement.HEADERS
+            else:
+                stage = FetchRequirement.METADATA
+            by_requirement.setdefault(stage, []).append(crit)
+        if not by_requirement:
+            return [(FetchRequirement.METADATA, [])]
+        return sorted(by_requirement.items(), key=lambda item: item[0].value)
@@ -1,26 +1,35 @@
 
 from bisect import bisect_right
-from itertools import chain, groupby, islice
+from datetime import datetime, timedelta, tzinfo
+from itertools import chain, count, groupby
 from typing import Any, Optional, Tuple, Dict, Set, MutableSet, AbstractSet, \
-    FrozenSet, Iterable, List, Sequence, SupportsBytes
-from weakref import WeakSet
+    FrozenSet, Iterable, Iterator, List, Sequence, SupportsBytes, Callable, \
+    Awaitable, Generic, TypeVar
+from weakref import WeakSet, WeakValueDictionary
 
 from .concurrent import Event
-from .context import subsystem
-from .flags import FlagOp, PermanentFlags, SessionFlags
+from .context import subsystem, updates_relay
+from .flags import FlagOp, FlagSet, PermanentFlags, SessionFlags
 from .interfaces.message import CachedMessage, FlagsKey
 from .parsing.command import Command
 from .parsing.primitives import ListP, Number
 from .parsing.response import Response, ResponseBye
 from .parsing.response.code import UidValidity
 from .parsing.response.specials import ExistsResponse, RecentResponse, \
-    ExpungeResponse, FetchResponse
+    ExpungeResponse, FetchResponse, VanishedResponse
 from .parsing.specials import FetchAttribute, Flag, SequenceSet
+from .sort import SortCache
+from .uids import SortedUids
 
 __all__ = ['SelectedSet', 'SynchronizedMessages', 'SelectedMailbox']
 
 _flags_attr = FetchAttribute(b'FLAGS')
 _uid_attr = FetchAttribute(b'UID')
+_modseq_attr = FetchAttribute(b'MODSEQ')
+_empty_result = SequenceSet([], True)
+
+_T = TypeVar('_T')
+_Refresh = Callable[['SelectedMailbox'], Awaitable['SelectedMailbox']]
 
 
 class SelectedSet:
@@ -28,18 +37,66 @@ class SelectedSet:
     a mailbox, across all sessions. This is useful for assigning the
     ``\\Recent`` flag, as well as notifying other sessions about updates.
 
+    The set also keeps the most recent state of the mailbox messages that
+    was synchronized by one of its sessions. A newly selected mailbox object
+    starts from a copy-on-write copy of that state, so that it only needs the
+    backend to provide the changes since, and so that the memory used for
+    the messages is shared by sessions until they diverge.
+
+    The sort keys of the mailbox messages, used by the ``SORT`` and
+    ``THREAD`` commands, are cached by the set for all of its sessions.
+
     Args:
-        updated: The event to notify when updates occur. Defaults to a new
-            event using :mod:`asyncio` concurrency primitives.
+        key: If given, update notifications for the mailbox are relayed to
+            other processes by the :data:`~pymap.context.updates_relay`.
 
     """
 
-    __slots__ = ['_set', '_updated']
+    __slots__ = ['_key', '_set', '_updated', '_idle', '_idle_lock', '_base',
+                 '_sort_cache', '__weakref__']
 
-    def __init__(self) -> None:
+    _shared: 'WeakValueDictionary[bytes, SelectedSet]' = WeakValueDictionary()
+
+    def __init__(self, key: bytes = None) -> None:
         super().__init__()
+        self._key = key
         self._set: MutableSet['SelectedMailbox'] = WeakSet()
         self._updated = subsystem.get().new_event()
+        self._idle: Optional[_IdleHub] = None
+        self._idle_lock = subsystem.get().new_rwlock()
+        self._base: Optional[_Base] = None
+        self._sort_cache: Optional[SortCache] = None
+
+    @classmethod
+    def for_key(cls, key: bytes) -> 'SelectedSet':
+        """Return the selected set for the mailbox identified by ``key``,
+        shared by all sessions in the current process. Backends that do not
+        otherwise share mailbox objects between sessions should use this, so
+        that sessions are notified of each other's updates.
+
+        Args:
+            key: Uniquely identifies the mailbox, across processes.
+
+        """
+        try:
+            return cls._shared[key]
+        except KeyError:
+            cls._shared[key] = selected_set = cls(key)
+            return selected_set
+
+    @classmethod
+    def notify_key(cls, key: bytes) -> None:
+        """Set the :attr:`.updated` event of the selected set for the mailbox
+        identified by ``key``, if it exists in the current process. This is
+        called when an update notification is received from another process.
+
+        Args:
+            key: Uniquely identifies the mailbox, across processes.
+
+        """
+        selected_set = cls._shared.get(key)
+        if selected_set is not None:
+            selected_set._updated.set()
 
     def add(self, selected: 'SelectedMailbox', *,
             replace: 'SelectedMailbox' = None) -> None:
@@ -61,6 +118,51 @@ class SelectedSet:
         """The event to notify when updates occur."""
         return self._updated
 
+    def notify(self) -> None:
+        """Set the :attr:`.updated` event, and relay the notification to other
+        processes if the selected set was created with a key.
+
+        """
+        self._updated.set()
+        if self._key is not None:
+            relay = updates_relay.get()
+            if relay is not None:
+                relay(self._key)
+
+    def get_messages(self) \
+            -> Optional[Tuple[int, Optional[int], 'SynchronizedMessages']]:
+        """Return the most recent state of the mailbox messages published by
+        one of the sessions, as its UID validity, its mod-sequence, and a
+        copy of the messages.
+
+        """
+        base = self._base
+        if base is None:
+            return None
+        return base.uid_validity, base.mod_sequence, base.messages.copy()
+
+    def publish(self, selected: 'SelectedMailbox') -> None:
+        """Keep the state of the selected mailbox messages for
+        :meth:`.get_messages`, unless the state already kept is at least as
+        recent.
+
+        Args:
+            selected: The selected mailbox object.
+
+        """
+        base = self._base
+        if base is None or base.is_stale(selected):
+            self._base = _Base(selected.uid_validity, selected.mod_sequence,
+                               selected.messages.copy())
+
+    @property
+    def sort_cache(self) -> SortCache:
+        """The cached sort keys of the mailbox messages."""
+        sort_cache = self._sort_cache
+        if sort_cache is None:
+            self._sort_cache = sort_cache = SortCache()
+        return sort_cache
+
     @property
     def any_selected(self) -> Optional['SelectedMailbox']:
         """A single, random object in the set of selected mailbox objects.
@@ -73,6 +175,171 @@ class SelectedSet:
                 return selected
         return None
 
+    async def wait_updates(self, selected: 'SelectedMailbox', wait_on: Event,
+                           refresh: _Refresh, timeout: float = None) \
+            -> 'SelectedMailbox':
+        """Block until either ``wait_on`` is signalled or updates to the
+        mailbox have been applied to ``selected``, e.g. for the ``IDLE``
+        command.
+
+        Only one of the waiting sessions, the leader, waits for
+        :attr:`.updated` and reads the changes from the backend. The changes
+        are then applied to the selected mailbox object of every waiting
+        session, and only sessions with changes are woken up.
+
+        Args:
+            selected: The selected mailbox object of the waiting session.
+            wait_on: Stop waiting when this event signals.
+            refresh: Populates a selected mailbox object with the current
+                state of the mailbox, usually the backend's
+                ``update_selected()`` method.
+            timeout: The leader checks for changes at least this often, in
+                seconds, even without notification.
+
+        """
+        waiter = _IdleWaiter(selected)
+        hub = await self._join(waiter)
+        try:
+            while not (waiter.updated or waiter.stale or wait_on.is_set()):
+                if hub.leader is waiter:
+                    await self._lead(hub, waiter, wait_on, refresh, timeout)
+                else:
+                    await wait_on.or_event(waiter.event).wait()
+                waiter.event.clear()
+        finally:
+            await self._leave(hub, waiter)
+        if waiter.stale:
+            return await refresh(selected)
+        return selected
+
+    async def _join(self, waiter: '_IdleWaiter') -> '_IdleHub':
+        async with self._idle_lock.write_lock():
+            hub = self._idle
+            if hub is None:
+                self._idle = hub = _IdleHub(waiter.selected)
+                hub.leader = waiter
+            else:
+                hub.check_stale(waiter)
+            hub.waiters.append(waiter)
+            return hub
+
+    async def _leave(self, hub: '_IdleHub', waiter: '_IdleWaiter') -> None:
+        async with self._idle_lock.write_lock():
+            hub.waiters.remove(waiter)
+            if hub.leader is waiter:
+                if hub.waiters:
+                    hub.leader = hub.waiters[0]
+                    hub.leader.event.set()
+                else:
+                    hub.leader = None
+                    self._idle = None
+
+    async def _lead(self, hub: '_IdleHub', waiter: '_IdleWaiter',
+                    wait_on: Event, refresh: _Refresh,
+                    timeout: Optional[float]) -> None:
+        mailbox = hub.mailbox
+        if hub.pulse is None:
+            hub.pulse = self._updated.or_event()
+        if not hub.pulse.is_set():
+            await hub.pulse.or_event(wait_on, waiter.event).wait(timeout)
+        if wait_on.is_set() or waiter.event.is_set():
+            return
+        # Notifications received while refreshing are kept for the next wait.
+        hub.pulse = self._updated.or_event()
+        before = mailbox.mod_sequence
+        await refresh(mailbox)
+        async with self._idle_lock.write_lock():
+            if mailbox.changed:
+                for other in hub.waiters:
+                    hub.apply(other, before)
+            if any(other.updated or other.stale for other in hub.waiters):
+                for other in hub.waiters:
+                    if other is not waiter \
+                            and (other.updated or other.stale):
+                        other.event.set()
+
+
+class _Base:
+    # The state of the mailbox messages shared by a selected set, as of the
+    # given UID validity and modification sequence.
+
+    __slots__ = ['uid_validity', 'mod_sequence', 'messages']
+
+    def __init__(self, uid_validity: int, mod_sequence: Optional[int],
+                 messages: 'SynchronizedMessages') -> None:
+        super().__init__()
+        self.uid_validity = uid_validity
+        self.mod_sequence = mod_sequence
+        self.messages = messages
+
+    def is_stale(self, selected: 'SelectedMailbox') -> bool:
+        mod_seq = selected.mod_sequence
+        return self.uid_validity != selected.uid_validity \
+            or mod_seq is None or self.mod_sequence is None \
+            or self.mod_sequence < mod_seq
+
+
+class _IdleWaiter:
+
+    __slots__ = ['selected', 'event', 'updated', 'stale']
+
+    def __init__(self, selected: 'SelectedMailbox') -> None:
+        super().__init__()
+        self.selected = selected
+        self.event = subsystem.get().new_event()
+        self.updated = False
+        self.stale = False
+
+
+class _IdleHub:
+    # The state of the mailbox shared by its idle sessions, refreshed by the
+    # leader and applied to the other sessions without reading the backend.
+    # The state starts from that of the first session, so that the leader
+    # only reads the changes since.
+
+    __slots__ = ['mailbox', 'waiters', 'leader', 'pulse']
+
+    def __init__(self, selected: 'SelectedMailbox') -> None:
+        super().__init__()
+        self.mailbox = _IdleMailbox(selected)
+        self.waiters: List[_IdleWaiter] = []
+        self.leader: Optional[_IdleWaiter] = None
+        self.pulse: Optional[Event] = None
+
+    def check_stale(self, waiter: _IdleWaiter) -> None:
+        mailbox = self.mailbox
+        selected = waiter.selected
+        mod_seq = selected.mod_sequence
+        if selected.uid_validity != mailbox.uid_validity:
+            waiter.stale = True
+        elif mailbox.all_messages is not None:
+            if not selected.messages.is_flags_equal(mailbox.messages):
+                waiter.stale = True
+        elif mod_seq is None or mod_seq < (mailbox.mod_sequence or 0):
+            waiter.stale = True
+
+    def apply(self, waiter: _IdleWaiter, before: Optional[int]) -> None:
+        mailbox = self.mailbox
+        selected = waiter.selected
+        if mailbox.is_deleted:
+            selected.set_deleted()
+            waiter.updated = True
+        elif selected.uid_validity != mailbox.uid_validity:
+            waiter.stale = True
+        elif mailbox.all_messages is not None:
+            selected.set_messages(mailbox.all_messages)
+            selected.mod_sequence = mailbox.mod_sequence
+            waiter.updated = True
+        else:
+            mod_seq = selected.mod_sequence
+            after = mailbox.mod_sequence
+            if mod_seq is None or before is None or mod_seq < before:
+                waiter.stale = True
+            elif after is not None and mod_seq < after:
+                selected.add_updates(mailbox.updated, mailbox.expunged)
+                selected.mod_sequence = after
+                waiter.updated = True
+
 
 class _Frozen:
 
@@ -81,84 +348,224 @@ class _Frozen:
         messages = selected.messages
         session_flags = selected.session_flags
         self.uid_validity = selected.uid_validity
-        self.is_deleted = selected._is_deleted
-        self.uids = messages._uids.copy()
-        self.sorted = messages._sorted.copy()
-        self.seqs_cache = messages._seqs_cache.copy()
-        self.flags = messages._flags_key_set.copy()
-        self.recent = session_flags.recent_uids & self.uids
+        self.is_deleted = selected.is_deleted
+        self.exists = messages.exists
+        self.recent = frozenset(uid for uid in session_flags.recent_uids
+                                if uid in messages)
         self.sflags = frozenset(session_flags.flags.items())
+        self.added, self.expunged, self.flags_before = \
+            messages._take_changes()
+
+
+class _Interned(Generic[_T]):
+    # Assigns a small integer to each distinct value, shared by all sessions
+    # so that the integers may be compared in place of the values.
+
+    # Only atomic operations are used, so values may be interned from
+    # several threads without a lock. When two threads intern the same value
+    # at once, the integer assigned by the loser is simply never used.
+
+    __slots__ = ['_values', '_ids', '_next_id']
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._values: Dict[int, _T] = {}
+        self._ids: Dict[_T, int] = {}
+        self._next_id = count()
+
+    def get_id(self, value: _T) -> int:
+        try:
+            return self._ids[value]
+        except KeyError:
+            value_id = next(self._next_id)
+            self._values[value_id] = value
+            return self._ids.setdefault(value, value_id)
+
+    def __getitem__(self, value_id: int) -> _T:
+        return self._values[value_id]
+
+
+_flag_sets: _Interned[FlagSet] = _Interned()
+_tzinfos: _Interned[Optional[tzinfo]] = _Interned()
+_epoch = datetime(1970, 1, 1)
+_epoch_days = _epoch.toordinal()
+_microsecond = timedelta(microseconds=1)
+
+
+class _MessageTable(SortedUids):
+    # The UID of each message, with its interned permanent flags, its
+    # internal date packed as microseconds and an interned time zone, and its
+    # mod-sequence, or zero if unknown.
+
+    __slots__: List[str] = []
+
+    columns = ('I', 'q', 'H', 'Q')
+
+    @staticmethod
+    def pack(msg: CachedMessage) -> Tuple[int, int, int, int, int]:
+        when = msg.internal_date
+        secs = (when.toordinal() - _epoch_days) * 86400 + when.hour * 3600 \
+            + when.minute * 60 + when.second
+        usecs = secs * 1000000 + when.microsecond
+        flags_id = _flag_sets.get_id(FlagSet(msg.permanent_flags))
+        return (msg.uid, flags_id, usecs, _tzinfos.get_id(when.tzinfo),
+                msg.mod_sequence or 0)
+
+    def get_flags_id(self, uid: int) -> Optional[int]:
+        values = self.get_values(uid)
+        return values[0] if values is not None else None
+
+    def get_message(self, uid: int) -> Optional['_PackedMessage']:
+        values = self.get_values(uid)
+        if values is None:
+            return None
+        return _PackedMessage(uid, *values)
+
+
+class _PackedMessage:
+    # A cached message rebuilt from the values in a _MessageTable row.
+
+    __slots__ = ['uid', 'permanent_flags', '_usecs', '_tz_id', '_mod_seq']
+
+    def __init__(self, uid: int, flags_id: int, usecs: int,
+                 tz_id: int, mod_seq: int) -> None:
+        super().__init__()
+        self.uid = uid
+        self.permanent_flags = _flag_sets[flags_id]
+        self._usecs = usecs
+        self._tz_id = tz_id
+        self._mod_seq = mod_seq
+
+    @property
+    def mod_sequence(self) -> Optional[int]:
+        return self._mod_seq or None
+
+    @property
+    def internal_date(self) -> datetime:
+        when = _epoch + self._usecs * _microsecond
+        return when.replace(tzinfo=_tzinfos[self._tz_id])
+
+    @property
+    def flags_key(self) -> FlagsKey:
+        return self.uid, self.permanent_flags
+
+    def get_flags(self, session_flags: SessionFlags) -> FlagSet:
+        msg_sflags = session_flags.get(self.uid)
+        if msg_sflags:
+            return self.permanent_flags | msg_sflags
+        else:
+            return self.permanent_flags
 
 
 class SynchronizedMessages:
-    """Manages the message data that has been synchronized with the client."""
+    """Manages the message data that has been synchronized with the client.
+
+    The UIDs added and expunged, and the original flags of messages whose
+    flags changed, are journaled until the next
+    :meth:`~SelectedMailbox.fork`, so that finding the untagged responses
+    does not require comparing the entire mailbox.
+
+    Rather than keeping the cached message objects given by the backend, the
+    UID, permanent flags, internal date, and mod-sequence of each message are
+    packed into arrays, and the cached messages returned by :meth:`.get` and
+    :meth:`.get_all` are rebuilt from them.
+
+    """
 
     def __init__(self) -> None:
         super().__init__()
-        self._uids: Set[int] = set()
-        self._sorted: List[int] = []
-        self._seqs_cache: Dict[int, int] = {}
-        self._cache: Dict[int, CachedMessage] = {}
-        self._flags_key_map: Dict[int, FlagsKey] = {}
-        self._flags_key_set: Set[FlagsKey] = set()
+        self._table = _MessageTable()
         self._pending_remove: Set[int] = set()
+        self._added: Set[int] = set()
+        self._expunged: Set[int] = set()
+        self._flags_before: Dict[int, Optional[int]] = {}
+        self._journal = False
 
     @property
     def exists(self) -> int:
         """The total number of messages in the mailbox."""
-        return len(self._uids)
+        return len(self._table)
 
     @property
     def max_uid(self) -> int:
         """The highest message UID value of the mailbox."""
         try:
-            return self._sorted[-1]
+            return self._table[-1]
         except IndexError:
             return 0
 
     def _update(self, messages: Iterable[CachedMessage]) -> None:
-        lowest_idx: Optional[int] = None
+        table = self._table
+        pack = table.pack
+        if not self._journal:
+            table.extend(pack(msg) for msg in messages)
+            return
         for msg in messages:
-            msg_uid = msg.uid
-            if msg_uid not in self._uids:
-                self._uids.add(msg_uid)
-                idx = bisect_right(self._sorted, msg_uid)
-                if lowest_idx is None or lowest_idx > idx:
-                    lowest_idx = idx
-                self._sorted.insert(idx, msg_uid)
-            self._cache[msg_uid] = msg
-            new_flags_key = msg.flags_key
-            old_flags_key = self._flags_key_map.get(msg_uid)
-            if old_flags_key is not None:
-                self._flags_key_set.discard(old_flags_key)
-            self._flags_key_map[msg_uid] = new_flags_key
-            self._flags_key_set.add(new_flags_key)
-        if lowest_idx is not None:
-            needs_reset = islice(self._sorted, lowest_idx, len(self._sorted))
-            for seq, uid in enumerate(needs_reset, lowest_idx + 1):
-                self._seqs_cache[uid] = seq
+            row = pack(msg)
+            msg_uid, flags_id = row[0:2]
+            old_flags_id = table.get_flags_id(msg_uid)
+            if table.add(*row):
+                if msg_uid in self._expunged:
+                    self._expunged.discard(msg_uid)
+                else:
+                    self._added.add(msg_uid)
+            if old_flags_id != flags_id:
+                self._flags_before.setdefault(msg_uid, old_flags_id)
 
     def _remove(self, uids: Iterable[int], pending: bool) -> None:
         if pending:
             self._pending_remove.update(uids)
         else:
-            any_removed = False
+            table = self._table
             for msg_uid in chain(uids, self._pending_remove):
-                try:
-                    self._uids.remove(msg_uid)
-                except KeyError:
-                    pass
-                else:
-                    flags_key = self._flags_key_map[msg_uid]
-                    self._flags_key_set.remove(flags_key)
-                    del self._flags_key_map[msg_uid]
-                    del self._cache[msg_uid]
-                    any_removed = True
+                flags_id = table.get_flags_id(msg_uid)
+                if flags_id is not None:
+                    table.discard(msg_uid)
+                    if not self._journal:
+                        continue
+                    elif msg_uid in self._added:
+                        self._added.discard(msg_uid)
+                    else:
+                        self._expunged.add(msg_uid)
+                    self._flags_before.setdefault(msg_uid, flags_id)
             self._pending_remove.clear()
-            if any_removed:
-                self._sorted = sorted_uids = sorted(self._uids)
-                self._seqs_cache = {uid: seq for seq, uid in
-                                    enumerate(sorted_uids, 1)}
+
+    def _take_changes(self) -> Tuple[Set[int], Set[int],
+                                     Dict[int, Optional[int]]]:
+        # Nothing is journaled until the first fork, which has no previous
+        # state to compare against.
+        self._journal = True
+        changes = self._added, self._expunged, self._flags_before
+        self._added = set()
+        self._expunged = set()
+        self._flags_before = {}
+        return changes
+
+    def copy(self) -> 'SynchronizedMessages':
+        """Return a copy of the messages, sharing memory with this object
+        until either of them is modified. Nothing is journaled by the copy
+        until its first fork.
+
+        """
+        copy = SynchronizedMessages()
+        copy._table = self._table.copy()
+        return copy
+
+    def is_flags_equal(self, other: 'SynchronizedMessages') -> bool:
+        """Return True if the other object has the same messages, with the
+        same permanent flags.
+
+        Args:
+            other: The other synchronized messages.
+
+        """
+        if self.exists != other.exists:
+            return False
+        rows = zip(self._table.iter_rows(), other._table.iter_rows())
+        return all(row[0:2] == other_row[0:2] for row, other_row in rows)
+
+    def __contains__(self, uid: object) -> bool:
+        return uid in self._table
 
     def get(self, uid: int) -> Optional[CachedMessage]:
         """Return the given cached message.
@@ -167,27 +574,32 @@ class SynchronizedMessages:
             uid: The message UID.
 
         """
-        return self._cache.get(uid)
+        return self._table.get_message(uid)
 
     def get_all(self, seq_set: SequenceSet) \
-            -> Sequence[Tuple[int, CachedMessage]]:
-        """Return the cached messages, and their sequence numbers, for the
-        given sequence set.
+            -> Iterator[Tuple[int, CachedMessage]]:
+        """Generate the cached messages, and their sequence numbers, for the
+        given sequence set. Each range in the sequence set is resolved
+        separately, so the cost is proportional to the number of messages
+        returned rather than the size of the mailbox.
 
         Args:
             seq_set: The message sequence set.
 
         """
+        table = self._table
         if seq_set.uid:
-            all_uids = seq_set.flatten(self.max_uid) & self._uids
-            return [(seq, self._cache[uid])
-                    for seq, uid in enumerate(self._sorted, 1)
-                    if uid in all_uids]
+            for low, high in seq_set.ranges(self.max_uid):
+                start = table.bisect_left(low)
+                end = table.bisect_right(high)
+                for seq, row in enumerate(table.iter_rows(start, end),
+                                          start + 1):
+                    yield seq, _PackedMessage(*row)
         else:
-            all_seqs = seq_set.flatten(self.exists)
-            return [(seq, self._cache[uid])
-                    for seq, uid in enumerate(self._sorted, 1)
-                    if seq in all_seqs]
+            for low, high in seq_set.ranges(self.exists):
+                for seq, row in enumerate(table.iter_rows(low - 1, high),
+                                          low):
+                    yield seq, _PackedMessage(*row)
 
 
 class SelectedMailbox:
@@ -221,20 +633,40 @@ class SelectedMailbox:
         self._session_flags = session_flags
         self._selected_set = selected_set
         self._kwargs = kwargs
-        self._uid_validity = 0
+        self._uid_validity: int = kwargs.get('_uid_validity', 0)
         self._mod_sequence: Optional[int] = kwargs.get('_mod_sequence')
+        self._condstore: bool = kwargs.get('_condstore', False)
+        self._qresync: bool = kwargs.get('_qresync', False)
+        self._saved_result: SequenceSet = kwargs.get(
+            '_saved_result', _empty_result)
+        self._sort_cache: Optional[SortCache] = kwargs.get('_sort_cache')
         self._is_deleted = False
         self._hide_expunged = False
         self._silenced_flags: Set[Tuple[int, FrozenSet[Flag]]] = set()
         self._silenced_sflags: Set[Tuple[int, FrozenSet[Flag]]] = set()
         self._prev: Optional[_Frozen] = kwargs.get('_prev')
+        self._seeded = False
         try:
             self._messages: SynchronizedMessages = kwargs['_messages']
         except KeyError:
             self._messages = SynchronizedMessages()
+            if selected_set is not None:
+                self._seed(selected_set)
         if selected_set:
             selected_set.add(self)
 
+    def _seed(self, selected_set: SelectedSet) -> None:
+        base = selected_set.get_messages()
+        if base is not None:
+            self._uid_validity, self._mod_sequence, self._messages = base
+            self._seeded = True
+
+    def _publish(self) -> None:
+        selected_set = self._selected_set
+        if selected_set is not None and not self._is_deleted \
+                and not self._messages._pending_remove:
+            selected_set.publish(self)
+
     @property
     def name(self) -> str:
         """The name of the selected mailbox."""
@@ -247,6 +679,11 @@ class SelectedMailbox:
 
     @uid_validity.setter
     def uid_validity(self, uid_validity: int) -> None:
+        if self._seeded and uid_validity != self._uid_validity:
+            # The shared state was of a previous mailbox with the same name.
+            self._messages = SynchronizedMessages()
+            self._mod_sequence = None
+        self._seeded = False
         self._uid_validity = uid_validity
 
     @property
@@ -258,6 +695,85 @@ class SelectedMailbox:
     def mod_sequence(self, mod_sequence: Optional[int]) -> None:
         self._mod_sequence = mod_sequence
 
+    @property
+    def condstore(self) -> bool:
+        """If True, the session has enabled ``CONDSTORE`` and untagged
+        ``FETCH`` responses include the ``MODSEQ`` of the message.
+
+        See Also:
+            `RFC 7162 3.1 <https://tools.ietf.org/html/rfc7162#section-3.1>`_
+
+        """
+        return self._condstore
+
+    @condstore.setter
+    def condstore(self, condstore: bool) -> None:
+        self._condstore = condstore
+
+    @property
+    def qresync(self) -> bool:
+        """If True, the session has enabled ``QRESYNC`` and expunged messages
+        are reported with untagged ``VANISHED`` responses instead of
+        ``EXPUNGE``.
+
+        See Also:
+            `RFC 7162 3.2 <https://tools.ietf.org/html/rfc7162#section-3.2>`_
+
+        """
+        return self._qresync
+
+    @qresync.setter
+    def qresync(self, qresync: bool) -> None:
+        self._qresync = qresync
+
+    @property
+    def saved_result(self) -> SequenceSet:
+        """The UIDs of the messages saved by the last ``SEARCH`` command with
+        the ``SAVE`` result option, which are referenced by ``$``. Because
+        the result holds UIDs, expunged messages drop out of it on their own.
+
+        See Also:
+            `RFC 5182 2.1. <https://tools.ietf.org/html/rfc5182#section-2.1>`_
+
+        """
+        return self._saved_result
+
+    @saved_result.setter
+    def saved_result(self, saved_result: SequenceSet) -> None:
+        self._saved_result = saved_result
+
+    def resolve_saved(self, seq_set: SequenceSet) -> SequenceSet:
+        """Return the :attr:`.saved_result` if the sequence set is the ``$``
+        marker, otherwise return the sequence set unchanged.
+
+        Args:
+            seq_set: The sequence set from a command.
+
+        """
+        if seq_set.is_saved:
+            return self._saved_result
+        return seq_set
+
+    @property
+    def sort_cache(self) -> SortCache:
+        """The cached sort keys of the mailbox messages, shared with other
+        sessions by the selected set. Messages are added to the cache when
+        they are first sorted, and removed when they are expunged.
+
+        See Also:
+            :mod:`pymap.sort`
+
+        """
+        selected_set = self._selected_set
+        sort_cache: SortCache
+        if selected_set is not None:
+            sort_cache = selected_set.sort_cache
+        else:
+            sort_cache = self._sort_cache or SortCache()
+            self._sort_cache = sort_cache
+        sort_cache.check(self._uid_validity)
+        return sort_cache
+
     @property
     def hide_expunged(self) -> bool:
         """If True, no untagged ``EXPUNGE`` responses will be generated, and
@@ -297,6 +813,11 @@ class SelectedMailbox:
         self._messages._remove(expunged, self._hide_expunged)
         if not self._hide_expunged:
             self._session_flags.remove(expunged)
+        selected_set = self._selected_set
+        if selected_set is not None:
+            selected_set.sort_cache.remove(expunged)
+        elif self._sort_cache is not None:
+            self._sort_cache.remove(expunged)
 
     def set_messages(self, messages: Sequence[CachedMessage]) -> None:
         """This is the non-optimized alternative to :meth:`.add_updates` for
@@ -312,7 +833,7 @@ class SelectedMailbox:
 
         """
         uids = {msg.uid for msg in messages}
-        expunged = self._messages._uids - uids
+        expunged = [uid for uid in self._messages._table if uid not in uids]
         return self.add_updates(messages, expunged)
 
     @property
@@ -335,6 +856,11 @@ class SelectedMailbox:
         """Session-only flags for the mailbox."""
         return self._session_flags
 
+    @property
+    def is_deleted(self) -> bool:
+        """True if the selected mailbox has been deleted."""
+        return self._is_deleted
+
     def set_deleted(self) -> None:
         """Marks the selected mailbox as having been deleted."""
         self._is_deleted = True
@@ -378,14 +904,19 @@ class SelectedMailbox:
 
         """
         frozen = _Frozen(self)
+        self._publish()
         cls = type(self)
         copy = cls(self._name, self._readonly, self._permanent_flags,
                    self._session_flags, self._selected_set,
+                   _uid_validity=self._uid_validity,
                    _mod_sequence=self._mod_sequence,
+                   _condstore=self._condstore, _qresync=self._qresync,
+                   _saved_result=self._saved_result,
+                   _sort_cache=self._sort_cache,
                    _prev=frozen, _messages=self._messages)
         if self._prev is not None:
             with_uid: bool = getattr(command, 'uid', False)
-            untagged = self._compare(self._prev, frozen, with_uid)
+            untagged = list(self._compare(self._prev, frozen, with_uid))
         else:
             untagged = []
         return copy, untagged
@@ -399,28 +930,86 @@ class SelectedMailbox:
             yield ResponseBye(b'UID validity changed.',
                               UidValidity(after.uid_validity))
             return
-        cache = self._messages._cache
+        messages = self._messages
+        table = messages._table
         session_flags = self._session_flags
-        expunged_uids = before.uids - after.uids
-        new_uids = after.uids - before.uids
-        if not self._hide_expunged and expunged_uids:
-            for uid in sorted(expunged_uids, reverse=True):
-                yield ExpungeResponse(before.seqs_cache[uid])
-        if new_uids:
-            yield ExistsResponse(len(after.uids))
+        if not self._hide_expunged and after.expunged:
+            if self._qresync:
+                yield VanishedResponse(SequenceSet.build(after.expunged, True))
+            else:
+                yield from self._expunge_responses(after)
+        if after.added:
+            yield ExistsResponse(after.exists)
         if len(after.recent) != len(before.recent):
             yield RecentResponse(len(after.recent))
         new_recent = (after.recent - before.recent)
-        new_flags = (after.flags - before.flags - self._silenced_flags)
+        new_flags = (uid for uid, before_id in after.flags_before.items()
+                     if self._is_flags_changed(uid, before_id))
         new_sflags = (after.sflags - before.sflags - self._silenced_sflags)
-        fetch_uids = chain(new_recent,
-                           (uid for uid, _ in new_flags),
+        fetch_uids = chain(new_recent, new_flags,
                            (uid for uid, _ in new_sflags))
         for uid, _ in groupby(sorted(fetch_uids)):
-            seq = after.seqs_cache[uid]
-            msg_flags = cache[uid].get_flags(session_flags)
+            msg = table.get_message(uid)
+            if msg is None:
+                continue
+            seq = table.index(uid) + 1
+            msg_flags = msg.get_flags(session_flags)
             fetch_data: Dict[FetchAttribute, SupportsBytes] = {
                 _flags_attr: ListP(msg_flags, sort=True)}
             if with_uid:
                 fetch_data[_uid_attr] = Number(uid)
+            if self._condstore:
+                mod_seq = Number(msg.mod_sequence or 0)
+                fetch_data[_modseq_attr] = ListP([mod_seq])
             yield FetchResponse(seq, fetch_data)
+
+    def _expunge_responses(self, after: _Frozen) -> Iterable[Response]:
+        table = self._messages._table
+        # The sequence number of each expunged message is found from its
+        # position in the current UIDs, adjusted by the journaled changes.
+        added = sorted(after.added)
+        expunged = sorted(after.expunged)
+        for idx in reversed(range(len(expunged))):
+            uid = expunged[idx]
+            seq = table.bisect_right(uid) \
+                - bisect_right(added, uid) + idx + 1
+            yield ExpungeResponse(seq)
+
+    def _is_flags_changed(self, uid: int, before_id: Optional[int]) -> bool:
+        flags_id = self._messages._table.get_flags_id(uid)
+        return flags_id is not None and flags_id != before_id \
+            and (uid, _flag_sets[flags_id]) not in self._silenced_flags
+
+
+class _IdleMailbox(SelectedMailbox):
+    # Records the changes found each time the mailbox is refreshed.
+
+    def __init__(self, selected: SelectedMailbox) -> None:
+        super().__init__(selected.name, True, PermanentFlags([]),
+                         SessionFlags([]),
+                         _uid_validity=selected.uid_validity,
+                         _mod_sequence=selected.mod_sequence,
+                         _messages=selected.messages.copy())
+        self._seeded = True
+        self.changed = False
+        self.updated: Sequence[CachedMessage] = []
+        self.expunged: Sequence[int] = []
+        self.all_messages: Optional[Sequence[CachedMessage]] = None
+
+    def add_updates(self, messages: Iterable[CachedMessage],
+                    expunged: Iterable[int]) -> None:
+        self.updated = messages = list(messages)
+        self.expunged = expunged = list(expunged)
+        self.changed = bool(messages or expunged)
+        self.all_messages = None
+        super().add_updates(messages, expunged)
+
+    def set_messages(self, messages: Sequence[CachedMessage]) -> None:
+        table = self._messages._table
+        changed = len(messages) != len(table) or any(
+            table.get_flags_id(msg.uid)
+            != _flag_sets.get_id(FlagSet(msg.permanent_flags))
+            for msg in messages)
+        super().set_messages(messages)
+        self.changed = changed
+        self.all_messages = messages
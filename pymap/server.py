@@ -7,15 +7,19 @@ import asyncio
 import binascii
 import re
 import sys
+import time
+import zlib
 from asyncio import shield, IncompleteReadError, StreamReader, StreamWriter, \
-    CancelledError
+    ReadTransport, CancelledError
 from base64 import b64encode, b64decode
 from ssl import SSLContext
-from typing import TypeVar, Iterable, List, Optional, Awaitable
+from typing import TypeVar, Iterable, List, Tuple, Sequence, Optional, \
+    Awaitable, Union
 
 from pysasl import ServerChallenge, AuthenticationError, \
     AuthenticationCredentials
 
+from .bytes import MaybeBytes
 from .concurrent import Event
 from .config import IMAPConfig
 from .context import subsystem, current_command, socket_info
@@ -23,17 +27,106 @@ from .exceptions import ResponseError
 from .interfaces.session import LoginProtocol
 from .parsing.command import Command
 from .parsing.commands import Commands
+from .parsing.command.auth import CompressCommand
 from .parsing.command.nonauth import AuthenticateCommand, StartTLSCommand
 from .parsing.command.select import IdleCommand
+from .parsing import Continuation
 from .parsing.exceptions import RequiresContinuation
 from .parsing.response import ResponseContinuation, Response, ResponseCode, \
     ResponseBad, ResponseNo, ResponseBye, ResponseOk
 from .sockinfo import SocketInfo
+from .spool import SpooledLiteral
 from .state import ConnectionState
 
 __all__ = ['IMAPServer', 'IMAPConnection']
 
 _Ret = TypeVar('_Ret')
+_Data = Union[bytes, bytearray, memoryview]
+
+
+class _Chunks(List[Union[bytes, memoryview]]):
+    # Collects the chunks of a rendered response, without copying them, so
+    # they may be given to the transport all at once.
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.length = 0
+
+    def write(self, data: Union[bytes, memoryview]) -> None:
+        self.append(data)
+        self.length += len(data)
+
+    def __bytes__(self) -> bytes:
+        return b''.join(self)
+
+
+class _DeflateWriter(StreamWriter):
+    # Compresses everything written to the transport, flushing the compressor
+    # each time the connection waits for the socket buffer to drain.
+
+    def __init__(self, writer: StreamWriter, reader: StreamReader,
+                 level: int) -> None:
+        transport = writer.transport
+        protocol = transport.get_protocol()  # type: ignore
+        super().__init__(transport, protocol, reader,
+                         asyncio.get_event_loop())
+        self._compress = zlib.compressobj(level, zlib.DEFLATED,
+                                          -zlib.MAX_WBITS)
+        self._inflated = reader
+        self._inflate: Optional[asyncio.Task] = None
+
+    def write(self, data: _Data) -> None:
+        super().write(self._compress.compress(data))
+
+    def writelines(self, data: Iterable[_Data]) -> None:
+        compress = self._compress.compress
+        super().write(b''.join([compress(chunk) for chunk in data]))
+
+    async def drain(self) -> None:
+        super().write(self._compress.flush(zlib.Z_SYNC_FLUSH))
+        await super().drain()
+
+    async def inflate(self, reader: StreamReader, limit: int) -> None:
+        # At most limit bytes are inflated at a time, and inflating pauses
+        # while the connection has not read what was already inflated, so
+        # that a small amount of compressed data cannot fill memory.
+        decompress = zlib.decompressobj(-zlib.MAX_WBITS)
+        flow = _InflateFlow()
+        self._inflated.set_transport(flow)
+        try:
+            while True:
+                data = await reader.read(limit)
+                if not data:
+                    break
+                while data:
+                    await flow.resumed.wait()
+                    self._inflated.feed_data(
+                        decompress.decompress(data, limit))
+                    data = decompress.unconsumed_tail
+            self._inflated.feed_data(decompress.flush())
+        except Exception as exc:
+            self._inflated.set_exception(exc)
+        else:
+            self._inflated.feed_eof()
+
+
+class _InflateFlow(ReadTransport):
+    # Given to the reader of inflated data, which pauses and resumes it based
+    # on the amount of data it has buffered.
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.resumed = asyncio.Event()
+        self.resumed.set()
+
+    def is_reading(self) -> bool:
+        return self.resumed.is_set()
+
+    def pause_reading(self) -> None:
+        self.resumed.clear()
+
+    def resume_reading(self) -> None:
+        self.resumed.set()
 
 
 class Disconnected(Exception):
@@ -92,9 +185,12 @@ class IMAPConnection:
 
     _lines = re.compile(br'\r?\n')
     _literal_plus = re.compile(br'{(\d+)\+}\r?\n$')
+    _literal_end = re.compile(br'{\d+\+?}\r?\n$')
+    _spool_chunk_len = 65536
 
     __slots__ = ['commands', 'config', 'params', 'bad_command_limit',
-                 '_print', 'reader', 'writer']
+                 'stream_buffer_len', 'stats', '_bad_commands', '_bytes_out',
+                 '_next_line', '_print', 'reader', 'writer']
 
     def __init__(self, commands: Commands, config: IMAPConfig,
                  reader: StreamReader,
@@ -104,6 +200,11 @@ class IMAPConnection:
         self.config = config
         self.params = config.parsing_params
         self.bad_command_limit = config.bad_command_limit
+        self.stream_buffer_len = config.stream_buffer_len
+        self.stats = config.stats
+        self._bad_commands = 0
+        self._bytes_out = 0
+        self._next_line: Optional[bytes] = None
         self._print = self._real_print if config.debug else self._noop_print
         self._reset_streams(reader, writer)
 
@@ -113,9 +214,9 @@ class IMAPConnection:
         socket_info.set(SocketInfo(writer))
 
     @classmethod
-    def _real_print(cls, prefix: str, output: bytes) -> None:
+    def _real_print(cls, prefix: str, output: MaybeBytes) -> None:
         prefix = prefix % socket_info.get().socket.fileno()
-        lines = cls._lines.split(output)
+        lines = cls._lines.split(bytes(output))
         if not lines[-1]:
             lines = lines[:-1]
         for line in lines:
@@ -123,14 +224,20 @@ class IMAPConnection:
             print(prefix, line_str)
 
     @classmethod
-    def _noop_print(cls, prefix: str, output: bytes) -> None:
+    def _noop_print(cls, prefix: str, output: MaybeBytes) -> None:
         pass
 
     def _exec(self, future: Awaitable[_Ret]) -> Awaitable[_Ret]:
         return subsystem.get().execute(future)
 
-    async def readline(self) -> memoryview:
-        buf = bytearray(await self.reader.readline())
+    async def readline(self, conts: List[Continuation] = None) \
+            -> memoryview:
+        if self._next_line is not None:
+            buf = bytearray(self._next_line)
+            self._next_line = None
+        else:
+            buf = bytearray(await self.reader.readline())
+        first: Optional[memoryview] = None
         while True:
             if buf.endswith(b'+}\n') or buf.endswith(b'+}\r\n'):
                 lit_plus = self._literal_plus.search(buf)
@@ -138,6 +245,16 @@ class IMAPConnection:
                 lit_plus = None
             if lit_plus:
                 literal_length = int(lit_plus.group(1))
+                if conts is not None and self._should_spool(literal_length):
+                    del buf[lit_plus.end(1)]
+                    self._print('%d -->|', buf)
+                    if first is None:
+                        first = memoryview(buf)
+                    else:
+                        conts.append(memoryview(buf))
+                    conts.append(await self._read_spooled(literal_length))
+                    buf = bytearray(await self.reader.readline())
+                    continue
                 try:
                     buf += await self.reader.readexactly(literal_length)
                 except IncompleteReadError:
@@ -145,7 +262,31 @@ class IMAPConnection:
                 buf += await self.reader.readline()
             else:
                 self._print('%d -->|', buf)
-                return memoryview(buf)
+                if first is None:
+                    return memoryview(buf)
+                assert conts is not None
+                conts.append(memoryview(buf))
+                return first
+
+    def _should_spool(self, literal_length: int) -> bool:
+        spool_literal_len = self.config.spool_literal_len
+        return spool_literal_len is not None \
+            and literal_length > spool_literal_len
+
+    async def _read_spooled(self, literal_length: int) -> SpooledLiteral:
+        spooled = SpooledLiteral(self.config.spool_dir)
+        remaining = literal_length
+        while remaining > 0:
+            chunk_len = min(remaining, self._spool_chunk_len)
+            try:
+                chunk = await self.reader.readexactly(chunk_len)
+            except IncompleteReadError:
+                raise Disconnected
+            spooled.append(chunk)
+            remaining -= chunk_len
+        spooled.finish()
+        self._print('%d -->|', b'<%d bytes spooled>' % literal_length)
+        return spooled
 
     async def read_continuation(self, literal_length: int) -> memoryview:
         try:
@@ -155,8 +296,37 @@ class IMAPConnection:
         self._print('%d -->|', extra_literal)
         extra_line = await self.readline()
         extra = extra_literal + bytes(extra_line)
+        cmd_stats = self.stats.command(current_command.get().command)
+        cmd_stats.bytes_in += len(extra)
         return memoryview(extra)
 
+    async def read_literal(self, literal_length: int,
+                           conts: List[Continuation]) -> None:
+        """Read a literal string sent by the client after a continuation
+        response, and the rest of the command line after it, adding them to
+        the continuation buffers for parsing. Literal strings longer than
+        :attr:`~pymap.config.IMAPConfig.spool_literal_len` are spooled to a
+        temporary file as they arrive.
+
+        Args:
+            literal_length: The length of the literal string.
+            conts: The continuation buffers of the command.
+
+        """
+        if self._should_spool(literal_length):
+            conts.append(await self._read_spooled(literal_length))
+            idx = len(conts)
+            conts.insert(idx, await self.readline(conts))
+        else:
+            try:
+                extra_literal = await self.reader.readexactly(literal_length)
+            except IncompleteReadError:
+                raise Disconnected
+            self._print('%d -->|', extra_literal)
+            idx = len(conts)
+            extra_line = await self.readline(conts)
+            conts.insert(idx, memoryview(extra_literal + bytes(extra_line)))
+
     async def authenticate(self, state: ConnectionState, mech_name: bytes) \
             -> Optional[AuthenticationCredentials]:
         mech = state.auth.get_server(mech_name)
@@ -180,8 +350,8 @@ class IMAPConnection:
                 responses.append(chal)
 
     async def read_command(self) -> Command:
-        line = await self.readline()
-        conts: List[memoryview] = []
+        conts: List[Continuation] = []
+        line = await self.readline(conts)
         while True:
             if self.reader.at_eof():
                 raise Disconnected
@@ -191,9 +361,10 @@ class IMAPConnection:
             except RequiresContinuation as req:
                 cont = ResponseContinuation(req.message)
                 await self.write_response(cont)
-                ret = await self.read_continuation(req.literal_length)
-                conts.append(ret)
+                await self.read_literal(req.literal_length, conts)
             else:
+                cmd_stats = self.stats.command(cmd.command)
+                cmd_stats.bytes_in += len(line) + sum(len(c) for c in conts)
                 return cmd
 
     async def read_idle_done(self, cmd: IdleCommand) -> bool:
@@ -201,11 +372,39 @@ class IMAPConnection:
         ok, _ = cmd.parse_done(buf)
         return ok
 
+    def _write_chunks(self, resp: Response) -> int:
+        chunks = _Chunks()
+        resp.write(chunks)
+        self.writer.writelines(chunks)
+        self._print('%d <--|', chunks)
+        self._bytes_out += chunks.length
+        return chunks.length
+
     async def write_response(self, resp: Response) -> None:
-        raw = bytes(resp)
-        resp.write(self.writer)
+        self._write_chunks(resp)
         await self.writer.drain()
-        self._print('%d <--|', raw)
+
+    async def write_stream(self, resp: Response) -> None:
+        """Write the untagged responses streamed by the response as they are
+        produced, waiting for the socket buffer to drain periodically. The
+        response itself, and its remaining untagged responses, must still be
+        written with :meth:`.write_response`.
+
+        Args:
+            resp: The response with streamed untagged responses.
+
+        """
+        stream = resp.stream_untagged()
+        buffered = 0
+        while True:
+            try:
+                untagged = await self._exec(stream.__anext__())
+            except StopAsyncIteration:
+                break
+            buffered += self._write_chunks(untagged)
+            if buffered >= self.stream_buffer_len:
+                await self.writer.drain()
+                buffered = 0
 
     async def start_tls(self, ssl_context: SSLContext) -> None:
         loop = asyncio.get_event_loop()
@@ -218,6 +417,16 @@ class IMAPConnection:
         protocol.connection_made(new_transport)
         self._print('%d <->|', b'<TLS handshake>')
 
+    def start_compress(self) -> None:
+        loop = asyncio.get_event_loop()
+        reader = StreamReader(loop=loop)
+        writer = _DeflateWriter(self.writer, reader,
+                                self.config.compression_level)
+        writer._inflate = asyncio.create_task(
+            writer.inflate(self.reader, self.stream_buffer_len))
+        self._reset_streams(reader, writer)
+        self._print('%d <->|', b'<COMPRESS=DEFLATE>')
+
     async def send_error_disconnect(self) -> None:
         exc_type, exc, exc_tb = sys.exc_info()
         if isinstance(exc, CancelledError):
@@ -237,16 +446,9 @@ class IMAPConnection:
 
     async def handle_updates(self, state: ConnectionState, done: Event,
                              cmd: IdleCommand) -> None:
-        timeout = self.config.max_idle_wait
         while not done.is_set():
-            receive_task = asyncio.create_task(
-                self._exec(state.receive_updates(cmd, done)))
-            try:
-                untagged = await asyncio.wait_for(receive_task, timeout)
-            except TimeoutError:
-                pass
-            else:
-                await shield(self.write_updates(untagged))
+            untagged = await self._exec(state.receive_updates(cmd, done))
+            await shield(self.write_updates(untagged))
 
     async def idle(self, state: ConnectionState, cmd: IdleCommand) -> Response:
         response = await self._exec(state.do_command(cmd))
@@ -278,6 +480,130 @@ class IMAPConnection:
         else:
             return response
 
+    async def _read_ahead(self) -> bool:
+        # Only a line that the client has already sent is read ahead, so that
+        # reading never waits on the client while commands are pending. A
+        # line ending in a literal is left for after the pending commands, so
+        # that its continuation response is not sent before their responses.
+        if self._next_line is None:
+            readline = asyncio.ensure_future(self.reader.readline())
+            await asyncio.sleep(0)
+            if not readline.done():
+                readline.cancel()
+                await asyncio.wait([readline])
+                return False
+            self._next_line = readline.result()
+        return self._literal_end.search(self._next_line) is None
+
+    async def read_pipeline(self, state: ConnectionState, cmd: Command) \
+            -> Tuple[List[Command], Optional[Command]]:
+        """Read ahead any commands that were pipelined by the client after
+        ``cmd`` and may be executed concurrently with it.
+
+        Args:
+            state: Defines the interaction with the backend plugin.
+            cmd: The command that was just read.
+
+        Returns:
+            The commands that may be executed concurrently, and the next
+            command that was read but may not.
+
+        """
+        cmds = [cmd]
+        while state.can_pipeline(cmds) and await self._read_ahead():
+            try:
+                next_cmd = await self.read_command()
+            except Disconnected:
+                break
+            if state.can_pipeline(cmds + [next_cmd]):
+                cmds.append(next_cmd)
+            else:
+                return cmds, next_cmd
+        return cmds, None
+
+    async def _execute(self, state: ConnectionState, cmd: Command) \
+            -> Response:
+        if isinstance(cmd, AuthenticateCommand):
+            creds = await self.authenticate(state, cmd.mech_name)
+            response, _ = await self._exec(state.do_authenticate(cmd, creds))
+            return response
+        elif isinstance(cmd, IdleCommand):
+            return await self.idle(state, cmd)
+        else:
+            return await self._exec(state.do_command(cmd))
+
+    @classmethod
+    async def _pipelined(cls, result: Union[Response, BaseException]) \
+            -> Response:
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def _run_commands(self, state: ConnectionState,
+                            cmds: Sequence[Command]) -> bool:
+        start = time.perf_counter()
+        if len(cmds) == 1:
+            cmd = cmds[0]
+            return await self._run_command(state, cmd, start,
+                                           self._execute(state, cmd))
+        results = await self._exec(state.do_pipeline(cmds))
+        for cmd, result in zip(cmds, results):
+            if not await self._run_command(state, cmd, start,
+                                           self._pipelined(result)):
+                return False
+        return True
+
+    async def _run_command(self, state: ConnectionState, cmd: Command,
+                           start: float, result: Awaitable[Response]) -> bool:
+        prev_cmd = current_command.set(cmd)
+        prev_bytes_out = self._bytes_out
+        try:
+            response = await result
+            await self.write_stream(response)
+        except ResponseError as exc:
+            resp = exc.get_response(cmd.tag)
+            await self.write_response(resp)
+            if resp.is_terminal:
+                return False
+        except AuthenticationError as exc:
+            msg = bytes(str(exc), 'utf-8', 'surrogateescape')
+            resp = ResponseBad(cmd.tag, msg)
+            await self.write_response(resp)
+        except TimeoutError:
+            resp = ResponseNo(cmd.tag, b'Operation timed out.',
+                              ResponseCode.of(b'TIMEOUT'))
+            await self.write_response(resp)
+        except CancelledError:
+            await self.send_error_disconnect()
+            return False
+        except Exception:
+            await self.send_error_disconnect()
+            raise
+        else:
+            await self.write_response(response)
+            if response.is_bad:
+                self._bad_commands += 1
+                if self.bad_command_limit \
+                        and self._bad_commands >= self.bad_command_limit:
+                    msg = b'Too many errors, disconnecting.'
+                    response.add_untagged(ResponseBye(msg))
+            else:
+                self._bad_commands = 0
+            if response.is_terminal:
+                return False
+            if isinstance(cmd, StartTLSCommand) and state.ssl_context \
+                    and isinstance(response, ResponseOk):
+                await self.start_tls(state.ssl_context)
+            elif isinstance(cmd, CompressCommand) \
+                    and isinstance(response, ResponseOk):
+                self.start_compress()
+        finally:
+            current_command.reset(prev_cmd)
+            cmd_stats = self.stats.command(cmd.command)
+            cmd_stats.bytes_out += self._bytes_out - prev_bytes_out
+            cmd_stats.latency.observe(time.perf_counter() - start)
+        return True
+
     async def run(self, state: ConnectionState) -> None:
         """Start the socket communication with the IMAP greeting, and then
         enter the command/response cycle.
@@ -287,7 +613,6 @@ class IMAPConnection:
 
         """
         self._print('%d +++|', bytes(socket_info.get()))
-        bad_commands = 0
         try:
             greeting = await self._exec(state.do_greeting())
         except ResponseError as exc:
@@ -297,9 +622,14 @@ class IMAPConnection:
             return
         else:
             await self.write_response(greeting)
+        pending: Optional[Command] = None
         while True:
             try:
-                cmd = await self.read_command()
+                if pending is None:
+                    cmd = await self.read_command()
+                else:
+                    cmd, pending = pending, None
+                cmds, pending = await self.read_pipeline(state, cmd)
             except (ConnectionResetError, BrokenPipeError):
                 break
             except Disconnected:
@@ -311,50 +641,6 @@ class IMAPConnection:
                 await self.send_error_disconnect()
                 raise
             else:
-                prev_cmd = current_command.set(cmd)
-                try:
-                    if isinstance(cmd, AuthenticateCommand):
-                        creds = await self.authenticate(state, cmd.mech_name)
-                        response, _ = await self._exec(
-                            state.do_authenticate(cmd, creds))
-                    elif isinstance(cmd, IdleCommand):
-                        response = await self.idle(state, cmd)
-                    else:
-                        response = await self._exec(state.do_command(cmd))
-                except ResponseError as exc:
-                    resp = exc.get_response(cmd.tag)
-                    await self.write_response(resp)
-                    if resp.is_terminal:
-                        break
-                except AuthenticationError as exc:
-                    msg = bytes(str(exc), 'utf-8', 'surrogateescape')
-                    resp = ResponseBad(cmd.tag, msg)
-                    await self.write_response(resp)
-                except TimeoutError:
-                    resp = ResponseNo(cmd.tag, b'Operation timed out.',
-                                      ResponseCode.of(b'TIMEOUT'))
-                    await self.write_response(resp)
-                except CancelledError:
-                    await self.send_error_disconnect()
+                if not await self._run_commands(state, cmds):
                     break
-                except Exception:
-                    await self.send_error_disconnect()
-                    raise
-                else:
-                    await self.write_response(response)
-                    if response.is_bad:
-                        bad_commands += 1
-                        if self.bad_command_limit \
-                                and bad_commands >= self.bad_command_limit:
-                            msg = b'Too many errors, disconnecting.'
-                            response.add_untagged(ResponseBye(msg))
-                    else:
-                        bad_commands = 0
-                    if response.is_terminal:
-                        break
-                    if isinstance(cmd, StartTLSCommand) and state.ssl_context \
-                            and isinstance(response, ResponseOk):
-                        await self.start_tls(state.ssl_context)
-                finally:
-                    current_command.reset(prev_cmd)
         self._print('%d ---|', b'<disconnected>')
@@ -0,0 +1,461 @@
+"""Ordering of search results by the ``SORT`` and ``THREAD`` commands.
+
+The keys compared by these commands are extracted from the message headers
+once and kept in a :class:`SortCache`, so that a mailbox may be sorted again
+without loading its messages.
+
+See Also:
+    `RFC 5256 <https://tools.ietf.org/html/rfc5256>`_
+
+"""
+
+import re
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, \
+    Tuple
+
+from .interfaces.message import MessageInterface
+from .parsing.response.specials import ThreadNode
+
+__all__ = ['base_subject', 'SortKeys', 'SortCache', 'sort_messages',
+           'thread_messages']
+
+_casemap = str.maketrans('abcdefghijklmnopqrstuvwxyz',
+                         'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+_whitespace = re.compile(r'\s+')
+_trailer = re.compile(r'(?:\s*\(fwd\)|\s+)$', re.I)
+_blob = r'\[[^\[\]]*\]\s*'
+_leader = re.compile(r'(?:%s)*(?:re|fwd?)\s*(?:%s)?:|\s+' % (_blob, _blob),
+                     re.I)
+_leading_blob = re.compile(_blob)
+_fwd_wrapper = re.compile(r'\[fwd:(.*)\]$', re.I | re.S)
+_msg_id = re.compile(r'<[^<>]*>')
+
+_sort_attrs = {b'ARRIVAL': 'arrival', b'CC': 'cc', b'DATE': 'date',
+               b'FROM': 'from_', b'SIZE': 'size', b'SUBJECT': 'subject',
+               b'TO': 'to'}
+
+
+def _extract_subject(subject: str) -> Tuple[str, bool]:
+    is_reply = False
+    subject = _whitespace.sub(' ', subject)
+    while True:
+        while True:
+            match = _trailer.search(subject)
+            if match is None:
+                break
+            is_reply = is_reply or match.group().strip() != ''
+            subject = subject[:match.start()]
+        while True:
+            before = subject
+            match = _leader.match(subject)
+            if match is not None:
+                is_reply = is_reply or match.group().strip() != ''
+                subject = subject[match.end():]
+            match = _leading_blob.match(subject)
+            if match is not None and match.end() < len(subject):
+                subject = subject[match.end():]
+            if subject == before:
+                break
+        match = _fwd_wrapper.match(subject)
+        if match is None:
+            break
+        is_reply = True
+        subject = match.group(1)
+    return subject.translate(_casemap), is_reply
+
+
+def base_subject(subject: str) -> str:
+    """Return the base subject of a message, with the reply and forward
+    prefixes and trailers removed, used to sort and thread messages by
+    subject.
+
+    See Also:
+        `RFC 5256 2.1. <https://tools.ietf.org/html/rfc5256#section-2.1>`_
+
+    Args:
+        subject: The decoded ``Subject:`` header value.
+
+    """
+    return _extract_subject(subject)[0]
+
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _first_mailbox(headers: Optional[Sequence]) -> str:
+    for header in headers or []:
+        for address in header.addresses:
+            return address.username.translate(_casemap)
+    return ''
+
+
+def _first_msg_id(header: object) -> Optional[str]:
+    if header is not None:
+        match = _msg_id.search(str(header))
+        if match is not None:
+            return match.group()
+    return None
+
+
+class SortKeys(NamedTuple):
+    """The values of a message compared by the ``SORT`` and ``THREAD``
+    commands.
+
+    Args:
+        arrival: The internal date of the message, as a UTC timestamp.
+        date: The ``Date:`` header of the message, as a UTC timestamp,
+            falling back to the internal date.
+        size: The size of the message.
+        subject: The base subject of the message.
+        from_: The mailbox of the first ``From:`` address.
+        to: The mailbox of the first ``To:`` address.
+        cc: The mailbox of the first ``Cc:`` address.
+        is_reply: True if the subject indicated a reply or forward.
+        message_id: The ``Message-Id:`` header of the message.
+        references: The message IDs in the ``References:`` header, or the
+            ``In-Reply-To:`` header if there is none, oldest first.
+
+    """
+
+    arrival: float
+    date: float
+    size: int
+    subject: str
+    from_: str
+    to: str
+    cc: str
+    is_reply: bool
+    message_id: Optional[str]
+    references: Tuple[str, ...]
+
+    @classmethod
+    def build(cls, msg: MessageInterface, size: int = None) -> 'SortKeys':
+        """Extract the sort keys from a message, which must have at least
+        its headers loaded.
+
+        Args:
+            msg: The message object.
+            size: The size of the message, if its contents are not loaded.
+
+        """
+        envelope = msg.get_envelope_structure()
+        arrival = _timestamp(msg.internal_date)
+        sent = envelope.date.datetime if envelope.date is not None else None
+        date = _timestamp(sent) if sent is not None else arrival
+        if envelope.subject is not None:
+            subject, is_reply = _extract_subject(str(envelope.subject))
+        else:
+            subject, is_reply = '', False
+        references = tuple(_msg_id.findall(' '.join(
+            str(header) for header in msg.get_header(b'references'))))
+        if not references:
+            in_reply_to = _first_msg_id(envelope.in_reply_to)
+            if in_reply_to is not None:
+                references = (in_reply_to, )
+        if size is None:
+            size = msg.get_size()
+        return cls(arrival, date, size, subject,
+                   _first_mailbox(envelope.from_), _first_mailbox(envelope.to),
+                   _first_mailbox(envelope.cc), is_reply,
+                   _first_msg_id(envelope.message_id), references)
+
+
+class SortCache:
+    """Keeps the sort keys of the messages in a mailbox, by UID, so that
+    they are only extracted from each message once.
+
+    """
+
+    __slots__ = ['_uid_validity', '_keys']
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._uid_validity = 0
+        self._keys: Dict[int, SortKeys] = {}
+
+    def check(self, uid_validity: int) -> None:
+        """Discard the cache if it was built for a different UID validity
+        value, since its UIDs no longer refer to the same messages.
+
+        Args:
+            uid_validity: The current UID validity value of the mailbox.
+
+        """
+        if uid_validity != self._uid_validity:
+            self._uid_validity = uid_validity
+            self._keys = {}
+
+    def get(self, uid: int) -> SortKeys:
+        """Return the sort keys of the message.
+
+        Args:
+            uid: The message UID.
+
+        Raises:
+            KeyError: The message is not in the cache.
+
+        """
+        return self._keys[uid]
+
+    def missing(self, uids: Iterable[int]) -> Sequence[int]:
+        """Return the UIDs that are not in the cache.
+
+        Args:
+            uids: The message UIDs.
+
+        """
+        keys = self._keys
+        return [uid for uid in uids if uid not in keys]
+
+    def add(self, messages: Iterable[Tuple[int, SortKeys]]) -> None:
+        """Add messages to the cache.
+
+        Args:
+            messages: The UID and sort keys of each message.
+
+        """
+        self._keys.update(messages)
+
+    def remove(self, uids: Iterable[int]) -> None:
+        """Remove messages from the cache.
+
+        Args:
+            uids: The message UIDs.
+
+        """
+        keys = self._keys
+        for uid in uids:
+            keys.pop(uid, None)
+
+
+def sort_messages(messages: Sequence[Tuple[int, SortKeys]],
+                  criteria: Sequence[Tuple[bytes, bool]]) -> Sequence[int]:
+    """Return the message IDs ordered by the sort criteria. Messages that are
+    equal by every criteria keep their original order.
+
+    Args:
+        messages: The ID and sort keys of each message, in sequence order.
+        criteria: The sort key and whether it is reversed, most significant
+            first.
+
+    """
+    ordered = list(messages)
+    for key, reverse in reversed(criteria):
+        attr = _sort_attrs[key]
+        ordered.sort(key=lambda item: getattr(item[1], attr),
+                     reverse=reverse)
+    return [msg_id for msg_id, _ in ordered]
+
+
+def thread_messages(messages: Sequence[Tuple[int, SortKeys]],
+                    algorithm: bytes) -> Sequence[ThreadNode]:
+    """Return the threads of the messages, ordered by the date of their
+    first message.
+
+    Args:
+        messages: The ID and sort keys of each message, in sequence order.
+        algorithm: The threading algorithm, ``ORDEREDSUBJECT`` or
+            ``REFERENCES``.
+
+    Raises:
+        ValueError: The threading algorithm is not supported.
+
+    """
+    if algorithm == b'ORDEREDSUBJECT':
+        return _thread_ordered_subject(messages)
+    elif algorithm == b'REFERENCES':
+        return _thread_references(messages)
+    raise ValueError(algorithm)
+
+
+def _thread_ordered_subject(messages: Sequence[Tuple[int, SortKeys]]) \
+        -> Sequence[ThreadNode]:
+    threads: Dict[str, List[Tuple[int, SortKeys]]] = {}
+    for msg_id, keys in sorted(messages, key=lambda item: item[1].date):
+        threads.setdefault(keys.subject, []).append((msg_id, keys))
+    ordered = sorted(threads.values(), key=lambda thread: thread[0][1].date)
+    return [ThreadNode(thread[0][0], [ThreadNode(msg_id, [])
+                                      for msg_id, _ in thread[1:]])
+            for thread in ordered]
+
+
+class _Container:
+    # A node of the REFERENCES threading algorithm, which is a placeholder
+    # if the message is not among those being threaded.
+
+    __slots__ = ['msg', 'parent', 'children']
+
+    def __init__(self, msg: Tuple[int, SortKeys] = None) -> None:
+        super().__init__()
+        self.msg = msg
+        self.parent: Optional[_Container] = None
+        self.children: List[_Container] = []
+
+    def first(self) -> Tuple[int, SortKeys]:
+        container = self
+        while container.msg is None:
+            container = container.children[0]
+        return container.msg
+
+    def sort_key(self) -> Tuple[float, int]:
+        msg_id, keys = self.first()
+        return keys.date, msg_id
+
+    def has_descendant(self, other: Optional['_Container']) -> bool:
+        while other is not None:
+            if other is self:
+                return True
+            other = other.parent
+        return False
+
+    def unlink(self) -> None:
+        if self.parent is not None:
+            self.parent.children.remove(self)
+            self.parent = None
+
+    def link(self, child: '_Container') -> None:
+        child.unlink()
+        child.parent = self
+        self.children.append(child)
+
+
+def _prune(parent: Optional[_Container],
+           containers: Iterable[_Container]) -> List[_Container]:
+    # Placeholders are removed and their children promoted, unless that
+    # would promote several children to the root set.
+    pruned: List[_Container] = []
+    stack = list(containers)
+    stack.reverse()
+    while stack:
+        container = stack.pop()
+        if container.msg is None:
+            children = container.children
+            if not children:
+                continue
+            elif parent is not None or len(children) == 1:
+                stack.extend(reversed(children))
+                continue
+        container.parent = parent
+        pruned.append(container)
+    return pruned
+
+
+def _walk(roots: Iterable[_Container]) -> List[_Container]:
+    # Breadth-first, so that children are visited after their parents.
+    ret: List[_Container] = []
+    queue = deque(roots)
+    while queue:
+        container = queue.popleft()
+        ret.append(container)
+        queue.extend(container.children)
+    return ret
+
+
+def _sort_siblings(roots: List[_Container]) -> None:
+    for container in reversed(_walk(roots)):
+        container.children.sort(key=_Container.sort_key)
+    roots.sort(key=_Container.sort_key)
+
+
+def _thread_references(messages: Sequence[Tuple[int, SortKeys]]) \
+        -> Sequence[ThreadNode]:
+    by_id: Dict[str, _Container] = {}
+    containers: List[_Container] = []
+    for msg in messages:
+        keys = msg[1]
+        container = by_id.get(keys.message_id or '')
+        if container is not None and container.msg is None:
+            container.msg = msg
+        else:
+            # Messages without a unique ID are never referenced.
+            container = _Container(msg)
+            if keys.message_id:
+                by_id.setdefault(keys.message_id, container)
+            containers.append(container)
+        parent: Optional[_Container] = None
+        for ref in keys.references:
+            ref_container = by_id.get(ref)
+            if ref_container is None:
+                by_id[ref] = ref_container = _Container()
+                containers.append(ref_container)
+            if parent is not None and ref_container.parent is None \
+                    and not ref_container.has_descendant(parent):
+                parent.link(ref_container)
+            parent = ref_container
+        if parent is not None and not container.has_descendant(parent):
+            parent.link(container)
+        else:
+            container.unlink()
+    roots = _prune(None, (container for container in containers
+                          if container.parent is None))
+    queue = deque(roots)
+    while queue:
+        container = queue.popleft()
+        container.children = _prune(container, container.children)
+        queue.extend(container.children)
+    _sort_siblings(roots)
+    roots = _group_subjects(roots)
+    _sort_siblings(roots)
+    return _build_nodes(roots)
+
+
+def _group_subjects(roots: List[_Container]) -> List[_Container]:
+    subjects: Dict[str, _Container] = {}
+    for container in roots:
+        keys = container.first()[1]
+        if not keys.subject:
+            continue
+        current = subjects.get(keys.subject)
+        if current is None \
+                or (container.msg is None and current.msg is not None) \
+                or (current.msg is not None and current.msg[1].is_reply
+                    and container.msg is not None
+                    and not container.msg[1].is_reply):
+            subjects[keys.subject] = container
+    grouped: List[Optional[_Container]] = []
+    positions: Dict[int, int] = {}
+    for container in roots:
+        if container.parent is not None:
+            # Already made a child of an earlier message with its subject.
+            continue
+        keys = container.first()[1]
+        current = subjects.get(keys.subject) if keys.subject else None
+        if current is None or current is container:
+            positions[id(container)] = len(grouped)
+            grouped.append(container)
+        elif current.msg is None and container.msg is None:
+            for child in list(container.children):
+                current.link(child)
+        elif current.msg is None:
+            current.link(container)
+        elif container.msg is not None and container.msg[1].is_reply \
+                and not current.msg[1].is_reply:
+            current.link(container)
+        else:
+            dummy = _Container()
+            idx = positions.pop(id(current), None)
+            dummy.link(current)
+            dummy.link(container)
+            subjects[keys.subject] = dummy
+            positions[id(dummy)] = len(grouped) if idx is None else idx
+            if idx is None:
+                grouped.append(dummy)
+            else:
+                grouped[idx] = dummy
+    return [container for container in grouped if container is not None]
+
+
+def _build_nodes(roots: Sequence[_Container]) -> Sequence[ThreadNode]:
+    # Built from the deepest containers up, to avoid recursion on long
+    # chains of replies.
+    nodes: Dict[int, ThreadNode] = {}
+    for container in reversed(_walk(roots)):
+        msg_id = container.msg[0] if container.msg is not None else None
+        nodes[id(container)] = ThreadNode(
+            msg_id, [nodes.pop(id(child)) for child in container.children])
+    return [nodes[id(container)] for container in roots]
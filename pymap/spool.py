@@ -0,0 +1,124 @@
+"""Large literal strings received from clients, such as the message data of an
+``APPEND`` command, are written to a temporary file as they arrive rather than
+held in memory.
+
+"""
+
+import os
+import weakref
+from mmap import mmap, ACCESS_READ
+from tempfile import mkstemp
+from typing import cast, Optional
+
+from .bytes import WriteStream, Writeable
+
+__all__ = ['SpooledLiteral']
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SpooledLiteral(Writeable):
+    """A literal string that is written to a temporary file as it is received.
+    Once :meth:`.finish` is called, the data is memory-mapped so that it may
+    be parsed without reading it into memory. The temporary file is removed
+    when the object is garbage-collected, unless it is moved elsewhere with
+    :meth:`.claim`.
+
+    Args:
+        directory: The directory to create the temporary file in, defaulting
+            to :func:`~tempfile.gettempdir`.
+
+    """
+
+    __slots__ = ['_path', '_file', '_length', '_mmap', '_finalizer']
+
+    def __init__(self, directory: str = None) -> None:
+        super().__init__()
+        fd, path = mkstemp(prefix='pymap-', suffix='.spool', dir=directory)
+        self._path = path
+        self._file = open(fd, 'r+b')
+        self._length = 0
+        self._mmap: Optional[mmap] = None
+        self._finalizer = weakref.finalize(self, _remove, path)
+
+    @property
+    def path(self) -> Optional[str]:
+        """The path to the temporary file, or ``None`` if it has been moved
+        with :meth:`.claim`.
+
+        """
+        return self._path if self._finalizer.alive else None
+
+    @property
+    def data(self) -> bytes:
+        """The memory-mapped literal data. This object supports the buffer
+        protocol and the read-only methods of :class:`bytes`.
+
+        Raises:
+            ValueError: :meth:`.finish` has not been called.
+
+        """
+        if not self._file.closed:
+            raise ValueError('Spooled literal is not finished.')
+        elif self._mmap is None:
+            return b''
+        return cast(bytes, self._mmap)
+
+    def append(self, data: bytes) -> None:
+        """Append data received from the client to the temporary file.
+
+        Args:
+            data: The received data.
+
+        """
+        self._file.write(data)
+        self._length += len(data)
+
+    def finish(self) -> None:
+        """Called when all the literal data has been received, to flush the
+        temporary file and memory-map its contents.
+
+        """
+        self._file.flush()
+        if self._length > 0:
+            self._mmap = mmap(self._file.fileno(), 0, access=ACCESS_READ)
+        self._file.close()
+
+    def claim(self, dest: str) -> bool:
+        """Move the temporary file to a new location with :func:`os.rename`,
+        so that it is no longer removed when the object is garbage-collected.
+        The memory-mapped data remains valid.
+
+        Args:
+            dest: The new path for the file.
+
+        Returns:
+            True if the file was moved, False if it could not be, e.g. because
+            *dest* is on another filesystem.
+
+        """
+        if not self._finalizer.alive:
+            return False
+        try:
+            os.rename(self._path, dest)
+        except OSError:
+            return False
+        self._finalizer.detach()
+        return True
+
+    def write(self, writer: WriteStream) -> None:
+        writer.write(memoryview(self.data))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bytes__(self) -> bytes:
+        return bytes(self.data)
+
+    def __repr__(self) -> str:
+        return f'<SpooledLiteral length={self._length}>'
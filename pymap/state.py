@@ -1,15 +1,21 @@
 
+import asyncio
 from collections import OrderedDict
 from socket import getfqdn
-from typing import Optional, Dict, List, Callable, Union, Tuple, Awaitable, \
-    Iterable
+from typing import Optional, Dict, List, Set, Callable, Union, Tuple, \
+    Awaitable, Iterable, Mapping, Sequence, AsyncIterable, AsyncIterator, \
+    FrozenSet
 
 from pysasl import AuthenticationCredentials
 
-from .bytes import MaybeBytes
+from .bytes import MaybeBytes, BytesFormat
 from .concurrent import Event
 from .config import IMAPConfig
+from .context import current_command
 from .exceptions import CommandNotAllowed, CloseConnection
+from .flags import FlagOp, SessionFlags
+from .interfaces.mailbox import MailboxInterface
+from .interfaces.message import AppendMessage, MessageInterface
 from .interfaces.session import SessionInterface, LoginProtocol
 from .parsing.command import CommandAuth, CommandNonAuth, CommandSelect, \
     Command
@@ -17,22 +23,27 @@ from .parsing.command.any import CapabilityCommand, LogoutCommand, \
     NoOpCommand
 from .parsing.command.nonauth import AuthenticateCommand, LoginCommand, \
     StartTLSCommand
-from .parsing.command.auth import AppendCommand, CreateCommand, \
-    DeleteCommand, ListCommand, RenameCommand, SelectCommand, StatusCommand, \
-    SubscribeCommand, UnsubscribeCommand
+from .parsing.command.auth import AppendCommand, CompressCommand, \
+    CreateCommand, DeleteCommand, EnableCommand, ListCommand, RenameCommand, \
+    SelectCommand, StatusCommand, SubscribeCommand, UnsubscribeCommand
 from .parsing.command.select import CheckCommand, CloseCommand, IdleCommand, \
-    ExpungeCommand, CopyCommand, FetchCommand, StoreCommand, SearchCommand
+    ExpungeCommand, CopyCommand, MoveCommand, FetchCommand, StoreCommand, \
+    SearchCommand, SortCommand, ThreadCommand
 from .parsing.commands import InvalidCommand
 from .parsing.primitives import ListP, Number, LiteralString, Nil
 from .parsing.response import Response, ResponseOk, ResponseNo, ResponseBad, \
         ResponseCode, ResponsePreAuth
 from .parsing.response.code import Capability, PermanentFlags, UidNext, \
-    UidValidity, Unseen
+    UidValidity, Unseen, HighestModSeq, Modified, AppendUid, CopyUid
 from .parsing.response.specials import FlagsResponse, ExistsResponse, \
     RecentResponse, FetchResponse, ListResponse, LSubResponse, \
-    SearchResponse, StatusResponse
-from .parsing.specials import DateTime, FetchAttribute, StatusAttribute
+    SearchResponse, ESearchResponse, SortResponse, ThreadResponse, \
+    StatusResponse, VanishedResponse
+from .parsing.specials import DateTime, FetchAttribute, StatusAttribute, \
+    SearchKey, SequenceSet, Flag
 from .selected import SelectedMailbox
+from .sort import SortKeys, sort_messages, thread_messages
+from .stats import Stats
 
 __all__ = ['ConnectionState']
 
@@ -42,6 +53,9 @@ _CommandFunc = Callable[[Command],
 
 fqdn = getfqdn().encode('ascii')
 
+_flags_attr = FetchAttribute(b'FLAGS')
+_modseq_attr = FetchAttribute(b'MODSEQ')
+
 
 class ConnectionState:
     """Defines the state flow of the IMAP connection. Determines if a command
@@ -59,6 +73,9 @@ class ConnectionState:
         self._session: Optional[SessionInterface] = None
         self._selected: Optional[SelectedMailbox] = None
         self._capability = list(config.initial_capability)
+        self._compressed = False
+        self._condstore = False
+        self._qresync = False
 
     @property
     def session(self) -> SessionInterface:
@@ -72,6 +89,12 @@ class ConnectionState:
             raise RuntimeError()  # State checking should prevent this.
         return self._selected
 
+    def _count_calls(self, session: SessionInterface) -> SessionInterface:
+        return _CountingSession(session, self.config.stats)
+
+    def _count_messages(self, cmd: Command, count: int) -> None:
+        self.config.stats.command(cmd.command).messages += count
+
     @property
     def capability(self) -> Capability:
         if self._session:
@@ -84,7 +107,8 @@ class ConnectionState:
     async def do_greeting(self) -> Response:
         preauth_creds = self.config.preauth_credentials
         if preauth_creds:
-            self._session = await self.login(preauth_creds, self.config)
+            self._session = self._count_calls(
+                await self.login(preauth_creds, self.config))
         resp_cls = ResponsePreAuth if preauth_creds else ResponseOk
         return resp_cls(b'*', b'Server ready ' + fqdn, self.capability)
 
@@ -92,7 +116,8 @@ class ConnectionState:
                               creds: Optional[AuthenticationCredentials]):
         if not creds:
             return ResponseNo(cmd.tag, b'Invalid authentication mechanism.')
-        self._session = await self.login(creds, self.config)
+        self._session = self._count_calls(
+            await self.login(creds, self.config))
         self._capability.extend(self.config.login_capability)
         return ResponseOk(cmd.tag, b'Authentication successful.',
                           self.capability), None
@@ -119,6 +144,20 @@ class ConnectionState:
         self.auth = self.config.starttls_auth
         return ResponseOk(cmd.tag, b'Ready to handshake.'), None
 
+    async def do_compress(self, cmd: CompressCommand):
+        if cmd.algorithm != b'DEFLATE':
+            return ResponseBad(cmd.tag, b'Unknown compression algorithm.'), \
+                None
+        elif self._compressed:
+            return ResponseNo(cmd.tag, b'Compression already active.',
+                              ResponseCode.of(b'COMPRESSIONACTIVE')), None
+        try:
+            self._capability.remove(b'COMPRESS=DEFLATE')
+        except ValueError:
+            raise CommandNotAllowed(b'COMPRESS is disabled.')
+        self._compressed = True
+        return ResponseOk(cmd.tag, b'DEFLATE active.'), None
+
     async def do_capability(self, cmd: CapabilityCommand):
         response = ResponseOk(cmd.tag, b'Capabilities listed.')
         response.add_untagged(Response(b'*', self.capability.string))
@@ -130,19 +169,65 @@ class ConnectionState:
             updates = await self.session.check_mailbox(self.selected)
         return ResponseOk(cmd.tag, cmd.command + b' completed.'), updates
 
+    def _enable_condstore(self) -> None:
+        self._condstore = True
+        if self._selected is not None:
+            self._selected.condstore = True
+
+    def _enable_qresync(self) -> None:
+        self._enable_condstore()
+        self._qresync = True
+        if self._selected is not None:
+            self._selected.qresync = True
+
+    async def do_enable(self, cmd: EnableCommand):
+        enabled: List[bytes] = []
+        for capability in cmd.capabilities:
+            if capability not in self.capability:
+                continue
+            elif capability == b'CONDSTORE' and not self._condstore:
+                self._enable_condstore()
+                enabled.append(capability)
+            elif capability == b'QRESYNC' and not self._qresync:
+                self._enable_qresync()
+                enabled.append(capability)
+        resp = ResponseOk(cmd.tag, cmd.command + b' completed.')
+        resp.add_untagged(Response(
+            b'*', BytesFormat(b' ').join([b'ENABLED'], enabled)))
+        return resp, None
+
     async def do_select(self, cmd: SelectCommand):
+        qresync = cmd.qresync
+        if qresync is not None and not self._qresync:
+            return ResponseBad(cmd.tag, b'QRESYNC must be enabled.'), None
+        elif cmd.condstore:
+            self._enable_condstore()
+        was_selected = self._selected is not None
         self._selected = None
         mailbox, updates = await self.session.select_mailbox(
             cmd.mailbox, cmd.readonly)
+        updates.condstore = self._condstore
+        updates.qresync = self._qresync
+        vanished: Sequence[int] = []
+        if qresync is not None \
+                and qresync.uid_validity == updates.uid_validity:
+            known_uids = qresync.known_uids or SequenceSet.all(uid=True)
+            vanished, updates = await self.session.find_vanished(
+                updates, qresync.mod_sequence, known_uids)
         if updates.readonly:
             num_recent = mailbox.recent
             resp = ResponseOk(cmd.tag, b'Selected mailbox.',
                               ResponseCode.of(b'READ-ONLY'))
-            resp.add_untagged_ok(b'Read-only mailbox.', PermanentFlags([]))
         else:
             num_recent = updates.session_flags.recent
             resp = ResponseOk(cmd.tag, b'Selected mailbox.',
                               ResponseCode.of(b'READ-WRITE'))
+        if was_selected and self._qresync:
+            resp.add_untagged_ok(b'Previous mailbox closed.',
+                                 ResponseCode.of(b'CLOSED'))
+        if updates.readonly:
+            resp.add_untagged_ok(b'Read-only mailbox.', PermanentFlags([]))
+        else:
             resp.add_untagged_ok(b'Flags permitted.',
                                  PermanentFlags(mailbox.permanent_flags))
         messages = updates.messages
@@ -153,11 +238,39 @@ class ConnectionState:
                              UidNext(mailbox.next_uid))
         resp.add_untagged_ok(b'UIDs valid.',
                              UidValidity(updates.uid_validity))
+        if mailbox.highest_mod_sequence is not None:
+            resp.add_untagged_ok(b'Highest mailbox mod-sequence.',
+                                 HighestModSeq(mailbox.highest_mod_sequence))
+        else:
+            resp.add_untagged_ok(b'Mod-sequences not supported.',
+                                 ResponseCode.of(b'NOMODSEQ'))
         if mailbox.first_unseen:
             resp.add_untagged_ok(b'First unseen message.',
                                  Unseen(mailbox.first_unseen))
+        if qresync is not None \
+                and qresync.uid_validity == updates.uid_validity:
+            if vanished:
+                resp.add_untagged(VanishedResponse(
+                    SequenceSet.build(vanished, True), True))
+            known_uids = qresync.known_uids or SequenceSet.all(uid=True)
+            resp.add_untagged(*self._changed_responses(
+                updates, known_uids, qresync.mod_sequence))
         return resp, updates
 
+    @classmethod
+    def _changed_responses(cls, selected: SelectedMailbox,
+                           seq_set: SequenceSet, mod_sequence: int) \
+            -> Iterable[FetchResponse]:
+        session_flags = selected.session_flags
+        for msg_seq, msg in selected.messages.get_all(seq_set):
+            msg_mod_seq = msg.mod_sequence or 0
+            if msg_mod_seq > mod_sequence:
+                flags = msg.get_flags(session_flags)
+                yield FetchResponse(msg_seq, {
+                    FetchAttribute(b'UID'): Number(msg.uid),
+                    FetchAttribute(b'FLAGS'): ListP(flags, sort=True),
+                    FetchAttribute(b'MODSEQ'): ListP([Number(msg_mod_seq)])})
+
     async def do_create(self, cmd: CreateCommand):
         if cmd.mailbox == 'INBOX':
             return ResponseNo(cmd.tag, b'Cannot create INBOX.'), None
@@ -179,15 +292,15 @@ class ConnectionState:
             cmd.from_mailbox, cmd.to_mailbox, selected=self._selected)
         return ResponseOk(cmd.tag, cmd.command + b' completed.'), updates
 
-    async def do_status(self, cmd: StatusCommand):
-        mailbox, updates = await self.session.get_mailbox(
-            cmd.mailbox, selected=self._selected)
+    def _status(self, name: str, mailbox: MailboxInterface,
+                status_list: Sequence[StatusAttribute],
+                updates: Optional[SelectedMailbox]) -> StatusResponse:
         data: Dict[StatusAttribute, Number] = OrderedDict()
-        for attr in cmd.status_list:
+        for attr in status_list:
             if attr == b'MESSAGES':
                 data[attr] = Number(mailbox.exists)
             elif attr == b'RECENT':
-                if updates and updates.name == cmd.mailbox:
+                if updates and updates.name == name:
                     data[attr] = Number(updates.session_flags.recent)
                 else:
                     data[attr] = Number(mailbox.recent)
@@ -197,8 +310,17 @@ class ConnectionState:
                 data[attr] = Number(mailbox.next_uid)
             elif attr == b'UIDVALIDITY':
                 data[attr] = Number(mailbox.uid_validity)
+            elif attr == b'HIGHESTMODSEQ':
+                self._enable_condstore()
+                data[attr] = Number(mailbox.highest_mod_sequence or 0)
+        return StatusResponse(name, data)
+
+    async def do_status(self, cmd: StatusCommand):
+        mailbox, updates = await self.session.get_mailbox(
+            cmd.mailbox, selected=self._selected)
         resp = ResponseOk(cmd.tag, cmd.command + b' completed.')
-        resp.add_untagged(StatusResponse(cmd.mailbox, data))
+        resp.add_untagged(self._status(cmd.mailbox, mailbox, cmd.status_list,
+                                       updates))
         return resp, updates
 
     async def do_append(self, cmd: AppendCommand):
@@ -208,6 +330,7 @@ class ConnectionState:
         append_uid, updates = await self.session.append_messages(
             cmd.mailbox, cmd.messages, selected=self._selected)
         resp = ResponseOk(cmd.tag, cmd.command + b' completed.', append_uid)
+        self._count_messages(cmd, len(cmd.messages))
         return resp, updates
 
     async def do_subscribe(self, cmd: SubscribeCommand):
@@ -221,13 +344,26 @@ class ConnectionState:
         return ResponseOk(cmd.tag, cmd.command + b' completed.'), updates
 
     async def do_list(self, cmd: ListCommand):
+        status_list = cmd.status_list
         mailboxes, updates = await self.session.list_mailboxes(
             cmd.ref_name, cmd.filter, subscribed=cmd.only_subscribed,
-            selected=self._selected)
+            selected=None if status_list else self._selected)
+        mailboxes = list(mailboxes)
+        statuses: Mapping[str, MailboxInterface] = {}
+        if status_list:
+            names = [name for name, _, attrs in mailboxes
+                     if b'Noselect' not in attrs
+                     and b'NonExistent' not in attrs]
+            statuses, updates = await self.session.get_mailboxes(
+                names, selected=self._selected)
         resp = ResponseOk(cmd.tag, cmd.command + b' completed.')
         resp_type = LSubResponse if cmd.only_subscribed else ListResponse
         for name, sep, attrs in mailboxes:
             resp.add_untagged(resp_type(name, sep, attrs))
+            mailbox = statuses.get(name)
+            if mailbox is not None:
+                resp.add_untagged(self._status(name, mailbox, status_list,
+                                               updates))
         return resp, updates
 
     async def do_check(self, cmd: CheckCommand):
@@ -241,25 +377,78 @@ class ConnectionState:
         return ResponseOk(cmd.tag, cmd.command + b' completed.'), None
 
     async def do_expunge(self, cmd: ExpungeCommand):
+        uid_set = cmd.uid_set
+        if uid_set is not None:
+            uid_set = self.selected.resolve_saved(uid_set)
         updates = await self.session.expunge_mailbox(
-            self.selected, cmd.uid_set)
+            self.selected, uid_set)
         resp = ResponseOk(cmd.tag, cmd.command + b' completed.')
         return resp, updates
 
     async def do_copy(self, cmd: CopyCommand):
+        seq_set = self.selected.resolve_saved(cmd.sequence_set)
         copy_uid, updates = await self.session.copy_messages(
-            self.selected, cmd.sequence_set, cmd.mailbox)
+            self.selected, seq_set, cmd.mailbox)
         resp = ResponseOk(cmd.tag, cmd.command + b' completed.', copy_uid)
+        if copy_uid is not None:
+            self._count_messages(cmd, len(copy_uid.uids))
+        return resp, updates
+
+    async def do_move(self, cmd: MoveCommand):
+        seq_set = self.selected.resolve_saved(cmd.sequence_set)
+        copy_uid, updates = await self.session.move_messages(
+            self.selected, seq_set, cmd.mailbox)
+        resp = ResponseOk(cmd.tag, cmd.command + b' completed.')
+        if copy_uid is not None:
+            resp.add_untagged_ok(b'Moved.', copy_uid)
+            self._count_messages(cmd, len(copy_uid.uids))
         return resp, updates
 
     async def do_fetch(self, cmd: FetchCommand):
+        if cmd.vanished and not self._qresync:
+            return ResponseBad(cmd.tag, b'QRESYNC must be enabled.'), None
+        elif cmd.changed_since is not None \
+                or any(attr.value == b'MODSEQ' for attr in cmd.attributes):
+            self._enable_condstore()
         if not cmd.uid:
             self.selected.hide_expunged = True
-        messages, updates = await self.session.fetch_messages(
-            self.selected, cmd.sequence_set, frozenset(cmd.attributes))
+        seq_set = self.selected.resolve_saved(cmd.sequence_set)
         resp = ResponseOk(cmd.tag, cmd.command + b' completed.')
-        session_flags = self.selected.session_flags
-        for msg_seq, msg in messages:
+        if cmd.changed_since is None:
+            messages, updates = await self.session.fetch_messages(
+                self.selected, seq_set, frozenset(cmd.attributes))
+            resp.add_untagged_stream(self._fetch_responses(
+                cmd, resp, messages, self.selected.session_flags))
+            return resp, updates
+        changed_since = cmd.changed_since
+        changed = [msg.uid for _, msg in
+                   self.selected.messages.get_all(seq_set)
+                   if (msg.mod_sequence or 0) > changed_since]
+        # The changed messages are found before the mailbox is updated, so
+        # that their sequence numbers match what the client has been sent.
+        if changed:
+            messages, updates = await self.session.fetch_messages(
+                self.selected, SequenceSet.build(changed, True),
+                frozenset(cmd.attributes))
+            resp.add_untagged_stream(self._fetch_responses(
+                cmd, resp, messages, self.selected.session_flags))
+        if cmd.vanished:
+            vanished, updates = await self.session.find_vanished(
+                self.selected, changed_since, seq_set)
+            if vanished:
+                resp.add_untagged(VanishedResponse(
+                    SequenceSet.build(vanished, True), True))
+        elif not changed:
+            updates = await self.session.check_mailbox(self.selected)
+        return resp, updates
+
+    async def _fetch_responses(
+            self, cmd: FetchCommand, resp: Response,
+            messages: AsyncIterable[Tuple[int, MessageInterface]],
+            session_flags: SessionFlags) -> AsyncIterator[FetchResponse]:
+        cmd_stats = self.config.stats.command(cmd.command)
+        async for msg_seq, msg in messages:
+            cmd_stats.messages += 1
             if msg.expunged:
                 resp.code = ResponseCode.of(b'EXPUNGEISSUED')
             fetch_data: Dict[FetchAttribute, MaybeBytes] = OrderedDict()
@@ -269,6 +458,8 @@ class ConnectionState:
                 elif attr.value == b'FLAGS':
                     flags = msg.get_flags(session_flags)
                     fetch_data[attr] = ListP(flags, sort=True)
+                elif attr.value == b'MODSEQ':
+                    fetch_data[attr] = ListP([Number(msg.mod_sequence or 0)])
                 elif attr.value == b'INTERNALDATE':
                     if msg.internal_date:
                         fetch_data[attr] = DateTime(msg.internal_date)
@@ -313,46 +504,159 @@ class ConnectionState:
                 elif attr.value == b'BINARY.SIZE':
                     parts = attr.section.parts if attr.section else None
                     fetch_data[attr] = Number(msg.get_size(parts, True))
-            resp.add_untagged(FetchResponse(msg_seq, fetch_data))
-        return resp, updates
+            if self._condstore and _flags_attr in fetch_data:
+                fetch_data.setdefault(
+                    _modseq_attr, ListP([Number(msg.mod_sequence or 0)]))
+            yield FetchResponse(msg_seq, fetch_data)
 
     async def do_search(self, cmd: SearchCommand):
         if not cmd.uid:
             self.selected.hide_expunged = True
+        with_mod_seq = self._has_mod_sequence(cmd.keys)
+        if with_mod_seq:
+            self._enable_condstore()
+        if cmd.save:
+            # A failed search leaves the saved result empty.
+            self.selected.saved_result = SequenceSet.build([], True)
         messages, updates = await self.session.search_mailbox(
             self.selected, cmd.keys)
         resp = ResponseOk(cmd.tag, cmd.command + b' completed.')
+        returns = cmd.returns
+        extended = bool(returns) or cmd.save
+        # Only the aggregates asked for are kept, so that only a RETURN (ALL)
+        # or SAVE needs the full list of matching messages.
+        keep_ids = not extended or b'ALL' in returns
+        save_all = cmd.save and not (returns and returns <= {b'MIN', b'MAX'})
         msg_ids: List[int] = []
+        save_uids: List[int] = []
+        count = 0
+        min_msg: Optional[Tuple[int, int]] = None
+        max_msg: Optional[Tuple[int, int]] = None
+        max_mod_seq: Optional[int] = None
         for msg_seq, msg in messages:
             if msg.expunged:
                 resp.code = ResponseCode.of(b'EXPUNGEISSUED')
-            if cmd.uid:
-                msg_ids.append(msg.uid)
-            else:
-                msg_ids.append(msg_seq)
-        resp.add_untagged(SearchResponse(msg_ids))
+            msg_id = msg.uid if cmd.uid else msg_seq
+            count += 1
+            if keep_ids:
+                msg_ids.append(msg_id)
+            if save_all:
+                save_uids.append(msg.uid)
+            if min_msg is None or msg_id < min_msg[0]:
+                min_msg = (msg_id, msg.uid)
+            if max_msg is None or msg_id > max_msg[0]:
+                max_msg = (msg_id, msg.uid)
+            if with_mod_seq:
+                max_mod_seq = max(max_mod_seq or 0, msg.mod_sequence or 0)
+        if not extended:
+            resp.add_untagged(SearchResponse(msg_ids, max_mod_seq))
+        elif returns:
+            data: Dict[bytes, MaybeBytes] = {}
+            if b'MIN' in returns and min_msg is not None:
+                data[b'MIN'] = Number(min_msg[0])
+            if b'MAX' in returns and max_msg is not None:
+                data[b'MAX'] = Number(max_msg[0])
+            if b'COUNT' in returns:
+                data[b'COUNT'] = Number(count)
+            if b'ALL' in returns and msg_ids:
+                data[b'ALL'] = SequenceSet.build(msg_ids, cmd.uid)
+            if max_mod_seq is not None and count:
+                data[b'MODSEQ'] = Number(max_mod_seq)
+            resp.add_untagged(ESearchResponse(cmd.tag, cmd.uid, data))
+        if cmd.save:
+            if not save_all:
+                if b'MIN' in returns and min_msg is not None:
+                    save_uids.append(min_msg[1])
+                if b'MAX' in returns and max_msg is not None:
+                    save_uids.append(max_msg[1])
+            updates.saved_result = SequenceSet.build(save_uids, True)
+        self._count_messages(cmd, count)
+        return resp, updates
+
+    @classmethod
+    def _has_mod_sequence(cls, keys: Iterable[SearchKey]) -> bool:
+        for key in keys:
+            if key.value == b'MODSEQ':
+                return True
+            elif key.value == b'KEYSET':
+                if cls._has_mod_sequence(key.filter_key_set):
+                    return True
+            elif key.value == b'OR':
+                if cls._has_mod_sequence(key.filter_key_or):
+                    return True
+        return False
+
+    async def _sort(self, cmd: Union[SortCommand, ThreadCommand],
+                    resp: ResponseOk) \
+            -> Tuple[Sequence[Tuple[int, SortKeys]], SelectedMailbox]:
+        if not cmd.uid:
+            self.selected.hide_expunged = True
+        messages, updates = await self.session.sort_mailbox(
+            self.selected, cmd.keys)
+        sort_keys: List[Tuple[int, SortKeys]] = []
+        for msg_seq, msg, keys in messages:
+            if msg.expunged:
+                resp.code = ResponseCode.of(b'EXPUNGEISSUED')
+            msg_id = msg.uid if cmd.uid else msg_seq
+            sort_keys.append((msg_id, keys))
+        self._count_messages(cmd, len(sort_keys))
+        return sort_keys, updates
+
+    async def do_sort(self, cmd: SortCommand):
+        resp = ResponseOk(cmd.tag, cmd.command + b' completed.')
+        sort_keys, updates = await self._sort(cmd, resp)
+        msg_ids = sort_messages(sort_keys, cmd.criteria)
+        resp.add_untagged(SortResponse(msg_ids))
+        return resp, updates
+
+    async def do_thread(self, cmd: ThreadCommand):
+        resp = ResponseOk(cmd.tag, cmd.command + b' completed.')
+        sort_keys, updates = await self._sort(cmd, resp)
+        threads = thread_messages(sort_keys, cmd.algorithm)
+        resp.add_untagged(ThreadResponse(threads))
         return resp, updates
 
     async def do_store(self, cmd: StoreCommand):
+        unchanged_since = cmd.unchanged_since
+        if unchanged_since is not None:
+            self._enable_condstore()
         if not cmd.uid:
             self.selected.hide_expunged = True
+        seq_set = self.selected.resolve_saved(cmd.sequence_set)
         if cmd.silent:
-            self.selected.silence(cmd.sequence_set, cmd.flag_set, cmd.mode)
+            self.selected.silence(seq_set, cmd.flag_set, cmd.mode)
+        requested: Dict[int, int] = {}
+        if unchanged_since is not None:
+            requested = {msg.uid: msg_seq for msg_seq, msg
+                         in self.selected.messages.get_all(seq_set)}
         messages, updates = await self.session.update_flags(
-            self.selected, cmd.sequence_set, cmd.flag_set, cmd.mode)
+            self.selected, seq_set, cmd.flag_set, cmd.mode,
+            unchanged_since=unchanged_since)
         resp = ResponseOk(cmd.tag, cmd.command + b' completed.')
         session_flags = self.selected.session_flags
+        condstore = self.selected.condstore
+        num_messages = 0
         for msg_seq, msg in messages:
+            num_messages += 1
+            requested.pop(msg.uid, None)
             if msg.expunged:
                 resp.code = ResponseCode.of(b'EXPUNGEISSUED')
-            elif cmd.silent:
+            elif cmd.silent and not condstore:
                 continue
-            flags = msg.get_flags(session_flags)
-            fetch_data: Dict[FetchAttribute, MaybeBytes] = \
-                {FetchAttribute(b'FLAGS'): ListP(flags, sort=True)}
+            fetch_data: Dict[FetchAttribute, MaybeBytes] = OrderedDict()
+            if not cmd.silent:
+                flags = msg.get_flags(session_flags)
+                fetch_data[FetchAttribute(b'FLAGS')] = ListP(flags, sort=True)
             if cmd.uid:
                 fetch_data[FetchAttribute(b'UID')] = Number(msg.uid)
+            if condstore:
+                fetch_data[FetchAttribute(b'MODSEQ')] = \
+                    ListP([Number(msg.mod_sequence or 0)])
             resp.add_untagged(FetchResponse(msg_seq, fetch_data))
+        if requested:
+            modified = requested.keys() if cmd.uid else requested.values()
+            resp.code = Modified(modified)
+        self._count_messages(cmd, num_messages)
         return resp, updates
 
     async def do_idle(self, cmd: IdleCommand):
@@ -390,7 +694,7 @@ class ConnectionState:
         cmd_str = str(cmd_type.command, 'ascii').lower()
         return 'do_' + cmd_str
 
-    async def do_command(self, cmd: Command):
+    async def do_command(self, cmd: Command, *, fork: bool = True):
         if isinstance(cmd, InvalidCommand):
             return self._get_bad_response(cmd)
         elif self._session and isinstance(cmd, CommandNonAuth):
@@ -408,7 +712,231 @@ class ConnectionState:
         except AttributeError:
             return ResponseNo(cmd.tag, cmd.command + b': Not Implemented')
         response, selected = await func(cmd)
-        if selected:
+        if selected and fork:
             self._selected, untagged = selected.fork(cmd)
             response.add_untagged(*untagged)
         return response
+
+    def can_pipeline(self, cmds: Sequence[Command]) -> bool:
+        """Return True if the commands may be executed concurrently by
+        :meth:`.do_pipeline`, because none of them could affect the results
+        of the others.
+
+        See Also:
+            `RFC 3501 5.5.
+            <https://tools.ietf.org/html/rfc3501#section-5.5>`_
+
+        Args:
+            cmds: The commands, in the order they were received.
+
+        """
+        selected = self._selected
+        seen_uids: Set[int] = set()
+        reads_flags = False
+        for cmd in cmds:
+            if isinstance(cmd, CapabilityCommand):
+                continue
+            elif isinstance(cmd, ListCommand):
+                if selected is not None and cmd.status_list:
+                    reads_flags = True
+            elif isinstance(cmd, StatusCommand):
+                if selected is not None and cmd.mailbox == selected.name:
+                    reads_flags = True
+            elif selected is None:
+                return False
+            elif isinstance(cmd, SearchCommand):
+                if cmd.save:
+                    return False
+                reads_flags = True
+            elif isinstance(cmd, (SortCommand, ThreadCommand)):
+                reads_flags = True
+            elif isinstance(cmd, FetchCommand):
+                if not selected.readonly and \
+                        any(attr.set_seen for attr in cmd.attributes):
+                    seq_set = selected.resolve_saved(cmd.sequence_set)
+                    uids = {msg.uid for _, msg in
+                            selected.messages.get_all(seq_set)}
+                    if not seen_uids.isdisjoint(uids):
+                        return False
+                    seen_uids.update(uids)
+                elif any(attr.value == b'FLAGS' for attr in cmd.attributes):
+                    reads_flags = True
+            else:
+                return False
+            if reads_flags and seen_uids:
+                return False
+        return True
+
+    async def _do_pipelined(self, cmd: Command) -> Response:
+        # Each gathered command runs in a task with its own context.
+        current_command.set(cmd)
+        return await self.do_command(cmd, fork=False)
+
+    async def do_pipeline(self, cmds: Sequence[Command]) \
+            -> Sequence[Union[Response, BaseException]]:
+        """Concurrently execute commands that were checked with
+        :meth:`.can_pipeline`. Any untagged responses with updates to the
+        selected mailbox are added to the last successful response. Exceptions
+        raised by a command are returned in place of its response.
+
+        Args:
+            cmds: The commands, in the order they were received.
+
+        """
+        if self._selected is not None:
+            self._selected.hide_expunged = True
+        results = await asyncio.gather(
+            *(self._do_pipelined(cmd) for cmd in cmds),
+            return_exceptions=True)
+        responses = [(cmd, result) for cmd, result in zip(cmds, results)
+                     if isinstance(result, Response)]
+        if self._selected is not None and responses:
+            last_cmd, last_response = responses[-1]
+            self._selected, untagged = self._selected.fork(last_cmd)
+            last_response.add_untagged(*untagged)
+        return results
+
+
+class _CountingSession(SessionInterface):
+    # Counts each call to the backend session in the metrics of the command
+    # that made it.
+
+    __slots__ = ['_session', '_stats']
+
+    def __init__(self, session: SessionInterface, stats: Stats) -> None:
+        super().__init__()
+        self._session = session
+        self._stats = stats
+
+    def _count(self, method: str) -> None:
+        cmd = current_command.get(None)
+        if cmd is not None:
+            self._stats.command(cmd.command).backend_calls[method] += 1
+
+    async def list_mailboxes(self, ref_name: str, filter_: str,
+                             subscribed: bool = False,
+                             selected: SelectedMailbox = None) \
+            -> Tuple[Iterable[Tuple[str, Optional[str], Sequence[bytes]]],
+                     Optional[SelectedMailbox]]:
+        self._count('list_mailboxes')
+        return await self._session.list_mailboxes(
+            ref_name, filter_, subscribed, selected)
+
+    async def get_mailbox(self, name: str, selected: SelectedMailbox = None) \
+            -> Tuple[MailboxInterface, Optional[SelectedMailbox]]:
+        self._count('get_mailbox')
+        return await self._session.get_mailbox(name, selected)
+
+    async def get_mailboxes(self, names: Sequence[str],
+                            selected: SelectedMailbox = None) \
+            -> Tuple[Mapping[str, MailboxInterface],
+                     Optional[SelectedMailbox]]:
+        self._count('get_mailboxes')
+        return await self._session.get_mailboxes(names, selected)
+
+    async def create_mailbox(self, name: str,
+                             selected: SelectedMailbox = None) \
+            -> Optional[SelectedMailbox]:
+        self._count('create_mailbox')
+        return await self._session.create_mailbox(name, selected)
+
+    async def delete_mailbox(self, name: str,
+                             selected: SelectedMailbox = None) \
+            -> Optional[SelectedMailbox]:
+        self._count('delete_mailbox')
+        return await self._session.delete_mailbox(name, selected)
+
+    async def rename_mailbox(self, before_name: str, after_name: str,
+                             selected: SelectedMailbox = None) \
+            -> Optional[SelectedMailbox]:
+        self._count('rename_mailbox')
+        return await self._session.rename_mailbox(
+            before_name, after_name, selected)
+
+    async def subscribe(self, name: str, selected: SelectedMailbox = None) \
+            -> Optional[SelectedMailbox]:
+        self._count('subscribe')
+        return await self._session.subscribe(name, selected)
+
+    async def unsubscribe(self, name: str, selected: SelectedMailbox = None) \
+            -> Optional[SelectedMailbox]:
+        self._count('unsubscribe')
+        return await self._session.unsubscribe(name, selected)
+
+    async def append_messages(self, name: str,
+                              messages: Sequence[AppendMessage],
+                              selected: SelectedMailbox = None) \
+            -> Tuple[AppendUid, Optional[SelectedMailbox]]:
+        self._count('append_messages')
+        return await self._session.append_messages(name, messages, selected)
+
+    async def select_mailbox(self, name: str, readonly: bool = False) \
+            -> Tuple[MailboxInterface, SelectedMailbox]:
+        self._count('select_mailbox')
+        return await self._session.select_mailbox(name, readonly)
+
+    async def check_mailbox(self, selected: SelectedMailbox, *,
+                            wait_on: Event = None,
+                            housekeeping: bool = False) -> SelectedMailbox:
+        self._count('check_mailbox')
+        return await self._session.check_mailbox(
+            selected, wait_on=wait_on, housekeeping=housekeeping)
+
+    async def fetch_messages(self, selected: SelectedMailbox,
+                             sequence_set: SequenceSet,
+                             attributes: FrozenSet[FetchAttribute]) \
+            -> Tuple[AsyncIterable[Tuple[int, MessageInterface]],
+                     SelectedMailbox]:
+        self._count('fetch_messages')
+        return await self._session.fetch_messages(
+            selected, sequence_set, attributes)
+
+    async def search_mailbox(self, selected: SelectedMailbox,
+                             keys: FrozenSet[SearchKey]) \
+            -> Tuple[Iterable[Tuple[int, MessageInterface]], SelectedMailbox]:
+        self._count('search_mailbox')
+        return await self._session.search_mailbox(selected, keys)
+
+    async def sort_mailbox(self, selected: SelectedMailbox,
+                           keys: FrozenSet[SearchKey]) \
+            -> Tuple[Sequence[Tuple[int, MessageInterface, SortKeys]],
+                     SelectedMailbox]:
+        self._count('sort_mailbox')
+        return await self._session.sort_mailbox(selected, keys)
+
+    async def expunge_mailbox(self, selected: SelectedMailbox,
+                              uid_set: SequenceSet = None) -> SelectedMailbox:
+        self._count('expunge_mailbox')
+        return await self._session.expunge_mailbox(selected, uid_set)
+
+    async def copy_messages(self, selected: SelectedMailbox,
+                            sequence_set: SequenceSet, mailbox: str) \
+            -> Tuple[Optional[CopyUid], SelectedMailbox]:
+        self._count('copy_messages')
+        return await self._session.copy_messages(
+            selected, sequence_set, mailbox)
+
+    async def move_messages(self, selected: SelectedMailbox,
+                            sequence_set: SequenceSet, mailbox: str) \
+            -> Tuple[Optional[CopyUid], SelectedMailbox]:
+        self._count('move_messages')
+        return await self._session.move_messages(
+            selected, sequence_set, mailbox)
+
+    async def update_flags(self, selected: SelectedMailbox,
+                           sequence_set: SequenceSet,
+                           flag_set: FrozenSet[Flag],
+                           mode: FlagOp = FlagOp.REPLACE, *,
+                           unchanged_since: int = None) \
+            -> Tuple[Iterable[Tuple[int, MessageInterface]], SelectedMailbox]:
+        self._count('update_flags')
+        return await self._session.update_flags(
+            selected, sequence_set, flag_set, mode,
+            unchanged_since=unchanged_since)
+
+    async def find_vanished(self, selected: SelectedMailbox,
+                            mod_sequence: int, uid_set: SequenceSet) \
+            -> Tuple[Sequence[int], SelectedMailbox]:
+        self._count('find_vanished')
+        return await self._session.find_vanished(
+            selected, mod_sequence, uid_set)
@@ -0,0 +1,163 @@
+"""Collects metrics about the commands executed by the IMAP server, such as
+their latency and the number of bytes they read and wrote. The metrics are
+kept as simple counters that are cheap to update, so that they may always be
+enabled.
+
+"""
+
+from bisect import bisect_left
+from collections import Counter
+from typing import Tuple, Sequence, Dict, Iterator
+
+__all__ = ['Histogram', 'CommandStats', 'Stats', 'LATENCY_BUCKETS']
+
+#: The upper bounds, in seconds, of the command latency histogram buckets.
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Counts observed values in buckets by their upper bounds.
+
+    Args:
+        buckets: The sorted upper bounds of each bucket. Values larger than
+            the last upper bound are counted in an extra, unbounded bucket.
+
+    """
+
+    __slots__ = ['buckets', 'counts', 'sum']
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    @property
+    def count(self) -> int:
+        """The total number of observed values."""
+        return sum(self.counts)
+
+    def observe(self, value: float) -> None:
+        """Count the value in the first bucket whose upper bound it does not
+        exceed.
+
+        Args:
+            value: The observed value.
+
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def cumulative(self) -> Iterator[Tuple[float, int]]:
+        """Generates each bucket upper bound, ending with ``inf``, and the
+        number of observed values that did not exceed it.
+
+        """
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+        yield float('inf'), total + self.counts[-1]
+
+
+class CommandStats:
+    """The metrics collected for one command name, e.g. ``UID FETCH``.
+
+    Attributes:
+        latency: The time, in seconds, from reading each command until its
+            response was written.
+        bytes_in: The number of bytes read from the client for the command.
+        bytes_out: The number of bytes written to the client for the command.
+        messages: The number of messages the command fetched, searched,
+            stored, copied or appended.
+        backend_calls: The number of calls the command made to each method of
+            the backend :class:`~pymap.interfaces.session.SessionInterface`.
+
+    """
+
+    __slots__ = ['latency', 'bytes_in', 'bytes_out', 'messages',
+                 'backend_calls']
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.latency = Histogram()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.messages = 0
+        self.backend_calls: Counter[str] = Counter()
+
+    @property
+    def count(self) -> int:
+        """The number of times the command was executed."""
+        return self.latency.count
+
+
+class Stats:
+    """Collects the metrics of every command executed by the IMAP server.
+
+    Args:
+        backend: The name of the backend handling the commands.
+
+    """
+
+    __slots__ = ['backend', 'commands']
+
+    def __init__(self, backend: str) -> None:
+        super().__init__()
+        self.backend = backend
+        self.commands: Dict[bytes, CommandStats] = {}
+
+    def command(self, name: bytes) -> CommandStats:
+        """Return the metrics for the command name, creating them if
+        necessary.
+
+        Args:
+            name: The command name, e.g. ``b'UID FETCH'``.
+
+        """
+        try:
+            return self.commands[name]
+        except KeyError:
+            self.commands[name] = stats = CommandStats()
+            return stats
+
+    def render(self) -> bytes:
+        """Render the metrics in the Prometheus text exposition format.
+
+        See Also:
+            `Exposition formats
+            <https://prometheus.io/docs/instrumenting/exposition_formats/>`_
+
+        """
+        backend = self.backend
+        commands = sorted(self.commands.items())
+        lines = ['# TYPE pymap_command_latency_seconds histogram']
+        for name, stats in commands:
+            labels = f'backend="{backend}",command="{name.decode("ascii")}"'
+            for bound, count in stats.latency.cumulative():
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'pymap_command_latency_seconds_bucket'
+                             f'{{{labels},le="{le}"}} {count}')
+            lines.append(f'pymap_command_latency_seconds_sum{{{labels}}} '
+                         f'{stats.latency.sum!r}')
+            lines.append(f'pymap_command_latency_seconds_count{{{labels}}} '
+                         f'{stats.count}')
+        for metric, attr in (('received_bytes', 'bytes_in'),
+                             ('sent_bytes', 'bytes_out'),
+                             ('messages', 'messages')):
+            lines.append(f'# TYPE pymap_command_{metric}_total counter')
+            for name, stats in commands:
+                labels = f'backend="{backend}",' \
+                    f'command="{name.decode("ascii")}"'
+                lines.append(f'pymap_command_{metric}_total{{{labels}}} '
+                             f'{getattr(stats, attr)}')
+        lines.append('# TYPE pymap_backend_calls_total counter')
+        for name, stats in commands:
+            labels = f'backend="{backend}",command="{name.decode("ascii")}"'
+            for method, count in sorted(stats.backend_calls.items()):
+                lines.append(f'pymap_backend_calls_total'
+                             f'{{{labels},method="{method}"}} {count}')
+        lines.append('')
+        return '\n'.join(lines).encode('utf-8')
@@ -0,0 +1,130 @@
+"""Full-text indexes of message contents, used to narrow down the candidate
+messages of the ``BODY``, ``TEXT`` and header search keys before the messages
+are loaded.
+
+IMAP searches match case-insensitive substrings, so the index records the
+trigrams, or three-byte sequences, found in each message rather than its
+words. A message may only contain a value if it contains every trigram of the
+value. Values shorter than three bytes have no trigrams, and are never
+answered by an index.
+
+"""
+
+from typing import AbstractSet, Dict, FrozenSet, Iterable, Set, Tuple
+
+from .message import BaseMessage
+
+__all__ = ['message_terms', 'value_terms', 'TextIndex']
+
+
+def _trigrams(data: bytes) -> Set[bytes]:
+    data = data.lower()
+    return {data[i:i + 3] for i in range(len(data) - 2)}
+
+
+def message_terms(msg: BaseMessage) -> FrozenSet[bytes]:
+    """Return the index terms of a message. The terms cover every value that
+    a ``BODY``, ``TEXT``, envelope or ``HEADER`` search key may match: the raw
+    headers of each MIME part, the raw bodies of each ``text/*`` part, and the
+    decoded values of the message headers.
+
+    Args:
+        msg: The message, with its contents loaded.
+
+    """
+    content = msg.content
+    terms: Set[bytes] = set()
+    for part in content.walk():
+        terms |= _trigrams(bytes(part.header))
+        if part.body.content_type.maintype == 'text':
+            terms |= _trigrams(bytes(part.body))
+    parsed = content.header.parsed
+    for name in parsed:
+        for value in parsed[name]:
+            terms |= _trigrams(str(value).encode('utf-8', 'replace'))
+    return frozenset(terms)
+
+
+def value_terms(value: bytes) -> FrozenSet[bytes]:
+    """Return the terms that every message containing the value must have
+    in its index terms.
+
+    Args:
+        value: The search value.
+
+    """
+    return frozenset(_trigrams(value))
+
+
+class TextIndex:
+    """An in-memory index of the terms in each message of a mailbox."""
+
+    __slots__ = ['_postings', '_terms']
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._postings: Dict[bytes, Set[int]] = {}
+        self._terms: Dict[int, FrozenSet[bytes]] = {}
+
+    def get(self, uid: int) -> FrozenSet[bytes]:
+        """Return the index terms of the message.
+
+        Args:
+            uid: The message UID.
+
+        Raises:
+            KeyError: The message has not been indexed.
+
+        """
+        return self._terms[uid]
+
+    def add(self, messages: Iterable[Tuple[int, FrozenSet[bytes]]]) -> None:
+        """Add messages to the index.
+
+        Args:
+            messages: The UID and index terms of each message.
+
+        """
+        postings = self._postings
+        for uid, terms in messages:
+            self._terms[uid] = terms
+            for term in terms:
+                postings.setdefault(term, set()).add(uid)
+
+    def remove(self, uids: Iterable[int]) -> None:
+        """Remove messages from the index.
+
+        Args:
+            uids: The message UIDs.
+
+        """
+        postings = self._postings
+        for uid in uids:
+            for term in self._terms.pop(uid, frozenset()):
+                posting = postings[term]
+                posting.discard(uid)
+                if not posting:
+                    del postings[term]
+
+    def find(self, uids: Iterable[int], value: bytes) -> AbstractSet[int]:
+        """Return the subset of the given UIDs whose messages may contain the
+        value. Messages that have not been indexed are always included.
+
+        Args:
+            uids: The candidate message UIDs.
+            value: The search value.
+
+        """
+        terms = value_terms(value)
+        if not terms:
+            return set(uids)
+        postings = self._postings
+        indexed = self._terms
+        # Intersect the smallest postings first.
+        ordered = sorted(terms, key=lambda term: len(postings.get(term, ())))
+        matched = set(postings.get(ordered[0], ()))
+        for term in ordered[1:]:
+            if not matched:
+                break
+            matched &= postings.get(term, set())
+        return {uid for uid in uids if uid in matched or uid not in indexed}
@@ -0,0 +1,416 @@
+"""A sorted collection of message UIDs that efficiently translates between UIDs
+and message sequence numbers, even as UIDs are added and expunged.
+
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain, islice
+from typing import overload, Any, Iterable, Iterator, List, Optional, \
+    Sequence, Tuple, TypeVar
+
+__all__ = ['SortedUids']
+
+_SortedUidsT = TypeVar('_SortedUidsT', bound='SortedUids')
+
+
+class SortedUids(Sequence[int]):
+    """A sorted sequence of unique message UIDs. Adding, removing, and finding
+    the index of a UID, as well as finding the UID at an index, are
+    ``O(log n)`` operations.
+
+    The UIDs are kept in sorted blocks of limited size, and the length of each
+    block is tracked by a `Fenwick tree
+    <https://en.wikipedia.org/wiki/Fenwick_tree>`_ so that the position of a
+    block in the overall sequence can be found without visiting every block.
+    Each block is an :class:`~array.array` of unsigned 32-bit integers, so a
+    UID takes only four bytes of memory.
+
+    Subclasses may set :attr:`.columns` to store integer values alongside
+    each UID, in parallel arrays of the same blocks.
+
+    A :meth:`.copy` shares its blocks with the original, and each block is
+    copied only when either one first modifies it.
+
+    Args:
+        uids: The initial message UIDs, in any order.
+
+    """
+
+    __slots__ = ['_blocks', '_cols', '_owned', '_maxes', '_tree', '_len']
+
+    #: The number of UIDs in each block, when blocks are built or split.
+    block_size = 512
+
+    #: The :mod:`array` type codes of the values stored with each UID.
+    columns: Tuple[str, ...] = ()
+
+    def __init__(self, uids: Iterable[int] = ()) -> None:
+        super().__init__()
+        sorted_uids = sorted(set(uids))
+        size = self.block_size
+        self._blocks = [array('I', sorted_uids[i:i + size])
+                        for i in range(0, len(sorted_uids), size)]
+        self._cols = [self._new_cols(len(block)) for block in self._blocks]
+        self._owned = [True] * len(self._blocks)
+        self._maxes = [block[-1] for block in self._blocks]
+        self._tree: List[int] = []
+        self._len = len(sorted_uids)
+        self._rebuild()
+
+    def _new_cols(self, length: int) -> List[array]:
+        return [array(code, [0]) * length for code in self.columns]
+
+    def _own(self, block_idx: int) -> array:
+        # Copy the block before it is modified, if it may be shared.
+        if not self._owned[block_idx]:
+            self._blocks[block_idx] = self._blocks[block_idx][:]
+            self._cols[block_idx] = [col[:] for col in self._cols[block_idx]]
+            self._owned[block_idx] = True
+        return self._blocks[block_idx]
+
+    def _rebuild(self) -> None:
+        tree = [len(block) for block in self._blocks]
+        for i in range(len(tree)):
+            parent = i | (i + 1)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, block_idx: int, delta: int) -> None:
+        tree = self._tree
+        while block_idx < len(tree):
+            tree[block_idx] += delta
+            block_idx |= block_idx + 1
+
+    def _offset(self, block_idx: int) -> int:
+        # The number of UIDs in the blocks before the given block.
+        tree = self._tree
+        total = 0
+        while block_idx > 0:
+            total += tree[block_idx - 1]
+            block_idx &= block_idx - 1
+        return total
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        # The block containing the given index, and the index in that block.
+        tree = self._tree
+        block_idx = 0
+        step = 1 << len(tree).bit_length()
+        while step:
+            next_idx = block_idx + step
+            if next_idx <= len(tree) and tree[next_idx - 1] <= index:
+                block_idx = next_idx
+                index -= tree[next_idx - 1]
+            step >>= 1
+        return block_idx, index
+
+    def _find(self, uid: int) -> Optional[Tuple[int, int]]:
+        # The block containing the UID, and its index in that block.
+        block_idx = bisect_left(self._maxes, uid)
+        if block_idx < len(self._maxes):
+            block = self._blocks[block_idx]
+            idx = bisect_left(block, uid)
+            if block[idx] == uid:
+                return block_idx, idx
+        return None
+
+    def add(self, uid: int, *values: int) -> bool:
+        """Add the UID to the sequence, if it is not already present. The
+        values stored with the UID are replaced either way.
+
+        Args:
+            uid: The message UID.
+            values: The values stored with the UID, one for each of the
+                :attr:`.columns`.
+
+        Returns:
+            True if the UID was added.
+
+        """
+        maxes = self._maxes
+        if not maxes:
+            self._blocks.append(array('I', [uid]))
+            self._cols.append([array(code, [value]) for code, value
+                               in zip(self.columns, values)])
+            self._owned.append(True)
+            maxes.append(uid)
+            self._len = 1
+            self._rebuild()
+            return True
+        block_idx = bisect_left(maxes, uid)
+        if block_idx == len(maxes):
+            block_idx -= 1
+            block = self._own(block_idx)
+            block.append(uid)
+            for col, value in zip(self._cols[block_idx], values):
+                col.append(value)
+            maxes[block_idx] = uid
+        else:
+            block = self._blocks[block_idx]
+            idx = bisect_left(block, uid)
+            if block[idx] == uid:
+                cols = self._cols[block_idx]
+                if any(col[idx] != value for col, value in zip(cols, values)):
+                    self._own(block_idx)
+                    for col, value in zip(self._cols[block_idx], values):
+                        col[idx] = value
+                return False
+            block = self._own(block_idx)
+            block.insert(idx, uid)
+            for col, value in zip(self._cols[block_idx], values):
+                col.insert(idx, value)
+        self._len += 1
+        if len(block) > self.block_size * 2:
+            half = len(block) >> 1
+            cols = self._cols[block_idx]
+            self._blocks[block_idx:block_idx + 1] = [block[:half],
+                                                     block[half:]]
+            self._cols[block_idx:block_idx + 1] = [
+                [col[:half] for col in cols], [col[half:] for col in cols]]
+            self._owned[block_idx:block_idx + 1] = [True, True]
+            maxes.insert(block_idx, block[half - 1])
+            self._rebuild()
+        else:
+            self._tree_add(block_idx, 1)
+        return True
+
+    def extend(self, rows: Iterable[Sequence[int]]) -> None:
+        """Add many UIDs, each followed by the values stored with it, as with
+        :meth:`.add`. If the UIDs are sorted and greater than any UID already
+        in the sequence, e.g. when the sequence is first populated, the blocks
+        are built directly.
+
+        Args:
+            rows: The UIDs and their values.
+
+        """
+        rows = list(rows)
+        max_uid = self._maxes[-1] if self._maxes else 0
+        if any(row[0] <= prev[0] for prev, row in zip(rows, rows[1:])) \
+                or (rows and rows[0][0] <= max_uid):
+            for row in rows:
+                self.add(*row)
+            return
+        size = self.block_size
+        columns = self.columns
+        if self._blocks and len(self._blocks[-1]) < size:
+            fill = size - len(self._blocks[-1])
+            block = self._own(len(self._blocks) - 1)
+            cols = self._cols[-1]
+            for row in rows[:fill]:
+                block.append(row[0])
+                for col, value in zip(cols, row[1:]):
+                    col.append(value)
+            if block:
+                self._maxes[-1] = block[-1]
+            rows = rows[fill:]
+        for i in range(0, len(rows), size):
+            chunk = rows[i:i + size]
+            self._blocks.append(array('I', [row[0] for row in chunk]))
+            self._cols.append([array(code, [row[col_idx] for row in chunk])
+                               for col_idx, code in enumerate(columns, 1)])
+            self._owned.append(True)
+            self._maxes.append(chunk[-1][0])
+        self._len = sum(len(block) for block in self._blocks)
+        self._rebuild()
+
+    def discard(self, uid: int) -> bool:
+        """Remove the UID from the sequence, if it is present.
+
+        Args:
+            uid: The message UID.
+
+        Returns:
+            True if the UID was removed.
+
+        """
+        found = self._find(uid)
+        if found is None:
+            return False
+        block_idx, idx = found
+        self._len -= 1
+        if len(self._blocks[block_idx]) == 1:
+            del self._blocks[block_idx]
+            del self._cols[block_idx]
+            del self._owned[block_idx]
+            del self._maxes[block_idx]
+            self._rebuild()
+        else:
+            block = self._own(block_idx)
+            del block[idx]
+            for col in self._cols[block_idx]:
+                del col[idx]
+            self._maxes[block_idx] = block[-1]
+            self._tree_add(block_idx, -1)
+        return True
+
+    def copy(self: _SortedUidsT) -> _SortedUidsT:
+        """Return a copy of the sequence. The copy initially shares its
+        blocks with the original, so it takes only ``O(n / block_size)`` time
+        and memory until either one is modified.
+
+        """
+        self._owned = [False] * len(self._blocks)
+        copy = type(self).__new__(type(self))
+        copy._blocks = list(self._blocks)
+        copy._cols = list(self._cols)
+        copy._owned = list(self._owned)
+        copy._maxes = list(self._maxes)
+        copy._tree = list(self._tree)
+        copy._len = self._len
+        return copy
+
+    def get_values(self, uid: int) -> Optional[Tuple[int, ...]]:
+        """Return the values stored with the UID, or ``None`` if the UID is
+        not in the sequence.
+
+        Args:
+            uid: The message UID.
+
+        """
+        found = self._find(uid)
+        if found is None:
+            return None
+        block_idx, idx = found
+        return tuple(col[idx] for col in self._cols[block_idx])
+
+    def bisect_left(self, uid: int) -> int:
+        """Return the number of UIDs in the sequence less than ``uid``.
+
+        Args:
+            uid: The message UID.
+
+        """
+        block_idx = bisect_left(self._maxes, uid)
+        if block_idx == len(self._maxes):
+            return self._len
+        return self._offset(block_idx) \
+            + bisect_left(self._blocks[block_idx], uid)
+
+    def bisect_right(self, uid: int) -> int:
+        """Return the number of UIDs in the sequence less than or equal to
+        ``uid``.
+
+        Args:
+            uid: The message UID.
+
+        """
+        block_idx = bisect_right(self._maxes, uid)
+        if block_idx == len(self._maxes):
+            return self._len
+        return self._offset(block_idx) \
+            + bisect_right(self._blocks[block_idx], uid)
+
+    def index(self, uid: Any, start: int = 0, stop: int = None) -> int:
+        """Return the index of the UID in the sequence, i.e. its message
+        sequence number minus one.
+
+        Args:
+            uid: The message UID.
+            start: The UID must be at or after this index.
+            stop: The UID must be before this index.
+
+        Raises:
+            ValueError: The UID is not in the sequence.
+
+        """
+        if isinstance(uid, int):
+            found = self._find(uid)
+            if found is not None:
+                block_idx, idx = found
+                ret = self._offset(block_idx) + idx
+                if start <= ret and (stop is None or ret < stop):
+                    return ret
+        raise ValueError(uid)
+
+    def iter_from(self, start: int, stop: int = None) -> Iterator[int]:
+        """Iterate through the UIDs from index ``start`` up to, but not
+        including, index ``stop``.
+
+        Args:
+            start: The index of the first UID.
+            stop: The index to stop at, defaulting to the end of the sequence.
+
+        """
+        return self._iter_blocks(self._blocks, start, stop)
+
+    def iter_rows(self, start: int = 0, stop: int = None) \
+            -> Iterator[Tuple[int, ...]]:
+        """Iterate through the UIDs, each followed by the values stored with
+        it, from index ``start`` up to, but not including, index ``stop``.
+
+        Args:
+            start: The index of the first UID.
+            stop: The index to stop at, defaulting to the end of the sequence.
+
+        """
+        blocks = _Rows(self._blocks, self._cols)
+        return self._iter_blocks(blocks, start, stop)
+
+    def _iter_blocks(self, blocks: Sequence[Iterable[Any]], start: int,
+                     stop: Optional[int]) -> Iterator[Any]:
+        if stop is None or stop > self._len:
+            stop = self._len
+        if start < 0:
+            start = 0
+        if start >= stop:
+            return iter(())
+        block_idx, idx = self._locate(start)
+        rest = (blocks[i] for i in range(block_idx + 1, len(blocks)))
+        first = islice(blocks[block_idx], idx, None)
+        return islice(chain(first, chain.from_iterable(rest)), stop - start)
+
+    @overload
+    def __getitem__(self, index: int) -> int:
+        ...
+
+    @overload  # noqa: F811
+    def __getitem__(self, index: slice) -> Sequence[int]:
+        ...
+
+    def __getitem__(self, index):  # noqa: F811
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return list(self)[index]
+            return list(self.iter_from(start, stop))
+        if index < 0:
+            index += self._len
+        if index < 0 or index >= self._len:
+            raise IndexError(index)
+        block_idx, idx = self._locate(index)
+        return self._blocks[block_idx][idx]
+
+    def __contains__(self, uid: object) -> bool:
+        return isinstance(uid, int) and self._find(uid) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        return chain.from_iterable(self._blocks)
+
+    def __reversed__(self) -> Iterator[int]:
+        return chain.from_iterable(
+            reversed(block) for block in reversed(self._blocks))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__} len={self._len}>'
+
+
+class _Rows(Sequence[Iterable[Tuple[int, ...]]]):
+    # Zips each block of UIDs with its values, only when it is visited.
+
+    __slots__ = ['_blocks', '_cols']
+
+    def __init__(self, blocks: List[array], cols: List[List[array]]) -> None:
+        super().__init__()
+        self._blocks = blocks
+        self._cols = cols
+
+    def __getitem__(self, block_idx):  # type: ignore
+        return zip(self._blocks[block_idx], *self._cols[block_idx])
+
+    def __len__(self) -> int:
+        return len(self._blocks)
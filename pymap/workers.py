@@ -0,0 +1,249 @@
+"""Runs the IMAP server in several worker processes that share the listening
+socket. A supervisor process restarts workers that exit unexpectedly, and
+relays mailbox update notifications between them so that ``IDLE`` and
+untagged responses reach sessions connected to other workers.
+
+"""
+
+import asyncio
+import os
+import selectors
+import signal
+import socket
+import sys
+import time
+import traceback
+from socket import socketpair, AF_UNIX, SOCK_DGRAM
+from typing import Callable, Optional, Dict, List
+
+from .selected import SelectedSet
+
+__all__ = ['Supervisor', 'UpdatesRelay']
+
+#: The maximum length of a mailbox key relayed between workers.
+MAX_KEY_LEN = 4096
+
+#: The delay, in seconds, before restarting a worker that exited. The delay
+#: doubles each time the worker exits again, up to :data:`MAX_RESTART_DELAY`.
+RESTART_DELAY = 1.0
+
+#: The maximum delay, in seconds, before restarting a worker that exited. A
+#: worker that ran for at least this long is restarted after
+#: :data:`RESTART_DELAY` again.
+MAX_RESTART_DELAY = 60.0
+
+
+class UpdatesRelay:
+    """The worker end of the update notification channel to the supervisor.
+    Instances are callable, and should be set as the
+    :data:`~pymap.context.updates_relay` of the worker.
+
+    Args:
+        sock: The worker's socket connected to the supervisor.
+
+    """
+
+    __slots__ = ['_sock']
+
+    def __init__(self, sock: socket.socket) -> None:
+        super().__init__()
+        self._sock = sock
+
+    def start(self) -> None:
+        """Start receiving update notifications relayed from other workers."""
+        self._sock.setblocking(False)
+        loop = asyncio.get_event_loop()
+        loop.add_reader(self._sock, self._receive)
+
+    def _receive(self) -> None:
+        while True:
+            try:
+                key = self._sock.recv(MAX_KEY_LEN)
+            except (BlockingIOError, InterruptedError):
+                return
+            SelectedSet.notify_key(key)
+
+    def __call__(self, key: bytes) -> None:
+        try:
+            self._sock.send(key)
+        except OSError:
+            pass  # Notifications are hints, IDLE will catch up eventually.
+
+
+class _Worker:
+
+    __slots__ = ['index', 'pid', 'sock', 'started']
+
+    def __init__(self, index: int, pid: int, sock: socket.socket) -> None:
+        super().__init__()
+        self.index = index
+        self.pid = pid
+        self.sock = sock
+        self.started = time.monotonic()
+
+
+class Supervisor:
+    """Forks and supervises the worker processes.
+
+    Args:
+        num_workers: The number of worker processes to run.
+        target: Called in each new worker process with the worker index and
+            the :class:`UpdatesRelay` for the worker. The worker exits when
+            it returns.
+
+    """
+
+    def __init__(self, num_workers: int,
+                 target: Callable[[int, UpdatesRelay], None]) -> None:
+        super().__init__()
+        self.num_workers = num_workers
+        self._target = target
+        self._workers: Dict[int, _Worker] = {}
+        self._delays: Dict[int, float] = {}
+        self._restarts: Dict[int, float] = {}
+        self._selector = selectors.DefaultSelector()
+        self._stopping = False
+        self._wakeup_r, self._wakeup_w = socketpair()
+
+    def _spawn(self, index: int) -> None:
+        parent_sock, child_sock = socketpair(AF_UNIX, SOCK_DGRAM)
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            status = 0
+            try:
+                parent_sock.close()
+                self._close_parent()
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                self._target(index, UpdatesRelay(child_sock))
+            except KeyboardInterrupt:
+                pass
+            except BaseException:
+                traceback.print_exc()
+                status = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(status)
+        child_sock.close()
+        parent_sock.setblocking(False)
+        self._workers[pid] = worker = _Worker(index, pid, parent_sock)
+        self._selector.register(parent_sock, selectors.EVENT_READ, worker)
+
+    def _close_parent(self) -> None:  # pragma: no cover
+        self._selector.close()
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+        for worker in self._workers.values():
+            worker.sock.close()
+
+    def _relay(self, sender: _Worker) -> None:
+        while True:
+            try:
+                key = sender.sock.recv(MAX_KEY_LEN)
+            except (BlockingIOError, InterruptedError):
+                return
+            for worker in self._workers.values():
+                if worker is not sender:
+                    try:
+                        worker.sock.send(key)
+                    except OSError:
+                        pass
+
+    def _reap(self) -> None:
+        while self._workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self._workers.pop(pid, None)
+            if worker is None:
+                continue
+            self._selector.unregister(worker.sock)
+            worker.sock.close()
+            if not self._stopping:
+                delay = self._restart_delay(worker)
+                print(f'Worker {worker.index} (pid {pid}) exited with '
+                      f'status {status}, restarting in {delay:.0f}s.',
+                      file=sys.stderr)
+                self._restarts[worker.index] = time.monotonic() + delay
+
+    def _restart_delay(self, worker: _Worker) -> float:
+        uptime = time.monotonic() - worker.started
+        if uptime >= MAX_RESTART_DELAY:
+            delay = RESTART_DELAY
+        else:
+            last_delay = self._delays.get(worker.index, 0.0)
+            delay = min(max(last_delay * 2, RESTART_DELAY), MAX_RESTART_DELAY)
+        self._delays[worker.index] = delay
+        return delay
+
+    def _restart_timeout(self) -> Optional[float]:
+        if not self._restarts:
+            return None
+        return max(min(self._restarts.values()) - time.monotonic(), 0.0)
+
+    def _restart_due(self) -> None:
+        now = time.monotonic()
+        for index, when in list(self._restarts.items()):
+            if when <= now:
+                del self._restarts[index]
+                self._spawn(index)
+
+    def _on_signal(self, signum: int, frame) -> None:
+        if signum != signal.SIGCHLD:
+            self._stopping = True
+        try:
+            self._wakeup_w.send(b'\x00')
+        except OSError:
+            pass
+
+    def _stop(self, signum: int) -> None:
+        for pid in self._workers:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        """Fork the worker processes, and supervise them until the supervisor
+        receives ``SIGINT`` or ``SIGTERM``.
+
+        """
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+        for index in range(self.num_workers):
+            self._spawn(index)
+        while not self._stopping:
+            for key, _ in self._selector.select(self._restart_timeout()):
+                worker: Optional[_Worker] = key.data
+                if worker is None:
+                    self._drain_wakeup()
+                elif worker.pid in self._workers:
+                    self._relay(worker)
+            self._reap()
+            self._restart_due()
+        self._stop(signal.SIGTERM)
+        self._wait_all()
+
+    def _drain_wakeup(self) -> None:
+        try:
+            while self._wakeup_r.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _wait_all(self) -> None:
+        pids: List[int] = list(self._workers)
+        for pid in pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self._workers.clear()
@@ -15,6 +15,7 @@ class FakeArgs(Namespace):
     insecure_login = True
     cert = None
     key = None
+    text_index = True
     demo_data = True
     demo_user = 'testuser'
     demo_password = 'testpass'
@@ -32,6 +32,7 @@ class MockTransport:
         self.matches = matches
         self.socket = _Socket(fd)
         self._write_batch = []
+        self.drained = []
 
     @classmethod
     def _caller(cls, frame):
@@ -119,7 +120,9 @@ class MockTransport:
             b'* ', exists, b' EXISTS\r\n'
             b'* ', recent, b' RECENT\r\n'
             b'* OK [UIDNEXT ', uidnext, b'] Predicted next UID.\r\n'
-            b'* OK [UIDVALIDITY ', (br'\d+', ), b'] UIDs valid.\r\n',
+            b'* OK [UIDVALIDITY ', (br'\d+', ), b'] UIDs valid.\r\n'
+            b'* OK [HIGHESTMODSEQ ', (br'\d+', ),
+            b'] Highest mailbox mod-sequence.\r\n',
             unseen_line,
             tag, b' OK [', ok_code, b'] Selected mailbox.\r\n',
             wait=post_wait, set=set)
@@ -187,6 +190,9 @@ class MockTransport:
             return 'test'
 
     async def readline(self) -> bytes:
+        # Emulates StreamReader, waiting until the client has sent the line.
+        if not self.queue or self.queue[0][0] == _Type.DRAIN:
+            await asyncio.sleep(1.0)
         where, data, wait, set = self._pop_expected(_Type.READLINE)
         if set:
             set.set()
@@ -196,6 +202,10 @@ class MockTransport:
             except asyncio.TimeoutError:
                 self._fail('\nTimeout: 1.0s' +
                            '\nWhere:   ' + where)
+            except asyncio.CancelledError:
+                self.queue.appendleft(
+                    (_Type.READLINE, where, data, wait, None))
+                raise
         return data
 
     async def readexactly(self, size: int) -> bytes:
@@ -216,10 +226,14 @@ class MockTransport:
     def write(self, data: bytes) -> None:
         self._write_batch.append(data)
 
+    def writelines(self, data) -> None:
+        self._write_batch.extend(data)
+
     async def drain(self) -> None:
         where, expected, wait, set = self._pop_expected(_Type.DRAIN)
         data = b''.join(self._write_batch)
         self._write_batch = []
+        self.drained.append(data)
         self._match_write(where, expected, data)
         if set:
             set.set()
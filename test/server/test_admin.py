@@ -7,8 +7,9 @@ import pytest  # type: ignore
 
 from pymap.admin.handlers import GrpcHandlers
 from pymap.admin.grpc.admin_pb2 import AppendRequest, AppendResponse, \
-    SUCCESS, USER_NOT_FOUND, MAILBOX_NOT_FOUND
+    StatsRequest, StatsResponse, SUCCESS, USER_NOT_FOUND, MAILBOX_NOT_FOUND
 from pymap.admin.client.append import AppendCommand
+from pymap.admin.client.stats import StatsCommand
 
 from .base import TestBase
 
@@ -91,6 +92,64 @@ class TestAdminHandlers(TestBase):
         response: AppendResponse = stream.response
         assert MAILBOX_NOT_FOUND == response.result
 
+    async def test_stats(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 FETCH 1:2 (UID)\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (UID 101)\r\n'
+            b'* 2 FETCH (UID 102)\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+        handlers = GrpcHandlers(self.backend)
+        stream = _Stream(StatsRequest())
+        await handlers.Stats(stream)
+        response: StatsResponse = stream.response
+        commands = {cmd.command: cmd for cmd in response.commands}
+        assert {'LOGIN', 'SELECT', 'FETCH', 'LOGOUT'} == set(commands)
+        fetch = commands['FETCH']
+        assert 1 == fetch.count
+        assert 2 == fetch.messages
+        assert 24 == fetch.bytes_in
+        assert 70 == fetch.bytes_out
+        assert float('inf') == fetch.latency[-1].upper_bound
+        assert 1 == fetch.latency[-1].count
+        calls = {call.method: call.count for call in fetch.backend_calls}
+        assert {'fetch_messages': 1} == calls
+        calls = {call.method: call.count
+                 for call in commands['SELECT'].backend_calls}
+        assert {'select_mailbox': 1} == calls
+
+    async def test_stats_pipelined(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 FETCH 1:2 (UID)\r\n')
+        self.transport.push_readline(
+            b'status1 STATUS Sent (MESSAGES)\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (UID 101)\r\n'
+            b'* 2 FETCH (UID 102)\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_write(
+            b'* STATUS Sent (MESSAGES 1)\r\n'
+            b'status1 OK STATUS completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+        handlers = GrpcHandlers(self.backend)
+        stream = _Stream(StatsRequest())
+        await handlers.Stats(stream)
+        response: StatsResponse = stream.response
+        calls = {cmd.command: {call.method: call.count
+                               for call in cmd.backend_calls}
+                 for cmd in response.commands}
+        assert {'fetch_messages': 1} == calls['FETCH']
+        assert {'get_mailbox': 1} == calls['STATUS']
+
 
 class TestAdminClient:
 
@@ -112,3 +171,13 @@ class TestAdminClient:
         assert ['\\Flagged', '\\Seen'] == request.flags
         assert 'testuser' == request.user
         assert 'INBOX' == request.mailbox
+
+    async def test_stats(self):
+        parser = ArgumentParser()
+        subparsers = parser.add_subparsers(dest='test')
+        name, command = StatsCommand.init(parser, subparsers)
+        stub = _Stub('stats response')
+        response = await command.run(stub, Namespace())
+        assert 'stats' == name
+        assert 'Stats' == stub.method
+        assert 'stats response' == response
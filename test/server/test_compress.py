@@ -0,0 +1,74 @@
+
+import asyncio
+import zlib
+from types import SimpleNamespace
+
+import pytest  # type: ignore
+
+from pymap.server import _DeflateWriter
+from .base import TestBase
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestCompress(TestBase):
+
+    async def test_compress_unknown(self):
+        self.transport.push_login()
+        self.transport.push_readline(
+            b'compress1 COMPRESS BZIP2\r\n')
+        self.transport.push_write(
+            b'compress1 BAD Unknown compression algorithm.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_compress_deflate(self):
+        server = await asyncio.start_server(self.backend, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            await reader.readline()
+            writer.write(b'login1 LOGIN testuser testpass\r\n')
+            assert b'COMPRESS=DEFLATE' in await reader.readline()
+            writer.write(b'compress1 COMPRESS DEFLATE\r\n')
+            assert b'compress1 OK DEFLATE active.\r\n' == \
+                await reader.readline()
+            compress = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+            decompress = zlib.decompressobj(wbits=-zlib.MAX_WBITS)
+            writer.write(compress.compress(
+                b'compress2 COMPRESS DEFLATE\r\n'
+                b'logout1 LOGOUT\r\n'))
+            writer.write(compress.flush(zlib.Z_SYNC_FLUSH))
+            received = b''
+            while not decompress.eof:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                received += decompress.decompress(data)
+            assert b'compress2 NO [COMPRESSIONACTIVE] Compression already '\
+                b'active.\r\n* BYE Logging out.\r\n'\
+                b'logout1 OK Logout successful.\r\n' == received
+        finally:
+            writer.close()
+            server.close()
+            await server.wait_closed()
+
+    async def test_inflate_bounded(self):
+        data = b'x' * 10000000
+        compress = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        compressed = compress.compress(data) + compress.flush()
+        source = asyncio.StreamReader()
+        source.feed_data(compressed)
+        source.feed_eof()
+        inflated = asyncio.StreamReader()
+        writer = SimpleNamespace(_inflated=inflated)
+        task = asyncio.create_task(
+            _DeflateWriter.inflate(writer, source, 4096))
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert len(inflated._buffer) < 65536 * 3
+        received = b''
+        while not inflated.at_eof():
+            received += await inflated.read(65536)
+        await task
+        assert data == received
@@ -0,0 +1,216 @@
+
+import pytest  # type: ignore
+
+from pymap.backend.dict import Session
+from pymap.backend.dict.mailbox import MailboxSet
+
+from .base import TestBase
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestCondstore(TestBase):
+
+    async def _load_inbox_uid_validity(self) -> int:
+        mailbox_set = MailboxSet()
+        await Session._load_demo(mailbox_set)
+        self.config.set_cache['testuser'] = mailbox_set
+        inbox = await mailbox_set.get_mailbox('INBOX')
+        return inbox.uid_validity
+
+    async def test_enable(self):
+        self.transport.push_login()
+        self.transport.push_readline(
+            b'enable1 ENABLE CONDSTORE QRESYNC UNKNOWN\r\n')
+        self.transport.push_write(
+            b'* ENABLED CONDSTORE QRESYNC\r\n'
+            b'enable1 OK ENABLE completed.\r\n')
+        self.transport.push_readline(
+            b'enable2 ENABLE QRESYNC\r\n')
+        self.transport.push_write(
+            b'* ENABLED\r\n'
+            b'enable2 OK ENABLE completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_select_condstore(self):
+        self.transport.push_login()
+        self.transport.push_readline(
+            b'select1 SELECT INBOX (CONDSTORE)\r\n')
+        self.transport.push_write(
+            b'* OK [PERMANENTFLAGS (\\Answered \\Deleted \\Draft '
+            b'\\Flagged \\Seen)] Flags permitted.\r\n'
+            b'* FLAGS (\\Answered \\Deleted \\Draft \\Flagged '
+            b'\\Recent \\Seen)\r\n'
+            b'* 4 EXISTS\r\n'
+            b'* 1 RECENT\r\n'
+            b'* OK [UIDNEXT 105] Predicted next UID.\r\n'
+            b'* OK [UIDVALIDITY ', (br'\d+', ), b'] UIDs valid.\r\n'
+            b'* OK [HIGHESTMODSEQ 6] Highest mailbox mod-sequence.\r\n'
+            b'* OK [UNSEEN 3] First unseen message.\r\n'
+            b'select1 OK [READ-WRITE] Selected mailbox.\r\n')
+        self.transport.push_readline(
+            b'fetch1 FETCH 1:* (FLAGS)\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (FLAGS (\\Seen) MODSEQ (2))\r\n'
+            b'* 2 FETCH (FLAGS (\\Answered \\Seen) MODSEQ (3))\r\n'
+            b'* 3 FETCH (FLAGS (\\Flagged) MODSEQ (4))\r\n'
+            b'* 4 FETCH (FLAGS (\\Recent) MODSEQ (6))\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_fetch_changedsince(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 UID FETCH 1:* (FLAGS) (CHANGEDSINCE 3)\r\n')
+        self.transport.push_write(
+            b'* 3 FETCH (FLAGS (\\Flagged) UID 103 MODSEQ (4))\r\n'
+            b'* 4 FETCH (FLAGS (\\Recent) UID 104 MODSEQ (6))\r\n'
+            b'fetch1 OK UID FETCH completed.\r\n')
+        self.transport.push_readline(
+            b'fetch2 FETCH 1:* (FLAGS) (CHANGEDSINCE 6)\r\n')
+        self.transport.push_write(
+            b'fetch2 OK FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_fetch_modseq(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 FETCH 2 (MODSEQ)\r\n')
+        self.transport.push_write(
+            b'* 2 FETCH (MODSEQ (3))\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_fetch_vanished_not_enabled(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 UID FETCH 1:* (FLAGS) (CHANGEDSINCE 1 VANISHED)\r\n')
+        self.transport.push_write(
+            b'fetch1 BAD QRESYNC must be enabled.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_store_unchangedsince(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'store1 STORE 1:4 (UNCHANGEDSINCE 3) +FLAGS (\\Deleted)\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (FLAGS (\\Deleted \\Seen) MODSEQ (7))\r\n'
+            b'* 2 FETCH (FLAGS (\\Answered \\Deleted \\Seen) MODSEQ (7))\r\n'
+            b'store1 OK [MODIFIED 3:4] STORE completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_store_silent(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'store1 UID STORE 101 (UNCHANGEDSINCE 2) '
+            b'+FLAGS.SILENT (\\Deleted)\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (UID 101 MODSEQ (7))\r\n'
+            b'store1 OK UID STORE completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_store_unchanged_flags(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 FETCH 1:2 (BODY[HEADER.FIELDS (SUBJECT)])\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (BODY[HEADER.FIELDS (SUBJECT)] {34}\r\n'
+            b'Subject: Re: Re: Random question\r\n)\r\n'
+            b'* 2 FETCH (BODY[HEADER.FIELDS (SUBJECT)] {26}\r\n'
+            b'Subject: Random question\r\n)\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_readline(
+            b'store1 STORE 1 +FLAGS.SILENT (\\Seen)\r\n')
+        self.transport.push_write(
+            b'store1 OK STORE completed.\r\n')
+        self.transport.push_readline(
+            b'fetch2 FETCH 1:2 (MODSEQ)\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (MODSEQ (2))\r\n'
+            b'* 2 FETCH (MODSEQ (3))\r\n'
+            b'fetch2 OK FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_search_modseq(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'search1 SEARCH MODSEQ 4\r\n')
+        self.transport.push_write(
+            b'* SEARCH 3 4 (MODSEQ 6)\r\n'
+            b'search1 OK SEARCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_status_highestmodseq(self):
+        self.transport.push_login()
+        self.transport.push_readline(
+            b'status1 STATUS INBOX (MESSAGES HIGHESTMODSEQ)\r\n')
+        self.transport.push_write(
+            b'* STATUS INBOX (MESSAGES 4 HIGHESTMODSEQ 5)\r\n'
+            b'status1 OK STATUS completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_select_qresync(self):
+        uid_validity = await self._load_inbox_uid_validity()
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'store1 STORE 1 +FLAGS.SILENT (\\Deleted)\r\n')
+        self.transport.push_write(
+            b'store1 OK STORE completed.\r\n')
+        self.transport.push_readline(
+            b'expunge1 EXPUNGE\r\n')
+        self.transport.push_write(
+            b'* 1 EXPUNGE\r\n'
+            b'expunge1 OK EXPUNGE completed.\r\n')
+        self.transport.push_readline(
+            b'enable1 ENABLE QRESYNC\r\n')
+        self.transport.push_write(
+            b'* ENABLED QRESYNC\r\n'
+            b'enable1 OK ENABLE completed.\r\n')
+        self.transport.push_readline(
+            b'select2 SELECT INBOX (QRESYNC (%i 3 101:104))\r\n'
+            % uid_validity)
+        self.transport.push_write(
+            b'* OK [CLOSED] Previous mailbox closed.\r\n'
+            b'* OK [PERMANENTFLAGS (\\Answered \\Deleted \\Draft '
+            b'\\Flagged \\Seen)] Flags permitted.\r\n'
+            b'* FLAGS (\\Answered \\Deleted \\Draft \\Flagged '
+            b'\\Recent \\Seen)\r\n'
+            b'* 3 EXISTS\r\n'
+            b'* 0 RECENT\r\n'
+            b'* OK [UIDNEXT 105] Predicted next UID.\r\n'
+            b'* OK [UIDVALIDITY %i] UIDs valid.\r\n' % uid_validity,
+            b'* OK [HIGHESTMODSEQ 8] Highest mailbox mod-sequence.\r\n'
+            b'* OK [UNSEEN 2] First unseen message.\r\n'
+            b'* VANISHED (EARLIER) 101\r\n'
+            b'* 2 FETCH (UID 103 FLAGS (\\Flagged) MODSEQ (4))\r\n'
+            b'* 3 FETCH (UID 104 FLAGS () MODSEQ (6))\r\n'
+            b'select2 OK [READ-WRITE] Selected mailbox.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_select_qresync_not_enabled(self):
+        self.transport.push_login()
+        self.transport.push_readline(
+            b'select1 SELECT INBOX (QRESYNC (1 1))\r\n')
+        self.transport.push_write(
+            b'select1 BAD QRESYNC must be enabled.\r\n')
+        self.transport.push_logout()
+        await self.run()
@@ -60,3 +60,22 @@ class TestCopy(TestBase):
         self.transport.push_logout()
 
         await self.run(concurrent)
+
+    async def test_copy_contents(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'copy1 COPY 2 Sent\r\n')
+        self.transport.push_write(
+            b'copy1 OK [COPYUID ', (br'\d+', ), b' 102 102]'
+            b' COPY completed.\r\n')
+        self.transport.push_select(b'Sent', 2, 1, unseen=False)
+        self.transport.push_readline(
+            b'fetch1 FETCH 2 (RFC822.SIZE BODY.PEEK[HEADER.FIELDS (SUBJECT)])'
+            b'\r\n')
+        self.transport.push_write(
+            b'* 2 FETCH (RFC822.SIZE 198 BODY[HEADER.FIELDS (SUBJECT)] {26}'
+            b'\r\nSubject: Random question\r\n)\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
@@ -0,0 +1,118 @@
+
+import pytest  # type: ignore
+
+from .base import TestBase
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestESearch(TestBase):
+
+    async def test_search_return(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'search1 SEARCH RETURN (MIN MAX COUNT) UNSEEN\r\n')
+        self.transport.push_write(
+            b'* ESEARCH (TAG "search1") COUNT 2 MAX 4 MIN 3\r\n'
+            b'search1 OK SEARCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_uid_search_return_all(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'search1 UID SEARCH RETURN () NOT FLAGGED\r\n')
+        self.transport.push_write(
+            b'* ESEARCH (TAG "search1") UID ALL 101:102,104\r\n'
+            b'search1 OK UID SEARCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_search_return_none(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'search1 SEARCH RETURN (MIN MAX COUNT ALL) '
+            b'SUBJECT "missing"\r\n')
+        self.transport.push_write(
+            b'* ESEARCH (TAG "search1") COUNT 0\r\n'
+            b'search1 OK SEARCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_search_save(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'search1 SEARCH RETURN (SAVE) UNSEEN\r\n')
+        self.transport.push_write(
+            b'search1 OK SEARCH completed.\r\n')
+        self.transport.push_readline(
+            b'fetch1 UID FETCH $ (FLAGS)\r\n')
+        self.transport.push_write(
+            b'* 3 FETCH (FLAGS (\\Flagged) UID 103)\r\n'
+            b'* 4 FETCH (FLAGS (\\Recent) UID 104)\r\n'
+            b'fetch1 OK UID FETCH completed.\r\n')
+        self.transport.push_readline(
+            b'search2 SEARCH $ FLAGGED\r\n')
+        self.transport.push_write(
+            b'* SEARCH 3\r\n'
+            b'search2 OK SEARCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_search_save_min(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'search1 SEARCH RETURN (MIN SAVE) SEEN\r\n')
+        self.transport.push_write(
+            b'* ESEARCH (TAG "search1") MIN 1\r\n'
+            b'search1 OK SEARCH completed.\r\n')
+        self.transport.push_readline(
+            b'store1 STORE $ +FLAGS.SILENT (\\Deleted)\r\n')
+        self.transport.push_write(
+            b'store1 OK STORE completed.\r\n')
+        self.transport.push_readline(
+            b'search2 SEARCH DELETED\r\n')
+        self.transport.push_write(
+            b'* SEARCH 1\r\n'
+            b'search2 OK SEARCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_search_save_expunged(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'search1 SEARCH RETURN (SAVE) SEEN\r\n')
+        self.transport.push_write(
+            b'search1 OK SEARCH completed.\r\n')
+        self.transport.push_readline(
+            b'store1 STORE 1 +FLAGS.SILENT (\\Deleted)\r\n')
+        self.transport.push_write(
+            b'store1 OK STORE completed.\r\n')
+        self.transport.push_readline(
+            b'expunge1 EXPUNGE\r\n')
+        self.transport.push_write(
+            b'* 1 EXPUNGE\r\n'
+            b'expunge1 OK EXPUNGE completed.\r\n')
+        self.transport.push_readline(
+            b'fetch1 FETCH $ (FLAGS)\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (FLAGS (\\Answered \\Seen))\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_fetch_saved_empty(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 FETCH $ (FLAGS)\r\n')
+        self.transport.push_write(
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
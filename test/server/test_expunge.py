@@ -58,7 +58,7 @@ class TestExpunge(TestBase):
             b'* 1 FETCH (UID 101 FLAGS (\\Seen))\r\n'
             b'* 2 FETCH (UID 102 FLAGS (\\Answered \\Seen))\r\n'
             b'* 3 FETCH (UID 103 FLAGS (\\Flagged))\r\n'
-            b'* 4 FETCH (UID 104 FLAGS (\\Deleted \\Recent))\r\n'
+            b'* 4 FETCH (UID 104 FLAGS (\\Recent))\r\n'
             b'fetch1 OK [EXPUNGEISSUED] FETCH completed.\r\n')
         concurrent.push_readline(
             b'store2 STORE 1:* +FLAGS (\\Flagged)\r\n')
@@ -66,7 +66,7 @@ class TestExpunge(TestBase):
             b'* 1 FETCH (FLAGS (\\Flagged \\Seen))\r\n'
             b'* 2 FETCH (FLAGS (\\Answered \\Flagged \\Seen))\r\n'
             b'* 3 FETCH (FLAGS (\\Flagged))\r\n'
-            b'* 4 FETCH (FLAGS (\\Deleted \\Flagged \\Recent))\r\n'
+            b'* 4 FETCH (FLAGS (\\Flagged \\Recent))\r\n'
             b'store2 OK [EXPUNGEISSUED] STORE completed.\r\n')
         concurrent.push_readline(
             b'search1 SEARCH ALL\r\n')
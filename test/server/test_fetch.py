@@ -1,6 +1,7 @@
 
 import pytest  # type: ignore
 
+from pymap.backend.dict import DictBackend, Config, Session
 from .base import TestBase
 
 pytestmark = pytest.mark.asyncio
@@ -22,6 +23,79 @@ class TestFetch(TestBase):
         self.transport.push_logout()
         await self.run()
 
+    async def test_uid_fetch_streamed(self, args):
+        self.config = Config(args, debug=True, reject_insecure_auth=False,
+                             stream_buffer_len=1, **Config.parse_args(args))
+        self.backend = DictBackend(Session.login, self.config)
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 UID FETCH 1:* (FLAGS)\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (FLAGS (\\Seen) UID 101)\r\n')
+        self.transport.push_write(
+            b'* 2 FETCH (FLAGS (\\Answered \\Seen) UID 102)\r\n')
+        self.transport.push_write(
+            b'* 3 FETCH (FLAGS (\\Flagged) UID 103)\r\n')
+        self.transport.push_write(
+            b'* 4 FETCH (FLAGS (\\Recent) UID 104)\r\n')
+        self.transport.push_write(
+            b'fetch1 OK UID FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+        fetch_drains = [data for data in self.transport.drained
+                        if b' FETCH (' in data]
+        assert 4 == len(fetch_drains)
+        assert all(1 == data.count(b'FETCH') for data in fetch_drains)
+
+    async def test_fetch_concurrent_append(self):
+        concurrent = self.new_transport()
+        event1, event2 = self.new_events(2)
+        message = b'test message\r\n'
+
+        concurrent.push_login()
+        concurrent.push_select(b'INBOX', 4, 1, set=event1)
+        concurrent.push_readline(
+            b'fetch1 FETCH 1:* (UID)\r\n', wait=event2)
+        concurrent.push_write(
+            b'* 1 FETCH (UID 101)\r\n'
+            b'* 2 FETCH (UID 102)\r\n'
+            b'* 3 FETCH (UID 103)\r\n'
+            b'* 4 FETCH (UID 104)\r\n'
+            b'* 5 EXISTS\r\n'
+            b'* 2 RECENT\r\n'
+            b'* 5 FETCH (FLAGS (\\Recent))\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        concurrent.push_logout()
+
+        self.transport.push_login(wait=event1)
+        self.transport.push_readline(
+            b'append1 APPEND INBOX {%i+}\r\n' % len(message))
+        self.transport.push_readexactly(message)
+        self.transport.push_readline(
+            b'\r\n')
+        self.transport.push_write(
+            b'append1 OK [APPENDUID ', (br'\d+', ), b' 105]'
+            b' APPEND completed.\r\n', set=event2)
+        self.transport.push_logout()
+
+        await self.run(concurrent)
+
+    async def test_uid_fetch_chunked(self, monkeypatch):
+        monkeypatch.setattr('pymap.backend.mailbox.FIND_CHUNK_SIZE', 3)
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 UID FETCH 1:* (FLAGS)\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (FLAGS (\\Seen) UID 101)\r\n'
+            b'* 2 FETCH (FLAGS (\\Answered \\Seen) UID 102)\r\n'
+            b'* 3 FETCH (FLAGS (\\Flagged) UID 103)\r\n'
+            b'* 4 FETCH (FLAGS (\\Recent) UID 104)\r\n'
+            b'fetch1 OK UID FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
     async def test_fetch_full(self):
         self.transport.push_login()
         self.transport.push_select(b'INBOX')
@@ -86,6 +86,64 @@ class TestIdle(TestBase):
 
         await self.run(concurrent)
 
+    async def test_concurrent_idle_many(self):
+        concurrent1 = self.new_transport()
+        concurrent2 = self.new_transport()
+        event1, event2, event3 = self.new_events(3)
+
+        concurrent1.push_login()
+        concurrent1.push_select(b'INBOX', 4, 1, 105)
+        concurrent1.push_readline(
+            b'idle1 IDLE\r\n')
+        concurrent1.push_write(
+            b'+ Idling.\r\n', set=event1)
+        concurrent1.push_readexactly(b'')
+        concurrent1.push_readline(
+            b'DONE\r\n', wait=event3)
+        concurrent1.push_write(
+            b'* 5 EXISTS\r\n')
+        concurrent1.push_write(
+            b'* 2 RECENT\r\n')
+        concurrent1.push_write(
+            b'* 5 FETCH (FLAGS (\\Recent \\Seen))\r\n')
+        concurrent1.push_write(
+            b'idle1 OK IDLE completed.\r\n')
+        concurrent1.push_logout()
+
+        concurrent2.push_login()
+        concurrent2.push_select(b'INBOX', 4, 0, 105, examine=True,
+                                wait=event1)
+        concurrent2.push_readline(
+            b'idle1 IDLE\r\n')
+        concurrent2.push_write(
+            b'+ Idling.\r\n', set=event2)
+        concurrent2.push_readexactly(b'')
+        concurrent2.push_readline(
+            b'DONE\r\n', wait=event3)
+        concurrent2.push_write(
+            b'* 5 EXISTS\r\n')
+        concurrent2.push_write(
+            b'* 5 FETCH (FLAGS (\\Seen))\r\n')
+        concurrent2.push_write(
+            b'idle1 OK IDLE completed.\r\n')
+        concurrent2.push_logout()
+
+        self.transport.push_login()
+        self.transport.push_readline(
+            b'append1 APPEND INBOX (\\Seen) {9}\r\n', wait=event2)
+        self.transport.push_write(
+            b'+ Literal string\r\n')
+        self.transport.push_readexactly(
+            b'testing\r\n')
+        self.transport.push_readline(
+            b'\r\n')
+        self.transport.push_write(
+            b'append1 OK [APPENDUID ', None, b' 105] APPEND completed.\r\n',
+            set=event3)
+        self.transport.push_logout()
+
+        await self.run(concurrent1, concurrent2)
+
     async def test_concurrent_idle_expunge(self):
         concurrent = self.new_transport()
         event1, event2 = self.new_events(2)
@@ -30,6 +30,33 @@ class TestMailbox(TestBase):
         self.transport.push_logout()
         await self.run()
 
+    async def test_list_status(self):
+        self.transport.push_login()
+        self.transport.push_readline(
+            b'list1 LIST "" * RETURN (STATUS (MESSAGES UNSEEN UIDNEXT))\r\n')
+        self.transport.push_write(
+            b'* LIST (\\HasNoChildren) "." INBOX\r\n'
+            b'* STATUS INBOX (MESSAGES 4 UNSEEN 2 UIDNEXT 105)\r\n'
+            b'* LIST (\\HasNoChildren) "." Sent\r\n'
+            b'* STATUS Sent (MESSAGES 1 UNSEEN 0 UIDNEXT 102)\r\n'
+            b'* LIST (\\HasNoChildren) "." Trash\r\n'
+            b'* STATUS Trash (MESSAGES 1 UNSEEN 1 UIDNEXT 102)\r\n'
+            b'list1 OK LIST completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_list_status_selected(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX', 4, 1, 105, 3)
+        self.transport.push_readline(
+            b'list1 LIST "" IN% RETURN (STATUS (MESSAGES RECENT))\r\n')
+        self.transport.push_write(
+            b'* LIST (\\HasNoChildren) "." INBOX\r\n'
+            b'* STATUS INBOX (MESSAGES 4 RECENT 1)\r\n'
+            b'list1 OK LIST completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
     async def test_create(self):
         self.transport.push_login()
         self.transport.push_readline(
@@ -246,6 +273,30 @@ class TestMailbox(TestBase):
         await self.run()
         assert self.matches['uidval1'] == self.matches['uidval2']
 
+    async def test_status_updated(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX', 4, 1, 105, 3)
+        self.transport.push_readline(
+            b'store1 STORE 3 +FLAGS.SILENT (\\Seen)\r\n')
+        self.transport.push_write(
+            b'store1 OK STORE completed.\r\n')
+        self.transport.push_readline(
+            b'store2 STORE 1 +FLAGS.SILENT (\\Deleted)\r\n')
+        self.transport.push_write(
+            b'store2 OK STORE completed.\r\n')
+        self.transport.push_readline(
+            b'close1 CLOSE\r\n')
+        self.transport.push_write(
+            b'close1 OK CLOSE completed.\r\n')
+        self.transport.push_readline(
+            b'status1 STATUS INBOX (MESSAGES RECENT UIDNEXT UNSEEN)\r\n')
+        self.transport.push_write(
+            b'* STATUS INBOX (MESSAGES 3 RECENT 0 UIDNEXT 105 UNSEEN 1)\r\n'
+            b'status1 OK STATUS completed.\r\n')
+        self.transport.push_select(b'INBOX', 3, 0, 105, 3)
+        self.transport.push_logout()
+        await self.run()
+
     async def test_append(self):
         message = b'test message\r\n'
         self.transport.push_login()
@@ -302,6 +353,36 @@ class TestMailbox(TestBase):
         self.transport.push_logout()
         await self.run()
 
+    async def test_append_spooled(self):
+        self.config.spool_literal_len = 10
+        message_1 = b'first spooled message\r\n'
+        message_2 = b'second spooled message\r\n'
+        self.transport.push_login()
+        self.transport.push_readline(
+            b'append1 APPEND INBOX {%i}\r\n' % len(message_1))
+        self.transport.push_write(
+            b'+ Literal string\r\n')
+        self.transport.push_readexactly(message_1)
+        self.transport.push_readline(
+            b' (\\Seen) {%i+}\r\n' % len(message_2))
+        self.transport.push_readexactly(message_2)
+        self.transport.push_readline(
+            b'\r\n')
+        self.transport.push_write(
+            b'append1 OK [APPENDUID ', (br'\d+', ), b' 105:106]'
+            b' APPEND completed.\r\n')
+        self.transport.push_select(b'INBOX', 6, 3, 107, 3)
+        self.transport.push_readline(
+            b'fetch1 UID FETCH 105:106 (BODY.PEEK[])\r\n')
+        self.transport.push_write(
+            b'* 5 FETCH (BODY[] {%i}\r\n' % len(message_1), message_1,
+            b' UID 105)\r\n'
+            b'* 6 FETCH (BODY[] {%i}\r\n' % len(message_2), message_2,
+            b' UID 106)\r\n'
+            b'fetch1 OK UID FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
     async def test_append_selected(self):
         message = b'test message\r\n'
         self.transport.push_login()
@@ -326,3 +407,32 @@ class TestMailbox(TestBase):
             b'status1 OK STATUS completed.\r\n')
         self.transport.push_logout()
         await self.run()
+
+    async def test_append_multi_selected(self):
+        message_1 = b'test message 1\r\n'
+        message_2 = b'test message 2\r\n'
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'append1 APPEND INBOX {%i+}\r\n' % len(message_1))
+        self.transport.push_readexactly(message_1)
+        self.transport.push_readline(
+            b' {%i+}\r\n' % len(message_2))
+        self.transport.push_readexactly(message_2)
+        self.transport.push_readline(
+            b'\r\n')
+        self.transport.push_write(
+            b'* 6 EXISTS\r\n'
+            b'* 3 RECENT\r\n'
+            b'* 5 FETCH (FLAGS (\\Recent))\r\n'
+            b'* 6 FETCH (FLAGS (\\Recent))\r\n'
+            b'append1 OK [APPENDUID ', (br'\d+', ), b' 105:106]'
+            b' APPEND completed.\r\n')
+        self.transport.push_readline(
+            b'fetch1 UID FETCH 105:* (MODSEQ)\r\n')
+        self.transport.push_write(
+            b'* 5 FETCH (MODSEQ (7) UID 105)\r\n'
+            b'* 6 FETCH (MODSEQ (7) UID 106)\r\n'
+            b'fetch1 OK UID FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
@@ -0,0 +1,72 @@
+
+import pytest  # type: ignore
+
+from .base import TestBase
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestMove(TestBase):
+
+    async def test_move(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'move1 MOVE 1:2 Sent\r\n')
+        self.transport.push_write(
+            b'* OK [COPYUID ', (br'\d+', ), b' 101:102 102:103] Moved.\r\n'
+            b'* 2 EXPUNGE\r\n'
+            b'* 1 EXPUNGE\r\n'
+            b'move1 OK MOVE completed.\r\n')
+        self.transport.push_select(b'Sent', 3, 2, unseen=False)
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_uid_move(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'move1 UID MOVE 102:103 Sent\r\n')
+        self.transport.push_write(
+            b'* OK [COPYUID ', (br'\d+', ), b' 102:103 102:103] Moved.\r\n'
+            b'* 3 EXPUNGE\r\n'
+            b'* 2 EXPUNGE\r\n'
+            b'move1 OK UID MOVE completed.\r\n')
+        self.transport.push_readline(
+            b'fetch1 FETCH 1:* (UID)\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (UID 101)\r\n'
+            b'* 2 FETCH (UID 104)\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_move_concurrent(self):
+        concurrent = self.new_transport()
+        event1, event2, event3 = self.new_events(3)
+
+        concurrent.push_login()
+        concurrent.push_select(b'Sent', 1, 0, unseen=False, set=event1)
+        concurrent.push_readline(
+            b'noop1 NOOP\r\n', wait=event2)
+        concurrent.push_write(
+            b'* 2 EXISTS\r\n'
+            b'* 1 RECENT\r\n'
+            b'* 2 FETCH (FLAGS (\\Answered \\Recent \\Seen))\r\n'
+            b'noop1 OK NOOP completed.\r\n', set=event3)
+        concurrent.push_logout()
+
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX', wait=event1)
+        self.transport.push_readline(
+            b'move1 MOVE 2 Sent\r\n')
+        self.transport.push_write(
+            b'* OK [COPYUID ', (br'\d+', ), b' 102 102] Moved.\r\n'
+            b'* 2 EXPUNGE\r\n'
+            b'move1 OK MOVE completed.\r\n', set=event2)
+        self.transport.push_readline(
+            b'noop1 NOOP\r\n', wait=event3)
+        self.transport.push_write(
+            b'noop1 OK NOOP completed.\r\n')
+        self.transport.push_logout()
+        await self.run(concurrent)
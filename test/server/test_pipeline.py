@@ -0,0 +1,129 @@
+
+import pytest  # type: ignore
+
+from .base import TestBase
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestPipeline(TestBase):
+
+    async def test_pipeline_fetch(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 FETCH 1:2 (UID)\r\n')
+        self.transport.push_readline(
+            b'status1 STATUS Sent (MESSAGES)\r\n')
+        self.transport.push_readline(
+            b'fetch2 UID FETCH 103:104 (FLAGS)\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (UID 101)\r\n'
+            b'* 2 FETCH (UID 102)\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_write(
+            b'* STATUS Sent (MESSAGES 1)\r\n'
+            b'status1 OK STATUS completed.\r\n')
+        self.transport.push_write(
+            b'* 3 FETCH (FLAGS (\\Flagged) UID 103)\r\n'
+            b'* 4 FETCH (FLAGS (\\Recent) UID 104)\r\n'
+            b'fetch2 OK UID FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_pipeline_set_seen(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 FETCH 3:4 (BODY[HEADER.FIELDS (SUBJECT)])\r\n')
+        self.transport.push_readline(
+            b'fetch2 FETCH 1:2 (UID)\r\n')
+        self.transport.push_readline(
+            b'search1 SEARCH UNSEEN\r\n')
+        self.transport.push_write(
+            b'* 3 FETCH (BODY[HEADER.FIELDS (SUBJECT)] {50}\r\n'
+            b'Subject: Important notice regarding your account\r\n)\r\n'
+            b'* 4 FETCH (BODY[HEADER.FIELDS (SUBJECT)] {24}\r\n'
+            b'Subject: Hello, World!\r\n)\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (UID 101)\r\n'
+            b'* 2 FETCH (UID 102)\r\n'
+            b'* 3 FETCH (FLAGS (\\Flagged \\Seen))\r\n'
+            b'* 4 FETCH (FLAGS (\\Recent \\Seen))\r\n'
+            b'fetch2 OK FETCH completed.\r\n')
+        self.transport.push_write(
+            b'* SEARCH\r\n'
+            b'search1 OK SEARCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_pipeline_overlapping_set_seen(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 FETCH 4 (BODY[HEADER.FIELDS (SUBJECT)])\r\n')
+        self.transport.push_readline(
+            b'fetch2 FETCH 4 (BODY[HEADER.FIELDS (SUBJECT)])\r\n')
+        self.transport.push_write(
+            b'* 4 FETCH (BODY[HEADER.FIELDS (SUBJECT)] {24}\r\n'
+            b'Subject: Hello, World!\r\n FLAGS (\\Recent \\Seen))\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_write(
+            b'* 4 FETCH (BODY[HEADER.FIELDS (SUBJECT)] {24}\r\n'
+            b'Subject: Hello, World!\r\n)\r\n'
+            b'fetch2 OK FETCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_pipeline_literal(self):
+        message = b'test message\r\n'
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 FETCH 1:2 (UID)\r\n')
+        self.transport.push_readline(
+            b'append1 APPEND INBOX {%i}\r\n' % len(message))
+        self.transport.push_write(
+            b'* 1 FETCH (UID 101)\r\n'
+            b'* 2 FETCH (UID 102)\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_write(
+            b'+ Literal string\r\n')
+        self.transport.push_readexactly(message)
+        self.transport.push_readline(
+            b'\r\n')
+        self.transport.push_write(
+            b'* 5 EXISTS\r\n'
+            b'* 2 RECENT\r\n'
+            b'* 5 FETCH (FLAGS (\\Recent))\r\n'
+            b'append1 OK [APPENDUID ', (br'\d+', ), b' 105]'
+            b' APPEND completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_pipeline_last_failed(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'fetch1 FETCH 3:4 (BODY[HEADER.FIELDS (SUBJECT)])\r\n')
+        self.transport.push_readline(
+            b'fetch2 UID FETCH 101:102 (UID)\r\n')
+        self.transport.push_readline(
+            b'status1 STATUS Nonexistent (MESSAGES)\r\n')
+        self.transport.push_write(
+            b'* 3 FETCH (BODY[HEADER.FIELDS (SUBJECT)] {50}\r\n'
+            b'Subject: Important notice regarding your account\r\n)\r\n'
+            b'* 4 FETCH (BODY[HEADER.FIELDS (SUBJECT)] {24}\r\n'
+            b'Subject: Hello, World!\r\n)\r\n'
+            b'fetch1 OK FETCH completed.\r\n')
+        self.transport.push_write(
+            b'* 1 FETCH (UID 101)\r\n'
+            b'* 2 FETCH (UID 102)\r\n'
+            b'* 3 FETCH (FLAGS (\\Flagged \\Seen) UID 103)\r\n'
+            b'* 4 FETCH (FLAGS (\\Recent \\Seen) UID 104)\r\n'
+            b'fetch2 OK UID FETCH completed.\r\n')
+        self.transport.push_write(
+            b'status1 NO [NONEXISTENT] Mailbox does not exist.\r\n')
+        self.transport.push_logout()
+        await self.run()
@@ -0,0 +1,94 @@
+
+import os
+from typing import Dict
+
+import pytest  # type: ignore
+
+from .base import TestBase, FakeArgs
+
+aioredis = pytest.importorskip('aioredis')
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeRedisArgs(FakeArgs):
+    address = os.environ.get('REDIS_ADDRESS', 'redis://localhost')
+    users_hash = None
+    users_key = 'pymap-test:{name}'
+    users_json = False
+
+
+class TestRedis(TestBase):
+
+    @classmethod
+    @pytest.fixture(autouse=True)
+    async def init_backend(cls, request, args):
+        from pymap.backend.redis import RedisBackend, Session
+        try:
+            redis = await aioredis.create_redis(args.address)
+        except OSError:
+            pytest.skip('redis server not available')
+        user_key = args.users_key.format(name=args.demo_user)
+        prefix = Session._get_prefix(args.demo_user)
+        await cls._cleanup(redis, user_key, prefix)
+        await redis.set(user_key, args.demo_password)
+        test = request.instance
+        test._fd = 1
+        test.backend = await RedisBackend.init(args)
+        test.config = test.backend.config
+        test.matches: Dict[str, bytes] = {}
+        test.transport = test.new_transport()
+        yield
+        await cls._cleanup(redis, user_key, prefix)
+        redis.close()
+        await redis.wait_closed()
+
+    @classmethod
+    async def _cleanup(cls, redis, user_key, prefix):
+        keys = await redis.keys(prefix + b'*')
+        await redis.delete(user_key, *keys)
+
+    @pytest.fixture
+    def args(self):
+        return FakeRedisArgs()
+
+    async def test_store_unseen(self):
+        message = b'test message\r\n'
+        self.transport.push_login()
+        self.transport.push_readline(
+            b'append1 APPEND INBOX {%i+}\r\n' % len(message))
+        self.transport.push_readexactly(message)
+        self.transport.push_readline(
+            b' {%i+}\r\n' % len(message))
+        self.transport.push_readexactly(message)
+        self.transport.push_readline(
+            b'\r\n')
+        self.transport.push_write(
+            b'append1 OK [APPENDUID ', (br'\d+', ), b' 1:2]'
+            b' APPEND completed.\r\n')
+        self.transport.push_select(b'INBOX', 2, 2, 3, 1)
+        self.transport.push_readline(
+            b'store1 STORE 1 +FLAGS.SILENT (\\Seen \\Deleted)\r\n')
+        self.transport.push_write(
+            b'store1 OK STORE completed.\r\n')
+        self.transport.push_readline(
+            b'search1 SEARCH UNSEEN\r\n')
+        self.transport.push_write(
+            b'* SEARCH 2\r\n'
+            b'search1 OK SEARCH completed.\r\n')
+        self.transport.push_readline(
+            b'search2 SEARCH DELETED\r\n')
+        self.transport.push_write(
+            b'* SEARCH 1\r\n'
+            b'search2 OK SEARCH completed.\r\n')
+        self.transport.push_readline(
+            b'store2 STORE 1 -FLAGS.SILENT (\\Seen)\r\n')
+        self.transport.push_write(
+            b'store2 OK STORE completed.\r\n')
+        self.transport.push_readline(
+            b'search3 SEARCH UNSEEN\r\n')
+        self.transport.push_write(
+            b'* SEARCH 1 2\r\n'
+            b'search3 OK SEARCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
@@ -214,3 +214,48 @@ class TestSearch(TestBase):
             b'search1 OK SEARCH completed.\r\n')
         self.transport.push_logout()
         await self.run()
+
+    async def test_search_text_short(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'search1 SEARCH TEXT "WO"\r\n')
+        self.transport.push_write(
+            b'* SEARCH 4\r\n'
+            b'search1 OK SEARCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_search_text_none(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'search1 SEARCH OR TEXT "xyzzy" BODY "plugh"\r\n')
+        self.transport.push_write(
+            b'* SEARCH\r\n'
+            b'search1 OK SEARCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_search_unseen_from(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'search1 SEARCH UNSEEN FROM "corp@example.com"\r\n')
+        self.transport.push_write(
+            b'* SEARCH 3\r\n'
+            b'search1 OK SEARCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_search_since_size_or(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'search1 SEARCH SINCE 01-Jan-2000 SMALLER 1000 '
+            b'OR TEXT "WORLD" FROM "corp@example.com"\r\n')
+        self.transport.push_write(
+            b'* SEARCH 3\r\n'
+            b'search1 OK SEARCH completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
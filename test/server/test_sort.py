@@ -0,0 +1,145 @@
+
+import pytest  # type: ignore
+
+from pymap.backend.dict.mailbox import MailboxData
+from pymap.parsing.specials import FetchRequirement
+
+from .base import TestBase
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestSort(TestBase):
+
+    async def test_sort_subject(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'sort1 SORT (SUBJECT) UTF-8 ALL\r\n')
+        self.transport.push_write(
+            b'* SORT 4 3 1 2\r\n'
+            b'sort1 OK SORT completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_sort_reverse_size(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'sort1 SORT (REVERSE SIZE) UTF-8 ALL\r\n')
+        self.transport.push_write(
+            b'* SORT 4 3 2 1\r\n'
+            b'sort1 OK SORT completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_sort_size_headers_only(self, monkeypatch):
+        requirements = []
+        get_many = MailboxData.get_many
+
+        async def _get_many(self, uids, requirement, *args):
+            requirements.append(requirement)
+            return await get_many(self, uids, requirement, *args)
+
+        monkeypatch.setattr(MailboxData, 'get_many', _get_many)
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'sort1 SORT (SIZE) UTF-8 ALL\r\n')
+        self.transport.push_write(
+            b'* SORT 1 2 3 4\r\n'
+            b'sort1 OK SORT completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+        assert FetchRequirement.HEADERS in requirements
+        assert FetchRequirement.BODY not in requirements
+
+    async def test_sort_multiple(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'sort1 SORT (FROM REVERSE DATE) UTF-8 ALL\r\n')
+        self.transport.push_write(
+            b'* SORT 3 4 2 1\r\n'
+            b'sort1 OK SORT completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_uid_sort_search(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'sort1 UID SORT (REVERSE ARRIVAL) US-ASCII NOT FLAGGED\r\n')
+        self.transport.push_write(
+            b'* SORT 104 102 101\r\n'
+            b'sort1 OK UID SORT completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_sort_none(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'sort1 SORT (DATE) UTF-8 SUBJECT "missing"\r\n')
+        self.transport.push_write(
+            b'* SORT\r\n'
+            b'sort1 OK SORT completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_sort_expunged(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'sort1 SORT (SUBJECT) UTF-8 ALL\r\n')
+        self.transport.push_write(
+            b'* SORT 4 3 1 2\r\n'
+            b'sort1 OK SORT completed.\r\n')
+        self.transport.push_readline(
+            b'store1 STORE 3 +FLAGS.SILENT (\\Deleted)\r\n')
+        self.transport.push_write(
+            b'store1 OK STORE completed.\r\n')
+        self.transport.push_readline(
+            b'expunge1 EXPUNGE\r\n')
+        self.transport.push_write(
+            b'* 3 EXPUNGE\r\n'
+            b'expunge1 OK EXPUNGE completed.\r\n')
+        self.transport.push_readline(
+            b'sort2 SORT (SUBJECT) UTF-8 ALL\r\n')
+        self.transport.push_write(
+            b'* SORT 3 1 2\r\n'
+            b'sort2 OK SORT completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_sort_bad_key(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'sort1 SORT (COLOR) UTF-8 ALL\r\n')
+        self.transport.push_write(
+            b'sort1 BAD SORT: Invalid arguments.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_thread_orderedsubject(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'thread1 THREAD ORDEREDSUBJECT UTF-8 ALL\r\n')
+        self.transport.push_write(
+            b'* THREAD (1 2)(3)(4)\r\n'
+            b'thread1 OK THREAD completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
+
+    async def test_uid_thread_references(self):
+        self.transport.push_login()
+        self.transport.push_select(b'INBOX')
+        self.transport.push_readline(
+            b'thread1 UID THREAD REFERENCES UTF-8 ALL\r\n')
+        self.transport.push_write(
+            b'* THREAD (102 101)(103)(104)\r\n'
+            b'thread1 OK UID THREAD completed.\r\n')
+        self.transport.push_logout()
+        await self.run()
@@ -0,0 +1,105 @@
+
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from pymap.backend.maildir.counters import MaildirCounters
+from pymap.counters import MailboxCounters
+
+
+class TestMailboxCounters(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.counters = counters = MailboxCounters()
+        counters.add(1, True, False)
+        counters.add(3, False, False)
+        counters.add(5, False, True)
+        counters.add(7, True, True)
+
+    def _counts(self):
+        counters = self.counters
+        return (counters.exists, counters.recent, counters.unseen,
+                counters.first_unseen)
+
+    def test_add(self) -> None:
+        self.assertEqual((4, 2, 2, 2), self._counts())
+        self.assertEqual({5, 7}, self.counters.recent_uids)
+        self.assertEqual([(1, True, False), (3, False, False),
+                          (5, False, True), (7, True, True)],
+                         list(self.counters))
+
+    def test_remove(self) -> None:
+        self.counters.remove([3, 7, 9])
+        self.assertEqual((2, 1, 1, 2), self._counts())
+        self.counters.remove([5])
+        self.assertEqual((1, 0, 0, None), self._counts())
+
+    def test_set_seen(self) -> None:
+        self.counters.set_seen(3, True)
+        self.assertEqual((4, 2, 1, 3), self._counts())
+        self.counters.set_seen(1, False)
+        self.assertEqual((4, 2, 2, 1), self._counts())
+        self.counters.set_seen(9, False)
+        self.assertEqual((4, 2, 2, 1), self._counts())
+
+    def test_claim_recent(self) -> None:
+        self.assertEqual([5, 7], self.counters.claim_recent())
+        self.assertEqual((4, 0, 2, 2), self._counts())
+        self.assertEqual([], self.counters.claim_recent())
+
+
+class TestMaildirCounters(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.base_dir = self.tmp_dir.name
+        os.mkdir(os.path.join(self.base_dir, 'tmp'))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_default(self) -> None:
+        counts = MaildirCounters.file_open(self.base_dir)
+        self.assertFalse(counts.is_current(1, 1))
+        self.assertEqual((0, 0, 0, None), counts.counts)
+
+    def test_write(self) -> None:
+        counts = MaildirCounters.file_read(self.base_dir)
+        counts.reset(123, 4, [(2, False, True), (1, True, False)])
+        counts.file_write()
+        opened = MaildirCounters.file_open(self.base_dir)
+        self.assertTrue(opened.is_current(123, 4))
+        self.assertFalse(opened.is_current(123, 5))
+        self.assertEqual((2, 1, 1, 2), opened.counts)
+        self.assertTrue(opened.set_seen([(2, True)]))
+        self.assertEqual((2, 1, 0, None), opened.counts)
+        with open(os.path.join(self.base_dir, 'pymap-counters')) as in_file:
+            self.assertEqual(1, len(in_file.readlines()))
+
+    def test_add(self) -> None:
+        counts = MaildirCounters(self.base_dir)
+        counts.add([(1, True, False), (3, False, False)])
+        counts.add([(5, False, True), (7, True, True)])
+        self.assertEqual((4, 2, 2, 2), counts.counts)
+        counts.claim_recent()
+        self.assertEqual((4, 0, 2, 2), counts.counts)
+
+    def test_remove(self) -> None:
+        counts = MaildirCounters(self.base_dir)
+        counts.add([(1, True, False), (3, False, False), (5, False, True),
+                    (7, True, True)])
+        self.assertTrue(counts.remove([(1, True, False), (7, True, True)]))
+        self.assertEqual((2, 1, 2, 1), counts.counts)
+        self.assertFalse(counts.remove([(3, False, False)]))
+        self.assertTrue(counts.remove([(5, False, True)]))
+        self.assertEqual((0, 0, 0, None), counts.counts)
+
+    def test_set_seen(self) -> None:
+        counts = MaildirCounters(self.base_dir)
+        counts.add([(1, True, False), (3, False, False), (5, False, True)])
+        self.assertTrue(counts.set_seen([(5, True)]))
+        self.assertEqual((3, 1, 1, 2), counts.counts)
+        self.assertTrue(counts.set_seen([(5, False)]))
+        self.assertEqual((3, 1, 2, 2), counts.counts)
+        self.assertFalse(counts.set_seen([(1, False)]))
+        self.assertFalse(counts.set_seen([(3, True)]))
@@ -0,0 +1,123 @@
+import pickle
+import unittest
+
+from pymap.flags import FlagOp, FlagSet, PermanentFlags, SessionFlags
+from pymap.parsing.specials.flag import Flag, Seen, Flagged, Deleted, \
+    Recent, Wildcard
+
+_Keyword = Flag(b'$Keyword')
+
+
+class TestFlagSet(unittest.TestCase):
+
+    def test_interned(self) -> None:
+        set1 = FlagSet([Seen, _Keyword])
+        set2 = FlagSet([_Keyword, Seen, Seen])
+        self.assertIs(set1, set2)
+        self.assertIs(set1, FlagSet(set1))
+        self.assertEqual(frozenset([Seen, _Keyword]), set1)
+        self.assertEqual(set1, frozenset([Seen, _Keyword]))
+        self.assertEqual(hash(frozenset([Seen, _Keyword])), hash(set1))
+        self.assertNotEqual(FlagSet([Seen]), set1)
+        self.assertEqual(0, FlagSet().mask)
+        self.assertEqual(FlagSet.mask_of(Seen) | FlagSet.mask_of(_Keyword),
+                         set1.mask)
+
+    def test_mask_of_unknown(self) -> None:
+        unknown = Flag(b'$NeverStored')
+        self.assertEqual(0, FlagSet.mask_of(unknown))
+        self.assertNotIn(unknown, FlagSet._bits)
+
+    def test_max_interned(self) -> None:
+        orig_max = FlagSet.max_interned
+        FlagSet.max_interned = len(FlagSet._interned)
+        try:
+            set1 = FlagSet([Seen, Flag(b'$NotInterned')])
+            set2 = FlagSet([Seen, Flag(b'$NotInterned')])
+        finally:
+            FlagSet.max_interned = orig_max
+        self.assertIsNot(set1, set2)
+        self.assertEqual(set1, set2)
+        self.assertNotIn(set1.mask, FlagSet._interned)
+
+    def test_max_bits(self) -> None:
+        orig_max = FlagSet.max_bits
+        FlagSet.max_bits = len(FlagSet._flags)
+        try:
+            self._test_max_bits()
+        finally:
+            FlagSet.max_bits = orig_max
+
+    def _test_max_bits(self) -> None:
+        extra1 = Flag(b'$NoBit1')
+        extra2 = Flag(b'$NoBit2')
+        set1 = FlagSet([Seen, extra1])
+        set2 = FlagSet([extra1, extra2, Flagged])
+        self.assertNotIn(extra1, FlagSet._bits)
+        self.assertEqual(0, FlagSet.mask_of(extra1))
+        self.assertIn(extra1, set1)
+        self.assertEqual(FlagSet([Seen, extra1]), set1)
+        self.assertEqual({Seen, extra1, extra2, Flagged}, set1 | set2)
+        self.assertEqual({extra1}, set1 & set2)
+        self.assertEqual({Seen}, set1 - set2)
+        self.assertEqual({Seen, extra2, Flagged}, set1 ^ set2)
+        self.assertEqual({Seen, extra1, Deleted},
+                         FlagOp.ADD.apply(set1, {Deleted}))
+        self.assertEqual({Seen}, FlagOp.DELETE.apply(set1, {extra1}))
+        self.assertIsInstance(set1 | set2, FlagSet)
+        self.assertIs(FlagSet([Seen]), set1 - set2)
+
+    def test_operators(self) -> None:
+        set1 = FlagSet([Seen, Flagged])
+        set2 = FlagSet([Flagged, Deleted])
+        self.assertIsInstance(set1 | set2, FlagSet)
+        self.assertEqual({Seen, Flagged, Deleted}, set1 | set2)
+        self.assertEqual({Flagged}, set1 & set2)
+        self.assertEqual({Seen}, set1 - set2)
+        self.assertEqual({Seen, Deleted}, set1 ^ set2)
+        self.assertIsInstance(frozenset([Recent]) | set1, FlagSet)
+        self.assertEqual({Seen, Flagged, Recent}, frozenset([Recent]) | set1)
+        self.assertEqual({Deleted}, frozenset([Seen, Deleted]) - set1)
+        self.assertEqual({Seen}, set1 & {Seen, Recent})
+        self.assertIn(Seen, set1)
+        self.assertNotIn(Deleted, set1)
+        self.assertEqual([Flagged, Seen], sorted(set1))
+
+    def test_pickle(self) -> None:
+        set1 = FlagSet([Seen, _Keyword])
+        self.assertIs(set1, pickle.loads(pickle.dumps(set1)))
+
+
+class TestFlagOp(unittest.TestCase):
+
+    def test_apply(self) -> None:
+        flags = frozenset([Seen, Flagged])
+        self.assertEqual({Seen, Flagged, Deleted},
+                         FlagOp.ADD.apply(flags, {Deleted}))
+        self.assertEqual({Seen}, FlagOp.DELETE.apply(flags, {Flagged}))
+        self.assertEqual({Deleted}, FlagOp.REPLACE.apply(flags, {Deleted}))
+        self.assertIsInstance(FlagOp.ADD.apply(flags, {Deleted}), FlagSet)
+
+
+class TestPermanentFlags(unittest.TestCase):
+
+    def test_intersect(self) -> None:
+        perm_flags = PermanentFlags([Seen, Flagged, Recent])
+        self.assertEqual({Seen, Flagged}, perm_flags.defined)
+        self.assertEqual({Seen}, perm_flags & [Seen, _Keyword])
+        wildcard = PermanentFlags([Seen, Wildcard])
+        self.assertEqual({Seen, _Keyword}, wildcard & [Seen, _Keyword])
+
+
+class TestSessionFlags(unittest.TestCase):
+
+    def test_update(self) -> None:
+        session_flags = SessionFlags([_Keyword])
+        session_flags.add_recent(1)
+        self.assertEqual({Recent}, session_flags.get(1))
+        self.assertEqual(set(), session_flags.get(2))
+        session_flags.update(2, [_Keyword, Seen], FlagOp.ADD)
+        self.assertEqual({_Keyword}, session_flags.get(2))
+        session_flags.update(2, [_Keyword], FlagOp.DELETE)
+        self.assertEqual(set(), session_flags.get(2))
+        self.assertNotIn(2, session_flags.flags)
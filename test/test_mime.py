@@ -4,6 +4,12 @@ import unittest
 from pymap.mime import MessageContent
 
 
+class _Parts(list):
+
+    def write(self, data) -> None:
+        self.append(data)
+
+
 class TestMessageContents(unittest.TestCase):
 
     def test_parse(self) -> None:
@@ -78,3 +84,11 @@ class TestMessageContents(unittest.TestCase):
         self.assertEqual(part2, bytes(msg.body.nested[1]))
         self.assertEqual({b'content-type': ['text/html']},
                          msg.body.nested[1].header.parsed)
+
+    def test_write(self) -> None:
+        raw = b'subject: hello\n\nbody text\n'
+        msg = MessageContent.parse(raw)
+        parts = _Parts()
+        msg.write(parts)
+        self.assertTrue(all(isinstance(part, memoryview) for part in parts))
+        self.assertEqual(raw, b''.join(parts))
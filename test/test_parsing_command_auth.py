@@ -5,7 +5,9 @@ from datetime import datetime, timezone
 from pymap.parsing import Params
 from pymap.parsing.exceptions import NotParseable
 from pymap.parsing.command.auth import CreateCommand, AppendCommand, \
-    ListCommand, RenameCommand, StatusCommand
+    CompressCommand, EnableCommand, ListCommand, LSubCommand, \
+    RenameCommand, \
+    SelectCommand, StatusCommand
 from pymap.parsing.specials import StatusAttribute, Flag
 
 
@@ -62,6 +64,18 @@ class TestAppendCommand(unittest.TestCase):
         self.assertEqual(b'[TOOBIG]', bytes(raised.exception.code))
 
 
+class TestCompressCommand(unittest.TestCase):
+
+    def test_parse(self):
+        ret, buf = CompressCommand.parse(b' deflate\n  ', Params())
+        self.assertEqual(b'DEFLATE', ret.algorithm)
+        self.assertEqual(b'  ', buf)
+
+    def test_parse_failure(self):
+        with self.assertRaises(NotParseable):
+            CompressCommand.parse(b'\n', Params())
+
+
 class TestListCommand(unittest.TestCase):
 
     def test_parse(self):
@@ -76,6 +90,23 @@ class TestListCommand(unittest.TestCase):
         self.assertEqual('two*', ret.filter)
         self.assertEqual(b'  ', buf)
 
+    def test_parse_return_status(self):
+        ret, buf = ListCommand.parse(
+            b' "" * RETURN (STATUS (MESSAGES unseen))\n  ', Params())
+        self.assertEqual('*', ret.filter)
+        self.assertEqual([b'MESSAGES', b'UNSEEN'],
+                         [attr.value for attr in ret.status_list])
+        self.assertEqual(b'  ', buf)
+
+    def test_parse_return_invalid(self):
+        with self.assertRaises(NotParseable):
+            ListCommand.parse(b' "" * RETURN (STATUS ())\n', Params())
+        with self.assertRaises(NotParseable):
+            ListCommand.parse(b' "" * RETURN (SUBSCRIBED)\n', Params())
+        with self.assertRaises(NotParseable):
+            LSubCommand.parse(b' "" * RETURN (STATUS (MESSAGES))\n',
+                              Params())
+
 
 class TestRenameCommand(unittest.TestCase):
 
@@ -101,3 +132,44 @@ class TestStatusCommand(unittest.TestCase):
     def test_parse_error(self):
         with self.assertRaises(NotParseable):
             StatusCommand.parse(b' mbx ()\n', Params())
+
+
+class TestEnableCommand(unittest.TestCase):
+
+    def test_parse(self):
+        ret, buf = EnableCommand.parse(b' condstore QRESYNC\n  ', Params())
+        self.assertEqual([b'CONDSTORE', b'QRESYNC'], ret.capabilities)
+        self.assertEqual(b'  ', buf)
+
+    def test_parse_error(self):
+        with self.assertRaises(NotParseable):
+            EnableCommand.parse(b'\n', Params())
+
+
+class TestSelectCommand(unittest.TestCase):
+
+    def test_parse(self):
+        ret, buf = SelectCommand.parse(b' mbx\n  ', Params())
+        self.assertEqual('mbx', ret.mailbox)
+        self.assertFalse(ret.condstore)
+        self.assertIsNone(ret.qresync)
+        self.assertEqual(b'  ', buf)
+
+    def test_parse_condstore(self):
+        ret, buf = SelectCommand.parse(b' mbx (CONDSTORE)\n  ', Params())
+        self.assertTrue(ret.condstore)
+        self.assertEqual(b'  ', buf)
+
+    def test_parse_qresync(self):
+        ret, buf = SelectCommand.parse(
+            b' mbx (QRESYNC (67890007 20050715194045000 41,43:211))\n  ',
+            Params())
+        self.assertIsNotNone(ret.qresync)
+        self.assertEqual(67890007, ret.qresync.uid_validity)
+        self.assertEqual(20050715194045000, ret.qresync.mod_sequence)
+        self.assertEqual(b'41,43:211', bytes(ret.qresync.known_uids))
+        self.assertEqual(b'  ', buf)
+
+    def test_parse_qresync_error(self):
+        with self.assertRaises(NotParseable):
+            SelectCommand.parse(b' mbx (QRESYNC (abc 1))\n', Params())
@@ -7,7 +7,8 @@ from pymap.parsing.exceptions import NotParseable
 from pymap.parsing.command.select import ExpungeCommand, CopyCommand, \
     FetchCommand, StoreCommand, SearchCommand, UidExpungeCommand, \
     UidCopyCommand, UidFetchCommand, UidStoreCommand, UidSearchCommand, \
-    IdleCommand
+    IdleCommand, MoveCommand, UidMoveCommand, SortCommand, UidSortCommand, \
+    ThreadCommand, UidThreadCommand
 from pymap.parsing.specials import FetchAttribute, SearchKey, Flag
 
 
@@ -42,6 +43,22 @@ class TestCopyCommand(unittest.TestCase):
         self.assertTrue(ret.sequence_set.uid)
 
 
+class TestMoveCommand(unittest.TestCase):
+
+    def test_parse(self):
+        ret, buf = MoveCommand.parse(b' 1,2,3 mbx\n  ', Params())
+        self.assertFalse(ret.uid)
+        self.assertFalse(ret.sequence_set.uid)
+        self.assertEqual([1, 2, 3], ret.sequence_set.value)
+        self.assertEqual('mbx', ret.mailbox)
+        self.assertEqual(b'  ', buf)
+
+    def test_parse_uid(self):
+        ret, buf = UidMoveCommand.parse(b' 1,2,3 mbx\n  ', Params())
+        self.assertTrue(ret.uid)
+        self.assertTrue(ret.sequence_set.uid)
+
+
 class TestFetchCommand(unittest.TestCase):
 
     def test_parse(self):
@@ -92,6 +109,23 @@ class TestFetchCommand(unittest.TestCase):
                               FetchAttribute(b'RFC822.SIZE')], ret.attributes)
         self.assertEqual(b'  ', buf)
 
+    def test_parse_changedsince(self):
+        ret, buf = UidFetchCommand.parse(
+            b' 1:* (FLAGS) (CHANGEDSINCE 12345 VANISHED)\n  ', Params())
+        self.assertEqual(12345, ret.changed_since)
+        self.assertTrue(ret.vanished)
+        self.assertListEqual([FetchAttribute(b'FLAGS'),
+                              FetchAttribute(b'UID'),
+                              FetchAttribute(b'MODSEQ')], ret.attributes)
+        self.assertEqual(b'  ', buf)
+
+    def test_parse_vanished_error(self):
+        with self.assertRaises(NotParseable):
+            UidFetchCommand.parse(b' 1:* (FLAGS) (VANISHED)\n', Params())
+        with self.assertRaises(NotParseable):
+            FetchCommand.parse(
+                b' 1:* (FLAGS) (CHANGEDSINCE 1 VANISHED)\n', Params())
+
 
 class TestStoreCommand(unittest.TestCase):
 
@@ -120,6 +154,13 @@ class TestStoreCommand(unittest.TestCase):
         self.assertFalse(ret.silent)
         self.assertEqual(b'  ', buf)
 
+    def test_parse_unchangedsince(self):
+        ret, buf = StoreCommand.parse(
+            b' 1,2,3 (UNCHANGEDSINCE 12345) +FLAGS (\\Seen)\n  ', Params())
+        self.assertEqual(12345, ret.unchanged_since)
+        self.assertEqual(FlagOp.ADD, ret.mode)
+        self.assertEqual(b'  ', buf)
+
     def test_parse_error(self):
         with self.assertRaises(NotParseable):
             StoreCommand.parse(b' 1,2,3 TEST (\\Seen)\n', Params())
@@ -157,6 +198,74 @@ class TestSearchCommand(unittest.TestCase):
         with self.assertRaises(NotParseable):
             SearchCommand.parse(b' TEST\n', Params())
 
+    def test_parse_return(self):
+        ret, buf = SearchCommand.parse(
+            b' RETURN (MIN COUNT SAVE) ALL\n  ', Params())
+        self.assertEqual({b'MIN', b'COUNT'}, ret.returns)
+        self.assertTrue(ret.save)
+        self.assertSetEqual({SearchKey(b'ALL')}, ret.keys)
+        self.assertEqual(b'  ', buf)
+
+    def test_parse_return_empty(self):
+        ret, buf = SearchCommand.parse(b' RETURN () ALL\n  ', Params())
+        self.assertEqual({b'ALL'}, ret.returns)
+        self.assertFalse(ret.save)
+
+    def test_parse_return_error(self):
+        with self.assertRaises(NotParseable):
+            SearchCommand.parse(b' RETURN (TEST) ALL\n', Params())
+        with self.assertRaises(NotParseable):
+            SearchCommand.parse(b' RETURN ALL\n', Params())
+
+
+class TestSortCommand(unittest.TestCase):
+
+    def test_parse(self):
+        ret, buf = SortCommand.parse(
+            b' (REVERSE date SUBJECT) UTF-8 ALL\n  ', Params())
+        self.assertFalse(ret.uid)
+        self.assertEqual([(b'DATE', True), (b'SUBJECT', False)],
+                         ret.criteria)
+        self.assertSetEqual({SearchKey(b'ALL')}, ret.keys)
+        self.assertEqual('UTF-8', ret.charset)
+        self.assertEqual(b'  ', buf)
+
+    def test_parse_uid(self):
+        ret, buf = UidSortCommand.parse(b' (SIZE) UTF-8 ALL\n  ', Params())
+        self.assertTrue(ret.uid)
+
+    def test_parse_error(self):
+        with self.assertRaises(NotParseable):
+            SortCommand.parse(b' (REVERSE) UTF-8 ALL\n', Params())
+        with self.assertRaises(NotParseable):
+            SortCommand.parse(b' (TEST) UTF-8 ALL\n', Params())
+        with self.assertRaises(NotParseable):
+            SortCommand.parse(b' () UTF-8 ALL\n', Params())
+        with self.assertRaises(NotParseable):
+            SortCommand.parse(b' (DATE) ALL\n', Params())
+        with self.assertRaises(NotParseable):
+            SortCommand.parse(b' (DATE) test ALL\n', Params())
+
+
+class TestThreadCommand(unittest.TestCase):
+
+    def test_parse(self):
+        ret, buf = ThreadCommand.parse(b' references UTF-8 ALL\n  ', Params())
+        self.assertFalse(ret.uid)
+        self.assertEqual(b'REFERENCES', ret.algorithm)
+        self.assertSetEqual({SearchKey(b'ALL')}, ret.keys)
+        self.assertEqual('UTF-8', ret.charset)
+        self.assertEqual(b'  ', buf)
+
+    def test_parse_uid(self):
+        ret, buf = UidThreadCommand.parse(
+            b' ORDEREDSUBJECT UTF-8 ALL\n  ', Params())
+        self.assertTrue(ret.uid)
+
+    def test_parse_error(self):
+        with self.assertRaises(NotParseable):
+            ThreadCommand.parse(b' TEST UTF-8 ALL\n', Params())
+
 
 class TestIdleCommand(unittest.TestCase):
 
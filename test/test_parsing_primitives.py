@@ -5,6 +5,7 @@ from pymap.parsing import Params
 from pymap.parsing.exceptions import NotParseable, RequiresContinuation
 from pymap.parsing.primitives import Nil, Number, Atom, String, QuotedString, \
     LiteralString, ListP
+from pymap.spool import SpooledLiteral
 
 
 class TestNil(unittest.TestCase):
@@ -107,6 +108,26 @@ class TestString(unittest.TestCase):
         self.assertEqual(b'', ret.value)
         self.assertEqual(b'abc', buf)
 
+    def test_literal_spooled(self):
+        spooled = SpooledLiteral()
+        spooled.append(b'test')
+        spooled.append(b'\x01')
+        spooled.finish()
+        ret, buf = String.parse(
+            b'{5}\r\n', Params(continuations=[spooled, memoryview(b'abc')]))
+        self.assertIsInstance(ret, LiteralString)
+        self.assertIs(spooled, ret.spooled)
+        self.assertEqual(b'test\x01', ret.value)
+        self.assertEqual(b'{5}\r\ntest\x01', bytes(ret))
+        self.assertEqual(b'abc', buf)
+
+    def test_literal_spooled_failure(self):
+        spooled = SpooledLiteral()
+        spooled.append(b'test')
+        spooled.finish()
+        with self.assertRaises(NotParseable):
+            String.parse(b'{5}\r\n', Params(continuations=[spooled, b'']))
+
     def test_literal_plus(self):
         ret, buf = String.parse(b'{5+}\r\ntest\x01abc', Params())
         self.assertIsInstance(ret, LiteralString)
@@ -2,7 +2,7 @@
 import unittest
 
 from pymap.parsing.response.code import Capability, PermanentFlags, UidNext, \
-    UidValidity, Unseen, AppendUid, CopyUid
+    UidValidity, Unseen, AppendUid, CopyUid, HighestModSeq, Modified
 
 
 class TestCapability(unittest.TestCase):
@@ -56,3 +56,17 @@ class TestCopyUid(unittest.TestCase):
     def test_bytes(self):
         code = CopyUid(12345, [(1, 100), (2, 101), (3, 102), (5, 103)])
         self.assertEqual(b'[COPYUID 12345 1:3,5 100:103]', bytes(code))
+
+
+class TestHighestModSeq(unittest.TestCase):
+
+    def test_bytes(self):
+        code = HighestModSeq(715194045007)
+        self.assertEqual(b'[HIGHESTMODSEQ 715194045007]', bytes(code))
+
+
+class TestModified(unittest.TestCase):
+
+    def test_bytes(self):
+        code = Modified([7, 9, 10, 11])
+        self.assertEqual(b'[MODIFIED 7,9:11]', bytes(code))
@@ -3,8 +3,9 @@ import unittest
 
 from pymap.parsing.response.specials import FlagsResponse, ExistsResponse, \
     RecentResponse, ExpungeResponse, FetchResponse, SearchResponse, \
-    ESearchResponse, ListResponse, LSubResponse
-from pymap.parsing.specials import FetchAttribute
+    ESearchResponse, SortResponse, ThreadNode, ThreadResponse, ListResponse, \
+    LSubResponse, VanishedResponse
+from pymap.parsing.specials import FetchAttribute, SequenceSet
 
 
 class TestFlagsResponse(unittest.TestCase):
@@ -48,12 +49,50 @@ class TestSearchResponse(unittest.TestCase):
         resp = SearchResponse([4, 8, 15, 16, 23, 42])
         self.assertEqual(b'* SEARCH 4 8 15 16 23 42\r\n', bytes(resp))
 
+    def test_bytes_mod_sequence(self):
+        resp = SearchResponse([2, 5], 917162500)
+        self.assertEqual(b'* SEARCH 2 5 (MODSEQ 917162500)\r\n', bytes(resp))
+
 
 class TestESearchResponse(unittest.TestCase):
 
     def test_bytes(self):
         resp = ESearchResponse(b'tag', True, {b'one': b'2', b'three': b'4'})
-        self.assertEqual(b'* (TAG "tag") UID ONE 2 THREE 4\r\n', bytes(resp))
+        self.assertEqual(b'* ESEARCH (TAG "tag") UID ONE 2 THREE 4\r\n',
+                         bytes(resp))
+
+
+class TestSortResponse(unittest.TestCase):
+
+    def test_bytes(self):
+        resp = SortResponse([5, 3, 4, 1, 2])
+        self.assertEqual(b'* SORT 5 3 4 1 2\r\n', bytes(resp))
+        resp = SortResponse([])
+        self.assertEqual(b'* SORT\r\n', bytes(resp))
+
+
+class TestThreadResponse(unittest.TestCase):
+
+    def test_bytes(self):
+        resp = ThreadResponse([
+            ThreadNode(2, []),
+            ThreadNode(3, [ThreadNode(6, [
+                ThreadNode(4, [ThreadNode(23, [])]),
+                ThreadNode(44, [ThreadNode(7, [ThreadNode(96, [])])])])]),
+            ThreadNode(None, [ThreadNode(5, []), ThreadNode(8, [])])])
+        self.assertEqual(b'* THREAD (2)(3 6 (4 23)(44 7 96))((5)(8))\r\n',
+                         bytes(resp))
+        resp = ThreadResponse([])
+        self.assertEqual(b'* THREAD\r\n', bytes(resp))
+
+
+class TestVanishedResponse(unittest.TestCase):
+
+    def test_bytes(self):
+        resp = VanishedResponse(SequenceSet.build([41, 43, 44, 45], True))
+        self.assertEqual(b'* VANISHED 41,43:45\r\n', bytes(resp))
+        resp = VanishedResponse(SequenceSet.build([41], True), True)
+        self.assertEqual(b'* VANISHED (EARLIER) 41\r\n', bytes(resp))
 
 
 class TestListResponse(unittest.TestCase):
@@ -0,0 +1,60 @@
+
+import unittest
+from datetime import datetime
+
+from pymap.flags import PermanentFlags, SessionFlags
+from pymap.parsing.specials import FetchRequirement, SearchKey, SequenceSet
+from pymap.parsing.specials.flag import Flag, Seen, Recent
+from pymap.search import SearchParams, SearchCriteriaSet, SearchPlan
+from pymap.selected import SelectedMailbox
+
+_Keyword = Flag(b'$Keyword')
+
+
+class TestSearchPlan(unittest.TestCase):
+
+    def setUp(self) -> None:
+        selected = SelectedMailbox('test', False, PermanentFlags([Seen]),
+                                   SessionFlags([_Keyword]))
+        self.params = SearchParams(selected)
+
+    def _plan(self, *keys: SearchKey) -> SearchPlan:
+        return SearchPlan(SearchCriteriaSet(frozenset(keys), self.params))
+
+    def test_cached(self) -> None:
+        plan = self._plan(SearchKey(b'SEQSET', SequenceSet([1])),
+                          SearchKey(b'SINCE', datetime(2000, 1, 1)),
+                          SearchKey(b'ALL'))
+        self.assertEqual(3, len(plan.cached_criteria))
+        self.assertEqual([(FetchRequirement.METADATA, [])], plan.stages())
+
+    def test_flags(self) -> None:
+        plan = self._plan(SearchKey(b'UNSEEN'), SearchKey(b'RECENT'),
+                          SearchKey(b'KEYWORD', _Keyword))
+        self.assertEqual([Seen], [crit.flag for crit in plan.flag_criteria])
+        [(requirement, criteria)] = plan.stages()
+        self.assertEqual(FetchRequirement.METADATA, requirement)
+        self.assertEqual({Seen, Recent, _Keyword},
+                         {crit.flag for crit in criteria})
+        [(_, criteria)] = plan.stages(plan.flag_criteria)
+        self.assertEqual({Recent, _Keyword}, {crit.flag for crit in criteria})
+
+    def test_stages(self) -> None:
+        plan = self._plan(SearchKey(b'TEXT', 'foo'),
+                          SearchKey(b'FROM', 'bar'),
+                          SearchKey(b'SMALLER', 100),
+                          SearchKey(b'SEEN'))
+        self.assertEqual(1, len(plan.size_criteria))
+        self.assertEqual([FetchRequirement.METADATA,
+                          FetchRequirement.HEADERS,
+                          FetchRequirement.BODY],
+                         [requirement for requirement, _ in plan.stages()])
+        self.assertEqual([FetchRequirement.METADATA,
+                          FetchRequirement.HEADERS,
+                          FetchRequirement.BODY],
+                         [requirement for requirement, _
+                          in plan.stages(plan.size_criteria)])
+        self.assertEqual([FetchRequirement.HEADERS,
+                          FetchRequirement.BODY],
+                         [requirement for requirement, _ in plan.stages(
+                             plan.flag_criteria)])
@@ -1,14 +1,18 @@
 
+import asyncio
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 
+from pymap.concurrent import Event
 from pymap.flags import FlagOp, PermanentFlags, SessionFlags
 from pymap.message import BaseMessage
 from pymap.parsing.command.select import SearchCommand, UidSearchCommand
 from pymap.parsing.response import ResponseOk
 from pymap.parsing.specials import SequenceSet
+from pymap.parsing.specials.sequenceset import MaxValue
 from pymap.parsing.specials.flag import Seen, Flagged, Flag
-from pymap.selected import SelectedMailbox
+from pymap.selected import SelectedSet, SelectedMailbox
 
 _Keyword = Flag(b'$Keyword')
 
@@ -39,6 +43,43 @@ class TestSelectedMailbox(unittest.TestCase):
     def uid_command(self) -> SearchCommand:
         return UidSearchCommand(b'.', [], None)
 
+    def test_get_all(self) -> None:
+        selected = self.new_selected()
+        self.set_messages(selected, [],
+                          [(2, []), (4, []), (6, []), (8, []), (10, [])])
+        messages = selected.messages
+        seq_set = SequenceSet([4, (1, 2), MaxValue()])
+        self.assertEqual([(1, 2), (2, 4), (4, 8), (5, 10)],
+                         [(seq, msg.uid) for seq, msg
+                          in messages.get_all(seq_set)])
+        uid_set = SequenceSet([(3, 7), 10, 11], uid=True)
+        self.assertEqual([(2, 4), (3, 6), (5, 10)],
+                         [(seq, msg.uid) for seq, msg
+                          in messages.get_all(uid_set)])
+        uid_set = SequenceSet([(20, MaxValue())], uid=True)
+        self.assertEqual([(5, 10)],
+                         [(seq, msg.uid) for seq, msg
+                          in messages.get_all(uid_set)])
+
+    def test_get_packed(self) -> None:
+        selected = self.new_selected()
+        when1 = datetime(2020, 3, 4, 5, 6, 7, 890)
+        when2 = datetime(1960, 1, 2, 3, 4, 5,
+                         tzinfo=timezone(timedelta(hours=-5)))
+        selected.add_updates([BaseMessage(1, [Seen], when1),
+                              BaseMessage(2, [Flagged, Seen], when2)], [])
+        msg1 = selected.messages.get(1)
+        msg2 = selected.messages.get(2)
+        self.assertIsNotNone(msg1)
+        self.assertIsNotNone(msg2)
+        self.assertEqual(frozenset([Seen]), msg1.permanent_flags)
+        self.assertEqual(when1, msg1.internal_date)
+        self.assertIsNone(msg1.internal_date.tzinfo)
+        self.assertEqual((2, frozenset([Flagged, Seen])), msg2.flags_key)
+        self.assertEqual(when2, msg2.internal_date)
+        self.assertEqual(when2.tzinfo, msg2.internal_date.tzinfo)
+        self.assertIsNone(selected.messages.get(3))
+
     def test_add_untagged_recent_equal(self) -> None:
         selected = self.new_selected()
         selected.session_flags.add_recent(1)
@@ -187,6 +228,47 @@ class TestSelectedMailbox(unittest.TestCase):
                          b'* 3 FETCH (FLAGS ())\r\n'
                          b'. OK testing\r\n', bytes(self.response))
 
+    def test_add_untagged_expunge_added(self) -> None:
+        selected = self.new_selected()
+        self.set_messages(selected, [],
+                          [(1, []), (3, []), (5, []), (7, [])])
+        forked, _ = selected.fork(self.command)
+        self.set_messages(forked, [],
+                          [(2, []), (4, []), (8, [])])
+        self.set_messages(forked, [3, 4, 7], [])
+        _, untagged = forked.fork(self.command)
+        self.response.add_untagged(*untagged)
+        self.assertEqual(b'* 4 EXPUNGE\r\n'
+                         b'* 2 EXPUNGE\r\n'
+                         b'* 4 EXISTS\r\n'
+                         b'* 2 FETCH (FLAGS ())\r\n'
+                         b'* 4 FETCH (FLAGS ())\r\n'
+                         b'. OK testing\r\n', bytes(self.response))
+
+    def test_add_untagged_fetch_reverted(self) -> None:
+        selected = self.new_selected()
+        self.set_messages(selected, [],
+                          [(1, []), (2, [Seen])])
+        forked, _ = selected.fork(self.command)
+        self.set_messages(forked, [],
+                          [(1, [Seen]), (2, [])])
+        self.set_messages(forked, [],
+                          [(1, [])])
+        _, untagged = forked.fork(self.command)
+        self.response.add_untagged(*untagged)
+        self.assertEqual(b'* 2 FETCH (FLAGS ())\r\n'
+                         b'. OK testing\r\n', bytes(self.response))
+
+    def test_fork_changes_reset(self) -> None:
+        selected = self.new_selected()
+        self.set_messages(selected, [],
+                          [(1, []), (2, [])])
+        forked, _ = selected.fork(self.command)
+        self.set_messages(forked, [1], [(2, [Seen]), (3, [])])
+        forked, _ = forked.fork(self.command)
+        _, untagged = forked.fork(self.command)
+        self.assertEqual([], list(untagged))
+
     def test_add_untagged_all(self) -> None:
         selected = self.new_selected()
         self.set_messages(selected, [],
@@ -234,3 +316,100 @@ class TestSelectedMailbox(unittest.TestCase):
         self.response.add_untagged(*untagged)
         self.assertEqual(b'* BYE [UIDVALIDITY 456] UID validity changed.\r\n'
                          b'. OK testing\r\n', bytes(self.response))
+
+
+class TestSelectedSet(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.selected_set = SelectedSet()
+        self.messages = {1: BaseMessage(1, [], datetime.now())}
+        self.mod_sequence = 1
+        self.refreshed = 0
+
+    async def refresh(self, selected: SelectedMailbox) -> SelectedMailbox:
+        self.refreshed += 1
+        selected.uid_validity = 123
+        selected.mod_sequence = self.mod_sequence
+        selected.add_updates(self.messages.values(), [])
+        return selected
+
+    async def new_selected(self) -> SelectedMailbox:
+        selected = SelectedMailbox('test', False, PermanentFlags([Seen]),
+                                   SessionFlags([]),
+                                   selected_set=self.selected_set)
+        return await self.refresh(selected)
+
+    async def _test_wait_updates(self) -> None:
+        done = Event.for_asyncio()
+        command = SearchCommand(b'.', [], None)
+        selected = [(await self.new_selected()).fork(command)[0]
+                    for _ in range(3)]
+        self.refreshed = 0
+        waits = [asyncio.create_task(self.selected_set.wait_updates(
+            sel, done, self.refresh)) for sel in selected]
+        await asyncio.sleep(0)
+        self.assertEqual(0, self.refreshed)
+        self.messages[2] = BaseMessage(2, [Seen], datetime.now())
+        self.mod_sequence = 2
+        self.selected_set.notify()
+        for sel in await asyncio.gather(*waits):
+            _, untagged = sel.fork(command)
+            self.assertEqual([b'* 2 EXISTS\r\n',
+                              b'* 2 FETCH (FLAGS (\\Seen))\r\n'],
+                             [bytes(resp) for resp in untagged])
+        self.assertEqual(1, self.refreshed)
+
+    def test_wait_updates(self) -> None:
+        asyncio.run(self._test_wait_updates())
+
+    async def _test_wait_updates_repeated(self) -> None:
+        done = Event.for_asyncio()
+        command = SearchCommand(b'.', [], None)
+        selected, _ = (await self.new_selected()).fork(command)
+        loaded: List[Optional[int]] = []
+
+        async def refresh(selected: SelectedMailbox) -> SelectedMailbox:
+            loaded.append(selected.mod_sequence)
+            return await self.refresh(selected)
+
+        for uid in range(2, 5):
+            wait = asyncio.create_task(self.selected_set.wait_updates(
+                selected, done, refresh))
+            await asyncio.sleep(0)
+            self.messages[uid] = BaseMessage(uid, [Seen], datetime.now())
+            self.mod_sequence = uid
+            self.selected_set.notify()
+            selected, untagged = (await wait).fork(command)
+            self.assertEqual(b'* %i EXISTS\r\n' % uid, bytes(untagged[0]))
+        self.assertEqual([1, 2, 3], loaded)
+
+    def test_wait_updates_repeated(self) -> None:
+        asyncio.run(self._test_wait_updates_repeated())
+
+    def _new_unrefreshed(self) -> SelectedMailbox:
+        return SelectedMailbox('test', False, PermanentFlags([Seen]),
+                               SessionFlags([]),
+                               selected_set=self.selected_set)
+
+    def test_shared_base(self) -> None:
+        command = SearchCommand(b'.', [], None)
+        self.messages[2] = BaseMessage(2, [Seen], datetime.now())
+        first = asyncio.run(self.new_selected())
+        self.assertEqual(0, self._new_unrefreshed().messages.exists)
+        first, _ = first.fork(command)
+        second = self._new_unrefreshed()
+        self.assertEqual(123, second.uid_validity)
+        self.assertEqual(1, second.mod_sequence)
+        self.assertEqual([1, 2], [msg.uid for _, msg in
+                                  second.messages.get_all(SequenceSet.all())])
+        second.uid_validity = 123
+        second.add_updates([BaseMessage(2, [], datetime.now())], [1])
+        self.assertEqual(2, first.messages.exists)
+        self.assertEqual(frozenset({Seen}),
+                         first.messages.get(2).permanent_flags)
+        self.assertEqual(frozenset(),
+                         second.messages.get(2).permanent_flags)
+        third = self._new_unrefreshed()
+        third.uid_validity = 456
+        self.assertEqual(0, third.messages.exists)
+        self.assertIsNone(third.mod_sequence)
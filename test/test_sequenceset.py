@@ -1,6 +1,7 @@
 
 import unittest
 
+from pymap.parsing import Params
 from pymap.parsing.specials.sequenceset import MaxValue, SequenceSet
 
 
@@ -57,6 +58,18 @@ class TestSequenceSet(unittest.TestCase):
         set11 = SequenceSet([(1000, 1000)])
         self.assertEqual([], list(set11.flatten(100)))
 
+    def test_ranges(self) -> None:
+        set1 = SequenceSet([12, (5, 10), 11, (MaxValue(), 95)])
+        self.assertEqual([(5, 12), (95, 100)], set1.ranges(100))
+        set2 = SequenceSet([(3, 5), (4, 6), 1])
+        self.assertEqual([(1, 1), (3, 6)], set2.ranges(100))
+        set3 = SequenceSet([(1000, 1000), (20, 10)])
+        self.assertEqual([(10, 20)], set3.ranges(100))
+        set4 = SequenceSet([(1000, MaxValue())])
+        self.assertEqual([(100, 100)], set4.ranges(100))
+        self.assertEqual([(1, 100)], SequenceSet.all().ranges(100))
+        self.assertEqual([], SequenceSet.all().ranges(0))
+
     def test_bytes(self) -> None:
         seq = SequenceSet([12, MaxValue(), (1, MaxValue())])
         self.assertEqual(b'12,*,1:*', bytes(seq))
@@ -76,3 +89,16 @@ class TestSequenceSet(unittest.TestCase):
         seq = SequenceSet.build([1, 3, 5])
         self.assertEqual(b'1,3,5', bytes(seq))
         seq = SequenceSet.build([1, 2, 3, 4, 5])
+        seq = SequenceSet.build([])
+        self.assertEqual(b'', bytes(seq))
+        self.assertEqual([], seq.ranges(100))
+        self.assertFalse(seq.is_all)
+
+    def test_saved(self) -> None:
+        seq, buf = SequenceSet.parse(memoryview(b'$ '), Params(uid=True))
+        self.assertTrue(seq.is_saved)
+        self.assertTrue(seq.uid)
+        self.assertFalse(seq.is_all)
+        self.assertEqual(b'$', bytes(seq))
+        self.assertEqual(b' ', bytes(buf))
+        self.assertFalse(SequenceSet([1]).is_saved)
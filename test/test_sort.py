@@ -0,0 +1,142 @@
+
+import unittest
+from datetime import datetime, timezone
+
+from pymap.message import BaseMessage
+from pymap.parsing.response.specials import ThreadResponse
+from pymap.sort import base_subject, sort_messages, thread_messages, \
+    SortKeys, SortCache
+
+_when = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def _keys(msg_id, subject, day, *headers):
+    data = b'Subject: %b\r\nDate: %i Jan 2020 00:00:00 +0000\r\n' \
+        % (subject, day)
+    data += b''.join(header + b'\r\n' for header in headers) + b'\r\n'
+    msg = BaseMessage.parse(msg_id, data, [], _when)
+    return msg_id, SortKeys.build(msg)
+
+
+class TestBaseSubject(unittest.TestCase):
+
+    def test_base_subject(self):
+        self.assertEqual('HELLO', base_subject('hello'))
+        self.assertEqual('HELLO', base_subject('Re: hello'))
+        self.assertEqual('HELLO', base_subject('RE: [list] Fwd: hello (fwd)'))
+        self.assertEqual('HELLO', base_subject('[fwd: Re: hello]'))
+        self.assertEqual('HELLO WORLD', base_subject('Fw:Re:  hello \t world'))
+        self.assertEqual('FOO', base_subject('[PATCH] foo'))
+        self.assertEqual('[PATCH]', base_subject('[PATCH]'))
+        self.assertEqual('REPLY: X', base_subject('Reply: x'))
+
+
+class TestSortKeys(unittest.TestCase):
+
+    def test_build(self):
+        _, keys = _keys(1, b'Re: test', 2,
+                        b'From: Bob <bob@example.com>',
+                        b'To: alice@example.com, carol@example.com',
+                        b'Message-Id: <one@example.com>',
+                        b'References: <a@example.com>\r\n <b@example.com>')
+        self.assertEqual(_when.timestamp(), keys.arrival)
+        self.assertEqual(datetime(2020, 1, 2, tzinfo=timezone.utc)
+                         .timestamp(), keys.date)
+        self.assertEqual('TEST', keys.subject)
+        self.assertTrue(keys.is_reply)
+        self.assertEqual('BOB', keys.from_)
+        self.assertEqual('ALICE', keys.to)
+        self.assertEqual('', keys.cc)
+        self.assertEqual('<one@example.com>', keys.message_id)
+        self.assertEqual(('<a@example.com>', '<b@example.com>'),
+                         keys.references)
+
+    def test_build_in_reply_to(self):
+        _, keys = _keys(1, b'test', 2, b'In-Reply-To: <a@example.com>')
+        self.assertEqual(('<a@example.com>', ), keys.references)
+        self.assertIsNone(keys.message_id)
+
+
+class TestSortCache(unittest.TestCase):
+
+    def test_cache(self):
+        cache = SortCache()
+        cache.check(1)
+        cache.add([_keys(1, b'one', 1), _keys(2, b'two', 2)])
+        self.assertEqual([3], cache.missing([1, 2, 3]))
+        self.assertEqual('ONE', cache.get(1).subject)
+        cache.remove([1])
+        self.assertEqual([1], cache.missing([1, 2]))
+        cache.check(1)
+        self.assertEqual([], cache.missing([2]))
+        cache.check(2)
+        self.assertEqual([2], cache.missing([2]))
+
+
+class TestSortMessages(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.messages = [_keys(1, b'b', 3), _keys(2, b'a', 2),
+                         _keys(3, b'Re: b', 1), _keys(4, b'a', 4)]
+
+    def test_sort(self):
+        self.assertEqual([3, 2, 1, 4],
+                         sort_messages(self.messages, [(b'DATE', False)]))
+        self.assertEqual([2, 4, 1, 3],
+                         sort_messages(self.messages, [(b'SUBJECT', False)]))
+
+    def test_sort_reverse(self):
+        self.assertEqual([1, 3, 2, 4],
+                         sort_messages(self.messages, [(b'SUBJECT', True)]))
+        self.assertEqual([4, 2, 1, 3],
+                         sort_messages(self.messages, [(b'SUBJECT', False),
+                                                       (b'DATE', True)]))
+
+
+class TestThreadMessages(unittest.TestCase):
+
+    def _thread(self, messages, algorithm):
+        threads = thread_messages(messages, algorithm)
+        return bytes(ThreadResponse(threads))
+
+    def test_orderedsubject(self):
+        messages = [_keys(1, b'b', 3), _keys(2, b'a', 2),
+                    _keys(3, b'Re: b', 1), _keys(4, b'a', 4),
+                    _keys(5, b'a', 5)]
+        self.assertEqual(b'* THREAD (3 1)(2 (4)(5))\r\n',
+                         self._thread(messages, b'ORDEREDSUBJECT'))
+
+    def test_references(self):
+        messages = [
+            _keys(1, b'Topic', 1, b'Message-Id: <a>'),
+            _keys(2, b'Re: Topic', 2, b'Message-Id: <b>',
+                  b'References: <a>'),
+            _keys(3, b'Re: Topic', 3, b'Message-Id: <c>',
+                  b'References: <a> <b>'),
+            _keys(4, b'Re: Topic', 4, b'Message-Id: <d>',
+                  b'In-Reply-To: <a>'),
+            _keys(5, b'Other', 5, b'Message-Id: <e>',
+                  b'References: <missing>'),
+            _keys(6, b'Re: Other', 6, b'Message-Id: <f>',
+                  b'References: <missing>'),
+            _keys(7, b'Re: Topic', 7, b'Message-Id: <g>')]
+        self.assertEqual(b'* THREAD (1 (2 3)(4)(7))((5)(6))\r\n',
+                         self._thread(messages, b'REFERENCES'))
+
+    def test_references_loop(self):
+        messages = [
+            _keys(1, b'one', 1, b'Message-Id: <a>', b'References: <b>'),
+            _keys(2, b'two', 2, b'Message-Id: <b>', b'References: <a>'),
+            _keys(3, b'three', 3, b'Message-Id: <a>')]
+        self.assertEqual(b'* THREAD (2 1)(3)\r\n',
+                         self._thread(messages, b'REFERENCES'))
+
+    def test_references_long_chain(self):
+        messages = [_keys(1, b'chain', 1, b'Message-Id: <1>')]
+        for i in range(2, 3001):
+            messages.append(_keys(i, b'Re: chain', 1,
+                                  b'Message-Id: <%i>' % i,
+                                  b'References: <%i>' % (i - 1)))
+        threads = thread_messages(messages, b'REFERENCES')
+        self.assertEqual(1, len(threads))
+        self.assertEqual(1, threads[0].msg_id)
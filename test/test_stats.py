@@ -0,0 +1,54 @@
+
+import unittest
+
+from pymap.stats import Histogram, Stats
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_observe(self) -> None:
+        histogram = Histogram([0.1, 1.0])
+        histogram.observe(0.05)
+        histogram.observe(0.1)
+        histogram.observe(0.5)
+        histogram.observe(2.0)
+        self.assertEqual(4, histogram.count)
+        self.assertAlmostEqual(2.65, histogram.sum)
+        self.assertEqual([(0.1, 2), (1.0, 3), (float('inf'), 4)],
+                         list(histogram.cumulative()))
+
+
+class TestStats(unittest.TestCase):
+
+    def test_command(self) -> None:
+        stats = Stats('test')
+        stats.command(b'NOOP').bytes_in += 10
+        stats.command(b'NOOP').bytes_in += 5
+        self.assertEqual([b'NOOP'], list(stats.commands))
+        self.assertEqual(15, stats.commands[b'NOOP'].bytes_in)
+
+    def test_render(self) -> None:
+        stats = Stats('test')
+        cmd_stats = stats.command(b'UID FETCH')
+        cmd_stats.latency.observe(0.003)
+        cmd_stats.bytes_in = 20
+        cmd_stats.bytes_out = 300
+        cmd_stats.messages = 4
+        cmd_stats.backend_calls['fetch_messages'] += 1
+        lines = stats.render().decode('utf-8').splitlines()
+        labels = 'backend="test",command="UID FETCH"'
+        self.assertIn('pymap_command_latency_seconds_bucket'
+                      '{%s,le="0.0025"} 0' % labels, lines)
+        self.assertIn('pymap_command_latency_seconds_bucket'
+                      '{%s,le="0.005"} 1' % labels, lines)
+        self.assertIn('pymap_command_latency_seconds_bucket'
+                      '{%s,le="+Inf"} 1' % labels, lines)
+        self.assertIn('pymap_command_latency_seconds_count{%s} 1' % labels,
+                      lines)
+        self.assertIn('pymap_command_received_bytes_total{%s} 20' % labels,
+                      lines)
+        self.assertIn('pymap_command_sent_bytes_total{%s} 300' % labels,
+                      lines)
+        self.assertIn('pymap_command_messages_total{%s} 4' % labels, lines)
+        self.assertIn('pymap_backend_calls_total'
+                      '{%s,method="fetch_messages"} 1' % labels, lines)
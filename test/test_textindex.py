@@ -0,0 +1,79 @@
+
+import unittest
+from datetime import datetime
+from tempfile import TemporaryDirectory
+
+from pymap.backend.maildir.textindex import MaildirTextIndex
+from pymap.message import BaseMessage
+from pymap.textindex import message_terms, value_terms, TextIndex
+
+_MESSAGE = b'From: Bob <bob@example.com>\r\n' \
+    b'Subject: =?utf-8?q?Caf=C3=A9_invoice?=\r\n' \
+    b'Content-Type: multipart/mixed; boundary="x"\r\n\r\n' \
+    b'--x\r\nContent-Type: text/plain\r\n\r\nPlease PAY soon.\r\n' \
+    b'--x\r\nContent-Type: application/octet-stream\r\n\r\nbinary\r\n' \
+    b'--x--\r\n'
+
+
+class TestTextIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        msg = BaseMessage.parse(1, _MESSAGE, [], datetime.now())
+        self.terms = message_terms(msg)
+        self.index = TextIndex()
+        self.index.add([(1, self.terms), (2, value_terms(b'other'))])
+
+    def test_message_terms(self) -> None:
+        self.assertLessEqual(value_terms(b'bob@example'), self.terms)
+        self.assertLessEqual(value_terms(b'please pay'), self.terms)
+        self.assertLessEqual(value_terms('Café'.encode('utf-8')), self.terms)
+        self.assertLessEqual(value_terms(b'octet-stream'), self.terms)
+        self.assertFalse(value_terms(b'binary') <= self.terms)
+
+    def test_find(self) -> None:
+        self.assertEqual({1}, self.index.find([1, 2], b'INVOICE'))
+        self.assertEqual({2}, self.index.find([1, 2], b'other'))
+        self.assertEqual(set(), self.index.find([1, 2], b'missing'))
+        self.assertEqual({1, 2}, self.index.find([1, 2], b'ot'))
+
+    def test_find_unindexed(self) -> None:
+        self.assertEqual({3}, self.index.find([1, 2, 3], b'missing'))
+
+    def test_remove(self) -> None:
+        self.index.remove([1])
+        self.assertEqual(set(), self.index.find([2], b'invoice'))
+        self.assertEqual({1}, self.index.find([1], b'invoice'))
+        with self.assertRaises(KeyError):
+            self.index.get(1)
+
+
+class TestMaildirTextIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.index = MaildirTextIndex(self.tmp_dir.name)
+        self.index.reset(1)
+        self.index.add([(1, value_terms(b'invoice')),
+                        (2, value_terms(b'other'))])
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_find(self) -> None:
+        self.assertEqual({1, 3}, self.index.find([1, 2, 3], b'INVOICE'))
+        self.assertEqual({2, 3}, self.index.find([1, 2, 3], b'other'))
+        self.assertEqual({1, 2}, self.index.find([1, 2], b'ot'))
+
+    def test_get(self) -> None:
+        self.assertEqual({1: value_terms(b'invoice')},
+                         self.index.get([1, 3]))
+
+    def test_remove(self) -> None:
+        self.index.remove([1])
+        self.assertEqual({1}, self.index.find([1, 2], b'invoice'))
+
+    def test_reset(self) -> None:
+        self.index.reset(1)
+        self.assertEqual(set(), self.index.find([1, 2], b'missing'))
+        self.index.reset(2)
+        self.assertEqual({1, 2}, self.index.find([1, 2], b'missing'))
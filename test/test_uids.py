@@ -0,0 +1,108 @@
+import random
+import unittest
+from bisect import bisect_left, bisect_right
+
+from pymap.uids import SortedUids
+
+
+class _SmallSortedUids(SortedUids):
+    block_size = 4
+
+
+class TestSortedUids(unittest.TestCase):
+
+    def test_empty(self) -> None:
+        uids = SortedUids()
+        self.assertEqual(0, len(uids))
+        self.assertEqual([], list(uids))
+        self.assertNotIn(1, uids)
+        self.assertFalse(uids.discard(1))
+        self.assertEqual(0, uids.bisect_left(1))
+        self.assertEqual([], list(uids.iter_from(0)))
+        with self.assertRaises(IndexError):
+            uids[-1]
+        with self.assertRaises(ValueError):
+            uids.index(1)
+
+    def test_add_discard(self) -> None:
+        uids = _SmallSortedUids([5, 3, 9])
+        self.assertTrue(uids.add(7))
+        self.assertFalse(uids.add(7))
+        self.assertTrue(uids.add(1))
+        self.assertEqual([1, 3, 5, 7, 9], list(uids))
+        self.assertTrue(uids.discard(5))
+        self.assertFalse(uids.discard(5))
+        self.assertEqual([1, 3, 7, 9], list(uids))
+        self.assertEqual(2, uids.index(7))
+        self.assertEqual(9, uids[-1])
+        self.assertEqual([3, 7], uids[1:3])
+        self.assertEqual([3, 7], list(uids.iter_from(1, 3)))
+        self.assertEqual([9, 7, 3, 1], list(reversed(uids)))
+
+    def test_random(self) -> None:
+        rand = random.Random(1234)
+        uids = _SmallSortedUids(rand.sample(range(1, 200), 50))
+        expected = sorted(uids)
+        for _ in range(2000):
+            uid = rand.randint(1, 220)
+            if rand.random() < 0.5:
+                self.assertEqual(uid not in expected, uids.add(uid))
+                if uid not in expected:
+                    expected.insert(bisect_left(expected, uid), uid)
+            else:
+                self.assertEqual(uid in expected, uids.discard(uid))
+                if uid in expected:
+                    expected.remove(uid)
+            self.assertEqual(len(expected), len(uids))
+        self.assertEqual(expected, list(uids))
+        for idx, uid in enumerate(expected):
+            self.assertEqual(uid, uids[idx])
+            self.assertEqual(idx, uids.index(uid))
+        for uid in range(0, 230):
+            self.assertEqual(bisect_left(expected, uid),
+                             uids.bisect_left(uid))
+            self.assertEqual(bisect_right(expected, uid),
+                             uids.bisect_right(uid))
+        for start in range(0, len(expected) + 2, 3):
+            self.assertEqual(expected[start:start + 10],
+                             list(uids.iter_from(start, start + 10)))
+
+    def test_columns(self) -> None:
+        uids = _SmallColumnUids()
+        uids.extend([(3, 30, -3), (5, 50, -5), (9, 90, -9)])
+        self.assertTrue(uids.add(4, 40, -4))
+        self.assertFalse(uids.add(5, 55, -55))
+        uids.extend([(n, n * 10, -n) for n in range(10, 20)])
+        uids.extend([(1, 10, -1)])
+        self.assertEqual((55, -55), uids.get_values(5))
+        self.assertIsNone(uids.get_values(6))
+        self.assertTrue(uids.discard(3))
+        self.assertEqual([(1, 10, -1), (4, 40, -4), (5, 55, -55)],
+                         list(uids.iter_rows(0, 3)))
+        self.assertEqual([(n, n * 10, -n) for n in range(10, 20)],
+                         list(uids.iter_rows(4)))
+        self.assertEqual(14, len(uids))
+
+    def test_copy(self) -> None:
+        uids = _SmallColumnUids()
+        uids.extend([(n, n * 10, -n) for n in range(1, 21)])
+        copy = uids.copy()
+        self.assertTrue(copy.add(25, 250, -25))
+        self.assertTrue(copy.discard(2))
+        self.assertFalse(copy.add(7, 77, -77))
+        self.assertTrue(uids.discard(19))
+        self.assertFalse(uids.add(8, 88, -88))
+        self.assertEqual([(n, n * 10, -n) for n in range(1, 21)
+                          if n not in (8, 19)],
+                         [row for row in uids.iter_rows() if row[0] != 8])
+        self.assertEqual((88, -88), uids.get_values(8))
+        self.assertEqual((70, -7), uids.get_values(7))
+        self.assertEqual((77, -77), copy.get_values(7))
+        self.assertEqual((80, -8), copy.get_values(8))
+        self.assertEqual([1] + list(range(3, 21)) + [25], list(copy))
+        self.assertEqual(19, len(uids))
+
+
+class _SmallColumnUids(SortedUids):
+    block_size = 4
+    columns = ('I', 'q')
@@ -0,0 +1,73 @@
+import unittest
+from socket import socketpair, AF_UNIX, SOCK_DGRAM
+from unittest.mock import patch
+
+from pymap.context import updates_relay
+from pymap.selected import SelectedSet
+from pymap.workers import UpdatesRelay, Supervisor, _Worker, \
+    RESTART_DELAY, MAX_RESTART_DELAY
+
+
+class TestUpdatesRelay(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.sock, self.other = socketpair(AF_UNIX, SOCK_DGRAM)
+        self.relay = UpdatesRelay(self.sock)
+
+    def tearDown(self) -> None:
+        self.sock.close()
+        self.other.close()
+
+    def test_for_key(self) -> None:
+        selected_set = SelectedSet.for_key(b'test1')
+        self.assertIs(selected_set, SelectedSet.for_key(b'test1'))
+        self.assertIsNot(selected_set, SelectedSet.for_key(b'test2'))
+
+    def test_notify(self) -> None:
+        selected_set = SelectedSet.for_key(b'test1')
+        token = updates_relay.set(self.relay)
+        try:
+            selected_set.notify()
+        finally:
+            updates_relay.reset(token)
+        self.assertTrue(selected_set.updated.is_set())
+        self.assertEqual(b'test1', self.other.recv(4096))
+
+    def test_receive(self) -> None:
+        selected_set = SelectedSet.for_key(b'test1')
+        self.sock.setblocking(False)
+        self.other.send(b'test2')
+        self.other.send(b'test1')
+        self.relay._receive()
+        self.assertTrue(selected_set.updated.is_set())
+
+
+class TestSupervisor(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.supervisor = Supervisor(1, lambda index, relay: None)
+        self.sock, self.other = socketpair(AF_UNIX, SOCK_DGRAM)
+
+    def tearDown(self) -> None:
+        self.supervisor._close_parent()
+        self.sock.close()
+        self.other.close()
+
+    def test_restart_delay(self) -> None:
+        with patch('time.monotonic', return_value=100.0):
+            worker = _Worker(0, 123, self.sock)
+            delays = [self.supervisor._restart_delay(worker)
+                      for _ in range(10)]
+        self.assertEqual(RESTART_DELAY, delays[0])
+        self.assertEqual(RESTART_DELAY * 2, delays[1])
+        self.assertEqual(RESTART_DELAY * 4, delays[2])
+        self.assertEqual(MAX_RESTART_DELAY, delays[-1])
+
+    def test_restart_delay_reset(self) -> None:
+        with patch('time.monotonic', return_value=100.0):
+            worker = _Worker(0, 123, self.sock)
+            self.supervisor._restart_delay(worker)
+            self.supervisor._restart_delay(worker)
+        with patch('time.monotonic', return_value=100.0 + MAX_RESTART_DELAY):
+            self.assertEqual(RESTART_DELAY,
+                             self.supervisor._restart_delay(worker))